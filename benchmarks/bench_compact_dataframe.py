@@ -0,0 +1,65 @@
+"""
+Compara a memória do DataFrame de `listar_saida_de_produtos` montado com
+`list_dicts_to_dataframe` (colunas object/int64) e com o schema compacto de
+`BaseService.compact_dataframe` (categorias, inteiros reduzidos, datetime64).
+
+Uso: python benchmarks/bench_compact_dataframe.py [itens]   (padrão: 20000, 12 meses cada)
+"""
+import random
+import sys
+
+from utils import formatar_bytes, medir, setup_django
+
+setup_django()
+
+from core.services.base_service import BaseService  # noqa: E402
+
+SCHEMA = {
+    "ItemName": "category",
+    "CardCode": "category",
+    "CardName": "category",
+    "AnoMes": "datetime",
+    "Total": "integer",
+}
+
+
+def gerar_linhas(itens: int) -> list[dict]:
+    random.seed(42)
+    clientes = [(f"C{i:05d}", f"Cliente {i}") for i in range(300)]
+    linhas = []
+    for indice in range(itens):
+        card_code, card_name = random.choice(clientes)
+        for mes in range(1, 13):
+            linhas.append({
+                "ItemCode": f"PA{indice:06d}",
+                "ItemName": f"Produto acabado {indice}",
+                "CardCode": card_code,
+                "CardName": card_name,
+                "AnoMes": f"2025-{mes:02d}",
+                "Total": random.randint(0, 5_000),
+            })
+    return linhas
+
+
+def main() -> None:
+    itens = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    linhas = gerar_linhas(itens)
+    service = BaseService()
+
+    caminhos = {
+        "list_dicts_to_dataframe": lambda: service.list_dicts_to_dataframe(linhas),
+        "com schema compacto": lambda: service.list_dicts_to_dataframe(linhas, schema=SCHEMA),
+    }
+
+    print(f"{len(linhas)} linhas")
+    for nome, caminho in caminhos.items():
+        tempo, pico, frame = medir(caminho)
+        memoria_frame = frame.memory_usage(deep=True).sum()
+        print(
+            f"{nome:<24} tempo={tempo:.3f}s  pico={formatar_bytes(pico):>10}  "
+            f"DataFrame={formatar_bytes(memoria_frame):>10}"
+        )
+
+
+if __name__ == '__main__':
+    main()
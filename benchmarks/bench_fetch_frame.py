@@ -0,0 +1,64 @@
+"""
+Compara `fetch_all` + `list_dicts_to_dataframe` com `fetch_frame`.
+
+Uso: python benchmarks/bench_fetch_frame.py [linhas]
+"""
+import random
+import sys
+from decimal import Decimal
+
+from utils import FakeConnection, formatar_bytes, medir, setup_django
+
+setup_django()
+
+from core.services.base_service import BaseService  # noqa: E402
+from core.services.sqlserver_cliente import SQLServerCliente  # noqa: E402
+from core.services.sqlserver_config import SQLServerConfig  # noqa: E402
+
+
+def gerar_linhas(quantidade: int) -> list[tuple]:
+    random.seed(42)
+    transportadoras = [(f"F{i:05d}", f"Transportadora {i}") for i in range(500)]
+    linhas = []
+    for _ in range(quantidade):
+        card_code, card_name = random.choice(transportadoras)
+        linhas.append((
+            card_code,
+            card_name,
+            random.randint(1, 500),
+            random.randint(1, 12),
+            random.choice((2024, 2025)),
+            Decimal(random.randint(100, 10_000_000)) / 100,
+        ))
+    return linhas
+
+
+def main() -> None:
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    description = [
+        ('CardCode', str), ('CardName', str), ('Total', int),
+        ('Mes', int), ('Ano', int), ('Valor', Decimal),
+    ]
+    conexao = FakeConnection(description, gerar_linhas(quantidade))
+
+    cliente = SQLServerCliente(SQLServerConfig())
+    cliente.connect = lambda: conexao
+    service = BaseService()
+
+    caminhos = {
+        "fetch_all + DataFrame": lambda: service.list_dicts_to_dataframe(cliente.fetch_all("SELECT")),
+        "fetch_frame": lambda: cliente.fetch_frame("SELECT"),
+    }
+
+    print(f"{quantidade} linhas")
+    for nome, caminho in caminhos.items():
+        tempo, pico, frame = medir(caminho)
+        memoria_frame = frame.memory_usage(deep=True).sum()
+        print(
+            f"{nome:<24} tempo={tempo:.3f}s  pico={formatar_bytes(pico):>10}  "
+            f"DataFrame={formatar_bytes(memoria_frame):>10}"
+        )
+
+
+if __name__ == '__main__':
+    main()
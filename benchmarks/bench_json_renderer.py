@@ -0,0 +1,81 @@
+"""
+Compara o renderer JSON padrão do Ninja (json.dumps + NinjaJSONEncoder) com o
+`ORJSONRenderer` da API na resposta da rentabilidade de itens (colunas
+DECIMAL(19, 2) do SQL Server, que chegam como Decimal) e no ranking de
+transportadoras em formato colunar (inteiros do numpy/pandas), e confere que os
+documentos gerados são iguais.
+
+Uso: python benchmarks/bench_json_renderer.py [linhas]
+"""
+import json
+import random
+import sys
+from decimal import Decimal
+
+from utils import formatar_bytes, medir, setup_django
+
+setup_django()
+
+from ninja.renderers import JSONRenderer  # noqa: E402
+
+from core.api.renderers import ORJSONRenderer  # noqa: E402
+
+
+def gerar_rentabilidade(quantidade: int) -> dict:
+    random.seed(42)
+    itens = []
+    for indice in range(quantidade):
+        faturamento = Decimal(random.randint(100, 10_000_000)) / 100
+        itens.append({
+            "ItemCode": f"I{indice:06d}",
+            "ItemName": f"Item {indice}",
+            "TipoDoNegocio": random.choice(("B2B", "B2C", "Distribuição")),
+            "Quantidade": Decimal(random.randint(1, 5_000)),
+            "PrecoMinimoUnitario": Decimal(random.randint(100, 100_000)) / 100,
+            "FaturamentoPorItem": faturamento,
+            "Rentabilidade": Decimal(random.randint(-5_000, 20_000)) / 100,
+        })
+    return {"itens": itens, "total": quantidade, "offset": 0, "fetch_next": None}
+
+
+def gerar_ranking_colunar(quantidade: int) -> dict:
+    import numpy as np
+
+    rng = np.random.default_rng(42)
+    transportadoras = max(quantidade // 24, 1)
+    return {
+        "schema": [{"name": "CardCode", "type": "string"}] + [
+            {"name": f"M{mes}", "type": "integer"} for mes in range(24)
+        ],
+        "length": transportadoras,
+        "columns": [[f"F{i:05d}" for i in range(transportadoras)]] + [
+            rng.integers(0, 500, transportadoras) for _ in range(24)
+        ],
+    }
+
+
+def main() -> None:
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    renderers = {"Ninja (json)": JSONRenderer(), "ORJSONRenderer": ORJSONRenderer()}
+
+    for nome_resposta, dados in (
+        ("rentabilidade de itens", gerar_rentabilidade(quantidade)),
+        ("ranking colunar", gerar_ranking_colunar(quantidade)),
+    ):
+        print(f"{nome_resposta} ({quantidade} valores por coluna/linhas)")
+        documentos = {}
+        for nome, renderer in renderers.items():
+            try:
+                tempo, pico, corpo = medir(lambda: renderer.render(None, dados, response_status=200))
+            except TypeError as erro:
+                print(f"  {nome:<16} não serializa: {erro}")
+                continue
+            documentos[nome] = json.loads(corpo)
+            print(f"  {nome:<16} tempo={tempo:.3f}s  pico={formatar_bytes(pico):>10}  corpo={formatar_bytes(len(corpo)):>10}")
+        if len(documentos) == 2:
+            assert documentos["Ninja (json)"] == documentos["ORJSONRenderer"]
+            print("  documentos idênticos")
+
+
+if __name__ == '__main__':
+    main()
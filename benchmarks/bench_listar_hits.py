@@ -0,0 +1,178 @@
+"""
+Compara a query anterior de `EstoqueRepository.listar_hits` (subquery correlacionada
+em OINV/INV1 por item) com a atual (meses com venda pré-agregados por item e unidos
+com LEFT JOIN), executando as duas sobre uma base sintética em SQLite.
+
+O texto T-SQL é traduzido para o dialeto do SQLite (DECLARE/CONVERT/ISNULL), então os
+tempos absolutos não representam o SQL Server; a comparação mostra o custo relativo dos
+dois formatos e confere que os resultados são idênticos.
+
+Uso: python benchmarks/bench_listar_hits.py [itens] [--sem-indice]
+
+Com `--sem-indice` a base não tem índice em INV1.ItemCode, caso em que a subquery
+correlacionada vira uma varredura de INV1 por item.
+"""
+import random
+import re
+import sqlite3
+import sys
+from datetime import timedelta
+
+from utils import medir, setup_django
+
+setup_django()
+
+from core.helpers.date_helper import DateHelper  # noqa: E402
+from core.repositories.estoque_repository import EstoqueRepository  # noqa: E402
+
+# Formato anterior da query (subquery correlacionada para Vendas06Meses)
+SQL_ANTERIOR = """
+        DECLARE @DataHoje DATE = ?;
+        DECLARE @DataInicio12M DATE = ?;
+        DECLARE @DataInicio6M DATE = ?;
+        DECLARE @DataInicio30D DATE = ?;
+
+        WITH Pedidos AS (
+            SELECT
+                RDR1.ItemCode,
+                OITM.ItemName,
+                OITM.CardCode,
+                ORDR.DocEntry,
+                ORDR.DocDate,
+                CONVERT(VARCHAR(7), ORDR.DocDate, 120) AS AnoMes,
+                ORDR.DocStatus
+            FROM
+                ORDR ORDR
+            INNER JOIN
+                RDR1 RDR1 ON ORDR.DocEntry = RDR1.DocEntry
+            INNER JOIN
+                OITM OITM ON OITM.ItemCode = RDR1.ItemCode
+            WHERE
+                ORDR.DocDate BETWEEN @DataInicio12M AND @DataHoje
+                AND ORDR.CANCELED = 'N'
+        )
+        SELECT
+            A.ItemCode AS ItemCode,
+            A.ItemName AS ItemName,
+            ISNULL(A.CardCode, '') AS CardCode,
+            COUNT(A.DocEntry) AS 'Hits12Meses',
+            COUNT(CASE
+                WHEN A.DocDate BETWEEN @DataInicio30D AND @DataHoje
+                THEN A.DocEntry
+            END) AS 'Hits30Dias',
+            COUNT(DISTINCT CASE
+                WHEN A.DocDate BETWEEN @DataInicio6M AND @DataHoje
+                THEN A.AnoMes
+            END) AS 'Pedidos06Meses',
+            (
+                SELECT COUNT(DISTINCT CONVERT(VARCHAR(7), T_OINV.DocDate, 120))
+                FROM OINV T_OINV
+                INNER JOIN INV1 T_INV1 ON T_OINV.DocEntry = T_INV1.DocEntry
+                WHERE T_INV1.ItemCode = A.ItemCode
+                AND T_OINV.DocDate BETWEEN @DataInicio6M AND @DataHoje
+                AND T_OINV.CANCELED = 'N'
+            ) AS 'Vendas06Meses'
+        FROM
+            Pedidos A
+        GROUP BY
+            A.ItemCode,
+            A.ItemName,
+            A.CardCode
+        ORDER BY
+            'Hits12Meses' DESC;
+"""
+
+
+def traduzir_para_sqlite(sql: str, params: list) -> tuple[str, dict]:
+    """Converte o T-SQL dos repositórios para o SQLite, com as variáveis DECLARE como parâmetros nomeados."""
+    nomes = re.findall(r"DECLARE @(\w+) \w+ = \?;", sql)
+    sql = re.sub(r"DECLARE @\w+ \w+ = \?;", "", sql)
+    sql = re.sub(r"@(\w+)", r":\1", sql)
+    sql = re.sub(r"CONVERT\(VARCHAR\(7\), ([\w.]+), 120\)", r"substr(\1, 1, 7)", sql)
+    sql = sql.replace("ISNULL(", "IFNULL(").replace("'Hits12Meses' DESC", "Hits12Meses DESC")
+    return sql, {nome: valor.isoformat() for nome, valor in zip(nomes, params)}
+
+
+def criar_base(itens: int, indice_item: bool = True) -> sqlite3.Connection:
+    random.seed(42)
+    conexao = sqlite3.connect(":memory:")
+    conexao.executescript("""
+        CREATE TABLE OITM (ItemCode TEXT PRIMARY KEY, ItemName TEXT, CardCode TEXT);
+        CREATE TABLE ORDR (DocEntry INTEGER PRIMARY KEY, DocDate TEXT, CANCELED TEXT, DocStatus TEXT);
+        CREATE TABLE RDR1 (DocEntry INTEGER, LineNum INTEGER, ItemCode TEXT, PRIMARY KEY (DocEntry, LineNum));
+        CREATE TABLE OINV (DocEntry INTEGER PRIMARY KEY, DocDate TEXT, CANCELED TEXT);
+        CREATE TABLE INV1 (DocEntry INTEGER, LineNum INTEGER, ItemCode TEXT, PRIMARY KEY (DocEntry, LineNum));
+        CREATE INDEX RDR1_ItemCode ON RDR1 (ItemCode);
+    """)
+    if indice_item:
+        conexao.execute("CREATE INDEX INV1_ItemCode ON INV1 (ItemCode)")
+
+    codigos = [f"I{i:06d}" for i in range(itens)]
+    conexao.executemany(
+        "INSERT INTO OITM VALUES (?, ?, ?)",
+        [(codigo, f"Produto {codigo}", random.choice([None, f"F{random.randint(1, 300):05d}"])) for codigo in codigos],
+    )
+
+    hoje = DateHelper.today()
+    documentos = itens * 4
+    for tabela, linhas in (("ORDR", "RDR1"), ("OINV", "INV1")):
+        conexao.executemany(
+            f"INSERT INTO {tabela} (DocEntry, DocDate, CANCELED) VALUES (?, ?, ?)",
+            [
+                (doc, (hoje - timedelta(days=random.randint(0, 420))).isoformat(), "Y" if random.random() < 0.03 else "N")
+                for doc in range(documentos)
+            ],
+        )
+        conexao.executemany(
+            f"INSERT INTO {linhas} VALUES (?, ?, ?)",
+            [
+                (doc, linha, random.choice(codigos))
+                for doc in range(documentos)
+                for linha in range(random.randint(1, 4))
+            ],
+        )
+    conexao.execute("ANALYZE")
+    return conexao
+
+
+def sql_atual() -> tuple[str, list]:
+    """Captura o SQL e os parâmetros que `listar_hits` envia ao cliente."""
+    capturado = {}
+
+    class ClienteFalso:
+        def fetch_all(self, sql, params=None):
+            capturado["params"] = params
+            return []
+
+    repo = EstoqueRepository()
+    repo.cliente = ClienteFalso()
+    _, sql = repo.listar_hits()
+    return sql, capturado["params"]
+
+
+def main() -> None:
+    argumentos = [argumento for argumento in sys.argv[1:] if not argumento.startswith("--")]
+    itens = int(argumentos[0]) if argumentos else 20_000
+    conexao = criar_base(itens, indice_item="--sem-indice" not in sys.argv)
+
+    sql, params = sql_atual()
+    consultas = {
+        "subquery correlacionada": traduzir_para_sqlite(SQL_ANTERIOR, params),
+        "pré-agregação + LEFT JOIN": traduzir_para_sqlite(sql, params),
+    }
+
+    print(f"{itens} itens")
+    resultados = {}
+    for nome, (consulta, parametros) in consultas.items():
+        tempo, _, linhas = medir(lambda: conexao.execute(consulta, parametros).fetchall(), repeticoes=3)
+        resultados[nome] = sorted(linhas)
+        print(f"{nome:<28} tempo={tempo:.3f}s  linhas={len(linhas)}")
+
+    anterior, atual = resultados.values()
+    print("resultados idênticos:", anterior == atual)
+    if anterior != atual:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compara o pivot genérico (`pd.pivot_table` + renomeação das colunas mês/ano) com o
+caminho rápido de `BaseService.pivot_table` (soma sobre chaves fatoradas, cabeçalhos
+'JAN-2025' montados direto), no formato do ranking de transportadoras, e confere que
+os resultados são idênticos.
+
+Uso: python benchmarks/bench_pivot.py [linhas ...]   (padrão: 10000 100000 1000000)
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+from utils import formatar_bytes, medir, setup_django
+
+setup_django()
+
+from core.services.base_service import BaseService  # noqa: E402
+
+
+def gerar_dados(quantidade: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    codigos = rng.integers(0, 2_000, quantidade)
+    return pd.DataFrame({
+        "CardCode": pd.Series([f"F{i:05d}" for i in range(2_000)]).to_numpy()[codigos],
+        "CardName": pd.Series([f"Transportadora {i}" for i in range(2_000)]).to_numpy()[codigos],
+        "Mes": rng.integers(1, 13, quantidade),
+        "Ano": rng.choice([2024, 2025], quantidade),
+        "Total": rng.integers(1, 500, quantidade),
+    })
+
+
+def pivot_generico(service: BaseService, dados: pd.DataFrame) -> pd.DataFrame:
+    """Caminho anterior: pivot genérico, achatamento das colunas e renomeação em Python."""
+    pivot = pd.pivot_table(
+        dados,
+        index=["CardCode", "CardName"],
+        columns=["Mes", "Ano"],
+        values="Total",
+        aggfunc="sum",
+        fill_value=0,
+        observed=True
+    )
+    pivot.reset_index(inplace=True)
+    pivot.columns = [
+        '-'.join(str(c) for c in col).strip('-') if isinstance(col, tuple) else col
+        for col in pivot.columns.values
+    ]
+    pivot.columns.name = None
+    return service.replace_column_names_with_month_year(pivot)
+
+
+def pivot_rapido(service: BaseService, dados: pd.DataFrame) -> pd.DataFrame:
+    return service.pivot_table(
+        data=dados,
+        index=["CardCode", "CardName"],
+        columns=["Mes", "Ano"],
+        values="Total",
+        aggfunc="sum",
+        fill_value=0,
+        month_year_headers=True
+    )
+
+
+def main() -> None:
+    quantidades = [int(valor) for valor in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    service = BaseService()
+
+    for quantidade in quantidades:
+        dados = gerar_dados(quantidade)
+        print(f"{quantidade} linhas")
+        resultados = {}
+        for nome, caminho in (("pd.pivot_table", pivot_generico), ("caminho rápido", pivot_rapido)):
+            tempo, pico, resultado = medir(lambda: caminho(service, dados))
+            resultados[nome] = resultado
+            print(f"  {nome:<16} tempo={tempo:.3f}s  pico={formatar_bytes(pico):>10}")
+        pd.testing.assert_frame_equal(resultados["pd.pivot_table"], resultados["caminho rápido"])
+        print("  resultados idênticos")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Utilitários compartilhados pelos scripts de benchmark."""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, List, Sequence, Tuple
+
+
+def setup_django() -> None:
+    """Configura o Django como o `manage.py` para permitir importar o `core`."""
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sistema_bom.settings')
+    import django
+    django.setup()
+
+
+def medir(func: Callable[[], Any], repeticoes: int = 3) -> Tuple[float, int, Any]:
+    """
+    Executa `func` algumas vezes e retorna (melhor tempo em segundos,
+    pico de memória alocada em bytes, resultado da última execução).
+    """
+    melhor = float('inf')
+    resultado = None
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        resultado = func()
+        melhor = min(melhor, time.perf_counter() - inicio)
+        del resultado
+
+    gc.collect()
+    tracemalloc.start()
+    resultado = func()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return melhor, pico, resultado
+
+
+def formatar_bytes(valor: int) -> str:
+    for unidade in ('B', 'KB', 'MB', 'GB'):
+        if valor < 1024:
+            return f"{valor:.1f} {unidade}"
+        valor /= 1024
+    return f"{valor:.1f} TB"
+
+
+class FakeCursor:
+    """Cursor em memória que imita a interface de leitura do pyodbc."""
+
+    def __init__(self, description: Sequence[tuple], rows: List[tuple]):
+        self.description = list(description)
+        self._rows = rows
+        self._position = 0
+        self.arraysize = 1
+
+    def execute(self, query: str, params: Any = None) -> 'FakeCursor':
+        self._position = 0
+        return self
+
+    def fetchall(self) -> List[tuple]:
+        rows = self._rows[self._position:]
+        self._position = len(self._rows)
+        return rows
+
+    def fetchmany(self, size: int | None = None) -> List[tuple]:
+        size = size or self.arraysize
+        rows = self._rows[self._position:self._position + size]
+        self._position += len(rows)
+        return rows
+
+    def fetchone(self) -> tuple | None:
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def close(self) -> None:
+        pass
+
+
+class FakeConnection:
+    def __init__(self, description: Sequence[tuple], rows: List[tuple]):
+        self._description = description
+        self._rows = rows
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self._description, self._rows)
+
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
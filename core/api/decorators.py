@@ -8,6 +8,7 @@ from core.services.exceptions import (
 
 from http import HTTPStatus
 from django.conf import settings
+import inspect
 import logging
 from functools import wraps
 from django.http import JsonResponse
@@ -25,11 +26,55 @@ class ErrorMessages:
     
     
 
+def _error_response(func_name: str, e: Exception) -> JsonResponse:
+    """Monta a resposta JSON padronizada para a exceção levantada pela view."""
+    if isinstance(e, ValidationError):
+        logger.warning(f'Erro de validação em {func_name}: {str(e)}')
+        return JsonResponse(
+            {'error': True, 'message': ErrorMessages.VALIDATION_ERROR, 'details': str(e)},
+            status=HTTPStatus.UNPROCESSABLE_ENTITY,
+        )
+    if isinstance(e, DataNotFoundError):
+        logger.warning(f'Recurso não encontrado em {func_name}: {str(e)}')
+        return JsonResponse(
+            {'error': True, 'message': ErrorMessages.DATA_NOT_FOUND_ERROR, 'details': str(e)}, 
+            status=HTTPStatus.NOT_FOUND
+        )
+    if isinstance(e, BusinessRuleError):
+        logger.warning(f'Erro de regra de negócio em {func_name}: {str(e)}')
+        return JsonResponse(
+            {'error': True, 'message': ErrorMessages.BUSINESS_RULE_ERROR, 'details': str(e)},
+            status=HTTPStatus.BAD_REQUEST,
+        )
+    if isinstance(e, DataTransformationError):
+        logger.error(f'Erro de transformação de dados em {func_name}: {str(e)}', exc_info=True)
+        return JsonResponse(
+            {'error': True, 'message': ErrorMessages.DATA_TRANSFORMATION_ERROR, 'details': str(e)},
+            status=HTTPStatus.INTERNAL_SERVER_ERROR,
+        )
+    if isinstance(e, ServiceError):
+        logger.error(f'Erro de serviço em {func_name}: {str(e)}', exc_info=True)
+        return JsonResponse(
+            {'error': True, 'message': ErrorMessages.SERVICE_ERROR, 'details': str(e)},
+            status=HTTPStatus.SERVICE_UNAVAILABLE,
+        )
+    logger.error(f'Erro interno em {func_name}: {str(e)}', exc_info=True)
+    return JsonResponse(
+        {
+            'error': True,
+            'message': ErrorMessages.INTERNAL_ERROR,
+            'details': str(e) if settings.DEBUG else 'Erro interno',
+        },
+        status=HTTPStatus.INTERNAL_SERVER_ERROR,
+    )
+
+
 def handle_error(func):
     """
     Decorator para padronizar o tratamento de erros nas views da API.
 
-    Este decorator captura exceções comuns e retorna respostas JSON padronizadas:
+    Este decorator captura exceções comuns e retorna respostas JSON padronizadas
+    (funciona tanto em views síncronas quanto assíncronas):
     - ValueError: Retorna status 400 com mensagem de parâmetros inválidos
     - FileNotFoundError: Retorna status 404 com mensagem de recurso não encontrado
     - Exception geral: Retorna status 500 com mensagem de erro interno
@@ -41,53 +86,21 @@ def handle_error(func):
         JsonResponse: Resposta JSON padronizada em caso de erro
     """
 
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                return _error_response(func.__name__, e)
+
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
-        except ValidationError as e:
-            logger.warning(f'Erro de validação em {func.__name__}: {str(e)}')
-            return JsonResponse(
-                {'error': True, 'message': ErrorMessages.VALIDATION_ERROR, 'details': str(e)},
-                status=HTTPStatus.UNPROCESSABLE_ENTITY,
-            )
-        except DataNotFoundError as e:
-            logger.warning(f'Recurso não encontrado em {func.__name__}: {str(e)}')
-            return JsonResponse(
-                {'error': True, 'message': ErrorMessages.DATA_NOT_FOUND_ERROR, 'details': str(e)}, 
-                status=HTTPStatus.NOT_FOUND
-            )
-            
-        except BusinessRuleError as e:
-            logger.warning(f'Erro de regra de negócio em {func.__name__}: {str(e)}')
-            return JsonResponse(
-                {'error': True, 'message': ErrorMessages.BUSINESS_RULE_ERROR, 'details': str(e)},
-                status=HTTPStatus.BAD_REQUEST,
-            )
-        
-        except DataTransformationError as e:
-            logger.error(f'Erro de transformação de dados em {func.__name__}: {str(e)}', exc_info=True)
-            return JsonResponse(
-                {'error': True, 'message': ErrorMessages.DATA_TRANSFORMATION_ERROR, 'details': str(e)},
-                status=HTTPStatus.INTERNAL_SERVER_ERROR,
-            )
-            
-        except ServiceError as e:
-            logger.error(f'Erro de serviço em {func.__name__}: {str(e)}', exc_info=True)
-            return JsonResponse(
-                {'error': True, 'message': ErrorMessages.SERVICE_ERROR, 'details': str(e)},
-                status=HTTPStatus.SERVICE_UNAVAILABLE,
-            )
-        
         except Exception as e:
-            logger.error(f'Erro interno em {func.__name__}: {str(e)}', exc_info=True)
-            return JsonResponse(
-                {
-                    'error': True,
-                    'message': ErrorMessages.INTERNAL_ERROR,
-                    'details': str(e) if settings.DEBUG else 'Erro interno',
-                },
-                status=HTTPStatus.INTERNAL_SERVER_ERROR,
-            )
+            return _error_response(func.__name__, e)
 
     return wrapper
\ No newline at end of file
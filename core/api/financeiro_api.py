@@ -0,0 +1,50 @@
+from http import HTTPStatus
+from django.http import HttpRequest
+
+from ninja import Router
+from core.services.financeiro_service import FinanceiroService
+
+from .decorators import handle_error
+
+router = Router(tags=["Financeiro"])
+
+@router.get("/rentabilidade-itens/", response={HTTPStatus.OK: dict})
+@handle_error
+async def listar_rentabilidade_itens(
+    request: HttpRequest,
+    data_inicio: str = None,
+    data_fim: str = None,
+    item_code: str = None,
+    tipo_negocio: str = None,
+    rentabilidade_min: float = None,
+    rentabilidade_max: float = None,
+    ordenar_por: str = None,
+    top: int = None,
+    offset: int = 0,
+    fetch_next: int = 50,
+    format: str = "records",
+):
+    """
+    Item profitability by business type, filtered, sorted and paginated in SQL.
+
+    `ordenar_por` accepts `item` (default), `faturamento` or `rentabilidade` (descending).
+    `top` keeps only the first N rows of that order (by `faturamento` when not given);
+    `offset`/`fetch_next` page through them. `total` is the number of matching rows.
+    `format=columns` returns `itens` as {"schema", "length", "columns"}, with the money
+    columns as integer cents (`"scale": 2` in the schema).
+    """
+    service = FinanceiroService()
+    pagina, _ = await service.listar_rentabilidade_itens_async(
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+        item_code=item_code,
+        tipo_negocio=tipo_negocio,
+        rentabilidade_min=rentabilidade_min,
+        rentabilidade_max=rentabilidade_max,
+        ordenar_por=ordenar_por,
+        top=top,
+        offset=offset,
+        fetch_next=fetch_next,
+        formato=format,
+    )
+    return pagina
@@ -8,9 +8,37 @@ from .decorators import handle_error
 
 router = Router(tags=["Logística"])
 
-@router.get("/listar-transportadoras-mais-usadas/", response={HTTPStatus.OK: list[dict]})
+@router.get("/listar-transportadoras-mais-usadas/", response={HTTPStatus.OK: list[dict] | dict})
 @handle_error
-def listar_transportadoras_mais_usadas(request: HttpRequest, offset : int = 10, fetch_next: int = None):
+async def listar_transportadoras_mais_usadas(
+    request: HttpRequest,
+    offset : int = 10,
+    fetch_next: int = None,
+    format: str = "records"
+):
+    """
+    Carrier ranking with one column per month and the period total.
+    `format=columns` returns {"schema", "length", "columns"} instead of one object per row.
+    """
     service = LogisticaService()
-    transportadoras, _ = service.listar_transportadoras_mais_usadas(offset=offset, fetch_next=fetch_next)
-    return transportadoras
\ No newline at end of file
+    transportadoras, _ = await service.listar_transportadoras_mais_usadas_async(
+        offset=offset, fetch_next=fetch_next, formato=format
+    )
+    return transportadoras
+
+@router.get("/transportadoras-mais-usadas/", response={HTTPStatus.OK: dict})
+@handle_error
+async def listar_transportadoras_por_cursor(
+    request: HttpRequest,
+    cursor: str = None,
+    limite: int = 10,
+    format: str = "records"
+):
+    """
+    Carrier ranking with cursor (keyset) pagination.
+    Pass `proximo_cursor` from the previous response as `cursor` to get the next page;
+    it is null on the last page. `format=columns` returns `transportadoras` column-oriented.
+    """
+    service = LogisticaService()
+    pagina, _ = await service.listar_transportadoras_por_cursor_async(cursor=cursor, limite=limite, formato=format)
+    return pagina
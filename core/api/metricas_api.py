@@ -0,0 +1,54 @@
+from http import HTTPStatus
+from django.http import HttpRequest, HttpResponse
+
+from ninja import Router
+from ninja.security import django_auth_is_staff
+
+from core.services.query_cache import query_cache, query_cache_refresher
+from core.services.query_metrics import query_metrics
+from core.services.single_flight import query_single_flight
+from core.services.sqlserver_cliente import default_sql_server_client
+
+from .decorators import handle_error
+
+router = Router(tags=["Métricas"], auth=django_auth_is_staff)
+
+@router.get("/consultas/", response={HTTPStatus.OK: dict})
+@handle_error
+def listar_metricas_consultas(request: HttpRequest, ordenar_por: str = "total_ms"):
+    """
+    Métricas por método de repositório desde o início do processo (ou do último reset),
+    ordenadas pela soma de `ordenar_por` (total_ms, connect_ms, execute_ms, fetch_ms, rows, bytes).
+    """
+    pool = default_sql_server_client.pool
+    return {
+        "metodos": query_metrics.snapshot(order_by=ordenar_por),
+        "pool": pool.stats() if pool is not None else None,
+    }
+
+@router.delete("/consultas/", response={HTTPStatus.NO_CONTENT: None})
+@handle_error
+def limpar_metricas_consultas(request: HttpRequest):
+    query_metrics.reset()
+    return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+@router.get("/cache/", response={HTTPStatus.OK: dict})
+@handle_error
+def listar_metricas_cache(request: HttpRequest):
+    """
+    Acertos (frescos e vencidos), faltas, gravações e invalidações do cache de consultas,
+    por método, e contadores da coalescência (single-flight) e das atualizações em segundo plano.
+    """
+    return {
+        "habilitado": query_cache.enabled,
+        "metodos": query_cache.stats(),
+        "coalescencia": query_single_flight.stats(),
+        "atualizacao_em_segundo_plano": query_cache_refresher.stats(),
+    }
+
+@router.delete("/cache/", response={HTTPStatus.NO_CONTENT: None})
+@handle_error
+def invalidar_cache(request: HttpRequest, metodo: str | None = None):
+    """Invalida as entradas de `metodo` ("Classe.metodo") ou, sem parâmetro, o cache inteiro."""
+    query_cache.invalidate(metodo)
+    return HttpResponse(status=HTTPStatus.NO_CONTENT)
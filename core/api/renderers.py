@@ -0,0 +1,42 @@
+from decimal import Decimal
+from typing import Any
+
+from django.http import HttpRequest
+from ninja.renderers import JSONRenderer
+from ninja.responses import NinjaJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - sem orjson, fica o renderer padrão do Ninja
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renderer JSON da API baseado em orjson, com o renderer padrão do Ninja como
+    alternativa quando o pacote não está instalado.
+
+    datetime/date, números e escalares/arrays do numpy são serializados em C, sem
+    passar pelo `default` do encoder. Só os tipos que o orjson não conhece (Decimal,
+    pandas.Timestamp, modelos pydantic, ...) chegam a `_default`, que os converte
+    como o NinjaJSONEncoder (Decimal vira string, como antes).
+
+    Diferenças em relação ao renderer padrão: NaN/inf viram null (em vez de NaN,
+    que não é JSON válido) e datetimes mantêm os microssegundos.
+    """
+
+    options = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z) if orjson else 0
+
+    def render(self, request: HttpRequest, data: Any, *, response_status: int) -> Any:
+        if orjson is None:
+            return super().render(request, data, response_status=response_status)
+        return orjson.dumps(data, default=_default, option=self.options)
+
+
+_encoder = NinjaJSONEncoder()
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    return _encoder.default(value)
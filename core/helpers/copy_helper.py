@@ -0,0 +1,45 @@
+import io
+from typing import Any, Dict, List
+
+from django.db import connection
+
+
+class CopyHelper:
+    """Utilitário para cargas em massa no banco do Django"""
+    
+    BATCH_SIZE = 5000
+    
+    @staticmethod
+    def csv_value(valor: Any) -> str:
+        """Valor no formato CSV do COPY: None vira campo vazio sem aspas (NULL), textos vão entre aspas."""
+        if valor is None:
+            return ""
+        if isinstance(valor, str):
+            return '"' + valor.replace('"', '""') + '"'
+        return str(valor)
+    
+    @staticmethod
+    def copy_records(modelo, registros: List[Dict[str, Any]]) -> None:
+        """
+        Insere `registros` (dicionários campo -> valor, todos com os mesmos campos) na tabela de `modelo`.
+        
+        No PostgreSQL usa COPY ... FROM STDIN, bem mais rápido que INSERTs para milhares de
+        linhas; nos demais bancos (ex.: SQLite dos testes) cai para `bulk_create`.
+        """
+        if not registros:
+            return
+        if connection.vendor != "postgresql":
+            modelo.objects.bulk_create([modelo(**registro) for registro in registros], batch_size=CopyHelper.BATCH_SIZE)
+            return
+        
+        campos = list(registros[0])
+        buffer = io.StringIO()
+        for registro in registros:
+            buffer.write(",".join(CopyHelper.csv_value(registro[campo]) for campo in campos))
+            buffer.write("\n")
+        buffer.seek(0)
+        
+        colunas = ", ".join(connection.ops.quote_name(modelo._meta.get_field(campo).column) for campo in campos)
+        tabela = connection.ops.quote_name(modelo._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {tabela} ({colunas}) FROM STDIN WITH (FORMAT csv)", buffer)
@@ -1,12 +1,17 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from dateutil.relativedelta import relativedelta
 from typing import Tuple
 
+from django.conf import settings
+
 class DateHelper:
     """Utilitário para a validação e formatação de datas para SQL"""
     
     DEFAULT_FORMAT = "%Y-%m-%d"
     
+    # Maior data aceita pelo tipo DATE do SQL Server (fim aberto em filtros com parâmetro)
+    MAX_DATE = date(9999, 12, 31)
+    
     @staticmethod
     def validate_date(date_str: str, param_name: str = "data") -> str:
         """Valida se a string fornecida é uma data válida no formato padrão (YYYY-MM-DD)."""
@@ -46,6 +51,104 @@ class DateHelper:
             
         return target_date.strftime("%Y-%m-%d")
     
+    @staticmethod
+    def today() -> date:
+        """Data atual, equivalente ao `CAST(GETDATE() AS DATE)` do SQL Server."""
+        return datetime.now().date()
+    
+    @staticmethod
+    def months_ago(months: int, day: int | None = None, reference: date | None = None) -> date:
+        """Data `months` meses antes de `reference` (hoje por padrão), opcionalmente no dia `day`."""
+        target = (reference or DateHelper.today()) - relativedelta(months=months)
+        if day is not None:
+            target = target.replace(day=day)
+        return target
+    
+    @staticmethod
+    def first_day_of_month(months_offset: int = 0, reference: date | None = None) -> date:
+        """
+        Primeiro dia do mês deslocado em `months_offset` meses (negativo = passado).
+        Equivale a `DATEADD(MONTH, n, DATEADD(MONTH, DATEDIFF(MONTH, 0, GETDATE()), 0))`.
+        """
+        return (reference or DateHelper.today()).replace(day=1) + relativedelta(months=months_offset)
+    
+    @staticmethod
+    def days_ago(days: int, reference: date | None = None) -> date:
+        return (reference or DateHelper.today()) - timedelta(days=days)
+    
+    @staticmethod
+    def month_partitions(data_inicio: date, data_fim: date) -> list[Tuple[date, date]]:
+        """
+        Divide o intervalo [data_inicio, data_fim] em trechos de no máximo um mês de calendário.
+        O primeiro e o último trecho podem ser parciais. Ex.: 15/01 a 10/03 ->
+        (15/01, 31/01), (01/02, 28/02), (01/03, 10/03).
+        """
+        particoes = []
+        inicio = data_inicio
+        while inicio <= data_fim:
+            fim = min(inicio.replace(day=1) + relativedelta(months=1) - timedelta(days=1), data_fim)
+            particoes.append((inicio, fim))
+            inicio = fim + timedelta(days=1)
+        return particoes
+    
+    @staticmethod
+    def window_end(reference: date | None = None) -> date:
+        """
+        Fim da janela padrão (quando `data_fim` não é informada), conforme `SQLSERVER_JANELA_PADRAO_FIM`:
+        - "dia": hoje (muda uma vez por dia);
+        - "mes": último dia do mês corrente (a janela inteira fica estável durante o mês).
+        """
+        hoje = reference or DateHelper.today()
+        if getattr(settings, "SQLSERVER_JANELA_PADRAO_FIM", "dia") == "mes":
+            return hoje.replace(day=1) + relativedelta(months=1) - timedelta(days=1)
+        return hoje
+    
+    @staticmethod
+    def resolve_window(data_inicio: str | None, data_fim: str | None, months: int) -> Tuple[date, date]:
+        """
+        Resolve e valida o intervalo, completando as datas ausentes com a janela padrão canônica:
+        do primeiro dia do mês `months` meses atrás até `window_end()`.
+        
+        Os limites são alinhados ao mês e iguais para todas as chamadas no mesmo período, então
+        a visão padrão de todos os usuários cai na mesma entrada do cache (ver `janela_padrao`
+        em core/repositories/decorators.py) e nos mesmos segmentos do cache mensal.
+        """
+        if data_inicio is None:
+            data_inicio = DateHelper.first_day_of_month(-months).strftime(DateHelper.DEFAULT_FORMAT)
+        if data_fim is None:
+            data_fim = DateHelper.window_end().strftime(DateHelper.DEFAULT_FORMAT)
+        return DateHelper.resolve_date_range(data_inicio, data_fim)
+    
+    @staticmethod
+    def resolve_date_range(
+        data_inicio: str | None,
+        data_fim: str | None,
+        default_inicio_months_offset: int = 6,
+        default_fim_months_offset: int = 0,
+        default_inicio_day: int | None = None,
+        default_fim_day: int | None = None
+    ) -> Tuple[date, date]:
+        """
+        Resolve e valida um intervalo de datas em Python, para uso como parâmetros (?) da query.
+        
+        Datas ausentes são calculadas a partir de hoje com os deslocamentos em meses
+        (e dia opcional) informados, em vez de expressões GETDATE() no texto do SQL.
+        Assim o texto da query é sempre o mesmo e o SQL Server reaproveita o plano.
+        
+        Returns:
+            Tuple com (data_inicio, data_fim) como objetos date.
+        """
+        if data_inicio is None:
+            data_inicio = DateHelper.months_ago(default_inicio_months_offset, day=default_inicio_day).strftime(DateHelper.DEFAULT_FORMAT)
+        if data_fim is None:
+            data_fim = DateHelper.months_ago(default_fim_months_offset, day=default_fim_day).strftime(DateHelper.DEFAULT_FORMAT)
+        
+        data_inicio, data_fim = DateHelper.validate_range(data_inicio, data_fim)
+        return (
+            datetime.strptime(data_inicio, DateHelper.DEFAULT_FORMAT).date(),
+            datetime.strptime(data_fim, DateHelper.DEFAULT_FORMAT).date(),
+        )
+    
     @staticmethod
     def prepare_date_params(
         data_inicio: str | None,
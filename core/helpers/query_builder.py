@@ -0,0 +1,163 @@
+from datetime import date, timedelta
+from typing import Any, Iterable, List, Tuple
+
+from dateutil.relativedelta import relativedelta
+
+
+class QueryBuilder:
+    """
+    Montagem de SELECTs com filtros opcionais no lugar certo da query.
+
+    Cada filtro vira uma condição do WHERE com os valores como parâmetros (?), na
+    ordem em que aparecem no texto. Os filtros de data usam intervalos
+    (`coluna >= ? AND coluna < ?`) em vez de YEAR()/MONTH()/DATEPART() sobre a
+    coluna, para que o SQL Server possa usar índices (condições sargable).
+
+        sql, params = (
+            QueryBuilder("OINV OINV")
+            .select("OINV.DocEntry", "OINV.DocDate")
+            .where("OINV.CANCELED = 'N'")
+            .year("OINV.DocDate", 2025)
+            .build()
+        )
+    """
+
+    def __init__(self, from_: str):
+        self._from = from_
+        self._select: List[str] = []
+        self._joins: List[str] = []
+        self._where: List[Tuple[str, List[Any]]] = []
+        self._group_by: List[str] = []
+        self._order_by: List[str] = []
+        self._offset: int | None = None
+        self._fetch_next: int | None = None
+
+    def select(self, *columns: str) -> "QueryBuilder":
+        self._select.extend(columns)
+        return self
+
+    def join(self, clause: str) -> "QueryBuilder":
+        """Acrescenta um JOIN completo (ex.: "INNER JOIN INV1 INV1 ON ..."); repetições são ignoradas."""
+        if clause not in self._joins:
+            self._joins.append(clause)
+        return self
+
+    def where(self, condition: str, *params: Any) -> "QueryBuilder":
+        """Acrescenta uma condição (unida com AND) e os valores dos seus `?`."""
+        self._where.append((condition, list(params)))
+        return self
+
+    def group_by(self, *columns: str) -> "QueryBuilder":
+        self._group_by.extend(columns)
+        return self
+
+    def order_by(self, *columns: str) -> "QueryBuilder":
+        self._order_by.extend(columns)
+        return self
+
+    def paginate(self, offset: int | None = None, fetch_next: int | None = None) -> "QueryBuilder":
+        """`OFFSET ? ROWS [FETCH NEXT ? ROWS ONLY]` (exige ORDER BY); sem efeito com os dois None."""
+        if fetch_next is not None and offset is None:
+            offset = 0
+        self._offset, self._fetch_next = offset, fetch_next
+        return self
+
+    # Filtros
+
+    def equals(self, column: str, value: Any) -> "QueryBuilder":
+        """`column = ?`; ignorado quando `value` é None."""
+        if value is None:
+            return self
+        return self.where(f"{column} = ?", value)
+
+    def in_(self, column: str, values: Iterable[Any] | None) -> "QueryBuilder":
+        """`column IN (?, ...)`; ignorado quando `values` é None. Lista vazia não retorna linhas."""
+        if values is None:
+            return self
+        values = list(values)
+        if not values:
+            return self.where("1 = 0")
+        return self.where(f"{column} IN ({', '.join('?' for _ in values)})", *values)
+
+    def date_range(self, column: str, inicio: date | None, fim_exclusivo: date | None) -> "QueryBuilder":
+        """`column >= inicio AND column < fim_exclusivo`; cada limite None fica aberto."""
+        if inicio is not None:
+            self.where(f"{column} >= ?", inicio)
+        if fim_exclusivo is not None:
+            self.where(f"{column} < ?", fim_exclusivo)
+        return self
+
+    def year(self, column: str, ano: int | None) -> "QueryBuilder":
+        """Datas do ano `ano` (equivale a `YEAR(column) = ano`)."""
+        if ano is None:
+            return self
+        return self.date_range(column, date(ano, 1, 1), date(ano + 1, 1, 1))
+
+    def month_range(self, column: str, inicio: str | None, fim: str | None) -> "QueryBuilder":
+        """Datas dos meses `inicio` a `fim` ("AAAA-MM", inclusive); cada limite None fica aberto."""
+        primeiro = self._month(inicio) if inicio else None
+        ultimo = self._month(fim) + relativedelta(months=1) if fim else None
+        if primeiro is not None and ultimo is not None and primeiro >= ultimo:
+            raise ValueError(f"O mês inicial '{inicio}' não pode ser maior que o mês final '{fim}'.")
+        return self.date_range(column, primeiro, ultimo)
+
+    def week(self, column: str, ano: int | None, semana: int | None) -> "QueryBuilder":
+        """
+        Datas da semana `semana` de `ano` como `DATEPART(WEEK, column)` do SQL Server
+        com DATEFIRST 7 (padrão us_english): a semana 1 começa em 1º de janeiro e as
+        seguintes começam no domingo.
+        """
+        if semana is None:
+            return self
+        if ano is None:
+            raise ValueError("O filtro por semana exige o ano.")
+        inicio, fim = self.week_bounds(ano, semana)
+        return self.date_range(column, inicio, fim)
+
+    @staticmethod
+    def week_bounds(ano: int, semana: int) -> Tuple[date, date]:
+        """Intervalo [início, fim) da semana `semana` de `ano` (ver `week`)."""
+        primeiro_dia = date(ano, 1, 1)
+        # Domingo da semana de 1º de janeiro (weekday(): segunda = 0, domingo = 6)
+        domingo = primeiro_dia - timedelta(days=(primeiro_dia.weekday() + 1) % 7)
+        inicio = max(primeiro_dia, domingo + timedelta(weeks=semana - 1))
+        fim = min(date(ano + 1, 1, 1), domingo + timedelta(weeks=semana))
+        if semana < 1 or inicio >= fim:
+            raise ValueError(f"Semana inválida para {ano}: {semana}.")
+        return inicio, fim
+
+    def build(self) -> Tuple[str, List[Any]]:
+        """Texto do SELECT e parâmetros, na ordem dos `?`."""
+        if not self._select:
+            raise ValueError("A query não tem colunas no SELECT.")
+
+        linhas = ["SELECT", ",\n".join(f"    {column}" for column in self._select), f"FROM {self._from}"]
+        linhas.extend(self._joins)
+        params: List[Any] = []
+        if self._where:
+            linhas.append("WHERE")
+            condicoes = []
+            for condition, condition_params in self._where:
+                condicoes.append(condition)
+                params.extend(condition_params)
+            linhas.append("\n    AND ".join(f"    {condicoes[0]}" if i == 0 else c for i, c in enumerate(condicoes)))
+        if self._group_by:
+            linhas.extend(["GROUP BY", ",\n".join(f"    {column}" for column in self._group_by)])
+        if self._order_by:
+            linhas.extend(["ORDER BY", ",\n".join(f"    {column}" for column in self._order_by)])
+        if self._offset is not None:
+            if not self._order_by:
+                raise ValueError("A paginação (OFFSET) exige ORDER BY.")
+            linhas.append("OFFSET ? ROWS")
+            params.append(self._offset)
+            if self._fetch_next is not None:
+                linhas[-1] += " FETCH NEXT ? ROWS ONLY"
+                params.append(self._fetch_next)
+        return "\n".join(linhas), params
+
+    def _month(self, ano_mes: str) -> date:
+        try:
+            ano, mes = ano_mes.split("-")
+            return date(int(ano), int(mes), 1)
+        except ValueError:
+            raise ValueError(f"O mês '{ano_mes}' não está no formato válido 'AAAA-MM'.")
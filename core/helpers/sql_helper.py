@@ -0,0 +1,51 @@
+import re
+from typing import Any, Iterable, List, Sequence, Tuple
+
+from django.conf import settings
+
+# Variáveis T-SQL (@Nome), sem pegar funções de sistema (@@ROWCOUNT)
+_VARIAVEL = re.compile(r"(?<![@\w])@(\w+)")
+
+
+class SQLHelper:
+    """Utilitário para ajustes no texto das queries SQL"""
+    
+    RECOMPILE_HINT = "OPTION (RECOMPILE)"
+    
+    @staticmethod
+    def add_recompile_hint(sql: str) -> str:
+        """Acrescenta OPTION (RECOMPILE) ao último comando da query."""
+        body = sql.rstrip().rstrip(";").rstrip()
+        return f"{body}\n        {SQLHelper.RECOMPILE_HINT};\n"
+    
+    @staticmethod
+    def apply_query_hints(sql: str, query_name: str) -> str:
+        """
+        Aplica as dicas configuradas para a query `query_name` ("Classe.metodo").
+        
+        Queries listadas em `SQLSERVER_RECOMPILE_QUERIES` recebem OPTION (RECOMPILE),
+        trocando o reaproveitamento do plano por um plano feito para os valores
+        de cada chamada (útil quando o parameter sniffing atrapalha).
+        """
+        if query_name in getattr(settings, "SQLSERVER_RECOMPILE_QUERIES", ()):
+            return SQLHelper.add_recompile_hint(sql)
+        return sql
+    
+    @staticmethod
+    def combine_statements(queries: Sequence[Tuple[str, Iterable[Any] | None]]) -> Tuple[str, List[Any]]:
+        """
+        Junta várias queries (sql, params) em um único lote, para uma só ida ao servidor.
+        
+        Cada comando ganha um sufixo nas variáveis (@DataInicio -> @DataInicio_1), já que
+        variáveis declaradas com DECLARE valem para o lote inteiro e repeti-las é erro.
+        O lote começa com SET NOCOUNT ON para que só os SELECTs gerem conjuntos de resultados.
+        
+        Returns:
+            Tuple com (sql do lote, parâmetros na ordem dos comandos).
+        """
+        comandos, params = ["SET NOCOUNT ON;"], []
+        for indice, (sql, query_params) in enumerate(queries):
+            sql = _VARIAVEL.sub(lambda m: f"@{m.group(1)}_{indice}", sql.strip().rstrip(";"))
+            comandos.append(f"{sql};")
+            params.extend(query_params or [])
+        return "\n".join(comandos), params
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.helpers.date_helper import DateHelper
+from core.repositories.agregados_repository import CONJUNTOS
+from core.services.exceptions import ServiceError
+from core.services.materializacao_service import MaterializacaoService
+
+
+class Command(BaseCommand):
+    help = (
+        "Materializa no banco local os agregados mensais de meses fechados. "
+        "Sem opções, recarrega o último mês fechado de todos os conjuntos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--mes",
+            action="append",
+            default=[],
+            help="Mês (AAAA-MM) a recarregar; pode ser repetido.",
+        )
+        parser.add_argument("--desde", help="Backfill a partir deste mês (AAAA-MM).")
+        parser.add_argument("--ate", help="Último mês do backfill (AAAA-MM); padrão: último mês fechado.")
+        parser.add_argument(
+            "--conjunto",
+            action="append",
+            choices=list(CONJUNTOS),
+            help="Conjunto a materializar; pode ser repetido. Padrão: todos.",
+        )
+
+    def handle(self, *args, **options):
+        service = MaterializacaoService()
+        conjuntos = options["conjunto"] or list(CONJUNTOS)
+
+        try:
+            if options["desde"]:
+                resultado = service.backfill(options["desde"], options["ate"], conjuntos)
+            else:
+                meses = options["mes"] or [DateHelper.first_day_of_month(-1).strftime("%Y-%m")]
+                resultado = {
+                    conjunto: {mes: service.materializar_mes(conjunto, mes) for mes in meses}
+                    for conjunto in conjuntos
+                }
+        except ServiceError as e:
+            raise CommandError(str(e))
+
+        for conjunto, meses in resultado.items():
+            for mes, linhas in meses.items():
+                self.stdout.write(f"{conjunto} {mes}: {linhas} linhas")
+        self.stdout.write(self.style.SUCCESS("Materialização concluída."))
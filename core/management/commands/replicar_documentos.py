@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.repositories.documentos_repository import DOCUMENTOS
+from core.services.exceptions import ServiceError
+from core.services.replicacao_service import ReplicacaoService
+
+
+class Command(BaseCommand):
+    help = (
+        "Replica no banco local as linhas de documentos do ERP criadas ou alteradas desde a "
+        "última execução (marca d'água por DocEntry/UpdateDate). Sem opções, replica todos os tipos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tipo",
+            action="append",
+            choices=list(DOCUMENTOS),
+            help="Tabela de cabeçalho a replicar; pode ser repetido. Padrão: todas.",
+        )
+        parser.add_argument("--lote", type=int, help="Linhas lidas do ERP por lote.")
+        parser.add_argument(
+            "--completo",
+            action="store_true",
+            help="Descarta a réplica e a marca d'água e recarrega tudo.",
+        )
+
+    def handle(self, *args, **options):
+        service = ReplicacaoService()
+
+        try:
+            resultados = [
+                service.replicar(tipo, options["lote"], completo=options["completo"])
+                for tipo in options["tipo"] or DOCUMENTOS
+            ]
+        except ServiceError as e:
+            raise CommandError(str(e))
+
+        for resultado in resultados:
+            self.stdout.write(
+                f"{resultado['tipo']}: {resultado['documentos']} documentos, {resultado['linhas']} linhas "
+                f"(DocEntry até {resultado['ultimo_doc_entry']})"
+            )
+        self.stdout.write(self.style.SUCCESS("Replicação concluída."))
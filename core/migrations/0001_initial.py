@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MesMaterializado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('conjunto', models.CharField(max_length=40)),
+                ('ano_mes', models.CharField(max_length=7)),
+                ('linhas', models.PositiveIntegerField(default=0)),
+                ('carregado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('conjunto', 'ano_mes'), name='mes_materializado_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SaidaItemMes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano_mes', models.CharField(max_length=7)),
+                ('item_code', models.CharField(max_length=50)),
+                ('total', models.DecimalField(decimal_places=6, max_digits=25)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ano_mes', 'item_code'], name='core_saidai_ano_mes_926455_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TransportadoraMes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano_mes', models.CharField(max_length=7)),
+                ('card_code', models.CharField(max_length=50)),
+                ('card_name', models.CharField(blank=True, max_length=200, null=True)),
+                ('ano', models.PositiveSmallIntegerField()),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('total', models.PositiveIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ano_mes', 'card_code'], name='core_transp_ano_mes_97ee7f_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VendaItemMes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano_mes', models.CharField(max_length=7)),
+                ('item_code', models.CharField(max_length=50)),
+                ('item_name', models.CharField(blank=True, max_length=200, null=True)),
+                ('card_code', models.CharField(blank=True, max_length=50)),
+                ('quantidade_vendida', models.DecimalField(decimal_places=1, max_digits=19)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ano_mes', 'item_code'], name='core_vendai_ano_mes_b53da5_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-17 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarcaReplicacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=4, unique=True)),
+                ('ultimo_doc_entry', models.IntegerField(default=0)),
+                ('ultima_atualizacao', models.DateField(null=True)),
+                ('linhas', models.PositiveIntegerField(default=0)),
+                ('replicado_em', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LinhaDocumento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=4)),
+                ('doc_entry', models.IntegerField()),
+                ('line_num', models.IntegerField()),
+                ('doc_date', models.DateField()),
+                ('update_date', models.DateField(null=True)),
+                ('canceled', models.CharField(max_length=1)),
+                ('doc_status', models.CharField(max_length=1)),
+                ('card_code', models.CharField(max_length=50, null=True)),
+                ('item_code', models.CharField(max_length=50, null=True)),
+                ('quantity', models.DecimalField(decimal_places=6, max_digits=19, null=True)),
+                ('inv_qty', models.DecimalField(decimal_places=6, max_digits=19, null=True)),
+                ('line_total', models.DecimalField(decimal_places=6, max_digits=19, null=True)),
+                ('usage', models.CharField(max_length=10, null=True)),
+                ('line_status', models.CharField(max_length=1, null=True)),
+                ('act_del_date', models.DateField(null=True)),
+                ('ship_date', models.DateField(null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tipo', 'doc_date'], name='core_linhad_tipo_d5c7d2_idx'), models.Index(fields=['tipo', 'item_code', 'doc_date'], name='core_linhad_tipo_d4a75e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'doc_entry', 'line_num'), name='linha_documento_unica')],
+            },
+        ),
+    ]
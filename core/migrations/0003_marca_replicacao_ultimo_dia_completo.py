@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.db import migrations
+
+
+def ultimo_dia_completo(apps, schema_editor):
+    # A marca guardava o dia do início da execução (filtro UpdateDate >= marca); agora guarda
+    # o último dia já replicado por completo (filtro UpdateDate > marca), a véspera
+    MarcaReplicacao = apps.get_model("core", "MarcaReplicacao")
+    for marca in MarcaReplicacao.objects.exclude(ultima_atualizacao=None):
+        marca.ultima_atualizacao -= timedelta(days=1)
+        marca.save(update_fields=["ultima_atualizacao"])
+
+
+def inicio_da_execucao(apps, schema_editor):
+    MarcaReplicacao = apps.get_model("core", "MarcaReplicacao")
+    for marca in MarcaReplicacao.objects.exclude(ultima_atualizacao=None):
+        marca.ultima_atualizacao += timedelta(days=1)
+        marca.save(update_fields=["ultima_atualizacao"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_replicacao_documentos'),
+    ]
+
+    operations = [
+        migrations.RunPython(ultimo_dia_completo, inicio_da_execucao),
+    ]
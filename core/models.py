@@ -1,3 +1,99 @@
 from django.db import models
 
-# Create your models here.
+
+class MesMaterializado(models.Model):
+    """Registro de quais meses fechados de cada conjunto de agregados já estão carregados."""
+    conjunto = models.CharField(max_length=40)
+    ano_mes = models.CharField(max_length=7)
+    linhas = models.PositiveIntegerField(default=0)
+    carregado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["conjunto", "ano_mes"], name="mes_materializado_unico"),
+        ]
+
+    def __str__(self):
+        return f"{self.conjunto} {self.ano_mes}"
+
+
+class VendaItemMes(models.Model):
+    """Quantidade faturada por item e mês (base de `listar_pedidos_de_venda`)."""
+    ano_mes = models.CharField(max_length=7)
+    item_code = models.CharField(max_length=50)
+    item_name = models.CharField(max_length=200, null=True, blank=True)
+    card_code = models.CharField(max_length=50, blank=True)
+    quantidade_vendida = models.DecimalField(max_digits=19, decimal_places=1)
+
+    class Meta:
+        indexes = [models.Index(fields=["ano_mes", "item_code"])]
+
+
+class SaidaItemMes(models.Model):
+    """Saldo de saídas por item e mês (base de `listar_saida_de_produtos`)."""
+    ano_mes = models.CharField(max_length=7)
+    item_code = models.CharField(max_length=50)
+    total = models.DecimalField(max_digits=25, decimal_places=6)
+
+    class Meta:
+        indexes = [models.Index(fields=["ano_mes", "item_code"])]
+
+
+class TransportadoraMes(models.Model):
+    """Notas emitidas por transportadora e mês (base de `listar_transportadoras_mais_usadas`)."""
+    ano_mes = models.CharField(max_length=7)
+    card_code = models.CharField(max_length=50)
+    card_name = models.CharField(max_length=200, null=True, blank=True)
+    ano = models.PositiveSmallIntegerField()
+    mes = models.PositiveSmallIntegerField()
+    total = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=["ano_mes", "card_code"])]
+
+
+class LinhaDocumento(models.Model):
+    """
+    Linha de documento de marketing do SAP B1 (cabeçalho + linha) replicada do ERP.
+    `tipo` é a tabela de cabeçalho de origem (OINV, ORDR, ORIN, OPOR, ODLN, ORDN).
+    """
+    tipo = models.CharField(max_length=4)
+    doc_entry = models.IntegerField()
+    line_num = models.IntegerField()
+    doc_date = models.DateField()
+    update_date = models.DateField(null=True)
+    canceled = models.CharField(max_length=1)
+    doc_status = models.CharField(max_length=1)
+    card_code = models.CharField(max_length=50, null=True)
+    item_code = models.CharField(max_length=50, null=True)
+    quantity = models.DecimalField(max_digits=19, decimal_places=6, null=True)
+    inv_qty = models.DecimalField(max_digits=19, decimal_places=6, null=True)
+    line_total = models.DecimalField(max_digits=19, decimal_places=6, null=True)
+    usage = models.CharField(max_length=10, null=True)
+    line_status = models.CharField(max_length=1, null=True)
+    act_del_date = models.DateField(null=True)
+    ship_date = models.DateField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tipo", "doc_entry", "line_num"], name="linha_documento_unica"),
+        ]
+        indexes = [
+            models.Index(fields=["tipo", "doc_date"]),
+            models.Index(fields=["tipo", "item_code", "doc_date"]),
+        ]
+
+
+class MarcaReplicacao(models.Model):
+    """
+    Marca d'água da replicação de cada tipo de documento: último DocEntry replicado por
+    completo e último dia (UpdateDate) cujas alterações já foram todas replicadas.
+    """
+    tipo = models.CharField(max_length=4, unique=True)
+    ultimo_doc_entry = models.IntegerField(default=0)
+    ultima_atualizacao = models.DateField(null=True)
+    linhas = models.PositiveIntegerField(default=0)
+    replicado_em = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.tipo} #{self.ultimo_doc_entry}"
@@ -0,0 +1,140 @@
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Tuple
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import transaction
+
+from core.helpers.copy_helper import CopyHelper
+from core.helpers.date_helper import DateHelper
+from core.models import MesMaterializado, SaidaItemMes, TransportadoraMes, VendaItemMes
+
+from .exceptions import QueryError
+
+CONJUNTO_VENDAS = "vendas_item_mes"
+CONJUNTO_SAIDAS = "saidas_item_mes"
+CONJUNTO_TRANSPORTADORAS = "transportadoras_mes"
+
+# Modelo e colunas (nome no ERP -> campo do modelo) de cada conjunto
+CONJUNTOS = {
+    CONJUNTO_VENDAS: (VendaItemMes, {
+        "ItemCode": "item_code",
+        "ItemName": "item_name",
+        "CardCode": "card_code",
+        "AnoMes": "ano_mes",
+        "QuantidadeVendida": "quantidade_vendida",
+    }),
+    CONJUNTO_SAIDAS: (SaidaItemMes, {
+        "ItemCode": "item_code",
+        "AnoMes": "ano_mes",
+        "Total": "total",
+    }),
+    CONJUNTO_TRANSPORTADORAS: (TransportadoraMes, {
+        "CardCode": "card_code",
+        "CardName": "card_name",
+        "Total": "total",
+        "Mes": "mes",
+        "Ano": "ano",
+    }),
+}
+
+
+class AgregadosRepository:
+    """
+    Agregados mensais de meses fechados, guardados no PostgreSQL do Django.
+
+    Meses fechados não mudam no ERP, então são carregados uma vez (COPY) e lidos
+    daqui; só o mês corrente e os meses ainda não carregados vão ao SQL Server.
+    """
+
+    @property
+    def habilitado(self) -> bool:
+        return getattr(settings, "MATERIALIZACAO_AGREGADOS_ENABLED", False)
+
+    def planejar(
+        self,
+        conjunto: str,
+        data_inicio: date,
+        data_fim: date | None
+    ) -> Tuple[List[str], List[Tuple[date, date | None]]]:
+        """
+        Divide o intervalo entre meses materializados e trechos a consultar no ERP.
+
+        Só entram como materializados os meses fechados, inteiramente dentro do
+        intervalo e já carregados; cada mês fica em apenas uma das partes, então os
+        resultados podem ser concatenados sem reagregar.
+
+        Returns:
+            Tuple com (meses materializados "AAAA-MM", trechos (início, fim) para o ERP).
+            `data_fim` None significa intervalo aberto, e o último trecho também fica aberto.
+        """
+        mes_atual = DateHelper.first_day_of_month()
+        mes = data_inicio.replace(day=1)
+        if mes < data_inicio:
+            mes += relativedelta(months=1)
+
+        candidatos = []
+        while mes < mes_atual and (data_fim is None or mes + relativedelta(months=1) - timedelta(days=1) <= data_fim):
+            candidatos.append(mes)
+            mes += relativedelta(months=1)
+
+        carregados = set(
+            MesMaterializado.objects
+            .filter(conjunto=conjunto, ano_mes__in=[m.strftime("%Y-%m") for m in candidatos])
+            .values_list("ano_mes", flat=True)
+        )
+
+        meses, trechos = [], []
+        inicio_trecho = data_inicio
+        for mes in candidatos:
+            ano_mes = mes.strftime("%Y-%m")
+            if ano_mes not in carregados:
+                continue
+            if inicio_trecho < mes:
+                trechos.append((inicio_trecho, mes - timedelta(days=1)))
+            meses.append(ano_mes)
+            inicio_trecho = mes + relativedelta(months=1)
+
+        if data_fim is None or inicio_trecho <= data_fim:
+            trechos.append((inicio_trecho, data_fim))
+        return meses, trechos
+
+    def listar(self, conjunto: str, meses: Iterable[str]) -> List[Dict[str, Any]]:
+        """Linhas materializadas dos `meses`, com os mesmos nomes de coluna da consulta no ERP."""
+        modelo, colunas = self._conjunto(conjunto)
+        meses = list(meses)
+        if not meses:
+            return []
+        registros = modelo.objects.filter(ano_mes__in=meses).values(*colunas.values())
+        return [{coluna: registro[campo] for coluna, campo in colunas.items()} for registro in registros]
+
+    def meses_materializados(self, conjunto: str) -> List[str]:
+        self._conjunto(conjunto)
+        return list(
+            MesMaterializado.objects.filter(conjunto=conjunto).order_by("ano_mes").values_list("ano_mes", flat=True)
+        )
+
+    def substituir_mes(self, conjunto: str, ano_mes: str, linhas: List[Dict[str, Any]]) -> int:
+        """
+        Substitui as linhas de `ano_mes` pelas `linhas` vindas do ERP (mesmos nomes de coluna)
+        e marca o mês como materializado, tudo na mesma transação.
+        """
+        modelo, colunas = self._conjunto(conjunto)
+        registros = [
+            {**{campo: linha.get(coluna) for coluna, campo in colunas.items()}, "ano_mes": ano_mes}
+            for linha in linhas
+        ]
+        with transaction.atomic():
+            modelo.objects.filter(ano_mes=ano_mes).delete()
+            CopyHelper.copy_records(modelo, registros)
+            MesMaterializado.objects.update_or_create(
+                conjunto=conjunto,
+                ano_mes=ano_mes,
+                defaults={"linhas": len(registros)},
+            )
+        return len(registros)
+
+    def _conjunto(self, conjunto: str):
+        if conjunto not in CONJUNTOS:
+            raise QueryError(f"Conjunto de agregados desconhecido: {conjunto}")
+        return CONJUNTOS[conjunto]
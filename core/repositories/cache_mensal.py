@@ -0,0 +1,89 @@
+import inspect
+from datetime import date
+from typing import Any, Callable, Dict, List, Tuple
+
+from django.conf import settings
+
+from core.services.query_cache import query_cache
+
+from .particionamento import ConsultaTrecho, ParticionamentoMensal
+
+# Separa as linhas de um intervalo por mês: recebe (linhas, meses "AAAA-MM") e devolve {mês: linhas}
+DivisaoMensal = Callable[[List[Dict[str, Any]], List[str]], Dict[str, List[Dict[str, Any]]]]
+
+
+class CacheMensal:
+    """
+    Cache por mês de consultas agrupadas por mês (coluna AnoMes).
+
+    Um intervalo é dividido nos mesmos segmentos mensais de `ParticionamentoMensal` e cada
+    segmento é procurado no cache com a chave do método de partição (`*_particao`). Só os
+    meses que faltam vão ao ERP: cada sequência contínua de meses faltantes é uma consulta,
+    cujo resultado é separado por mês e guardado segmento a segmento. Assim janelas que se
+    sobrepõem (jan-jun e depois fev-jul) consultam só o que ainda não foi visto.
+    """
+
+    def __init__(self, particoes: ParticionamentoMensal):
+        self.particoes = particoes
+
+    @property
+    def habilitado(self) -> bool:
+        return query_cache.enabled and getattr(settings, "SQLSERVER_CACHE_MENSAL_ENABLED", True)
+
+    def consultar(
+        self,
+        trechos: List[Tuple[date, date]],
+        consulta: ConsultaTrecho,
+        consulta_particao: ConsultaTrecho,
+        dividir: DivisaoMensal
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Linhas de cada segmento mensal dos `trechos` (mesmo formato de
+        `ParticionamentoMensal.consultar`, que é usado quando o cache está desligado).
+        Trechos vazios (início depois do fim) vão direto para `consulta`.
+        """
+        if not self.habilitado:
+            return self.particoes.consultar(trechos, consulta, consulta_particao)
+
+        vazios = [consulta(inicio, fim)[0] for inicio, fim in trechos if inicio > fim]
+        segmentos = self.particoes.dividir(trechos)
+        partes = {}
+        for segmento in segmentos:
+            entrada = query_cache.lookup(consulta_particao.__qualname__, self._params(consulta_particao, segmento))
+            if entrada is not None and not entrada.is_stale:
+                partes[segmento] = entrada.value[0]
+
+        faltantes = [segmento for segmento in segmentos if segmento not in partes]
+        if faltantes and self.particoes.aplicavel(faltantes):
+            # Muitos meses faltando: partições paralelas, que se guardam no cache sozinhas
+            partes.update(zip(faltantes, self.particoes.executar(consulta_particao, faltantes)))
+        else:
+            for sequencia in self._sequencias(faltantes):
+                linhas, sql = consulta(sequencia[0][0], sequencia[-1][1])
+                por_mes = dividir(linhas, [inicio.strftime("%Y-%m") for inicio, _ in sequencia])
+                for segmento in sequencia:
+                    partes[segmento] = por_mes[segmento[0].strftime("%Y-%m")]
+                    query_cache.set(
+                        consulta_particao.__qualname__,
+                        self._params(consulta_particao, segmento),
+                        (partes[segmento], sql),
+                        stale_ttl=query_cache.default_stale_ttl,
+                    )
+
+        return vazios + [partes[segmento] for segmento in segmentos]
+
+    def _params(self, consulta_particao: ConsultaTrecho, segmento: Tuple[date, date]) -> Dict[str, Any]:
+        """Argumentos normalizados como o `@cached_query` do método de partição os vê."""
+        bound = inspect.signature(consulta_particao).bind(*segmento)
+        bound.apply_defaults()
+        return dict(bound.arguments)
+
+    def _sequencias(self, segmentos: List[Tuple[date, date]]) -> List[List[Tuple[date, date]]]:
+        """Agrupa segmentos consecutivos (cada um começa no dia seguinte ao fim do anterior)."""
+        sequencias = []
+        for segmento in segmentos:
+            if sequencias and (segmento[0] - sequencias[-1][-1][1]).days == 1:
+                sequencias[-1].append(segmento)
+            else:
+                sequencias.append([segmento])
+        return sequencias
@@ -1,35 +1,78 @@
+from typing import List
+
 from core.services.sqlserver_cliente import default_sql_server_client
-from .decorators import handle_db_errors
+from core.services.async_sqlserver_cliente import default_async_sql_server_client
+from core.helpers.query_builder import QueryBuilder
+from core.helpers.sql_helper import SQLHelper
+from .decorators import cached_query, handle_db_errors
 
 class DashboardRepository:
     def __init__(self):
         self.cliente = default_sql_server_client
-        
-    
-    @handle_db_errors 
-    def listar_notas_fiscais(self, ano : int = None) -> tuple[list[dict], str]:
-
-        sql = """
-            SELECT
-                COUNT(distinct(OINV.Serial)) AS quantidade_notas,
-                ,CAST(SUM(INV1.Quantity) AS int) as quantidade_itens,
-                ,OINV.DocDate as data_emissao
-                ,DATEPART(MONTH, OINV.DocDate) as mes_emissao
-                ,DATEPART(WEEK, OINV.DocDate) as semana_emissao
-                ,DATEPART(YEAR, OINV.DocDate) as ano_emissao
-            FROM OINV OINV
-            JOIN INV1 INV1 ON OINV.DocEntry = INV1.DocEntry
-            WHERE 
-                OINV.CANCELED = 'N'
-                AND OINV.InvntSttus = 'O'
-            GROUP BY
-                OINV.DocDate
-            ORDER BY
-                OINV.DocDate
+        self.cliente_async = default_async_sql_server_client
+
+
+    @cached_query()
+    @handle_db_errors
+    def listar_notas_fiscais(
+        self,
+        ano: int = None,
+        mes_inicio: str = None,
+        mes_fim: str = None,
+        semana: int = None,
+        grupos_itens: List[int] = None,
+        card_code: str = None
+    ) -> tuple[list[dict], str]:
+        """
+        Notas fiscais e itens faturados por dia de emissão.
+
+        Os filtros são opcionais e combinados com AND, todos aplicados no WHERE:
+        - ano: ano de emissão;
+        - mes_inicio/mes_fim: meses de emissão ("AAAA-MM", inclusive);
+        - semana: semana do ano (DATEPART(WEEK)), exige `ano`;
+        - grupos_itens: grupos de itens (OITM.ItmsGrpCod) das linhas consideradas;
+        - card_code: parceiro de negócio da nota.
         """
-        parameters = []
-        if ano is not None:
-            sql += " AND YEAR(OINV.DocDate) = ?"
-            parameters.append(ano)
-            
-        return self.cliente.fetch_all(sql, parameters), sql
+        sql, params = self._montar_sql_notas_fiscais(ano, mes_inicio, mes_fim, semana, grupos_itens, card_code)
+        return self.cliente.fetch_all(sql, params), sql
+
+    def _montar_sql_notas_fiscais(
+        self,
+        ano: int = None,
+        mes_inicio: str = None,
+        mes_fim: str = None,
+        semana: int = None,
+        grupos_itens: List[int] = None,
+        card_code: str = None
+    ) -> tuple[str, list]:
+        query = (
+            QueryBuilder("OINV OINV")
+            .select(
+                "COUNT(DISTINCT OINV.Serial) AS quantidade_notas",
+                "CAST(SUM(INV1.Quantity) AS int) AS quantidade_itens",
+                "OINV.DocDate AS data_emissao",
+                "DATEPART(MONTH, OINV.DocDate) AS mes_emissao",
+                "DATEPART(WEEK, OINV.DocDate) AS semana_emissao",
+                "DATEPART(YEAR, OINV.DocDate) AS ano_emissao",
+            )
+            .join("INNER JOIN INV1 INV1 ON OINV.DocEntry = INV1.DocEntry")
+            .where("OINV.CANCELED = 'N'")
+            .where("OINV.InvntSttus = 'O'")
+            .year("OINV.DocDate", ano)
+            .month_range("OINV.DocDate", mes_inicio, mes_fim)
+            .week("OINV.DocDate", ano, semana)
+            .equals("OINV.CardCode", card_code)
+            .group_by("OINV.DocDate")
+            .order_by("OINV.DocDate")
+        )
+        if grupos_itens is not None:
+            query.join("INNER JOIN OITM OITM ON INV1.ItemCode = OITM.ItemCode")
+            query.in_("OITM.ItmsGrpCod", grupos_itens)
+
+        sql, params = query.build()
+        return SQLHelper.apply_query_hints(sql, "DashboardRepository.listar_notas_fiscais"), params
+
+    # Variantes assíncronas: executam o método síncrono no executor dedicado do cliente
+
+    async def listar_notas_fiscais_async(self, ano: int = None, **filtros) -> tuple[list[dict], str]:
+        return await self.cliente_async.run(self.listar_notas_fiscais, ano=ano, **filtros)
@@ -1,33 +1,226 @@
 import functools
+import inspect
 import pyodbc
+from typing import Any, Callable, Dict, Iterable, Iterator, TypeVar
+
+from django.conf import settings
+
+from core.helpers.date_helper import DateHelper
+from core.services.query_cache import params_digest, query_cache, query_cache_refresher
+from core.services.query_metrics import query_metrics
+from core.services.single_flight import SingleFlightTimeoutError, query_single_flight
+from core.services.sqlserver_pool import PoolTimeoutError
 from .exceptions import ConnectionError, QueryError, RepositoryError
+
+T = TypeVar("T")
+
+# Retorno de `cached` quando não há entrada fresca (None é um valor válido de retorno)
+MISSING = object()
+
+
+def translate_db_error(error: Exception) -> RepositoryError:
+    """
+    Converte uma exceção de pyodbc (ou inesperada) na exceção de repositório
+    correspondente, preservando a mensagem original. Exceções que já são de
+    repositório (ex.: vindas de outro método decorado) são devolvidas sem alteração.
+    """
+    if isinstance(error, RepositoryError):
+        return error
+    if isinstance(error, PoolTimeoutError):
+        return ConnectionError(f"Pool de conexões esgotado: {error}")
+    if isinstance(error, SingleFlightTimeoutError):
+        return QueryError(f"Tempo esgotado aguardando consulta idêntica em andamento: {error}")
+    if isinstance(error, pyodbc.InterfaceError):
+        return ConnectionError(f"Falha na configuração do driver ODBC: {error}")
+    if isinstance(error, pyodbc.OperationalError):
+        return ConnectionError(f"Não foi possível conectar ao SQL Server: {error}")
+    if isinstance(error, pyodbc.ProgrammingError):
+        return QueryError(f"Erro na query SQL: {error}")
+    if isinstance(error, pyodbc.DataError):
+        return QueryError(f"Erro de dados na query: {error}")
+    if isinstance(error, pyodbc.DatabaseError):
+        return RepositoryError(f"Erro no banco de dados: {error}")
+    if isinstance(error, ValueError):
+        return QueryError(f"Erro de valor: {error}")
+    return RepositoryError(f"Erro inesperado no repositório: {error}")
+
+
 def handle_db_errors(func):
     """
     Decorator que trata exceções de pyodbc e as transforma
     em exceções mais amigáveis para a camada de serviço.
+    
+    Cada chamada também é registrada em `query_metrics` (tempos de conexão,
+    execução e leitura, linhas, bytes e classe do erro original).
     """
+    method = func.__qualname__
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                with query_metrics.track(method):
+                    return await func(*args, **kwargs)
+            except Exception as e:
+                translated = translate_db_error(e)
+                if translated is e:
+                    raise
+                raise translated from e
+        
+        return async_wrapper
+    
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         try:
-            return func(*args, **kwargs)
+            with query_metrics.track(method):
+                return func(*args, **kwargs)
+        except Exception as e:
+            translated = translate_db_error(e)
+            if translated is e:
+                raise
+            raise translated from e
+    
+    return wrapper
+
+
+def janela_padrao(meses: int) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Normalização de chave (`cached_query(normalizar=...)`) para métodos com `data_inicio` e
+    `data_fim` que usam `DateHelper.resolve_window(..., meses)`: datas ausentes entram na chave
+    já resolvidas. Chamadas sem datas e com as mesmas datas explícitas compartilham a entrada,
+    e a chave muda quando a janela padrão muda (virada do dia ou do mês).
+    """
+    def normalizar(params: Dict[str, Any]) -> Dict[str, Any]:
+        params = dict(params)
+        if params.get("data_inicio") is None:
+            params["data_inicio"] = DateHelper.first_day_of_month(-meses).strftime(DateHelper.DEFAULT_FORMAT)
+        if params.get("data_fim") is None:
+            params["data_fim"] = DateHelper.window_end().strftime(DateHelper.DEFAULT_FORMAT)
+        return params
+    
+    return normalizar
+
+
+def cached_query(
+    ttl: int | None = None,
+    stale_while_revalidate: bool = False,
+    normalizar: Callable[[Dict[str, Any]], Dict[str, Any]] | None = None
+):
+    """
+    Decorator que guarda o retorno do método de repositório em `query_cache`,
+    chaveado pelo nome do método e pelos argumentos normalizados (padrões incluídos).
+    
+    Em uma falta, chamadas idênticas e simultâneas são coalescidas (`query_single_flight`):
+    só a primeira vai ao banco, as demais aguardam até `SQLSERVER_SINGLE_FLIGHT_TIMEOUT`
+    segundos e recebem o mesmo resultado ou a mesma exceção.
+    
+    Com `stale_while_revalidate`, a entrada continua servível por mais
+    `SQLSERVER_QUERY_CACHE_STALE_TTL` segundos depois de vencer: quem a lê recebe o
+    valor vencido na hora e a atualização roda em segundo plano (`query_cache_refresher`).
+    Só uma falta depois desse prazo faz o chamador esperar pela consulta.
+    
+    Deve ficar acima de `handle_db_errors`, para que acertos no cache não sejam
+    contados como consultas nas métricas. Exceções não são guardadas.
+    
+    :param ttl: Validade em segundos (padrão: `SQLSERVER_QUERY_CACHE_TTL`).
+    :param stale_while_revalidate: Serve o valor vencido enquanto atualiza em segundo plano.
+    :param normalizar: Ajusta os argumentos usados na chave (ex.: `janela_padrao`).
+    
+    O método decorado ganha `invalidate()`, que descarta as entradas dele, e
+    `cached(...)`/`store(valor, ...)`, que leem e gravam a entrada de uma chamada
+    sem executá-la (ex.: consultas em lote que reaproveitam as entradas de cada método).
+    """
+    def decorator(func):
+        method = func.__qualname__
+        signature = inspect.signature(func)
         
-        except pyodbc.InterfaceError as e:
-            raise ConnectionError(f"Falha na configuração do driver ODBC: {e}") from e
+        def key_params(*args, **kwargs) -> Dict[str, Any]:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = {name: value for name, value in bound.arguments.items() if name != "self"}
+            if normalizar is not None:
+                params = normalizar(params)
+            return params
         
-        except pyodbc.OperationalError as e:
-            raise ConnectionError(f"Não foi possível conectar ao SQL Server: {e}") from e
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            use_cache = query_cache.enabled
+            coalesce = getattr(settings, "SQLSERVER_SINGLE_FLIGHT_ENABLED", False)
+            if not (use_cache or coalesce):
+                return func(*args, **kwargs)
+            
+            params = key_params(*args, **kwargs)
+            flight_key = f"{method}:{params_digest(params)}"
+            
+            def compute():
+                value = func(*args, **kwargs)
+                if use_cache:
+                    stale_ttl = query_cache.default_stale_ttl if stale_while_revalidate else 0
+                    query_cache.set(method, params, value, ttl, stale_ttl=stale_ttl)
+                return value
+            
+            def run():
+                if not coalesce:
+                    return compute()
+                return query_single_flight.do(
+                    flight_key,
+                    compute,
+                    timeout=getattr(settings, "SQLSERVER_SINGLE_FLIGHT_TIMEOUT", None),
+                )
+            
+            if use_cache:
+                entry = query_cache.lookup(method, params)
+                if entry is not None:
+                    if entry.is_stale:
+                        query_cache_refresher.submit(flight_key, run)
+                    return entry.value
+            
+            try:
+                return run()
+            except SingleFlightTimeoutError as e:
+                raise translate_db_error(e) from e
         
-        except pyodbc.ProgrammingError as e:
-            raise QueryError(f"Erro na query SQL: {e}") from e
+        def cached(*args, **kwargs):
+            """Valor guardado e ainda fresco para os argumentos (sem `self`), ou `MISSING`."""
+            if not query_cache.enabled:
+                return MISSING
+            entry = query_cache.lookup(method, key_params(None, *args, **kwargs))
+            if entry is None or entry.is_stale:
+                return MISSING
+            return entry.value
         
-        except pyodbc.DataError as e:
-            raise QueryError(f"Erro de dados na query: {e}") from e
+        def store(value, *args, **kwargs) -> bool:
+            """Guarda `value` como retorno da chamada com os argumentos (sem `self`)."""
+            if not query_cache.enabled:
+                return False
+            stale_ttl = query_cache.default_stale_ttl if stale_while_revalidate else 0
+            return query_cache.set(method, key_params(None, *args, **kwargs), value, ttl, stale_ttl=stale_ttl)
         
-        except pyodbc.DatabaseError as e:
-            raise RepositoryError(f"Erro no banco de dados: {e}") from e
-        except ValueError as e:
-            raise QueryError(f"Erro de valor: {e}") from e
-        except Exception as e:
-            raise RepositoryError(f"Erro inesperado no repositório: {e}") from e
+        wrapper.invalidate = lambda: query_cache.invalidate(method)
+        wrapper.cached = cached
+        wrapper.store = store
+        return wrapper
     
-    return wrapper
\ No newline at end of file
+    return decorator
+
+
+def stream_db_errors(iterable: Iterable[T]) -> Iterator[T]:
+    """
+    Equivalente de `handle_db_errors` para resultados em streaming: as exceções
+    levantadas durante a iteração (e não só na chamada) são traduzidas.
+    
+    Chamado dentro de um método com `handle_db_errors`, também leva a medição do
+    método para a iteração (`query_metrics.track_stream`): conexão, execução,
+    leitura e linhas são registradas quando o gerador é consumido.
+    """
+    return _translate_stream_errors(query_metrics.track_stream(iterable))
+
+
+def _translate_stream_errors(iterable: Iterable[T]) -> Iterator[T]:
+    try:
+        yield from iterable
+    except Exception as e:
+        translated = translate_db_error(e)
+        if translated is e:
+            raise
+        raise translated from e
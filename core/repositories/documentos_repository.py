@@ -0,0 +1,82 @@
+from datetime import date
+from typing import Iterator
+
+from core.services.sqlserver_cliente import default_sql_server_client
+from core.helpers.date_helper import DateHelper
+from core.helpers.sql_helper import SQLHelper
+
+from .decorators import handle_db_errors, stream_db_errors
+from .exceptions import QueryError
+
+# Tabela de cabeçalho -> tabela de linhas dos documentos replicados
+DOCUMENTOS = {
+    "OINV": "INV1",  # Notas fiscais de saída
+    "ORIN": "RIN1",  # Devoluções de nota fiscal
+    "ORDR": "RDR1",  # Pedidos de venda
+    "OPOR": "POR1",  # Pedidos de compra
+    "ODLN": "DLN1",  # Entregas
+    "ORDN": "RDN1",  # Devoluções de entrega
+}
+
+
+class DocumentosRepository:
+    """Leitura incremental das linhas de documentos do ERP, para a replicação local."""
+
+    def __init__(self):
+        self.cliente = default_sql_server_client
+
+    @handle_db_errors
+    def iterar_linhas_alteradas(
+        self,
+        tipo: str,
+        ultimo_doc_entry: int = 0,
+        ultima_atualizacao: date | None = None,
+        tamanho_lote: int | None = None
+    ) -> tuple[Iterator[list[dict]], str]:
+        """
+        Linhas dos documentos `tipo` criados depois de `ultimo_doc_entry` ou atualizados
+        depois de `ultima_atualizacao` (UpdateDate > último dia já replicado), em lotes,
+        ordenadas por DocEntry/LineNum.
+
+        Cada documento vem com todas as suas linhas, para que a réplica possa substituí-lo
+        inteiro (cancelamentos e fechamentos alteram documentos antigos).
+        """
+        sql = self._montar_sql_linhas_alteradas(tipo)
+        params = [ultimo_doc_entry, ultima_atualizacao or DateHelper.MAX_DATE]
+        return stream_db_errors(self.cliente.fetch_iter(sql, params, arraysize=tamanho_lote)), sql
+
+    def _montar_sql_linhas_alteradas(self, tipo: str) -> str:
+        if tipo not in DOCUMENTOS:
+            raise QueryError(f"Tipo de documento não replicado: {tipo}")
+
+        # Nomes das tabelas vêm da lista fixa acima; só os valores são parâmetros
+        sql = f"""
+        DECLARE @UltimoDocEntry INT = ?;
+        DECLARE @UltimaAtualizacao DATE = ?;
+
+        SELECT
+            H.DocEntry,
+            L.LineNum,
+            H.DocDate,
+            H.UpdateDate,
+            H.CANCELED AS Canceled,
+            H.DocStatus,
+            H.CardCode,
+            L.ItemCode,
+            L.Quantity,
+            L.InvQty,
+            L.LineTotal,
+            L.Usage,
+            L.LineStatus,
+            L.ActDelDate,
+            L.ShipDate
+        FROM {tipo} H
+        INNER JOIN {DOCUMENTOS[tipo]} L ON H.DocEntry = L.DocEntry
+        WHERE
+            H.DocEntry > @UltimoDocEntry
+            OR H.UpdateDate > @UltimaAtualizacao
+        ORDER BY
+            H.DocEntry,
+            L.LineNum
+        """
+        return SQLHelper.apply_query_hints(sql, f"DocumentosRepository.{tipo}")
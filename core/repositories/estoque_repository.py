@@ -1,20 +1,47 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterator
+
 from core.services.sqlserver_cliente import default_sql_server_client
+from core.services.async_sqlserver_cliente import default_async_sql_server_client
 from core.helpers.date_helper import DateHelper
+from core.helpers.sql_helper import SQLHelper
+
+from .agregados_repository import CONJUNTO_SAIDAS, CONJUNTO_VENDAS, AgregadosRepository
+from .cache_mensal import CacheMensal
+from .decorators import MISSING, cached_query, handle_db_errors, janela_padrao, stream_db_errors
+from .particionamento import ParticionamentoMensal
 
-from .decorators import handle_db_errors
+# Meses da janela padrão (sem datas) de pedidos de venda e saída de produtos
+MESES_JANELA_PADRAO = 6
 
 
 class EstoqueRepository:
     def __init__(self):
         self.cliente = default_sql_server_client
+        self.cliente_async = default_async_sql_server_client
+        self.agregados = AgregadosRepository()
+        self.particoes = ParticionamentoMensal(self.cliente)
+        self.cache_mensal = CacheMensal(self.particoes)
     
+    @cached_query()
     @handle_db_errors
     def listar_hits(self):
+        sql, params = self._montar_sql_hits()
+        return self.cliente.fetch_all(sql, params), sql
+    
+    def _montar_sql_hits(self) -> tuple[str, list]:
+        params = [
+            DateHelper.today(),
+            DateHelper.first_day_of_month(-12),
+            DateHelper.first_day_of_month(-5),
+            DateHelper.days_ago(30),
+        ]
         sql = """
-        DECLARE @DataHoje DATE = GETDATE();
-        DECLARE @DataInicio12M DATE = DATEADD(MONTH, -12, DATEADD(MONTH, DATEDIFF(MONTH, 0, GETDATE()), 0));
-        DECLARE @DataInicio6M DATE = DATEADD(MONTH, -5, DATEADD(MONTH, DATEDIFF(MONTH, 0, GETDATE()), 0));
-        DECLARE @DataInicio30D DATE = DATEADD(DAY, -30, GETDATE()); 
+        DECLARE @DataHoje DATE = ?;
+        DECLARE @DataInicio12M DATE = ?;
+        DECLARE @DataInicio6M DATE = ?;
+        DECLARE @DataInicio30D DATE = ?;
 
         WITH Pedidos AS (
             SELECT
@@ -34,49 +61,74 @@ class EstoqueRepository:
             WHERE
                 ORDR.DocDate BETWEEN @DataInicio12M AND @DataHoje 
                 AND ORDR.CANCELED = 'N'
-        )
-        SELECT
-            A.ItemCode AS ItemCode,
-            A.ItemName AS ItemName,
-            ISNULL(A.CardCode, '') AS CardCode, 
-            
-            COUNT(A.DocEntry) AS 'Hits12Meses',
-
-            COUNT(CASE
-                WHEN A.DocDate BETWEEN @DataInicio30D AND @DataHoje
-                THEN A.DocEntry
-            END) AS 'Hits30Dias',
+        ),
+        -- Meses com venda por item nos últimos 6 meses, agregados uma única vez
+        -- (em vez de uma subquery correlacionada por item)
+        VendasPorItem AS (
+            SELECT
+                INV1.ItemCode,
+                COUNT(DISTINCT CONVERT(VARCHAR(7), OINV.DocDate, 120)) AS MesesComVenda
+            FROM OINV OINV
+            INNER JOIN INV1 INV1 ON OINV.DocEntry = INV1.DocEntry
+            WHERE
+                OINV.DocDate BETWEEN @DataInicio6M AND @DataHoje
+                AND OINV.CANCELED = 'N'
+            GROUP BY
+                INV1.ItemCode
+        ),
+        HitsPorItem AS (
+            SELECT
+                A.ItemCode,
+                A.ItemName,
+                A.CardCode,
+                
+                COUNT(A.DocEntry) AS Hits12Meses,
 
-            COUNT(DISTINCT CASE
-                WHEN A.DocDate BETWEEN @DataInicio6M AND @DataHoje
-                THEN A.AnoMes
-            END) AS 'Pedidos06Meses',
-            
-            (
-                SELECT COUNT(DISTINCT CONVERT(VARCHAR(7), T_OINV.DocDate, 120))
-                FROM OINV T_OINV
-                INNER JOIN INV1 T_INV1 ON T_OINV.DocEntry = T_INV1.DocEntry
-                WHERE T_INV1.ItemCode = A.ItemCode
-                AND T_OINV.DocDate BETWEEN @DataInicio6M AND @DataHoje
-                AND T_OINV.CANCELED = 'N'
-            ) AS 'Vendas06Meses'
+                COUNT(CASE
+                    WHEN A.DocDate BETWEEN @DataInicio30D AND @DataHoje
+                    THEN A.DocEntry
+                END) AS Hits30Dias,
 
+                COUNT(DISTINCT CASE
+                    WHEN A.DocDate BETWEEN @DataInicio6M AND @DataHoje
+                    THEN A.AnoMes
+                END) AS Pedidos06Meses
+            FROM
+                Pedidos A
+            GROUP BY
+                A.ItemCode,
+                A.ItemName,
+                A.CardCode
+        )
+        SELECT
+            H.ItemCode AS ItemCode,
+            H.ItemName AS ItemName,
+            ISNULL(H.CardCode, '') AS CardCode, 
+            H.Hits12Meses AS 'Hits12Meses',
+            H.Hits30Dias AS 'Hits30Dias',
+            H.Pedidos06Meses AS 'Pedidos06Meses',
+            ISNULL(V.MesesComVenda, 0) AS 'Vendas06Meses'
         FROM
-            Pedidos A
-        GROUP BY
-            A.ItemCode,
-            A.ItemName,
-            A.CardCode
+            HitsPorItem H
+        LEFT JOIN
+            VendasPorItem V ON V.ItemCode = H.ItemCode
         ORDER BY
             'Hits12Meses' DESC;
         """
-        return self.cliente.fetch_all(sql), sql
+        sql = SQLHelper.apply_query_hints(sql, "EstoqueRepository.listar_hits")
+        return sql, params
     
+    @cached_query()
     @handle_db_errors
     def listar_pedidos_em_transito(self):
+        sql, params = self._montar_sql_pedidos_em_transito()
+        return self.cliente.fetch_all(sql, params), sql
+    
+    def _montar_sql_pedidos_em_transito(self) -> tuple[str, list]:
+        params = [DateHelper.first_day_of_month(), DateHelper.first_day_of_month(12)]
         sql = """
-        DECLARE @DataInicio DATE =  DATEADD(MONTH, DATEDIFF(MONTH, 0, GETDATE()), 0);
-        DECLARE @DataFim DATE = DATEADD(MONTH, 12, DATEADD(MONTH, DATEDIFF(MONTH, 0, GETDATE()), 0));
+        DECLARE @DataInicio DATE = ?;
+        DECLARE @DataFim DATE = ?;
 
         SELECT
             POR1.ItemCode AS ItemCode,
@@ -101,23 +153,60 @@ class EstoqueRepository:
             POR1.ItemCode,
             AnoMes;
         """
-        return self.cliente.fetch_all(sql), sql
+        sql = SQLHelper.apply_query_hints(sql, "EstoqueRepository.listar_pedidos_em_transito")
+        return sql, params
     
+    @cached_query(stale_while_revalidate=True, normalizar=janela_padrao(MESES_JANELA_PADRAO))
     @handle_db_errors
     def listar_pedidos_de_venda(self, data_inicio: str = None, data_fim: str = None) -> tuple[list[dict], str]:
+        inicio, fim = self._periodo_pedidos_de_venda(data_inicio, data_fim)
         
-        data_inicio_sql, data_fim_sql, _, _ = DateHelper.prepare_date_params(
-            data_inicio,
-            data_fim,
-            default_inicio_sql="DATEADD(MONTH, -6, DATEADD(MONTH, DATEDIFF(MONTH, 0, GETDATE()), 0))",
-            default_fim_sql="GETDATE()",
-            default_inicio_months_offset=6,
-            default_inicio_day=1
-        )
-            
-        sql = f"""
-        DECLARE @DataFim DATE = {data_fim_sql};
-        DECLARE @DataInicio DATE = {data_inicio_sql};
+        meses, trechos = [], [(inicio, fim)]
+        if self.agregados.habilitado:
+            meses, trechos = self.agregados.planejar(CONJUNTO_VENDAS, inicio, fim)
+        
+        if meses or self.particoes.aplicavel(trechos) or self.cache_mensal.habilitado:
+            # Meses fechados vêm do banco local; dos trechos restantes, os meses que já estão no
+            # cache mensal são reaproveitados e só os demais vão ao ERP (em partições mensais
+            # paralelas, se forem muitos). Cada mês fica em uma só parte.
+            dados = self.agregados.listar(CONJUNTO_VENDAS, meses)
+            for linhas in self.cache_mensal.consultar(
+                trechos,
+                self.listar_pedidos_de_venda_erp,
+                self.listar_pedidos_de_venda_particao,
+                self._dividir_pedidos_de_venda,
+            ):
+                dados.extend(linhas)
+            dados.sort(key=lambda linha: (linha["ItemCode"], linha["AnoMes"]))
+            return dados, self._montar_sql_pedidos_de_venda()
+        
+        return self.listar_pedidos_de_venda_erp(inicio, fim)
+    
+    @handle_db_errors
+    def listar_pedidos_de_venda_erp(self, data_inicio: date, data_fim: date) -> tuple[list[dict], str]:
+        """Consulta `listar_pedidos_de_venda` direto no ERP, sem os meses materializados."""
+        sql = self._montar_sql_pedidos_de_venda()
+        return self.cliente.fetch_all(sql, [data_fim, data_inicio]), sql
+    
+    @cached_query(stale_while_revalidate=True)
+    def listar_pedidos_de_venda_particao(self, data_inicio: date, data_fim: date) -> tuple[list[dict], str]:
+        """Uma partição mensal de `listar_pedidos_de_venda`, guardada no cache separadamente."""
+        return self.listar_pedidos_de_venda_erp(data_inicio, data_fim)
+    
+    def _dividir_pedidos_de_venda(self, linhas: list[dict], meses: list[str]) -> dict[str, list[dict]]:
+        """Separa o resultado de um intervalo nas linhas de cada mês (`AnoMes`)."""
+        por_mes = {mes: [] for mes in meses}
+        for linha in linhas:
+            por_mes[linha["AnoMes"]].append(linha)
+        return por_mes
+    
+    def _periodo_pedidos_de_venda(self, data_inicio: str | None, data_fim: str | None) -> tuple[date, date]:
+        return DateHelper.resolve_window(data_inicio, data_fim, MESES_JANELA_PADRAO)
+    
+    def _montar_sql_pedidos_de_venda(self) -> str:
+        sql = """
+        DECLARE @DataFim DATE = ?;
+        DECLARE @DataInicio DATE = ?;
 
         SELECT
             INV1.ItemCode AS ItemCode,
@@ -144,22 +233,120 @@ class EstoqueRepository:
             INV1.ItemCode,
             CONVERT(VARCHAR(7), OINV.DocDate, 120)
         """
-        return self.cliente.fetch_all(sql), sql
+        return SQLHelper.apply_query_hints(sql, "EstoqueRepository.listar_pedidos_de_venda")
     
+    @cached_query(stale_while_revalidate=True, normalizar=janela_padrao(MESES_JANELA_PADRAO))
     @handle_db_errors
     def listar_saida_de_produtos(self, data_inicio: str = None, data_fim: str = None) -> tuple[list[dict], str]:
+        inicio, fim = DateHelper.resolve_window(data_inicio, data_fim, MESES_JANELA_PADRAO)
         
-        data_inicio_sql, data_fim_sql, _, _ = DateHelper.prepare_date_params(
-            data_inicio,
-            data_fim,
-            default_inicio_sql="DATEADD(MONTH, -6, GETDATE())",
-            default_fim_sql="GETDATE()",
-            default_inicio_months_offset=6
-        )
+        meses, trechos = [], [(inicio, fim)]
+        if self.agregados.habilitado:
+            meses, trechos = self.agregados.planejar(CONJUNTO_SAIDAS, inicio, fim)
+        
+        if meses or self.particoes.aplicavel(trechos) or self.cache_mensal.habilitado:
+            return self._combinar_saida_de_produtos(meses, trechos, fim), self._montar_sql_saida_de_produtos()
         
-        sql = f"""
-        DECLARE @DataInicio DATE = {data_inicio_sql};
-        DECLARE @DataFim DATE = {data_fim_sql};
+        return self.listar_saida_de_produtos_erp(inicio, fim)
+    
+    @handle_db_errors
+    def listar_saida_de_produtos_erp(self, data_inicio: date, data_fim: date) -> tuple[list[dict], str]:
+        """Consulta `listar_saida_de_produtos` direto no ERP, sem os meses materializados."""
+        sql = self._montar_sql_saida_de_produtos()
+        return self.cliente.fetch_all(sql, [data_inicio, data_fim]), sql
+    
+    @cached_query(stale_while_revalidate=True)
+    def listar_saida_de_produtos_particao(self, data_inicio: date, data_fim: date) -> tuple[list[dict], str]:
+        """Uma partição mensal de `listar_saida_de_produtos`, guardada no cache separadamente."""
+        return self.listar_saida_de_produtos_erp(data_inicio, data_fim)
+    
+    def _dividir_saida_de_produtos(self, linhas: list[dict], meses: list[str]) -> dict[str, list[dict]]:
+        """
+        Separa o resultado de um intervalo no que a consulta de cada mês devolveria: os
+        movimentos do mês e, para os produtos sem movimento nele, a linha com `AnoMes` nulo.
+        """
+        produtos, por_mes = {}, {mes: [] for mes in meses}
+        for linha in linhas:
+            produtos.setdefault(linha["ItemCode"], linha)
+            if linha["AnoMes"] is not None:
+                por_mes[linha["AnoMes"]].append(linha)
+        
+        for mes, movimentos in por_mes.items():
+            com_movimento = {linha["ItemCode"] for linha in movimentos}
+            movimentos.extend(
+                {**produto, "AnoMes": None, "Total": Decimal(0)}
+                for item, produto in produtos.items() if item not in com_movimento
+            )
+            movimentos.sort(key=lambda linha: (linha["ItemCode"], linha["AnoMes"] or ""))
+        return por_mes
+    
+    def _combinar_saida_de_produtos(
+        self,
+        meses: list[str],
+        trechos: list[tuple[date, date]],
+        data_fim: date
+    ) -> list[dict]:
+        """
+        Junta os meses materializados com os meses dos trechos restantes (do cache mensal,
+        do ERP ou de partições mensais paralelas, quando o intervalo é longo).
+        
+        A lista de produtos (e seus nomes/fornecedores) sempre vem do ERP: sem trecho
+        restante, consulta um intervalo vazio, que devolve só os produtos. Produtos sem
+        nenhum movimento no período ficam com uma única linha `AnoMes` nula, como na query.
+        """
+        if not trechos:
+            trechos = [(data_fim + timedelta(days=1), data_fim)]
+        
+        produtos, sem_movimento, dados = {}, {}, []
+        for linhas in self.cache_mensal.consultar(
+            trechos,
+            self.listar_saida_de_produtos_erp,
+            self.listar_saida_de_produtos_particao,
+            self._dividir_saida_de_produtos,
+        ):
+            for linha in linhas:
+                produtos.setdefault(linha["ItemCode"], linha)
+                if linha["AnoMes"] is None:
+                    sem_movimento.setdefault(linha["ItemCode"], linha)
+                else:
+                    dados.append(linha)
+        
+        for linha in self.agregados.listar(CONJUNTO_SAIDAS, meses):
+            produto = produtos.get(linha["ItemCode"])
+            if produto is not None:
+                dados.append({
+                    "ItemCode": produto["ItemCode"],
+                    "ItemName": produto["ItemName"],
+                    "CardCode": produto["CardCode"],
+                    "CardName": produto["CardName"],
+                    "AnoMes": linha["AnoMes"],
+                    "Total": linha["Total"],
+                })
+        
+        com_movimento = {linha["ItemCode"] for linha in dados}
+        dados.extend(linha for item, linha in sem_movimento.items() if item not in com_movimento)
+        dados.sort(key=lambda linha: (linha["ItemCode"], linha["AnoMes"] or ""))
+        return dados
+    
+    @handle_db_errors
+    def iterar_saida_de_produtos(
+        self,
+        data_inicio: str = None,
+        data_fim: str = None,
+        tamanho_lote: int | None = None
+    ) -> tuple[Iterator[list[dict]], str]:
+        """
+        Versão em streaming de `listar_saida_de_produtos`: devolve um gerador de lotes
+        de até `tamanho_lote` linhas, mantendo a memória limitada em períodos longos.
+        """
+        inicio, fim = DateHelper.resolve_window(data_inicio, data_fim, MESES_JANELA_PADRAO)
+        sql = self._montar_sql_saida_de_produtos()
+        return stream_db_errors(self.cliente.fetch_iter(sql, [inicio, fim], arraysize=tamanho_lote)), sql
+    
+    def _montar_sql_saida_de_produtos(self) -> str:
+        sql = """
+        DECLARE @DataInicio DATE = ?;
+        DECLARE @DataFim DATE = ?;
         WITH PRODUTOS AS (
             SELECT
                 OITM.ItemCode,
@@ -243,6 +430,69 @@ class EstoqueRepository:
         HAVING M.AnoMes IS NOT NULL OR SUM(M.Quantidade) IS NULL
         ORDER BY P.ItemCode, M.AnoMes;
         """
-        return self.cliente.fetch_all(sql), sql
+        return SQLHelper.apply_query_hints(sql, "EstoqueRepository.listar_saida_de_produtos")
+
+    @cached_query(normalizar=janela_padrao(MESES_JANELA_PADRAO))
+    @handle_db_errors
+    def listar_paineis_estoque(
+        self,
+        data_inicio: str = None,
+        data_fim: str = None
+    ) -> tuple[tuple[list[dict], str], tuple[list[dict], str], tuple[list[dict], str]]:
+        """
+        Busca os três conjuntos do dashboard de estoque: hits, pedidos em trânsito e pedidos
+        de venda (nessa ordem).
+        
+        Cada conjunto é procurado antes no cache do seu método (`listar_hits`, ...); só os que
+        faltam vão ao banco, juntos em um único lote (uma conexão e uma ida ao servidor), e
+        cada resultado é guardado na entrada do seu método. Os pedidos de venda seguem por
+        `listar_pedidos_de_venda` quando ela não é uma consulta única ao ERP (agregados
+        materializados, cache mensal ou partições) ou quando já estão no cache.
+        """
+        paineis = [self.listar_hits.cached(), self.listar_pedidos_em_transito.cached(), MISSING]
+        consultas = {}
+        if paineis[0] is MISSING:
+            consultas[0] = self._montar_sql_hits()
+        if paineis[1] is MISSING:
+            consultas[1] = self._montar_sql_pedidos_em_transito()
+        
+        inicio, fim = self._periodo_pedidos_de_venda(data_inicio, data_fim)
+        vendas_pelo_metodo = (
+            self.agregados.habilitado
+            or self.cache_mensal.habilitado
+            or self.particoes.aplicavel([(inicio, fim)])
+            or self.listar_pedidos_de_venda.cached(data_inicio, data_fim) is not MISSING
+        )
+        if not vendas_pelo_metodo:
+            consultas[2] = (self._montar_sql_pedidos_de_venda(), [fim, inicio])
+        
+        if consultas:
+            resultados = self.cliente.fetch_multi(list(consultas.values()))
+            for indice, dados, (sql, _) in zip(consultas, resultados, consultas.values()):
+                paineis[indice] = (dados, sql)
+        
+        if 0 in consultas:
+            self.listar_hits.store(paineis[0])
+        if 1 in consultas:
+            self.listar_pedidos_em_transito.store(paineis[1])
+        if 2 in consultas:
+            self.listar_pedidos_de_venda.store(paineis[2], data_inicio, data_fim)
+        else:
+            paineis[2] = self.listar_pedidos_de_venda(data_inicio=data_inicio, data_fim=data_fim)
+        
+        hits, pedidos_em_transito, pedidos_de_venda = paineis
+        return hits, pedidos_em_transito, pedidos_de_venda
+
+    # Variantes assíncronas: executam o método síncrono no executor dedicado do cliente
+
+    async def listar_hits_async(self) -> tuple[list[dict], str]:
+        return await self.cliente_async.run(self.listar_hits)
+
+    async def listar_pedidos_em_transito_async(self) -> tuple[list[dict], str]:
+        return await self.cliente_async.run(self.listar_pedidos_em_transito)
 
+    async def listar_pedidos_de_venda_async(self, data_inicio: str = None, data_fim: str = None) -> tuple[list[dict], str]:
+        return await self.cliente_async.run(self.listar_pedidos_de_venda, data_inicio=data_inicio, data_fim=data_fim)
 
+    async def listar_saida_de_produtos_async(self, data_inicio: str = None, data_fim: str = None) -> tuple[list[dict], str]:
+        return await self.cliente_async.run(self.listar_saida_de_produtos, data_inicio=data_inicio, data_fim=data_fim)
@@ -1,34 +1,265 @@
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from functools import partial
+from typing import Iterator
+
+import pandas as pd
+
+from core.services.decimal_policy import CENTS, scaled
 from core.services.sqlserver_cliente import default_sql_server_client
+from core.services.async_sqlserver_cliente import default_async_sql_server_client
 
 from core.helpers.date_helper import DateHelper
-from .decorators import handle_db_errors
+from core.helpers.sql_helper import SQLHelper
+from core.helpers.query_builder import QueryBuilder
+from .decorators import cached_query, handle_db_errors, janela_padrao, stream_db_errors
+from .exceptions import QueryError
+from .particionamento import ParticionamentoMensal
+
+# Colunas devolvidas pela rentabilidade de itens
+COLUNAS_RENTABILIDADE = (
+    "R.ItemCode",
+    "R.ItemName",
+    "R.TipoDoNegocio",
+    "R.Quantidade",
+    "R.PrecoMinimoUnitario",
+    "R.FaturamentoPorItem",
+    "R.Rentabilidade",
+)
+
+# Ordenações aceitas por `ordenar_por`; as de ranking desempatam pela chave do item
+ORDENACOES_RENTABILIDADE = {
+    "item": ("R.ItemCode", "R.TipoDoNegocio"),
+    "faturamento": ("R.FaturamentoPorItem DESC", "R.ItemCode", "R.TipoDoNegocio"),
+    "rentabilidade": ("R.Rentabilidade DESC", "R.ItemCode", "R.TipoDoNegocio"),
+}
+
+# Componentes somáveis da rentabilidade por origem, para a execução particionada
+COLUNAS_COMPONENTES = (
+    "A.Origem",
+    "A.ItemCode",
+    "A.ItemName",
+    "A.U_Tipo_Negocios AS TipoDoNegocio",
+    "A.Price",
+    "A.Quantidade",
+    "A.PrecoMinimo",
+    "A.FaturamentoPorItem",
+)
+
+# Meses da janela padrão (sem datas) da rentabilidade de itens
+MESES_JANELA_RENTABILIDADE = 12
+
+# Políticas DECIMAL da página em DataFrame: valores monetários exatos em centavos
+# (Rentabilidade, um percentual, fica em float64)
+DECIMAIS_RENTABILIDADE = {
+    "Quantidade": scaled(0),
+    "PrecoMinimoUnitario": CENTS,
+    "FaturamentoPorItem": CENTS,
+}
+
+# Filtros que podem ser aplicados em cada partição mensal (os demais dependem do período inteiro)
+FILTROS_PARTICIONAVEIS = {"item_code", "tipo_negocio"}
 
 class FinanceiroRepository:
     def __init__(self):
         self.cliente = default_sql_server_client
+        self.cliente_async = default_async_sql_server_client
+        self.particoes = ParticionamentoMensal(self.cliente)
 
+    @cached_query(stale_while_revalidate=True, normalizar=janela_padrao(MESES_JANELA_RENTABILIDADE))
     @handle_db_errors
-    def listar_rentabilidade_itens(self, data_inicio: str | None = None, data_fim: str | None = None) -> tuple[list[dict], str]:
-        
-        data_inicio_sql, data_fim_sql, _, _ = DateHelper.prepare_date_params(
-            data_inicio,
-            data_fim,
-            default_inicio_sql="DATEADD(MONTH, -12, GETDATE())",
-            default_fim_sql="GETDATE()",
-            default_inicio_months_offset=12,
-            default_inicio_day=1
+    def listar_rentabilidade_itens(
+        self,
+        data_inicio: str | None = None,
+        data_fim: str | None = None,
+        **filtros
+    ) -> tuple[list[dict], str]:
+        """
+        Rentabilidade por item e tipo de negócio no período.
+
+        Sem `filtros`, devolve todas as linhas ordenadas por item. Os filtros aceitos são
+        os de `_montar_sql_rentabilidade_itens`, todos aplicados no SQL.
+
+        Em intervalos longos (ver `ParticionamentoMensal`) e só com filtros de item e tipo de
+        negócio, cada mês é consultado em paralelo e as partes são somadas aqui.
+        """
+        sql, params = self._montar_sql_rentabilidade_itens(data_inicio, data_fim, **filtros)
+
+        usados = {nome: valor for nome, valor in filtros.items() if valor is not None}
+        if usados.keys() <= FILTROS_PARTICIONAVEIS:
+            inicio, fim = DateHelper.resolve_window(data_inicio, data_fim, MESES_JANELA_RENTABILIDADE)
+            if self.particoes.aplicavel([(inicio, fim)]):
+                partes = self.particoes.executar(
+                    partial(self.listar_rentabilidade_itens_particao, **usados),
+                    [(inicio, fim)],
+                )
+                return self._combinar_rentabilidade(partes), sql
+
+        return self.cliente.fetch_all(sql, params), sql
+
+    @cached_query(stale_while_revalidate=True)
+    @handle_db_errors
+    def listar_rentabilidade_itens_particao(
+        self,
+        data_inicio: date,
+        data_fim: date,
+        item_code: str | None = None,
+        tipo_negocio: str | None = None
+    ) -> tuple[list[dict], str]:
+        """
+        Componentes somáveis da rentabilidade em uma partição mensal (por item, tipo de negócio,
+        preço e origem NF/DEV), guardados no cache separadamente. Ver `_combinar_rentabilidade`.
+        """
+        sql, params = self._montar_sql_rentabilidade_itens(
+            data_inicio.isoformat(),
+            data_fim.isoformat(),
+            item_code=item_code,
+            tipo_negocio=tipo_negocio,
+            componentes=True,
         )
-        
+        return self.cliente.fetch_all(sql, params), sql
+
+    @cached_query(stale_while_revalidate=True, normalizar=janela_padrao(MESES_JANELA_RENTABILIDADE))
+    @handle_db_errors
+    def listar_rentabilidade_itens_com_total(
+        self,
+        data_inicio: str | None = None,
+        data_fim: str | None = None,
+        offset: int = 0,
+        fetch_next: int | None = None,
+        **filtros
+    ) -> tuple[list[dict], int, str]:
+        """
+        Uma página da rentabilidade e o total de linhas que atendem aos filtros.
+
+        O total vem na mesma query (COUNT(*) OVER ()), sem repetir a agregação.
+        """
+        sql, params = self._montar_sql_rentabilidade_itens(
+            data_inicio, data_fim, offset=offset, fetch_next=fetch_next, com_total=True, **filtros
+        )
+        linhas = self.cliente.fetch_all(sql, params)
+        if not linhas and offset:
+            # Página além do fim: o total vem da primeira linha do resultado
+            primeira_sql, primeira_params = self._montar_sql_rentabilidade_itens(
+                data_inicio, data_fim, offset=0, fetch_next=1, com_total=True, **filtros
+            )
+            linhas_total = self.cliente.fetch_all(primeira_sql, primeira_params)
+            return [], linhas_total[0]["TotalLinhas"] if linhas_total else 0, sql
+
+        total = linhas[0]["TotalLinhas"] if linhas else 0
+        for linha in linhas:
+            linha.pop("TotalLinhas", None)
+        return linhas, total, sql
+
+    @cached_query(stale_while_revalidate=True, normalizar=janela_padrao(MESES_JANELA_RENTABILIDADE))
+    @handle_db_errors
+    def listar_rentabilidade_itens_com_total_dataframe(
+        self,
+        data_inicio: str | None = None,
+        data_fim: str | None = None,
+        offset: int = 0,
+        fetch_next: int | None = None,
+        **filtros
+    ) -> tuple[pd.DataFrame, int, str]:
+        """
+        Igual a `listar_rentabilidade_itens_com_total`, mas a página vem em DataFrame
+        (`fetch_frame`), com as colunas DECIMAL conforme `DECIMAIS_RENTABILIDADE`.
+        """
+        sql, params = self._montar_sql_rentabilidade_itens(
+            data_inicio, data_fim, offset=offset, fetch_next=fetch_next, com_total=True, **filtros
+        )
+        buscar = partial(self.cliente.fetch_frame, decimals=DECIMAIS_RENTABILIDADE)
+        frame = buscar(sql, params)
+        total_frame = frame
+        if frame.empty and offset:
+            # Página além do fim: o total vem da primeira linha do resultado
+            primeira_sql, primeira_params = self._montar_sql_rentabilidade_itens(
+                data_inicio, data_fim, offset=0, fetch_next=1, com_total=True, **filtros
+            )
+            total_frame = buscar(primeira_sql, primeira_params)
+
+        total = int(total_frame["TotalLinhas"].iloc[0]) if not total_frame.empty else 0
+        return frame.drop(columns="TotalLinhas"), total, sql
+
+    @handle_db_errors
+    def iterar_rentabilidade_itens(
+        self,
+        data_inicio: str | None = None,
+        data_fim: str | None = None,
+        tamanho_lote: int | None = None
+    ) -> tuple[Iterator[list[dict]], str]:
+        """
+        Igual a `listar_rentabilidade_itens`, mas lê o resultado do cursor em lotes
+        de `tamanho_lote` linhas em vez de carregá-lo inteiro.
+        """
+        sql, params = self._montar_sql_rentabilidade_itens(data_inicio, data_fim)
+        return stream_db_errors(self.cliente.fetch_iter(sql, params, arraysize=tamanho_lote)), sql
+
+    def _montar_sql_rentabilidade_itens(
+        self,
+        data_inicio: str | None,
+        data_fim: str | None,
+        item_code: str | None = None,
+        tipo_negocio: str | None = None,
+        rentabilidade_min: float | None = None,
+        rentabilidade_max: float | None = None,
+        ordenar_por: str | None = None,
+        offset: int | None = None,
+        fetch_next: int | None = None,
+        com_total: bool = False,
+        componentes: bool = False
+    ) -> tuple[str, list]:
+        """
+        - item_code / tipo_negocio: aplicados nas linhas das notas e devoluções, antes da agregação;
+        - rentabilidade_min / rentabilidade_max: limites (inclusive) da rentabilidade agregada;
+        - ordenar_por: uma das chaves de ORDENACOES_RENTABILIDADE (padrão "item");
+        - offset / fetch_next: paginação (OFFSET/FETCH) sobre a ordenação;
+        - com_total: acrescenta a coluna TotalLinhas com o total de linhas antes da paginação;
+        - componentes: devolve as somas por origem (NF/DEV) em vez da rentabilidade final,
+          para a execução particionada (ignora limites, ordenação e paginação).
+        """
+        inicio, fim = DateHelper.resolve_window(data_inicio, data_fim, MESES_JANELA_RENTABILIDADE)
+
+        # Filtros de item e tipo de negócio entram nas duas partes do UNION, como variáveis
+        declaracoes, params = [], [fim, inicio]
+        filtros_nf, filtros_dev = [], []
+        if item_code is not None:
+            declaracoes.append("DECLARE @ItemCode NVARCHAR(50) = ?;")
+            params.append(item_code)
+            filtros_nf.append("AND INV1.ItemCode = @ItemCode")
+            filtros_dev.append("AND RIN1.ItemCode = @ItemCode")
+        if tipo_negocio is not None:
+            declaracoes.append("DECLARE @TipoNegocio NVARCHAR(100) = ?;")
+            params.append(tipo_negocio)
+            filtros_nf.append("AND OCRD.U_Tipo_Negocios = @TipoNegocio")
+            filtros_dev.append("AND OCRD.U_Tipo_Negocios = @TipoNegocio")
+
+        # Nas partições, a quantidade vem sem truncar: o CAST para int é feito uma vez, sobre a soma
+        # de todas as partições (ver `_combinar_rentabilidade`), como na query completa
+        quantidade_nf, quantidade_dev = "CAST(SUM(INV1.Quantity) AS int)", "CAST(SUM(RIN1.Quantity) AS int)"
+        if componentes:
+            quantidade_nf, quantidade_dev = "SUM(INV1.Quantity)", "SUM(RIN1.Quantity)"
+            sql_consulta, params_consulta = QueryBuilder("RENTABILIDADE_ITEM A").select(*COLUNAS_COMPONENTES).build()
+        else:
+            sql_consulta, params_consulta = self._montar_consulta_rentabilidade(
+                rentabilidade_min, rentabilidade_max, ordenar_por, offset, fetch_next, com_total
+            )
+        declaracoes = "\n        ".join(declaracoes)
+        filtros_nf = "\n                ".join(filtros_nf)
+        filtros_dev = "\n                ".join(filtros_dev)
+
         sql = f"""
-        DECLARE @DataFim DATE = {data_fim_sql};
-        DECLARE @DataInicio DATE = {data_inicio_sql};
+        DECLARE @DataFim DATE = ?;
+        DECLARE @DataInicio DATE = ?;
+        {declaracoes}
 
         WITH RENTABILIDADE_ITEM AS (
             SELECT
+                'NF' AS Origem,
                 INV1.ItemCode,
                 OITM.ItemName,
                 OCRD.U_Tipo_Negocios,
-                CAST(SUM(INV1.Quantity) AS int) as 'Quantidade',
+                {quantidade_nf} as 'Quantidade',
                 ITM1.Price,
                 SUM(ITM1.Price * INV1.Quantity) AS 'PrecoMinimo',
                 SUM(INV1.LineTotal + INV1.VatSum) AS 'PrecoFaturado',
@@ -43,6 +274,7 @@ class FinanceiroRepository:
                 OINV.TaxDate BETWEEN @DataInicio AND @DataFim 
                 AND OINV.CANCELED = 'N' 
                 AND OINV.ObjType = 13
+                {filtros_nf}
 
             GROUP BY 
                 INV1.ItemCode,
@@ -53,10 +285,11 @@ class FinanceiroRepository:
             UNION ALL
 
             SELECT
+                'DEV' AS Origem,
                 RIN1.ItemCode,
                 OITM.ItemName,
                 OCRD.U_Tipo_Negocios,
-                -CAST(SUM(RIN1.Quantity) AS int) as 'Quantidade',
+                -{quantidade_dev} as 'Quantidade',
                 ITM1.Price,
                 -SUM(ITM1.Price * RIN1.Quantity) AS 'PrecoMinimo',
                 -SUM(RIN1.LineTotal + RIN1.VatSum) AS 'PrecoFaturado',
@@ -72,30 +305,146 @@ class FinanceiroRepository:
                 ORIN.TaxDate BETWEEN @DataInicio AND @DataFim
                 AND ORIN.CANCELED = 'N'
                 AND ORIN.ObjType = 14
+                {filtros_dev}
 
             GROUP BY
                 RIN1.ItemCode,
                 OITM.ItemName,
                 OCRD.U_Tipo_Negocios,
                 ITM1.Price
+        ),
+        RENTABILIDADE AS (
+            SELECT
+                A.ItemCode,
+                A.ItemName,
+                A.U_Tipo_Negocios AS TipoDoNegocio,
+                CONVERT(DECIMAL(19, 0), SUM(A.Quantidade)) AS Quantidade,
+                CONVERT(DECIMAL(19, 2), A.Price) AS PrecoMinimoUnitario,
+                CONVERT(DECIMAL(19, 2), SUM(A.FaturamentoPorItem)) AS FaturamentoPorItem,
+                CONVERT(DECIMAL(19, 2), SUM(A.Rentabilidade)) AS Rentabilidade
+            FROM RENTABILIDADE_ITEM A
+            GROUP BY
+                A.ItemCode,
+                A.ItemName,
+                A.U_Tipo_Negocios,
+                A.Price
         )
-        SELECT
-            A.ItemCode,
-            A.ItemName,
-            A.U_Tipo_Negocios AS 'TipoDoNegocio',
-            CONVERT(DECIMAL(19, 0), SUM(A.Quantidade)) AS 'Quantidade',
-            CONVERT(DECIMAL(19, 2), A.Price) AS 'PrecoMinimoUnitario',
-            CONVERT(DECIMAL(19, 2), SUM(A.FaturamentoPorItem)) AS 'FaturamentoPorItem',
-            CONVERT(DECIMAL(19, 2), SUM(A.Rentabilidade)) AS 'Rentabilidade'
-        FROM RENTABILIDADE_ITEM A
-
-        GROUP BY
-            A.ItemCode,
-            A.ItemName,
-            A.U_Tipo_Negocios,
-            A.Price
-        ORDER BY
-            A.ItemCode,
-            'TipoDoNegocio' ASC
+{sql_consulta}
+        """
+        sql = SQLHelper.apply_query_hints(sql, "FinanceiroRepository.listar_rentabilidade_itens")
+        return sql, params + params_consulta
+
+    def _montar_consulta_rentabilidade(
+        self,
+        rentabilidade_min: float | None,
+        rentabilidade_max: float | None,
+        ordenar_por: str | None,
+        offset: int | None,
+        fetch_next: int | None,
+        com_total: bool
+    ) -> tuple[str, list]:
+        """SELECT final sobre o CTE RENTABILIDADE: limites, ordenação e paginação."""
+        if (ordenar_por or "item") not in ORDENACOES_RENTABILIDADE:
+            raise QueryError(
+                f"Ordenação inválida: {ordenar_por}. Opções: {', '.join(ORDENACOES_RENTABILIDADE)}."
+            )
+        consulta = (
+            QueryBuilder("RENTABILIDADE R")
+            .select(*COLUNAS_RENTABILIDADE)
+            .order_by(*ORDENACOES_RENTABILIDADE[ordenar_por or "item"])
+            .paginate(offset, fetch_next)
+        )
+        if com_total:
+            consulta.select("COUNT(*) OVER () AS TotalLinhas")
+        if rentabilidade_min is not None:
+            consulta.where("R.Rentabilidade >= ?", rentabilidade_min)
+        if rentabilidade_max is not None:
+            consulta.where("R.Rentabilidade <= ?", rentabilidade_max)
+        return consulta.build()
+
+    def _combinar_rentabilidade(self, partes: list[list[dict]]) -> list[dict]:
+        """
+        Soma os componentes das partições e calcula a rentabilidade como a query completa:
+        (faturado - mínimo) / mínimo * 100 em cada origem (negativa nas devoluções), somando as
+        origens. A quantidade de cada origem é truncada para inteiro só depois da soma das
+        partições (o CAST AS int da query completa). Grupos com preço mínimo zero ficam com rentabilidade nula (na query completa,
+        a divisão por zero é um erro).
         """
-        return self.cliente.fetch_all(sql), sql
\ No newline at end of file
+        grupos = {}
+        for linhas in partes:
+            for linha in linhas:
+                chave = (linha["ItemCode"], linha["ItemName"], linha["TipoDoNegocio"], linha["Price"])
+                origens = grupos.setdefault(chave, {})
+                quantidade, minimo, faturado = origens.get(linha["Origem"], (Decimal(0), Decimal(0), Decimal(0)))
+                origens[linha["Origem"]] = (
+                    quantidade + Decimal(linha["Quantidade"] or 0),
+                    minimo + Decimal(linha["PrecoMinimo"] or 0),
+                    faturado + Decimal(linha["FaturamentoPorItem"] or 0),
+                )
+
+        centavos = Decimal("0.01")
+        dados = []
+        for (item_code, item_name, tipo_negocio, preco), origens in grupos.items():
+            rentabilidade = Decimal(0)
+            for origem, (_, minimo, faturado) in origens.items():
+                if minimo == 0:
+                    rentabilidade = None
+                    break
+                sinal = -1 if origem == "DEV" else 1
+                rentabilidade += sinal * (faturado - minimo) / minimo * 100
+            dados.append({
+                "ItemCode": item_code,
+                "ItemName": item_name,
+                "TipoDoNegocio": tipo_negocio,
+                # int() trunca em direção a zero, como o CAST AS int
+                "Quantidade": Decimal(sum(int(quantidade) for quantidade, _, _ in origens.values())),
+                "PrecoMinimoUnitario": Decimal(preco).quantize(centavos, ROUND_HALF_UP),
+                "FaturamentoPorItem": sum(faturado for _, _, faturado in origens.values()).quantize(centavos, ROUND_HALF_UP),
+                "Rentabilidade": None if rentabilidade is None else rentabilidade.quantize(centavos, ROUND_HALF_UP),
+            })
+        dados.sort(key=lambda linha: (linha["ItemCode"], linha["TipoDoNegocio"] or ""))
+        return dados
+
+    # Variantes assíncronas: executam o método síncrono no executor dedicado do cliente
+
+    async def listar_rentabilidade_itens_async(
+        self,
+        data_inicio: str | None = None,
+        data_fim: str | None = None,
+        **filtros
+    ) -> tuple[list[dict], str]:
+        return await self.cliente_async.run(self.listar_rentabilidade_itens, data_inicio=data_inicio, data_fim=data_fim, **filtros)
+
+    async def listar_rentabilidade_itens_com_total_async(
+        self,
+        data_inicio: str | None = None,
+        data_fim: str | None = None,
+        offset: int = 0,
+        fetch_next: int | None = None,
+        **filtros
+    ) -> tuple[list[dict], int, str]:
+        return await self.cliente_async.run(
+            self.listar_rentabilidade_itens_com_total,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            offset=offset,
+            fetch_next=fetch_next,
+            **filtros,
+        )
+
+    async def listar_rentabilidade_itens_com_total_dataframe_async(
+        self,
+        data_inicio: str | None = None,
+        data_fim: str | None = None,
+        offset: int = 0,
+        fetch_next: int | None = None,
+        **filtros
+    ) -> tuple[pd.DataFrame, int, str]:
+        return await self.cliente_async.run(
+            self.listar_rentabilidade_itens_com_total_dataframe,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            offset=offset,
+            fetch_next=fetch_next,
+            **filtros,
+        )
@@ -1,11 +1,42 @@
+import unicodedata
+from datetime import date
+
+import pandas as pd
+
 from core.services.sqlserver_cliente import default_sql_server_client
-from .decorators import handle_db_errors
+from core.services.async_sqlserver_cliente import default_async_sql_server_client
+from core.helpers.date_helper import DateHelper
+from core.helpers.query_builder import QueryBuilder
+from core.helpers.sql_helper import SQLHelper
+from .agregados_repository import CONJUNTO_TRANSPORTADORAS, AgregadosRepository
+from .decorators import cached_query, handle_db_errors
+
+COLUNAS_TRANSPORTADORAS = ["CardCode", "CardName", "Total", "Mes", "Ano"]
+
+# Códigos por consulta em `listar_nomes_transportadoras` (o SQL Server aceita até 2100 parâmetros)
+LOTE_CARD_CODES = 1000
+
+
+def chave_nome(nome: str | None) -> tuple[bool, str, str]:
+    """
+    Aproxima em Python a ordem de `ORDER BY CardName` na collation do banco do SAP B1
+    (SQL_Latin1_General_CP1_CI_AS): NULL primeiro (antes de ''), maiúsculas e minúsculas iguais e
+    acentos só como desempate ("Ágil" entre "Agil" e "Ahl"). Regras mais finas da
+    collation (ex.: hífen e apóstrofo ignorados) não são reproduzidas.
+    """
+    nulo = nome is None
+    nome = (nome or "").casefold()
+    sem_acento = "".join(c for c in unicodedata.normalize("NFKD", nome) if not unicodedata.combining(c))
+    return not nulo, sem_acento, nome
 
 class LogisticaRepository:
     def __init__(self):
         self.cliente = default_sql_server_client
+        self.cliente_async = default_async_sql_server_client
+        self.agregados = AgregadosRepository()
     
-    @handle_db_errors 
+    @cached_query()
+    @handle_db_errors
     def listar_transportadoras_mais_usadas(self, offset: int = 0, fetch_next: int = None) -> tuple[list[dict], str]:
         """
         Lista as transportadoras mais usadas com paginação por transportadora (não por linha).
@@ -13,10 +44,105 @@ class LogisticaRepository:
         A paginação é feita primeiro nas transportadoras únicas, depois busca todos os dados
         dessas transportadoras (todos os meses/anos).
         """
-        # Monta a paginação da CTE
-        pagination = f"OFFSET {offset} ROWS"
+        sql, params = self._montar_sql_transportadoras_mais_usadas(offset, fetch_next)
+        combinado = self._combinar_transportadoras(offset, fetch_next)
+        if combinado is not None:
+            return combinado, sql
+        return self.cliente.fetch_all(sql, params), sql
+    
+    @cached_query()
+    @handle_db_errors
+    def listar_transportadoras_mais_usadas_dataframe(self, offset: int = 0, fetch_next: int = None) -> tuple[pd.DataFrame, str]:
+        """Mesma consulta de `listar_transportadoras_mais_usadas`, já como DataFrame colunar."""
+        sql, params = self._montar_sql_transportadoras_mais_usadas(offset, fetch_next)
+        combinado = self._combinar_transportadoras(offset, fetch_next)
+        if combinado is not None:
+            return pd.DataFrame(combinado, columns=COLUNAS_TRANSPORTADORAS), sql
+        return self.cliente.fetch_frame(sql, params), sql
+    
+    @handle_db_errors
+    def listar_transportadoras_por_mes(self, data_inicio: date, data_fim: date | None = None) -> tuple[list[dict], str]:
+        """
+        Notas por transportadora e mês entre `data_inicio` e `data_fim` (aberto se None), sem paginação.
+        Base da materialização e dos trechos não materializados de `listar_transportadoras_mais_usadas`.
+        """
+        sql = """
+        SELECT
+            OCRD.CardCode AS CardCode,
+            OCRD.CardName AS CardName,
+            COUNT(OINV.DocEntry) AS Total,
+            MONTH(OINV.DocDate) AS Mes,
+            YEAR(OINV.DocDate) AS Ano
+        FROM OINV OINV
+        INNER JOIN INV12 INV12 ON OINV.DocEntry = INV12.DocEntry
+        INNER JOIN OCRD OCRD ON INV12.Carrier = OCRD.CardCode
+        WHERE OINV.DocDate BETWEEN ? AND ?
+        GROUP BY
+            OCRD.CardCode,
+            OCRD.CardName,
+            MONTH(OINV.DocDate),
+            YEAR(OINV.DocDate)
+        """
+        sql = SQLHelper.apply_query_hints(sql, "LogisticaRepository.listar_transportadoras_por_mes")
+        return self.cliente.fetch_all(sql, [data_inicio, data_fim or DateHelper.MAX_DATE]), sql
+    
+    def _combinar_transportadoras(self, offset: int, fetch_next: int | None) -> list[dict] | None:
+        """
+        Monta a página a partir dos meses materializados mais os trechos consultados no ERP,
+        com a mesma paginação por transportadora (ordenadas por nome e CardCode) da query.
+        Retorna None quando não há mês materializado no período, para seguir com a query.
+        
+        Os meses materializados guardam o nome da época da carga: as transportadoras são
+        identificadas pelo CardCode e todas as linhas recebem o nome atual do ERP (OCRD),
+        como na query. A ordem por nome segue `chave_nome`.
+        """
+        if not self.agregados.habilitado:
+            return None
+        meses, trechos = self.agregados.planejar(CONJUNTO_TRANSPORTADORAS, DateHelper.first_day_of_month(-6), None)
+        if not meses:
+            return None
+        
+        dados = self.agregados.listar(CONJUNTO_TRANSPORTADORAS, meses)
+        for trecho_inicio, trecho_fim in trechos:
+            dados.extend(self.listar_transportadoras_por_mes(trecho_inicio, trecho_fim)[0])
+        
+        # Sem cadastro no OCRD (ex.: excluída), fica o último nome carregado
+        nomes = {linha["CardCode"]: linha["CardName"] for linha in sorted(dados, key=lambda linha: (linha["Ano"], linha["Mes"]))}
+        nomes.update(self.listar_nomes_transportadoras(list(nomes))[0])
+        
+        transportadoras = sorted(nomes, key=lambda card_code: (chave_nome(nomes[card_code]), card_code))
+        fim = None if fetch_next is None else offset + fetch_next
+        pagina = set(transportadoras[offset:fim])
+        
+        dados = [{**linha, "CardName": nomes[linha["CardCode"]]} for linha in dados if linha["CardCode"] in pagina]
+        dados.sort(key=lambda linha: (chave_nome(linha["CardName"]), linha["CardCode"], linha["Mes"], linha["Ano"]))
+        return dados
+    
+    @handle_db_errors
+    def listar_nomes_transportadoras(self, card_codes: list[str]) -> tuple[dict[str, str | None], str]:
+        """Nome atual (OCRD.CardName) de cada CardCode, em consultas de até LOTE_CARD_CODES códigos."""
+        nomes, sql = {}, ""
+        for inicio in range(0, len(card_codes), LOTE_CARD_CODES):
+            sql, params = (
+                QueryBuilder("OCRD OCRD")
+                .select("OCRD.CardCode", "OCRD.CardName")
+                .in_("OCRD.CardCode", card_codes[inicio:inicio + LOTE_CARD_CODES])
+                .build()
+            )
+            sql = SQLHelper.apply_query_hints(sql, "LogisticaRepository.listar_nomes_transportadoras")
+            nomes.update((linha["CardCode"], linha["CardName"]) for linha in self.cliente.fetch_all(sql, params))
+        return nomes, sql
+    
+    def _montar_sql_transportadoras_mais_usadas(self, offset: int, fetch_next: int | None) -> tuple[str, list]:
+        data_inicio = DateHelper.first_day_of_month(-6)
+        
+        # Monta a paginação da CTE com valores vinculados: o texto da query não muda entre páginas
+        pagination = "OFFSET ? ROWS"
+        params = [data_inicio, offset]
         if fetch_next is not None:
-            pagination += f" FETCH NEXT {fetch_next} ROWS ONLY"
+            pagination += " FETCH NEXT ? ROWS ONLY"
+            params.append(fetch_next)
+        params.append(data_inicio)
         
         sql = f"""
         WITH TransportadorasPaginadas AS (
@@ -27,8 +153,8 @@ class LogisticaRepository:
             FROM OINV OINV
             INNER JOIN INV12 INV12 ON OINV.DocEntry = INV12.DocEntry
             INNER JOIN OCRD OCRD ON INV12.Carrier = OCRD.CardCode
-            WHERE OINV.DocDate >= DATEADD(MONTH, -6, DATEADD(MONTH, DATEDIFF(MONTH, 0, GETDATE()), 0))
-            ORDER BY OCRD.CardName
+            WHERE OINV.DocDate >= ?
+            ORDER BY OCRD.CardName, OCRD.CardCode
             {pagination}
         )
         -- Depois: buscar TODOS os dados dessas transportadoras (todos os meses)
@@ -43,27 +169,150 @@ class LogisticaRepository:
         INNER JOIN OCRD OCRD ON INV12.Carrier = OCRD.CardCode
         WHERE 
             OCRD.CardCode IN (SELECT CardCode FROM TransportadorasPaginadas)
-            AND OINV.DocDate >= DATEADD(MONTH, -6, DATEADD(MONTH, DATEDIFF(MONTH, 0, GETDATE()), 0))
+            AND OINV.DocDate >= ?
+        GROUP BY
+            OCRD.CardCode,
+            OCRD.CardName,
+            MONTH(OINV.DocDate),
+            YEAR(OINV.DocDate)
+        ORDER BY
+            OCRD.CardName, OCRD.CardCode, Mes, Ano
+        """
+        sql = SQLHelper.apply_query_hints(sql, "LogisticaRepository.listar_transportadoras_mais_usadas")
+        return sql, params
+    
+    @cached_query()
+    @handle_db_errors
+    def listar_transportadoras_por_chave(
+        self,
+        apos: tuple[str | None, str] | None = None,
+        limite: int = 10,
+        data_inicio: date | None = None
+    ) -> tuple[list[dict], tuple[str | None, str] | None, str]:
+        """
+        Paginação por chave (keyset) das transportadoras, ordenadas por (CardName, CardCode).
+        
+        Em vez de OFFSET, cada página começa logo após a chave `apos` (CardName, CardCode) da
+        última transportadora da página anterior: o SQL Server percorre OCRD a partir dela e
+        para ao encontrar `limite` transportadoras com notas, então a página N custa o mesmo
+        que a primeira.
+        
+        O filtro e a ordenação usam a coluna CardName sem funções, para que um índice em
+        (CardName, CardCode) seja percorrido a partir da chave. NULL vem primeiro (como no
+        ORDER BY do SQL Server) e fica None na chave, distinto de '': depois de uma chave com
+        nome nulo vêm as demais de nome nulo com CardCode maior e então todas as nomeadas.
+        
+        Returns:
+            Tuple com (linhas das transportadoras da página, chave para a próxima página
+            ou None se esta for a última, sql).
+        """
+        data_inicio = data_inicio or DateHelper.first_day_of_month(-6)
+        
+        # Uma transportadora a mais indica se existe próxima página
+        params = [limite + 1, data_inicio]
+        filtro_chave = ""
+        if apos is not None and apos[0] is None:
+            filtro_chave = "AND ((C.CardName IS NULL AND C.CardCode > ?) OR C.CardName IS NOT NULL)"
+            params.append(apos[1])
+        elif apos is not None:
+            filtro_chave = "AND (C.CardName > ? OR (C.CardName = ? AND C.CardCode > ?))"
+            params += [apos[0], apos[0], apos[1]]
+        params.append(data_inicio)
+        
+        sql = f"""
+        WITH Pagina AS (
+            SELECT TOP (?)
+                C.CardCode,
+                C.CardName
+            FROM OCRD C
+            WHERE
+                EXISTS (
+                    SELECT 1
+                    FROM INV12 INV12
+                    INNER JOIN OINV OINV ON OINV.DocEntry = INV12.DocEntry
+                    WHERE INV12.Carrier = C.CardCode
+                        AND OINV.DocDate >= ?
+                )
+                {filtro_chave}
+            ORDER BY C.CardName, C.CardCode
+        )
+        SELECT
+            OCRD.CardCode AS CardCode,
+            OCRD.CardName AS CardName,
+            COUNT(OINV.DocEntry) AS Total,
+            MONTH(OINV.DocDate) AS Mes,
+            YEAR(OINV.DocDate) AS Ano
+        FROM OINV OINV
+        INNER JOIN INV12 INV12 ON OINV.DocEntry = INV12.DocEntry
+        INNER JOIN OCRD OCRD ON INV12.Carrier = OCRD.CardCode
+        WHERE 
+            OCRD.CardCode IN (SELECT CardCode FROM Pagina)
+            AND OINV.DocDate >= ?
         GROUP BY
             OCRD.CardCode,
             OCRD.CardName,
             MONTH(OINV.DocDate),
             YEAR(OINV.DocDate)
         ORDER BY
-            OCRD.CardName, Mes, Ano
+            OCRD.CardName, OCRD.CardCode, Ano, Mes
         """
-            
-        return self.cliente.fetch_all(sql), sql
+        sql = SQLHelper.apply_query_hints(sql, "LogisticaRepository.listar_transportadoras_por_chave")
+        linhas = self.cliente.fetch_all(sql, params)
+        
+        chaves = list(dict.fromkeys((linha["CardName"], linha["CardCode"]) for linha in linhas))
+        if len(chaves) <= limite:
+            return linhas, None, sql
+        
+        extra = chaves[limite]
+        linhas = [linha for linha in linhas if (linha["CardName"], linha["CardCode"]) != extra]
+        return linhas, chaves[limite - 1], sql
     
+    @cached_query()
     @handle_db_errors
-    def contar_transportadoras(self) -> tuple[int, str]:
+    def contar_transportadoras(self, data_inicio: date | None = None) -> tuple[int, str]:
         """Retorna o total de transportadoras únicas para calcular paginação."""
+        sql, params = self._montar_sql_contar_transportadoras(data_inicio)
+        result = self.cliente.fetch_one(sql, params)
+        return result["Total"] if result else 0, sql
+    
+    def _montar_sql_contar_transportadoras(self, data_inicio: date | None) -> tuple[str, list]:
         sql = """
         SELECT COUNT(DISTINCT T2.CardCode) AS Total
         FROM OINV T0
         INNER JOIN INV12 T1 ON T0.DocEntry = T1.DocEntry
         INNER JOIN OCRD T2 ON T1.Carrier = T2.CardCode
-        WHERE T0.DocDate >= DATEADD(MONTH, -6, DATEADD(MONTH, DATEDIFF(MONTH, 0, GETDATE()), 0))
+        WHERE T0.DocDate >= ?
         """
-        result = self.cliente.fetch_one(sql)
-        return result["Total"] if result else 0, sql
\ No newline at end of file
+        sql = SQLHelper.apply_query_hints(sql, "LogisticaRepository.contar_transportadoras")
+        return sql, [data_inicio or DateHelper.first_day_of_month(-6)]
+
+    @handle_db_errors
+    def listar_transportadoras_mais_usadas_com_total(self, offset: int = 0, fetch_next: int = None) -> tuple[list[dict], int, str]:
+        """Busca a página de transportadoras e o total para paginação em um único lote (uma ida ao servidor)."""
+        combinado = self._combinar_transportadoras(offset, fetch_next)
+        if combinado is not None:
+            total, _ = self.contar_transportadoras()
+            return combinado, total, self._montar_sql_transportadoras_mais_usadas(offset, fetch_next)[0]
+        
+        pagina = self._montar_sql_transportadoras_mais_usadas(offset, fetch_next)
+        data, totais = self.cliente.fetch_multi([pagina, self._montar_sql_contar_transportadoras(None)])
+        return data, totais[0]["Total"] if totais else 0, pagina[0]
+
+    # Variantes assíncronas: executam o método síncrono no executor dedicado do cliente
+
+    async def listar_transportadoras_mais_usadas_async(self, offset: int = 0, fetch_next: int = None) -> tuple[list[dict], str]:
+        return await self.cliente_async.run(self.listar_transportadoras_mais_usadas, offset=offset, fetch_next=fetch_next)
+
+    async def listar_transportadoras_mais_usadas_dataframe_async(self, offset: int = 0, fetch_next: int = None) -> tuple[pd.DataFrame, str]:
+        return await self.cliente_async.run(self.listar_transportadoras_mais_usadas_dataframe, offset=offset, fetch_next=fetch_next)
+
+    async def listar_transportadoras_por_chave_async(
+        self,
+        apos: tuple[str | None, str] | None = None,
+        limite: int = 10,
+        data_inicio: date | None = None
+    ) -> tuple[list[dict], tuple[str | None, str] | None, str]:
+        return await self.cliente_async.run(self.listar_transportadoras_por_chave, apos=apos, limite=limite, data_inicio=data_inicio)
+
+    async def contar_transportadoras_async(self, data_inicio: date | None = None) -> tuple[int, str]:
+        return await self.cliente_async.run(self.contar_transportadoras, data_inicio=data_inicio)
@@ -0,0 +1,61 @@
+from datetime import date
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from django.conf import settings
+
+from core.helpers.date_helper import DateHelper
+
+# Consulta de um trecho: recebe (data_inicio, data_fim) e devolve (linhas, sql)
+ConsultaTrecho = Callable[[date, date], Tuple[List[Dict[str, Any]], str]]
+
+
+class ParticionamentoMensal:
+    """
+    Execução de consultas com intervalo de datas em partições mensais.
+
+    Cada mês do intervalo vira uma consulta separada, executada em paralelo em até
+    `SQLSERVER_PARTICIONAMENTO_MAX_WORKERS` conexões do pool (`run_parallel`). A consulta
+    de cada partição deve ter `@cached_query`, para que intervalos que se sobrepõem
+    reaproveitem os meses já consultados. Quem chama junta os resultados parciais.
+    """
+
+    def __init__(self, cliente):
+        self.cliente = cliente
+
+    @property
+    def min_meses(self) -> int:
+        """Intervalos com pelo menos tantos meses são particionados (0 desativa)."""
+        return getattr(settings, "SQLSERVER_PARTICIONAMENTO_MIN_MESES", 0)
+
+    @property
+    def max_workers(self) -> int | None:
+        return getattr(settings, "SQLSERVER_PARTICIONAMENTO_MAX_WORKERS", None)
+
+    def aplicavel(self, trechos: Iterable[Tuple[date, date]]) -> bool:
+        """Se os trechos somam meses suficientes para valer a pena particionar."""
+        if self.min_meses <= 0:
+            return False
+        return len(self.dividir(trechos)) >= self.min_meses
+
+    def dividir(self, trechos: Iterable[Tuple[date, date]]) -> List[Tuple[date, date]]:
+        return [particao for inicio, fim in trechos for particao in DateHelper.month_partitions(inicio, fim)]
+
+    def executar(self, consulta: ConsultaTrecho, trechos: Iterable[Tuple[date, date]]) -> List[List[Dict[str, Any]]]:
+        """Linhas de cada partição mensal dos `trechos`, na ordem das partições."""
+        chamadas = [partial(consulta, inicio, fim) for inicio, fim in self.dividir(trechos)]
+        return [linhas for linhas, _ in self.cliente.run_parallel(*chamadas, max_workers=self.max_workers)]
+
+    def consultar(
+        self,
+        trechos: List[Tuple[date, date]],
+        consulta: ConsultaTrecho,
+        consulta_particao: ConsultaTrecho
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Linhas de cada trecho: em partições mensais paralelas (`consulta_particao`) quando
+        `aplicavel`, senão uma consulta por trecho (`consulta`), em sequência.
+        """
+        if self.aplicavel(trechos):
+            return self.executar(consulta_particao, trechos)
+        return [consulta(inicio, fim)[0] for inicio, fim in trechos]
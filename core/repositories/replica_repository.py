@@ -0,0 +1,103 @@
+from datetime import date
+from typing import Any, Dict, Iterable, List, Set
+
+from core.helpers.copy_helper import CopyHelper
+from core.models import LinhaDocumento, MarcaReplicacao
+
+from .documentos_repository import DOCUMENTOS
+from .exceptions import QueryError
+
+# Coluna da consulta no ERP -> campo de LinhaDocumento
+COLUNAS = {
+    "DocEntry": "doc_entry",
+    "LineNum": "line_num",
+    "DocDate": "doc_date",
+    "UpdateDate": "update_date",
+    "Canceled": "canceled",
+    "DocStatus": "doc_status",
+    "CardCode": "card_code",
+    "ItemCode": "item_code",
+    "Quantity": "quantity",
+    "InvQty": "inv_qty",
+    "LineTotal": "line_total",
+    "Usage": "usage",
+    "LineStatus": "line_status",
+    "ActDelDate": "act_del_date",
+    "ShipDate": "ship_date",
+}
+
+
+class ReplicaRepository:
+    """
+    Réplica local (banco do Django) das linhas de documentos do ERP.
+
+    A réplica é mantida por documento: cada documento recebido do ERP substitui
+    todas as linhas que ele tinha na réplica. As gravações devem ocorrer dentro
+    de uma transação junto com `atualizar_marca`.
+    """
+
+    def marca(self, tipo: str) -> MarcaReplicacao:
+        """Marca d'água atual de `tipo` (não salva, zerada, se o tipo nunca foi replicado)."""
+        self._validar(tipo)
+        return MarcaReplicacao.objects.filter(tipo=tipo).first() or MarcaReplicacao(tipo=tipo)
+
+    def marcas(self) -> List[MarcaReplicacao]:
+        return list(MarcaReplicacao.objects.order_by("tipo"))
+
+    def gravar_lote(self, tipo: str, linhas: List[Dict[str, Any]], substituidos: Set[int]) -> int:
+        """
+        Grava um lote de linhas vindas do ERP, apagando antes as linhas antigas dos documentos
+        do lote. `substituidos` guarda os documentos já apagados nesta execução, para que um
+        documento dividido entre dois lotes não perca as linhas do primeiro.
+        """
+        novos = {linha["DocEntry"] for linha in linhas} - substituidos
+        if novos:
+            LinhaDocumento.objects.filter(tipo=tipo, doc_entry__in=novos).delete()
+            substituidos.update(novos)
+
+        CopyHelper.copy_records(LinhaDocumento, [
+            {"tipo": tipo, **{campo: linha.get(coluna) for coluna, campo in COLUNAS.items()}}
+            for linha in linhas
+        ])
+        return len(linhas)
+
+    def atualizar_marca(self, tipo: str, ultimo_doc_entry: int, ultima_atualizacao: date, linhas: int) -> MarcaReplicacao:
+        marca, _ = MarcaReplicacao.objects.update_or_create(
+            tipo=tipo,
+            defaults={
+                "ultimo_doc_entry": ultimo_doc_entry,
+                "ultima_atualizacao": ultima_atualizacao,
+                "linhas": linhas,
+            },
+        )
+        return marca
+
+    def reiniciar(self, tipo: str) -> None:
+        """Apaga a réplica e a marca de `tipo`; a próxima replicação recarrega tudo."""
+        self._validar(tipo)
+        LinhaDocumento.objects.filter(tipo=tipo).delete()
+        MarcaReplicacao.objects.filter(tipo=tipo).delete()
+
+    def listar_linhas(
+        self,
+        tipos: Iterable[str],
+        data_inicio: date,
+        data_fim: date,
+        incluir_cancelados: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Linhas replicadas dos `tipos` com DocDate no intervalo, com os nomes de coluna do ERP."""
+        tipos = list(tipos)
+        for tipo in tipos:
+            self._validar(tipo)
+
+        queryset = LinhaDocumento.objects.filter(tipo__in=tipos, doc_date__range=(data_inicio, data_fim))
+        if not incluir_cancelados:
+            queryset = queryset.filter(canceled="N")
+        return [
+            {"Tipo": registro["tipo"], **{coluna: registro[campo] for coluna, campo in COLUNAS.items()}}
+            for registro in queryset.order_by("tipo", "doc_entry", "line_num").values("tipo", *COLUNAS.values())
+        ]
+
+    def _validar(self, tipo: str) -> None:
+        if tipo not in DOCUMENTOS:
+            raise QueryError(f"Tipo de documento não replicado: {tipo}")
@@ -0,0 +1,49 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, TypeVar
+
+import pandas as pd
+
+from .sqlserver_cliente import SQLServerCliente, default_sql_server_client
+
+T = TypeVar("T")
+
+
+class AsyncSQLServerCliente:
+    """
+    Fachada assíncrona do `SQLServerCliente`.
+
+    O pyodbc é bloqueante, então cada chamada roda em um executor dedicado e
+    limitado a `max_workers` threads; o event loop fica livre enquanto a consulta
+    está no SQL Server. Chamadas além do limite aguardam na fila do executor em vez
+    de criar uma thread por requisição.
+    """
+
+    def __init__(self, cliente: SQLServerCliente, max_workers: int | None = None):
+        self.cliente = cliente
+        self.max_workers = max_workers or cliente.config.async_max_workers
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="sqlserver",
+        )
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Executa uma função bloqueante qualquer no executor do cliente."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def fetch_all(self, query: str, params: Iterable[Any] | None = None) -> List[Dict[str, Any]]:
+        return await self.run(self.cliente.fetch_all, query, params)
+
+    async def fetch_one(self, query: str, params: Iterable[Any] | None = None) -> Dict[str, Any] | None:
+        return await self.run(self.cliente.fetch_one, query, params)
+
+    async def fetch_frame(self, query: str, params: Iterable[Any] | None = None, **kwargs: Any) -> pd.DataFrame:
+        return await self.run(self.cliente.fetch_frame, query, params, **kwargs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait)
+
+
+default_async_sql_server_client = AsyncSQLServerCliente(default_sql_server_client)
@@ -1,12 +1,50 @@
+import logging
+
 import pandas as pd
 import numpy as np
 
-from typing import Any, Dict, List, TypeVar, Generic, Callable
+from typing import Any, Dict, Iterable, List, TypeVar, Generic, Callable
 from dataclasses import dataclass
 
 from core.services.sqlserver_cliente import SQLServerCliente, default_sql_server_client
 
-from core.services.exceptions import DataNotFoundError
+from core.services.exceptions import DataNotFoundError, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Response shapes for tabular data: one dict per row, or column arrays with a schema
+TABLE_FORMATS = ("records", "columns")
+
+# JSON type of each column in the "columns" format, from pandas' inferred dtype
+COLUMN_TYPES = {
+    "string": "string",
+    "integer": "integer",
+    "floating": "number",
+    "mixed-integer-float": "number",
+    "decimal": "decimal",
+    "boolean": "boolean",
+    "date": "date",
+    "datetime": "datetime",
+    "datetime64": "datetime",
+}
+
+# Column kinds accepted in `compact_dataframe` schemas
+COLUMN_KINDS = ("category", "integer", "float", "datetime", "string")
+
+MONTH_NAMES = {
+    '1': 'JAN',
+    '2': 'FEV',
+    '3': 'MAR',
+    '4': 'ABR',
+    '5': 'MAI',
+    '6': 'JUN',
+    '7': 'JUL',
+    '8': 'AGO',
+    '9': 'SET',
+    '10': 'OUT',
+    '11': 'NOV',
+    '12': 'DEZ',
+}
 
 
 class BaseService:
@@ -25,39 +63,229 @@ class BaseService:
         return dataframe.to_dict(orient="records")
     
     
-    def list_dicts_to_dataframe(self, data: List[Dict[str, Any]]) -> pd.DataFrame:
+    def dataframe_to_columns(self, dataframe: pd.DataFrame, dictionary_ratio: float = 0.5) -> Dict[str, Any]:
+        """
+        Convert a pandas DataFrame to a column-oriented payload, without building
+        one dict per row and without repeating the column names in every row:
+        
+            {
+                "schema": [{"name": "CardCode", "type": "string"},
+                           {"name": "CardName", "type": "string", "dictionary": True},
+                           {"name": "JAN-2025", "type": "integer"}],
+                "length": 2,
+                "columns": [["F00001", "F00002"],
+                            {"values": ["Transportadora A"], "indices": [0, 0]},
+                            [150, 0]],
+            }
+        
+        String columns with few distinct values (at most `dictionary_ratio` of the
+        rows) are dictionary-encoded: the distinct values once, and one index per row.
+        Missing values are null (also as an index).
+        
+        Fixed-point columns listed in `dataframe.attrs["scales"]` (see the `decimals`
+        policies of `SQLServerCliente.fetch_frame`) carry their scale: an integer column
+        with `"scale": 2` holds cents (value / 10**2).
+        
+        :param dataframe: DataFrame representing the data.
+        :param dictionary_ratio: Maximum distinct/rows ratio for dictionary encoding.
+        :return: Dictionary with the schema, the row count and one array per column.
+        """
+        schema, columns = [], []
+        scales = dataframe.attrs.get("scales", {})
+        for name in dataframe.columns:
+            column = dataframe[name]
+            # Categoricals (see `compact_dataframe`) are typed by their categories
+            values = column.cat.categories if isinstance(column.dtype, pd.CategoricalDtype) else column
+            field = {"name": name, "type": COLUMN_TYPES.get(pd.api.types.infer_dtype(values, skipna=True), "object")}
+            if name in scales:
+                field["scale"] = scales[name]
+            
+            if field["type"] == "string":
+                indices, values = pd.factorize(column)
+                if len(values) <= dictionary_ratio * len(column):
+                    field["dictionary"] = True
+                    schema.append(field)
+                    columns.append({"values": values.tolist(), "indices": self._column_values(pd.Series(indices), indices < 0)})
+                    continue
+            
+            schema.append(field)
+            columns.append(self._column_values(column, column.isna().to_numpy()))
+        
+        return {"schema": schema, "length": len(dataframe), "columns": columns}
+    
+    def _column_values(self, column: pd.Series, missing: np.ndarray) -> List[Any]:
+        """Column values as Python objects, with None where `missing`."""
+        if missing.any():
+            return column.astype(object).where(~missing, None).tolist()
+        return column.tolist()
+    
+    def format_dataframe(self, dataframe: pd.DataFrame, formato: str = "records") -> List[Dict[str, Any]] | Dict[str, Any]:
+        """
+        Convert a pandas DataFrame to the response format requested by the client.
+        
+        :param dataframe: DataFrame representing the data.
+        :param formato: "records" (`dataframe_to_list_dicts`) or "columns" (`dataframe_to_columns`).
+        :return: List of dictionaries or column-oriented payload.
+        :raises ValidationError: If the format is unknown.
+        """
+        self.validate_table_format(formato)
+        if formato == "columns":
+            return self.dataframe_to_columns(dataframe)
+        return self.dataframe_to_list_dicts(dataframe)
+    
+    def validate_table_format(self, formato: str) -> None:
+        """
+        :raises ValidationError: If `formato` is not one of TABLE_FORMATS.
+        """
+        if formato not in TABLE_FORMATS:
+            raise ValidationError(f"format inválido: {formato}. Opções: {', '.join(TABLE_FORMATS)}.")
+    
+    def list_dicts_to_dataframe(self, data: List[Dict[str, Any]], schema: Dict[str, str] | None = None) -> pd.DataFrame:
         """
         Convert a list of dictionaries to a pandas DataFrame.
         
         :param data: List of dictionaries representing the data.
+        :param schema: Optional column kinds; when given, the frame goes through `compact_dataframe`.
         :return: DataFrame representing the data.
         """
-        return pd.DataFrame(data)
+        dataframe = pd.DataFrame(data)
+        if schema is not None:
+            return self.compact_dataframe(dataframe, schema)
+        return dataframe
+    
+    def batches_to_dataframe(
+        self,
+        batches: Iterable[List[Dict[str, Any]]],
+        schema: Dict[str, str] | None = None
+    ) -> pd.DataFrame:
+        """
+        Build a DataFrame from row batches (e.g. `SQLServerCliente.fetch_iter`).
+        
+        Only one batch of dictionaries is alive at a time, so the full result is
+        never held as dicts and as a DataFrame simultaneously.
+        
+        :param batches: Iterable of lists of dictionaries.
+        :param schema: Optional column kinds; when given, the frame goes through `compact_dataframe`.
+        :return: DataFrame with all rows, or an empty DataFrame if there are none.
+        """
+        frames = [pd.DataFrame(batch) for batch in batches if batch]
+        if not frames:
+            return pd.DataFrame()
+        dataframe = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        if schema is not None:
+            return self.compact_dataframe(dataframe, schema)
+        return dataframe
+    
+    def compact_dataframe(
+        self,
+        dataframe: pd.DataFrame,
+        schema: Dict[str, str] | None = None,
+        category_ratio: float = 0.5
+    ) -> pd.DataFrame:
+        """
+        Convert columns to memory-compact dtypes, as declared in `schema`:
+        
+            {"ItemName": "category", "CardName": "category", "AnoMes": "datetime", "Total": "integer"}
+        
+        - "category": repeated strings stored once, plus one small code per row;
+        - "integer": smallest integer dtype that holds the values (float64 if there are nulls);
+          sums still return int64, but element-wise arithmetic keeps the small dtype;
+        - "float": float64 (e.g. Decimal columns used only in calculations);
+        - "datetime": datetime64 (e.g. "2025-01" or datetime.date values);
+        - "string": kept as Python strings (object).
+        
+        Columns not in the schema are kept. Without a schema, integer columns are
+        downcast and string columns with few distinct values (at most `category_ratio`
+        of the rows) become categoricals. The deep memory usage before and after is
+        logged (DEBUG, logger "core.services.base_service").
+        
+        :param dataframe: DataFrame representing the data.
+        :param schema: Column name -> one of COLUMN_KINDS.
+        :param category_ratio: Maximum distinct/rows ratio for inferred categoricals.
+        :return: New DataFrame with the converted columns.
+        :raises ValidationError: If the schema has an unknown kind.
+        """
+        if schema is None:
+            schema = self._infer_schema(dataframe, category_ratio)
+        invalid = {kind for kind in schema.values() if kind not in COLUMN_KINDS}
+        if invalid:
+            raise ValidationError(f"Tipo de coluna inválido: {', '.join(sorted(invalid))}. Opções: {', '.join(COLUMN_KINDS)}.")
+        
+        converted = {
+            name: self._compact_column(dataframe[name], kind)
+            for name, kind in schema.items()
+            if name in dataframe.columns
+        }
+        compacted = dataframe.assign(**converted) if converted else dataframe.copy()
+        # deep=True walks every string of every row: only measure when the log is emitted
+        if logger.isEnabledFor(logging.DEBUG):
+            before = int(dataframe.memory_usage(index=True, deep=True).sum())
+            after = int(compacted.memory_usage(index=True, deep=True).sum())
+            logger.debug(
+                "DataFrame compactado: %d linhas, %d -> %d bytes (%.0f%%)",
+                len(compacted), before, after, 100 * after / before if before else 100,
+            )
+        return compacted
+    
+    def _infer_schema(self, dataframe: pd.DataFrame, category_ratio: float) -> Dict[str, str]:
+        """Default `compact_dataframe` schema: downcast integers, categorize repeated strings."""
+        schema = {}
+        for name in dataframe.columns:
+            column = dataframe[name]
+            if pd.api.types.is_integer_dtype(column.dtype):
+                schema[name] = "integer"
+            elif column.dtype == object and pd.api.types.infer_dtype(column, skipna=True) == "string":
+                if column.nunique(dropna=True) <= category_ratio * len(column):
+                    schema[name] = "category"
+        return schema
+    
+    def _compact_column(self, column: pd.Series, kind: str) -> pd.Series:
+        if kind == "category":
+            return column.astype("category")
+        if kind == "integer":
+            return pd.to_numeric(column, downcast="integer")
+        if kind == "float":
+            return column.astype(np.float64)
+        if kind == "datetime":
+            return pd.to_datetime(column)
+        return column.astype(object)
     
     def pivot_table(
         self,
         data: pd.DataFrame,
         index: List[str],
-        columns: str,
+        columns: str | List[str],
         values: str,
         aggfunc: str | Callable = "sum",
-        fill_value: Any = 0
+        fill_value: Any = 0,
+        month_year_headers: bool = False
     ) -> pd.DataFrame:
         """
         Pivot a DataFrame into a pivoted DataFrame.
         
+        Sums of numeric values over non-null keys (the common case) go through a
+        fast path (`_pivot_sum`); anything else goes through `pd.pivot_table`.
+        Both produce the same frame.
+        
         :param data: DataFrame representing the data.
         :param index: List of columns to set as index.
-        :param columns: Column to pivot.
+        :param columns: Column(s) to pivot.
         :param values: Column with values to aggregate.
         :param aggfunc: Aggregation function to use.
         :param fill_value: Value to replace NaNs with.
+        :param month_year_headers: `columns` are (month, year); name the pivoted columns
+            like `replace_column_names_with_month_year` ('JAN-2024').
         :return: Pivoted DataFrame.
         :raises ValueError: If data is empty.
         """
         if data.empty:
             raise DataNotFoundError("No data available to pivot.")
         
+        column_keys = [columns] if isinstance(columns, str) else list(columns)
+        if aggfunc == "sum" and self._can_pivot_sum(data, [*index, *column_keys], values, fill_value):
+            pivot_df = self._pivot_sum(data, list(index), column_keys, values, fill_value, month_year_headers)
+            if pivot_df is not None:
+                return pivot_df
 
         pivot_df = pd.pivot_table(
             data,
@@ -65,7 +293,8 @@ class BaseService:
             columns=columns,
             values=values,
             aggfunc=aggfunc,
-            fill_value=fill_value
+            fill_value=fill_value,
+            observed=True  # Only combinations present in the data (categorical keys)
         )
         pivot_df.reset_index(inplace=True)
         
@@ -77,8 +306,93 @@ class BaseService:
             ]
         
         pivot_df.columns.name = None  # Remove the aggregation name
+        if month_year_headers:
+            pivot_df = self.replace_column_names_with_month_year(pivot_df)
         return pivot_df
 
+    def _can_pivot_sum(self, data: pd.DataFrame, keys: List[str], values: str, fill_value: Any) -> bool:
+        """
+        Whether `_pivot_sum` reproduces `pd.pivot_table` for this input: int64/float64 values
+        (pandas casts sums of narrower types back to them) and numeric fill value. Null keys
+        are checked by `_pivot_sum` itself.
+        """
+        return data[values].dtype in (np.int64, np.float64) and isinstance(fill_value, (int, float))
+
+    def _pivot_sum(
+        self,
+        data: pd.DataFrame,
+        index: List[str],
+        columns: List[str],
+        values: str,
+        fill_value: Any,
+        month_year_headers: bool
+    ) -> pd.DataFrame | None:
+        """
+        Sum pivot on factorized keys: each row and column combination gets a code and the
+        values are added straight into a preallocated 2-D array, with the final headers
+        built once per pivoted column.
+        
+        :return: Pivoted DataFrame, or None if any key is null (left to `pd.pivot_table`).
+        """
+        row_codes, row_keys = self._factorize_keys(data, index)
+        column_codes, column_keys = self._factorize_keys(data, columns)
+        if row_codes is None or column_codes is None:
+            return None
+        shape = (len(row_keys[0]), len(column_keys[0]))
+        cells = row_codes * shape[1] + column_codes
+
+        source = data[values].to_numpy()
+        if source.dtype == np.float64:
+            matrix = np.bincount(cells, weights=np.nan_to_num(source), minlength=shape[0] * shape[1])
+        else:
+            matrix = np.zeros(shape[0] * shape[1], dtype=np.int64)
+            np.add.at(matrix, cells, source)
+        
+        missing = np.bincount(cells, minlength=matrix.size) == 0
+        if missing.any() and fill_value != 0:
+            matrix = matrix.astype(np.result_type(matrix, fill_value))
+            matrix[missing] = fill_value
+        matrix = matrix.reshape(shape)
+
+        if len(columns) == 1:
+            headers = list(column_keys[0])
+        else:
+            headers = ['-'.join(str(c) for c in combination).strip('-') for combination in zip(*column_keys)]
+        if month_year_headers:
+            headers = [self._month_year_header(header) for header in headers]
+
+        pivot = {name: keys for name, keys in zip(index, row_keys)}
+        pivot.update({header: matrix[:, position] for position, header in enumerate(headers)})
+        return pd.DataFrame(pivot)
+
+    def _factorize_keys(self, data: pd.DataFrame, keys: List[str]) -> tuple[np.ndarray | None, List[pd.Index]]:
+        """
+        Codes of each row's key combination, numbered in sorted key order (as `groupby`
+        sorts them), and the values of each key per code. Codes are None if a key is null.
+        
+        Categorical keys (e.g. from `fetch_frame`) are numbered from their category codes,
+        in category order, keeping only the observed categories (`observed=True`).
+        """
+        codes, levels = [], []
+        for key in keys:
+            column = data[key]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                key_codes, observed = pd.factorize(column.cat.codes.to_numpy(), sort=True)
+                if observed.size and observed[0] < 0:
+                    return None, []
+                uniques = pd.CategoricalIndex(pd.Categorical.from_codes(observed, dtype=column.dtype))
+            else:
+                key_codes, uniques = pd.factorize(column, sort=True)
+                if key_codes.min() < 0:
+                    return None, []
+            codes.append(key_codes)
+            levels.append(uniques)
+        
+        combined = np.ravel_multi_index(codes, [len(level) for level in levels])
+        combination_codes, combinations = pd.factorize(combined, sort=True)
+        positions = np.unravel_index(combinations, [len(level) for level in levels])
+        return combination_codes, [level.take(position) for level, position in zip(levels, positions)]
+
     def replace_column_names_with_month_year(self, dataframe: pd.DataFrame) -> pd.DataFrame:
         """
         Replace column names in the format 'Mes-Ano' with MonthName-Ano.
@@ -87,36 +401,13 @@ class BaseService:
         :param dataframe: DataFrame with columns to rename.
         :return: DataFrame with renamed columns.
         """
-        
-        month_map = {
-            '1': 'JAN',
-            '2': 'FEV',
-            '3': 'MAR',
-            '4': 'ABR',
-            '5': 'MAI',
-            '6': 'JUN',
-            '7': 'JUL',
-            '8': 'AGO',
-            '9': 'SET',
-            '10': 'OUT',
-            '11': 'NOV',
-            '12': 'DEZ',
-        }
-        
-        new_columns = []
-        for col in dataframe.columns:
-            if isinstance(col, str) and '-' in col:
-                parts = col.split('-')
-                if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
-                    month_num = parts[0]
-                    year = parts[1]
-                    month_name = month_map.get(month_num, month_num)
-                    new_col = f"{month_name}-{year}"
-                    new_columns.append(new_col)
-                else:
-                    new_columns.append(col)
-            else:
-                new_columns.append(col)
-        
-        dataframe.columns = new_columns
-        return dataframe
\ No newline at end of file
+        dataframe.columns = [self._month_year_header(col) for col in dataframe.columns]
+        return dataframe
+
+    def _month_year_header(self, col: Any) -> Any:
+        """'1-2024' -> 'JAN-2024'; any other name is returned unchanged."""
+        if isinstance(col, str) and '-' in col:
+            parts = col.split('-')
+            if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
+                return f"{MONTH_NAMES.get(parts[0], parts[0])}-{parts[1]}"
+        return col
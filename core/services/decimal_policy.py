@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from decimal import ROUND_HALF_EVEN
+from typing import Mapping
+
+import numpy as np
+
+# A partir deste valor absoluto, um valor escalado via float64 pode não ser o inteiro exato
+_FLOAT_EXACT_LIMIT = 2 ** 50
+
+
+@dataclass(frozen=True)
+class DecimalPolicy:
+    """
+    Como as colunas DECIMAL/NUMERIC (Decimal no pyodbc) viram arrays em
+    `SQLServerCliente.fetch_frame`:
+
+    - FLOAT: float64 (padrão), para colunas usadas só em contas e agregações;
+    - scaled(n) / CENTS: int64 com o valor multiplicado por 10**n (CENTS = centavos),
+      exato para valores monetários e somas sem erro de arredondamento;
+    - DECIMAL: mantém os objetos Decimal (dtype object), sem conversão.
+
+    Nulos viram NaN: com eles, uma coluna escalada fica em float64 (como as colunas
+    inteiras com nulos), ainda com os valores escalados.
+    """
+
+    kind: str
+    scale: int = 0
+
+    def to_array(self, values: tuple, column_scale: int | None = None) -> np.ndarray:
+        """
+        Converte os valores de uma coluna (um lote) conforme a política.
+
+        :param values: Valores da coluna (Decimal ou None).
+        :param column_scale: Casas decimais da coluna (cursor.description), se conhecidas.
+        """
+        if self.kind == "decimal":
+            return np.array(values, dtype=object)
+
+        floats = np.array(values, dtype=np.float64)
+        if self.kind == "float":
+            return floats
+
+        scaled_values = floats * 10 ** self.scale
+        # O caminho via float64 é exato quando não há arredondamento a fazer (a coluna não tem
+        # mais casas que a escala) e os valores escalados cabem na mantissa com folga
+        rounding = column_scale is None or column_scale > self.scale
+        if rounding or np.nanmax(np.abs(scaled_values), initial=0) >= _FLOAT_EXACT_LIMIT:
+            return self._scale_exact(values)
+
+        rounded = np.rint(scaled_values)
+        if np.isnan(rounded).any():
+            return rounded
+        return rounded.astype(np.int64)
+
+    def _scale_exact(self, values: tuple) -> np.ndarray:
+        """
+        Escala valor a valor com Decimal (ROUND_HALF_EVEN, como np.rint). Valores que não
+        cabem em int64 mantêm os inteiros Python (dtype object).
+        """
+        scaled_values = [
+            None if value is None else int(value.scaleb(self.scale).to_integral_value(ROUND_HALF_EVEN))
+            for value in values
+        ]
+        if None in scaled_values:
+            return np.array(scaled_values, dtype=np.float64)
+        try:
+            return np.array(scaled_values, dtype=np.int64)
+        except OverflowError:
+            return np.array(scaled_values, dtype=object)
+
+
+FLOAT = DecimalPolicy("float")
+DECIMAL = DecimalPolicy("decimal")
+
+
+def scaled(scale: int) -> DecimalPolicy:
+    """int64 com o valor multiplicado por 10**scale (ex.: scaled(2) guarda centavos)."""
+    return DecimalPolicy("scaled", scale)
+
+
+CENTS = scaled(2)
+
+# Política única para todas as colunas DECIMAL ou uma por coluna (as demais ficam em FLOAT)
+DecimalPolicies = DecimalPolicy | Mapping[str, DecimalPolicy]
+
+
+def policy_for(policies: DecimalPolicies, column: str) -> DecimalPolicy:
+    if isinstance(policies, DecimalPolicy):
+        return policies
+    return policies.get(column, FLOAT)
@@ -1,4 +1,5 @@
 import functools
+import inspect
 
 from core.repositories.exceptions import (
     RepositoryError,
@@ -14,83 +15,109 @@ from .exceptions import (
 )
 
 
+def translate_service_error(error: Exception) -> Exception:
+    """
+    Converte uma exceção levantada dentro de um serviço na exceção que deve
+    chegar à camada de views. Exceções de serviço são devolvidas sem alteração.
+    """
+    # Repository errors (bubbled up from repository layer)
+    if isinstance(error, RepoConnectionError):
+        return ServiceError(f"Erro de conexão com o banco de dados: {error}")
+    if isinstance(error, RepoQueryError):
+        return ServiceError(f"Erro ao executar consulta: {error}")
+    if isinstance(error, RepositoryError):
+        return ServiceError(f"Erro no repositório: {error}")
+
+    # Data transformation errors
+    if isinstance(error, KeyError):
+        return DataTransformationError(f"Campo não encontrado nos dados: {error}")
+    if isinstance(error, TypeError):
+        return DataTransformationError(f"Tipo de dado inválido: {error}")
+    if isinstance(error, ZeroDivisionError):
+        return DataTransformationError(f"Erro de cálculo (divisão por zero): {error}")
+
+    # Validation, business rule, not found and other service errors pass through as-is
+    if isinstance(error, (ValidationError, BusinessRuleError, DataNotFoundError, ServiceError)):
+        return error
+
+    # Unexpected errors
+    return ServiceError(f"Erro inesperado no serviço: {error}")
+
+
 def handle_service_errors(func):
     """
     Decorator that handles exceptions in the service layer and transforms them
     into user-friendly exceptions for the view layer.
+    Works with both regular and async service methods.
     """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                translated = translate_service_error(e)
+                if translated is e:
+                    raise
+                raise translated from e
+
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
-        
-        # Repository errors (bubbled up from repository layer)
-        except RepoConnectionError as e:
-            raise ServiceError(f"Erro de conexão com o banco de dados: {e}") from e
-        
-        except RepoQueryError as e:
-            raise ServiceError(f"Erro ao executar consulta: {e}") from e
-        
-        except RepositoryError as e:
-            raise ServiceError(f"Erro no repositório: {e}") from e
-        
-        # Data transformation errors
-        except KeyError as e:
-            raise DataTransformationError(f"Campo não encontrado nos dados: {e}") from e
-        
-        except TypeError as e:
-            raise DataTransformationError(f"Tipo de dado inválido: {e}") from e
-        
-        except ZeroDivisionError as e:
-            raise DataTransformationError(f"Erro de cálculo (divisão por zero): {e}") from e
-        
-        # Validation errors (let them pass through as-is)
-        except ValidationError:
-            raise
-        
-        except BusinessRuleError:
-            raise
-        
-        except DataNotFoundError:
-            raise
-        
-        # Service errors (let them pass through as-is)
-        except ServiceError:
-            raise
-        
-        # Unexpected errors
         except Exception as e:
-            raise ServiceError(f"Erro inesperado no serviço: {e}") from e
-    
+            translated = translate_service_error(e)
+            if translated is e:
+                raise
+            raise translated from e
+
     return wrapper
 
 
+def _check_pagination(kwargs: dict) -> None:
+    # Check offset
+    offset = kwargs.get('offset')
+    if offset is not None and offset < 0:
+        raise ValidationError("offset não pode ser negativo")
+
+    # Check fetch_next
+    fetch_next = kwargs.get('fetch_next')
+    if fetch_next is not None and fetch_next <= 0:
+        raise ValidationError("fetch_next deve ser maior que zero")
+
+    # Check page
+    page = kwargs.get('page')
+    if page is not None and page < 1:
+        raise ValidationError("page deve ser maior ou igual a 1")
+
+    # Check page_size
+    page_size = kwargs.get('page_size')
+    if page_size is not None and page_size <= 0:
+        raise ValidationError("page_size deve ser maior que zero")
+
+    # Check limite (paginação por cursor)
+    limite = kwargs.get('limite')
+    if limite is not None and limite <= 0:
+        raise ValidationError("limite deve ser maior que zero")
+
+
 def validate_pagination(func):
     """
-    Decorator that validates pagination parameters (offset, fetch_next, page, page_size).
+    Decorator that validates pagination parameters (offset, fetch_next, page, page_size, limite).
     """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            _check_pagination(kwargs)
+            return await func(*args, **kwargs)
+
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Check offset
-        offset = kwargs.get('offset')
-        if offset is not None and offset < 0:
-            raise ValidationError("offset não pode ser negativo")
-        
-        # Check fetch_next
-        fetch_next = kwargs.get('fetch_next')
-        if fetch_next is not None and fetch_next <= 0:
-            raise ValidationError("fetch_next deve ser maior que zero")
-        
-        # Check page
-        page = kwargs.get('page')
-        if page is not None and page < 1:
-            raise ValidationError("page deve ser maior ou igual a 1")
-        
-        # Check page_size
-        page_size = kwargs.get('page_size')
-        if page_size is not None and page_size <= 0:
-            raise ValidationError("page_size deve ser maior que zero")
-        
+        _check_pagination(kwargs)
         return func(*args, **kwargs)
-    
+
     return wrapper
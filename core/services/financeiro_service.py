@@ -0,0 +1,140 @@
+import pandas as pd
+
+from core.repositories.financeiro_repository import FinanceiroRepository, ORDENACOES_RENTABILIDADE
+from core.services.decorators import handle_service_errors, validate_pagination
+from core.services.exceptions import ValidationError
+
+from core.services.base_service import BaseService
+
+class FinanceiroService(BaseService):
+    def __init__(self):
+        self.repo = FinanceiroRepository()
+
+    @handle_service_errors
+    @validate_pagination
+    def listar_rentabilidade_itens(
+        self,
+        data_inicio: str | None = None,
+        data_fim: str | None = None,
+        item_code: str | None = None,
+        tipo_negocio: str | None = None,
+        rentabilidade_min: float | None = None,
+        rentabilidade_max: float | None = None,
+        ordenar_por: str | None = None,
+        top: int | None = None,
+        offset: int = 0,
+        fetch_next: int | None = None,
+        formato: str = "records"
+    ) -> tuple[dict, str]:
+        """
+        Página da rentabilidade de itens, com filtros, ordenação e paginação feitos no SQL.
+
+        `top` limita o resultado aos N primeiros da ordenação (padrão: por faturamento)
+        e a paginação percorre só esses N. Com `formato` "columns", `itens` vem no formato
+        colunar (ver `BaseService.dataframe_to_columns`), com Quantidade, PrecoMinimoUnitario
+        e FaturamentoPorItem inteiros exatos (os monetários em centavos, `"scale": 2`).
+
+        :return: {"itens", "total", "offset", "fetch_next"} e o SQL executado.
+        """
+        self.validate_table_format(formato)
+        ordenar_por, fetch_next = self._validar_rentabilidade(
+            rentabilidade_min, rentabilidade_max, ordenar_por, top, offset, fetch_next
+        )
+        # No formato colunar, a página vem em DataFrame com os valores monetários em centavos
+        listar = (
+            self.repo.listar_rentabilidade_itens_com_total_dataframe if formato == "columns"
+            else self.repo.listar_rentabilidade_itens_com_total
+        )
+        itens, total, sql = listar(
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            offset=offset,
+            fetch_next=fetch_next,
+            item_code=item_code,
+            tipo_negocio=tipo_negocio,
+            rentabilidade_min=rentabilidade_min,
+            rentabilidade_max=rentabilidade_max,
+            ordenar_por=ordenar_por,
+        )
+        return self._montar_pagina_rentabilidade(itens, total, top, offset, fetch_next, formato), sql
+
+    @handle_service_errors
+    @validate_pagination
+    async def listar_rentabilidade_itens_async(
+        self,
+        data_inicio: str | None = None,
+        data_fim: str | None = None,
+        item_code: str | None = None,
+        tipo_negocio: str | None = None,
+        rentabilidade_min: float | None = None,
+        rentabilidade_max: float | None = None,
+        ordenar_por: str | None = None,
+        top: int | None = None,
+        offset: int = 0,
+        fetch_next: int | None = None,
+        formato: str = "records"
+    ) -> tuple[dict, str]:
+        self.validate_table_format(formato)
+        ordenar_por, fetch_next = self._validar_rentabilidade(
+            rentabilidade_min, rentabilidade_max, ordenar_por, top, offset, fetch_next
+        )
+        listar = (
+            self.repo.listar_rentabilidade_itens_com_total_dataframe_async if formato == "columns"
+            else self.repo.listar_rentabilidade_itens_com_total_async
+        )
+        itens, total, sql = await listar(
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            offset=offset,
+            fetch_next=fetch_next,
+            item_code=item_code,
+            tipo_negocio=tipo_negocio,
+            rentabilidade_min=rentabilidade_min,
+            rentabilidade_max=rentabilidade_max,
+            ordenar_por=ordenar_por,
+        )
+        return self._montar_pagina_rentabilidade(itens, total, top, offset, fetch_next, formato), sql
+
+    def _validar_rentabilidade(
+        self,
+        rentabilidade_min: float | None,
+        rentabilidade_max: float | None,
+        ordenar_por: str | None,
+        top: int | None,
+        offset: int,
+        fetch_next: int | None
+    ) -> tuple[str | None, int | None]:
+        """Valida os filtros e devolve a ordenação e o tamanho de página efetivos (com `top`)."""
+        if ordenar_por is not None and ordenar_por not in ORDENACOES_RENTABILIDADE:
+            raise ValidationError(
+                f"ordenar_por inválido: {ordenar_por}. Opções: {', '.join(ORDENACOES_RENTABILIDADE)}."
+            )
+        if rentabilidade_min is not None and rentabilidade_max is not None and rentabilidade_min > rentabilidade_max:
+            raise ValidationError("rentabilidade_min não pode ser maior que rentabilidade_max")
+        if top is None:
+            return ordenar_por, fetch_next
+
+        if top <= 0:
+            raise ValidationError("top deve ser maior que zero")
+        if offset >= top:
+            raise ValidationError("offset deve ser menor que top")
+        restantes = top - offset
+        return ordenar_por or "faturamento", restantes if fetch_next is None else min(fetch_next, restantes)
+
+    def _montar_pagina_rentabilidade(
+        self,
+        itens: list[dict] | pd.DataFrame,
+        total: int,
+        top: int | None,
+        offset: int,
+        fetch_next: int | None,
+        formato: str = "records"
+    ) -> dict:
+        if formato == "columns":
+            itens = self.dataframe_to_columns(itens)
+        return {
+            "itens": itens,
+            "total": total if top is None else min(total, top),
+            "offset": offset,
+            "fetch_next": fetch_next,
+        }
@@ -1,26 +1,145 @@
+from datetime import date
+
+import pandas as pd
+from django.core import signing
+
+from core.helpers.date_helper import DateHelper
 from core.repositories.logistica_repository import LogisticaRepository
 from core.services.decorators import handle_service_errors, validate_pagination
+from core.services.exceptions import ValidationError
 
 from core.services.base_service import BaseService
 
+CURSOR_SALT = "core.logistica.transportadoras"
+
 class LogisticaService(BaseService):
     def __init__(self):
         self.repo = LogisticaRepository()
     
     @handle_service_errors
     @validate_pagination
-    def listar_transportadoras_mais_usadas(self, offset: int = 0, fetch_next: int = None) -> tuple[list[dict], str]:
-        data, sql = self.repo.listar_transportadoras_mais_usadas(offset=offset, fetch_next=fetch_next)
-        dataframe = self.list_dicts_to_dataframe(data)
+    def listar_transportadoras_mais_usadas(
+        self,
+        offset: int = 0,
+        fetch_next: int = None,
+        formato: str = "records"
+    ) -> tuple[list[dict] | dict, str]:
+        """
+        Ranking de transportadoras com uma coluna por mês ('JAN-2025') e o total do período.
+        
+        `formato` "columns" devolve o ranking colunar (ver `BaseService.dataframe_to_columns`).
+        """
+        self.validate_table_format(formato)
+        dataframe, sql = self.repo.listar_transportadoras_mais_usadas_dataframe(offset=offset, fetch_next=fetch_next)
+        return self.format_dataframe(self._montar_ranking_transportadoras(dataframe), formato), sql
+    
+    @handle_service_errors
+    @validate_pagination
+    async def listar_transportadoras_mais_usadas_async(
+        self,
+        offset: int = 0,
+        fetch_next: int = None,
+        formato: str = "records"
+    ) -> tuple[list[dict] | dict, str]:
+        self.validate_table_format(formato)
+        dataframe, sql = await self.repo.listar_transportadoras_mais_usadas_dataframe_async(offset=offset, fetch_next=fetch_next)
+        return self.format_dataframe(self._montar_ranking_transportadoras(dataframe), formato), sql
+    
+    @handle_service_errors
+    @validate_pagination
+    def listar_transportadoras_por_cursor(
+        self,
+        cursor: str | None = None,
+        limite: int = 10,
+        formato: str = "records"
+    ) -> tuple[dict, str]:
+        """
+        Ranking de transportadoras paginado por cursor (keyset) em vez de offset.
+        
+        O cursor devolvido em `proximo_cursor` é opaco (assinado) e guarda a última
+        transportadora da página, o início da janela e o total. Assim todas as páginas
+        usam a mesma janela de datas e o total é contado uma única vez, na primeira.
+        """
+        self.validate_table_format(formato)
+        apos, data_inicio, total = self._ler_cursor(cursor)
+        linhas, proxima_chave, sql = self.repo.listar_transportadoras_por_chave(
+            apos=apos,
+            limite=limite,
+            data_inicio=data_inicio,
+        )
+        if total is None:
+            total, _ = self.repo.contar_transportadoras(data_inicio=data_inicio)
+        return self._montar_pagina_cursor(linhas, proxima_chave, data_inicio, total, formato), sql
+    
+    @handle_service_errors
+    @validate_pagination
+    async def listar_transportadoras_por_cursor_async(
+        self,
+        cursor: str | None = None,
+        limite: int = 10,
+        formato: str = "records"
+    ) -> tuple[dict, str]:
+        self.validate_table_format(formato)
+        apos, data_inicio, total = self._ler_cursor(cursor)
+        linhas, proxima_chave, sql = await self.repo.listar_transportadoras_por_chave_async(
+            apos=apos,
+            limite=limite,
+            data_inicio=data_inicio,
+        )
+        if total is None:
+            total, _ = await self.repo.contar_transportadoras_async(data_inicio=data_inicio)
+        return self._montar_pagina_cursor(linhas, proxima_chave, data_inicio, total, formato), sql
+    
+    def _ler_cursor(self, cursor: str | None) -> tuple[tuple[str | None, str] | None, date, int | None]:
+        """Decodifica o cursor em (chave da última transportadora, início da janela, total)."""
+        if not cursor:
+            return None, DateHelper.first_day_of_month(-6), None
+        try:
+            dados = signing.loads(cursor, salt=CURSOR_SALT)
+            return tuple(dados["apos"]), date.fromisoformat(dados["inicio"]), dados["total"]
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            raise ValidationError("cursor inválido")
+    
+    def _montar_pagina_cursor(
+        self,
+        linhas: list[dict],
+        proxima_chave: tuple[str | None, str] | None,
+        data_inicio: date,
+        total: int,
+        formato: str = "records"
+    ) -> dict:
+        proximo_cursor = None
+        if proxima_chave is not None:
+            proximo_cursor = signing.dumps(
+                {"apos": list(proxima_chave), "inicio": data_inicio.isoformat(), "total": total},
+                salt=CURSOR_SALT,
+            )
+        ranking = pd.DataFrame()
+        if linhas:
+            # O pivot descarta chaves nulas: o nome nulo entra como '' e volta depois. As linhas já
+            # vêm na ordem da chave (CardName, CardCode); o pivot ordena por CardCode, então a
+            # página é reordenada pela primeira aparição de cada transportadora
+            nomes = {linha["CardCode"]: linha["CardName"] for linha in linhas}
+            posicoes = {card_code: posicao for posicao, card_code in enumerate(nomes)}
+            dataframe = self.list_dicts_to_dataframe(linhas).fillna({"CardName": ""})
+            ranking = self._montar_ranking_transportadoras(dataframe)
+            ranking["CardName"] = ranking["CardCode"].map(nomes)
+            ranking = ranking.sort_values("CardCode", key=lambda coluna: coluna.map(posicoes), ignore_index=True)
+        return {
+            "transportadoras": self.format_dataframe(ranking, formato),
+            "proximo_cursor": proximo_cursor,
+            "total": total,
+        }
+    
+    def _montar_ranking_transportadoras(self, dataframe: pd.DataFrame) -> pd.DataFrame:
         dataframe = self.pivot_table(
             data=dataframe,
             index=["CardCode", "CardName"],
             columns=["Mes", "Ano"],
             values="Total",
             aggfunc="sum",
-            fill_value=0
+            fill_value=0,
+            month_year_headers=True
         )
         dataframe['Total6Meses'] = dataframe.iloc[:, 2:].sum(axis=1)
-        dataframe = self.replace_column_names_with_month_year(dataframe)
-        data = self.dataframe_to_list_dicts(dataframe)
-        return data, sql
\ No newline at end of file
+        return dataframe
@@ -0,0 +1,98 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List
+
+from dateutil.relativedelta import relativedelta
+
+from core.helpers.date_helper import DateHelper
+from core.repositories.agregados_repository import (
+    CONJUNTO_SAIDAS,
+    CONJUNTO_TRANSPORTADORAS,
+    CONJUNTO_VENDAS,
+    CONJUNTOS,
+    AgregadosRepository,
+)
+from core.repositories.estoque_repository import EstoqueRepository
+from core.repositories.logistica_repository import LogisticaRepository
+from core.services.base_service import BaseService
+from core.services.decorators import handle_service_errors
+from core.services.exceptions import ValidationError
+from core.services.query_cache import query_cache
+
+
+class MaterializacaoService(BaseService):
+    """
+    Carrega no banco local os agregados mensais dos meses fechados, a partir do ERP.
+    """
+
+    def __init__(self):
+        self.agregados = AgregadosRepository()
+        self.estoque = EstoqueRepository()
+        self.logistica = LogisticaRepository()
+
+    @handle_service_errors
+    def materializar_mes(self, conjunto: str, ano_mes: str) -> int:
+        """
+        Recarrega `ano_mes` ("AAAA-MM") do conjunto a partir do ERP, substituindo o que houver.
+
+        :return: Quantidade de linhas carregadas.
+        :raises ValidationError: Se o conjunto não existir ou o mês não estiver fechado.
+        """
+        if conjunto not in CONJUNTOS:
+            raise ValidationError(f"Conjunto inválido: {conjunto}. Opções: {', '.join(CONJUNTOS)}.")
+        inicio = self._primeiro_dia(ano_mes)
+        if inicio >= DateHelper.first_day_of_month():
+            raise ValidationError(f"O mês {ano_mes} ainda não está fechado.")
+        fim = inicio + relativedelta(months=1) - timedelta(days=1)
+
+        linhas = self._consultar_erp(conjunto, inicio, fim)
+        total = self.agregados.substituir_mes(conjunto, ano_mes, linhas)
+        # Resultados em cache calculados antes da carga continuam corretos, mas passam a ser
+        # recalculados com o mês materializado
+        query_cache.invalidate()
+        return total
+
+    @handle_service_errors
+    def backfill(self, desde: str, ate: str | None = None, conjuntos: Iterable[str] | None = None) -> Dict[str, Dict[str, int]]:
+        """
+        Materializa todos os meses fechados de `desde` até `ate` (por padrão, o último mês fechado).
+
+        :return: Linhas carregadas por conjunto e mês.
+        """
+        ultimo_fechado = DateHelper.first_day_of_month(-1)
+        fim = self._primeiro_dia(ate) if ate else ultimo_fechado
+        if fim > ultimo_fechado:
+            raise ValidationError(f"O mês {ate} ainda não está fechado.")
+
+        resultado = {}
+        for conjunto in conjuntos or CONJUNTOS:
+            resultado[conjunto] = {
+                ano_mes: self.materializar_mes(conjunto, ano_mes)
+                for ano_mes in self._meses(self._primeiro_dia(desde), fim)
+            }
+        return resultado
+
+    def _consultar_erp(self, conjunto: str, inicio: date, fim: date) -> List[dict]:
+        if conjunto == CONJUNTO_VENDAS:
+            return self.estoque.listar_pedidos_de_venda_erp(inicio, fim)[0]
+        if conjunto == CONJUNTO_SAIDAS:
+            linhas, _ = self.estoque.listar_saida_de_produtos_erp(inicio, fim)
+            # Produtos sem movimento no mês não geram linha materializada
+            return [linha for linha in linhas if linha["AnoMes"] is not None]
+        if conjunto == CONJUNTO_TRANSPORTADORAS:
+            return self.logistica.listar_transportadoras_por_mes(inicio, fim)[0]
+        raise ValidationError(f"Conjunto inválido: {conjunto}.")
+
+    def _primeiro_dia(self, ano_mes: str) -> date:
+        try:
+            return datetime.strptime(ano_mes, "%Y-%m").date()
+        except ValueError:
+            raise ValidationError(f"Mês inválido: '{ano_mes}'. Use o formato AAAA-MM.")
+
+    def _meses(self, inicio: date, fim: date) -> List[str]:
+        if inicio > fim:
+            raise ValidationError("O mês inicial não pode ser maior que o mês final.")
+        meses = []
+        while inicio <= fim:
+            meses.append(inicio.strftime("%Y-%m"))
+            inicio += relativedelta(months=1)
+        return meses
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "sqlserver"
+ALL_METHODS = "*"
+
+_MISSING = object()
+
+
+def _normalize(value: Any) -> Any:
+    """Converte os argumentos em valores estáveis para compor a chave."""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_normalize(item) for item in value]
+        return sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    return value
+
+
+def params_digest(params: Dict[str, Any]) -> str:
+    """Resumo estável dos argumentos normalizados de uma chamada."""
+    payload = json.dumps(_normalize(params), sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _result_rows(value: Any) -> int:
+    """Quantidade de linhas de um retorno de repositório (`(dados, sql)` ou só dados)."""
+    data = value[0] if isinstance(value, tuple) and value else value
+    try:
+        return len(data)
+    except TypeError:
+        return 0
+
+
+@dataclass
+class CacheEntry:
+    """Valor guardado no backend, com o instante até o qual é considerado fresco."""
+    value: Any
+    stored_at: float
+    fresh_until: float
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() >= self.fresh_until
+
+
+class QueryCache:
+    """
+    Cache de resultados de métodos de repositório sobre um backend de cache do Django.
+
+    A chave é composta pelo nome do método e pelos argumentos normalizados. O backend
+    é o alias `SQLSERVER_QUERY_CACHE_ALIAS` de `CACHES` (LocMemCache com LRU limitado
+    por `MAX_ENTRIES` por padrão; Redis/Memcached em produção com vários processos).
+
+    A invalidação usa gerações: o cache inteiro e cada método têm uma geração que
+    entra na chave. Invalidar troca a geração, tornando as entradas antigas
+    inacessíveis; o backend as descarta por TTL/LRU. Assim funciona com qualquer
+    backend, inclusive os que não apagam chaves por prefixo.
+    """
+
+    def __init__(self, alias: str | None = None):
+        self._alias = alias
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Counter] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, "SQLSERVER_QUERY_CACHE_ENABLED", False)
+
+    @property
+    def default_ttl(self) -> int:
+        return getattr(settings, "SQLSERVER_QUERY_CACHE_TTL", 300)
+
+    @property
+    def default_stale_ttl(self) -> int:
+        return getattr(settings, "SQLSERVER_QUERY_CACHE_STALE_TTL", 0)
+
+    @property
+    def max_rows(self) -> int | None:
+        return getattr(settings, "SQLSERVER_QUERY_CACHE_MAX_ROWS", None)
+
+    @property
+    def backend(self):
+        return caches[self._alias or getattr(settings, "SQLSERVER_QUERY_CACHE_ALIAS", "default")]
+
+    def make_key(self, method: str, params: Dict[str, Any]) -> str:
+        """Chave do backend para `method` com `params`, na geração atual."""
+        return f"{KEY_PREFIX}:{method}:{self._generation(method)}:{params_digest(params)}"
+
+    def get(self, method: str, params: Dict[str, Any]) -> Tuple[bool, Any]:
+        """Retorna `(True, valor)` em caso de acerto (fresco ou vencido) e `(False, None)` caso contrário."""
+        entry = self.lookup(method, params)
+        if entry is None:
+            return False, None
+        return True, entry.value
+
+    def lookup(self, method: str, params: Dict[str, Any]) -> CacheEntry | None:
+        """Retorna a entrada guardada (que pode estar vencida, ver `CacheEntry.is_stale`) ou None."""
+        try:
+            entry = self.backend.get(self.make_key(method, params), _MISSING)
+        except Exception as e:
+            logger.warning("Falha ao ler o cache de consultas (%s): %s", method, e)
+            self._count(method, "errors")
+            return None
+
+        if entry is _MISSING:
+            self._count(method, "misses")
+            return None
+        self._count(method, "stale_hits" if entry.is_stale else "hits")
+        return entry
+
+    def set(
+        self,
+        method: str,
+        params: Dict[str, Any],
+        value: Any,
+        ttl: int | None = None,
+        stale_ttl: int = 0
+    ) -> bool:
+        """
+        Guarda `value`, fresco por `ttl` segundos e servível vencido por mais `stale_ttl`.
+        Resultados acima de `SQLSERVER_QUERY_CACHE_MAX_ROWS` linhas não são guardados.
+        """
+        if self.max_rows is not None and _result_rows(value) > self.max_rows:
+            self._count(method, "skipped")
+            return False
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        try:
+            self.backend.set(
+                self.make_key(method, params),
+                CacheEntry(value, stored_at=now, fresh_until=now + ttl),
+                ttl + stale_ttl,
+            )
+        except Exception as e:
+            logger.warning("Falha ao gravar no cache de consultas (%s): %s", method, e)
+            self._count(method, "errors")
+            return False
+        self._count(method, "sets")
+        return True
+
+    def invalidate(self, method: str | None = None) -> None:
+        """Invalida as entradas de `method` ("Classe.metodo") ou, sem argumento, de todos os métodos."""
+        scope = method or ALL_METHODS
+        self.backend.set(self._generation_key(scope), time.time_ns(), None)
+        self._count(scope, "invalidations")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Contadores por método, com a taxa de acerto calculada."""
+        with self._lock:
+            stats = {method: dict(counter) for method, counter in self._stats.items()}
+        for counters in stats.values():
+            hits = counters.get("hits", 0) + counters.get("stale_hits", 0)
+            lookups = hits + counters.get("misses", 0)
+            counters["hit_ratio"] = round(hits / lookups, 4) if lookups else None
+        return stats
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def _generation_key(self, scope: str) -> str:
+        return f"{KEY_PREFIX}:geracao:{scope}"
+
+    def _generation(self, method: str) -> str:
+        keys = [self._generation_key(ALL_METHODS), self._generation_key(method)]
+        generations = self.backend.get_many(keys)
+        for key in keys:
+            if key not in generations:
+                # Geração ausente (nunca criada ou descartada pelo backend): cria uma nova,
+                # o que equivale a invalidar; nunca volta a expor entradas antigas.
+                self.backend.add(key, time.time_ns(), None)
+                generations[key] = self.backend.get(key)
+        return "-".join(str(generations[key]) for key in keys)
+
+    def _count(self, method: str, counter: str) -> None:
+        with self._lock:
+            self._stats.setdefault(method, Counter())[counter] += 1
+
+
+class BackgroundRefresher:
+    """
+    Executa em segundo plano a atualização de entradas vencidas (stale-while-revalidate).
+
+    Cada chave tem no máximo uma atualização pendente; as threads são limitadas a
+    `SQLSERVER_QUERY_CACHE_REFRESH_WORKERS` e a fila a `SQLSERVER_QUERY_CACHE_REFRESH_MAX_PENDING`
+    chaves. Pedidos além disso são descartados: a entrada vencida continua sendo servida
+    e a próxima leitura tenta de novo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Set[str] = set()
+        self._executor: ThreadPoolExecutor | None = None
+        self._stats: Counter = Counter()
+
+    def submit(self, key: str, func: Callable[[], Any]) -> bool:
+        """Agenda `func` para a chave `key`; retorna False se já houver atualização pendente ou a fila estiver cheia."""
+        max_pending = getattr(settings, "SQLSERVER_QUERY_CACHE_REFRESH_MAX_PENDING", 100)
+        with self._lock:
+            if key in self._pending:
+                self._stats["deduplicated"] += 1
+                return False
+            if len(self._pending) >= max_pending:
+                self._stats["rejected"] += 1
+                return False
+            self._pending.add(key)
+            self._stats["submitted"] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "SQLSERVER_QUERY_CACHE_REFRESH_WORKERS", 2),
+                    thread_name_prefix="cache-refresh",
+                )
+            executor = self._executor
+        executor.submit(self._run, key, func)
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending": len(self._pending), **self._stats}
+
+    def _run(self, key: str, func: Callable[[], Any]) -> None:
+        try:
+            func()
+            outcome = "completed"
+        except Exception as e:
+            logger.warning("Falha ao atualizar em segundo plano a entrada %s: %s", key, e)
+            outcome = "failed"
+        with self._lock:
+            self._pending.discard(key)
+            self._stats[outcome] += 1
+
+
+query_cache = QueryCache()
+query_cache_refresher = BackgroundRefresher()
@@ -0,0 +1,249 @@
+import bisect
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, TypeVar
+
+from django.conf import settings
+
+T = TypeVar("T")
+
+# Limites superiores dos buckets de cada histograma
+TIME_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+BYTE_BUCKETS = (1024, 10240, 102400, 1048576, 10485760, 104857600, 1073741824)
+
+# Quantidade de linhas usadas para estimar o tamanho médio de uma linha
+SIZE_SAMPLE_ROWS = 50
+
+
+class Histogram:
+    """Histograma de buckets fixos com contagem, soma, mínimo, máximo e percentis estimados."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # último bucket: acima do maior limite
+        self.count = 0
+        self.total = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, fraction: float) -> float | None:
+        """Limite superior do bucket que contém o percentil (o máximo no último bucket)."""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        accumulated = 0
+        for index, bucket_count in enumerate(self.counts):
+            accumulated += bucket_count
+            if accumulated >= target:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "avg": round(self.total / self.count, 3) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "buckets": {
+                **{f"<={limit}": count for limit, count in zip(self.buckets, self.counts)},
+                f">{self.buckets[-1]}": self.counts[-1],
+            },
+        }
+
+
+class MethodMetrics:
+    """Métricas acumuladas de um método de repositório."""
+
+    STAGES = ("total_ms", "connect_ms", "execute_ms", "fetch_ms")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors: Counter = Counter()
+        self.histograms = {stage: Histogram(TIME_BUCKETS_MS) for stage in self.STAGES}
+        self.histograms["rows"] = Histogram(ROW_BUCKETS)
+        self.histograms["bytes"] = Histogram(BYTE_BUCKETS)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": dict(self.errors),
+            **{name: histogram.snapshot() for name, histogram in self.histograms.items()},
+        }
+
+
+@dataclass
+class QueryRecord:
+    """Medições de uma execução de método de repositório, preenchidas pelo cliente."""
+    method: str
+    started_at: float = field(default_factory=time.perf_counter)
+    connect_ms: float = 0.0
+    execute_ms: float = 0.0
+    fetch_ms: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+    queries: int = 0
+    # Resultado em streaming: a medição continua durante a iteração (ver `track_stream`)
+    deferred: bool = False
+
+
+_current_record: ContextVar[QueryRecord | None] = ContextVar("sqlserver_query_record", default=None)
+
+
+class QueryMetricsRegistry:
+    """Registro em memória (por processo) das métricas por método de repositório."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods: Dict[str, MethodMetrics] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, "SQLSERVER_QUERY_METRICS_ENABLED", True)
+
+    @contextmanager
+    def track(self, method: str):
+        """Abre um registro para `method`; as etapas medidas pelo cliente caem nele."""
+        if not self.enabled:
+            yield None
+            return
+
+        record = QueryRecord(method)
+        token = _current_record.set(record)
+        error = None
+        try:
+            yield record
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current_record.reset(token)
+            if not record.deferred:
+                self._store(record, error)
+
+    def track_stream(self, iterable: Iterable[T]) -> Iterator[T]:
+        """
+        Mede um resultado em streaming (ex.: `SQLServerCliente.fetch_iter`) devolvido por
+        um método em `track`: as etapas do cliente só rodam durante a iteração, depois que
+        o método já retornou. O registro do método é adiado e um novo, com o mesmo nome,
+        é aberto no início da iteração e guardado ao esgotar o iterável, em erro ou no
+        fechamento. O registro só fica ativo durante cada `next()` do iterável, e não
+        enquanto o consumidor processa o lote.
+
+        Fora de `track` (ou com as métricas desligadas), o iterável é devolvido como está.
+        """
+        record = _current_record.get()
+        if record is None:
+            return iter(iterable)
+        record.deferred = True
+        return self._iterate(record.method, iter(iterable))
+
+    def _iterate(self, method: str, iterator: Iterator[T]) -> Iterator[T]:
+        record = QueryRecord(method)
+        error = None
+        try:
+            while True:
+                token = _current_record.set(record)
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    _current_record.reset(token)
+                yield item
+        except BaseException as e:
+            if not isinstance(e, GeneratorExit):
+                error = e
+            raise
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            self._store(record, error)
+
+    def snapshot(self, order_by: str = "total_ms") -> Dict[str, Any]:
+        """Retorna as métricas por método, ordenadas pela soma de `order_by` (decrescente)."""
+        with self._lock:
+            methods = {name: metrics.snapshot() for name, metrics in self._methods.items()}
+        return dict(sorted(
+            methods.items(),
+            key=lambda item: item[1].get(order_by, {}).get("sum") or 0,
+            reverse=True,
+        ))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._methods.clear()
+
+    def _store(self, record: QueryRecord, error: BaseException | None) -> None:
+        total_ms = (time.perf_counter() - record.started_at) * 1000
+        with self._lock:
+            metrics = self._methods.setdefault(record.method, MethodMetrics())
+            metrics.calls += 1
+            metrics.histograms["total_ms"].observe(total_ms)
+            if error is not None:
+                # Classe original (ex.: OperationalError), antes da tradução do decorator
+                metrics.errors[type(error).__name__] += 1
+            if record.queries:
+                metrics.histograms["connect_ms"].observe(record.connect_ms)
+                metrics.histograms["execute_ms"].observe(record.execute_ms)
+                metrics.histograms["fetch_ms"].observe(record.fetch_ms)
+                metrics.histograms["rows"].observe(record.rows)
+                metrics.histograms["bytes"].observe(record.bytes)
+
+
+def current_record() -> QueryRecord | None:
+    return _current_record.get()
+
+
+@contextmanager
+def timed(stage: str):
+    """Soma o tempo do bloco à etapa `stage` ('connect', 'execute' ou 'fetch') do registro atual."""
+    record = _current_record.get()
+    if record is None:
+        yield
+        return
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        setattr(record, f"{stage}_ms", getattr(record, f"{stage}_ms") + elapsed_ms)
+        if stage == "execute":
+            record.queries += 1
+
+
+def add_result(rows: int, nbytes: int) -> None:
+    """Soma linhas e bytes retornados ao registro atual, se houver."""
+    record = _current_record.get()
+    if record is not None:
+        record.rows += rows
+        record.bytes += nbytes
+
+
+def estimate_rows_size(rows: List[Iterable[Any]]) -> int:
+    """Estima o tamanho do resultado a partir de uma amostra das primeiras linhas."""
+    if not rows:
+        return 0
+    sample = rows[:SIZE_SAMPLE_ROWS]
+    sample_size = sum(sys.getsizeof(value) for row in sample for value in row)
+    return int(sample_size / len(sample) * len(rows))
+
+
+query_metrics = QueryMetricsRegistry()
@@ -0,0 +1,75 @@
+from datetime import timedelta
+from typing import Any, Dict
+
+from django.db import transaction
+
+from core.helpers.date_helper import DateHelper
+from core.repositories.documentos_repository import DOCUMENTOS, DocumentosRepository
+from core.repositories.replica_repository import ReplicaRepository
+from core.services.base_service import BaseService
+from core.services.decorators import handle_service_errors
+from core.services.exceptions import ValidationError
+
+
+class ReplicacaoService(BaseService):
+    """
+    Replicação incremental das linhas de documentos do ERP para o banco local.
+
+    Cada execução busca só os documentos com DocEntry acima da marca d'água ou com
+    UpdateDate depois do último dia já replicado por completo, e os substitui na réplica.
+    """
+
+    def __init__(self):
+        self.documentos = DocumentosRepository()
+        self.replica = ReplicaRepository()
+
+    @handle_service_errors
+    def replicar(self, tipo: str, tamanho_lote: int | None = None, completo: bool = False) -> Dict[str, Any]:
+        """
+        Replica as alterações de `tipo` desde a última execução (ou tudo, com `completo`).
+
+        Cada lote é gravado em uma transação própria, junto com a marca d'água: uma falha
+        no meio mantém os lotes já gravados, e a execução seguinte continua do último
+        documento completo. A data da marca só avança ao fim da execução.
+
+        :return: Documentos e linhas recebidos e a nova marca d'água.
+        """
+        if tipo not in DOCUMENTOS:
+            raise ValidationError(f"Tipo de documento inválido: {tipo}. Opções: {', '.join(DOCUMENTOS)}.")
+
+        # UpdateDate não tem hora: o último dia completo é a véspera do início, e as
+        # alterações feitas a partir de hoje entram na próxima execução
+        ultimo_dia_completo = DateHelper.today() - timedelta(days=1)
+        if completo:
+            with transaction.atomic():
+                self.replica.reiniciar(tipo)
+        marca = self.replica.marca(tipo)
+        # Sem data anterior (primeira carga), uma execução interrompida é retomada a partir
+        # da véspera do início, para não perder alterações em documentos já gravados
+        ultima_atualizacao = marca.ultima_atualizacao or ultimo_dia_completo
+        lotes, _ = self.documentos.iterar_linhas_alteradas(
+            tipo,
+            marca.ultimo_doc_entry,
+            marca.ultima_atualizacao,
+            tamanho_lote,
+        )
+
+        substituidos, linhas = set(), 0
+        ultimo_doc_entry = marca.ultimo_doc_entry
+        for lote in lotes:
+            with transaction.atomic():
+                linhas += self.replica.gravar_lote(tipo, lote, substituidos)
+                # O último documento do lote pode continuar no próximo: a marca fica antes dele
+                ultimo_doc_entry = max(ultimo_doc_entry, lote[-1]["DocEntry"] - 1)
+                self.replica.atualizar_marca(tipo, ultimo_doc_entry, ultima_atualizacao, linhas)
+
+        if substituidos:
+            ultimo_doc_entry = max(ultimo_doc_entry, max(substituidos))
+        self.replica.atualizar_marca(tipo, ultimo_doc_entry, ultimo_dia_completo, linhas)
+
+        return {
+            "tipo": tipo,
+            "documentos": len(substituidos),
+            "linhas": linhas,
+            "ultimo_doc_entry": ultimo_doc_entry,
+        }
@@ -0,0 +1,93 @@
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlightTimeoutError(Exception):
+    """A execução em andamento para a mesma chave não terminou dentro do tempo limite."""
+    pass
+
+
+class _Call:
+    """Execução em andamento de uma chave; os demais chamadores aguardam o `done`."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalescência de chamadas idênticas e simultâneas (single-flight).
+
+    Enquanto uma chamada para uma chave está em andamento, as chamadas seguintes
+    com a mesma chave não executam a função: aguardam a primeira e recebem o mesmo
+    resultado (o mesmo objeto, que deve ser tratado como somente leitura) ou a
+    mesma exceção. Cada chave só tem uma execução em andamento por processo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._stats: Counter = Counter()
+
+    def do(self, key: str, func: Callable[[], T], timeout: float | None = None) -> T:
+        """
+        Executa `func` ou aguarda a execução em andamento para `key`.
+
+        :param timeout: Espera máxima, em segundos, de quem aguarda outra execução
+            (None = sem limite). Não limita a execução de quem roda `func`.
+        :raises SingleFlightTimeoutError: Se a execução em andamento não terminar a tempo.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["executions"] += 1
+            else:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+
+        if leader:
+            try:
+                call.result = func()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                    if call.error is not None:
+                        self._stats["shared_errors"] += call.waiters
+                call.done.set()
+
+        if not call.done.wait(timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise SingleFlightTimeoutError(
+                f"A consulta em andamento para '{key}' não terminou em {timeout:.1f}s."
+            )
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"in_flight": len(self._calls), **self._stats}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+query_single_flight = SingleFlight()
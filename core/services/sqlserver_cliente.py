@@ -1,11 +1,72 @@
-from contextlib import contextmanager
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+import numpy as np
+import pandas as pd
 import pyodbc
-from typing import Any, Dict, Iterable, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, TypeVar
 
+from core.helpers.sql_helper import SQLHelper
+
+from .decimal_policy import FLOAT, DecimalPolicies, policy_for
 from .sqlserver_config import SQLServerConfig
+from .sqlserver_pool import SQLServerConnectionPool
+from .query_metrics import add_result, estimate_rows_size, timed
+
+T = TypeVar("T")
+
+def _column_to_array(values: tuple, type_code: type) -> np.ndarray:
+    """Converte os valores de uma coluna (um lote) em um array numpy tipado."""
+    has_null = None in values
+    if type_code is bool and not has_null:
+        return np.array(values, dtype=np.bool_)
+    if type_code is int:
+        if not has_null:
+            return np.fromiter(values, dtype=np.int64, count=len(values))
+        # Mesmo comportamento do pandas: inteiros com nulos viram float64 com NaN
+        return np.array(values, dtype=np.float64)
+    if type_code is float:
+        return np.array(values, dtype=np.float64)
+    if type_code in (datetime, date):
+        return np.array(values, dtype="datetime64[ns]")
+    return np.array(values, dtype=object)
+
+def _column_converter(column: tuple, decimals: DecimalPolicies) -> Callable[[tuple], np.ndarray]:
+    """Conversor dos lotes de uma coluna do cursor.description (DECIMAL segue a política da coluna)."""
+    name, type_code = column[0], column[1]
+    if type_code is Decimal:
+        # description: (name, type_code, display_size, internal_size, precision, scale, null_ok)
+        scale = column[5] if len(column) > 5 else None
+        return functools.partial(policy_for(decimals, name).to_array, column_scale=scale)
+    return functools.partial(_column_to_array, type_code=type_code)
+
+def _column_scales(description: Sequence[tuple], decimals: DecimalPolicies) -> Dict[str, int]:
+    """Escala (10**n) das colunas DECIMAL convertidas com `scaled(n)`, por nome."""
+    scales = {}
+    for column in description:
+        policy = policy_for(decimals, column[0])
+        if column[1] is Decimal and policy.kind == "scaled":
+            scales[column[0]] = policy.scale
+    return scales
+
 class SQLServerCliente:
-    def __init__(self, config: Any):
+    DEFAULT_ARRAYSIZE = 5000
+
+    def __init__(self, config: Any, use_pool: bool = False):
         self.config = config
+        self.pool = None
+        if use_pool:
+            self.pool = SQLServerConnectionPool(
+                self.connect,
+                min_size=config.pool_min_size,
+                max_size=config.pool_max_size,
+                timeout=config.pool_timeout,
+                max_lifetime=config.pool_max_lifetime,
+                idle_timeout=config.pool_idle_timeout,
+                health_check_interval=config.pool_health_check_interval,
+            )
         
     def connect(self) -> pyodbc.Connection:
         connection_string = self.config.get_connection_string()
@@ -14,7 +75,15 @@ class SQLServerCliente:
     
     @contextmanager
     def connection(self):
-        connection = self.connect()
+        if self.pool is not None:
+            with ExitStack() as stack:
+                with timed("connect"):
+                    connection = stack.enter_context(self.pool.connection())
+                yield connection
+            return
+
+        with timed("connect"):
+            connection = self.connect()
         try:
             yield connection
         finally:
@@ -24,21 +93,188 @@ class SQLServerCliente:
         params = params or []
         with self.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(query, params)
-            columns = [column[0] for column in cursor.description]
-            rows = cursor.fetchall()
-        return [dict(zip(columns, row)) for row in rows]
+            try:
+                with timed("execute"):
+                    cursor.execute(query, params)
+                columns = [column[0] for column in cursor.description]
+                with timed("fetch"):
+                    rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        with timed("fetch"):
+            result = [dict(zip(columns, row)) for row in rows]
+        add_result(len(rows), estimate_rows_size(rows))
+        return result
+    
+    def fetch_multi(self, queries: Sequence[Tuple[str, Iterable[Any] | None]]) -> List[List[Dict[str, Any]]]:
+        """
+        Executa várias queries em um único lote e lê cada conjunto de resultados com `nextset()`.
+
+        Uma conexão e uma ida ao servidor no lugar de uma por query. Cada query deve
+        produzir exatamente um conjunto de resultados (um SELECT final).
+
+        :param queries: Pares (sql, params), na ordem em que os resultados são devolvidos.
+        :return: Uma lista de linhas (dicionários) por query.
+        """
+        if not queries:
+            return []
+        sql, params = SQLHelper.combine_statements(queries)
+        results = []
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                with timed("execute"):
+                    cursor.execute(sql, params)
+                for index in range(len(queries)):
+                    has_set = index == 0 or cursor.nextset()
+                    # Pula conjuntos sem colunas (contagens de linhas de comandos que não são SELECT)
+                    while has_set and cursor.description is None:
+                        has_set = cursor.nextset()
+                    if not has_set:
+                        raise pyodbc.ProgrammingError(
+                            f"O lote devolveu {index} conjuntos de resultados; esperados {len(queries)}."
+                        )
+                    columns = [column[0] for column in cursor.description]
+                    with timed("fetch"):
+                        rows = cursor.fetchall()
+                    add_result(len(rows), estimate_rows_size(rows))
+                    results.append([dict(zip(columns, row)) for row in rows])
+            finally:
+                cursor.close()
+        return results
+    
+    def fetch_iter(
+        self,
+        query: str,
+        params: Iterable[Any] | None = None,
+        arraysize: int | None = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Executa a query e devolve os resultados em lotes de até `arraysize` linhas.
+
+        A conexão fica emprestada apenas enquanto o gerador estiver ativo: ela é
+        devolvida ao esgotar os lotes ou quando o gerador é fechado/coletado.
+        """
+        params = params or []
+        arraysize = arraysize or self.DEFAULT_ARRAYSIZE
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.arraysize = arraysize
+                with timed("execute"):
+                    cursor.execute(query, params)
+                columns = [column[0] for column in cursor.description]
+                while True:
+                    with timed("fetch"):
+                        rows = cursor.fetchmany(arraysize)
+                    if not rows:
+                        break
+                    add_result(len(rows), estimate_rows_size(rows))
+                    yield [dict(zip(columns, row)) for row in rows]
+            finally:
+                # Descarta resultados pendentes antes de devolver a conexão
+                cursor.close()
+    
+    def fetch_frame(
+        self,
+        query: str,
+        params: Iterable[Any] | None = None,
+        arraysize: int | None = None,
+        categorical: bool = True,
+        decimals: DecimalPolicies = FLOAT,
+    ) -> pd.DataFrame:
+        """
+        Executa a query e monta um DataFrame diretamente a partir do cursor.
+
+        Cada lote lido com `fetchmany` é transposto em colunas e convertido para
+        arrays numpy tipados (int64, float64, datetime64), sem criar um dicionário
+        por linha. Colunas de texto viram `category` quando `categorical` é True.
+
+        Colunas DECIMAL seguem `decimals`: uma política para todas ou uma por coluna
+        (ex.: `{"FaturamentoPorItem": CENTS}`; as não listadas ficam em float64). As
+        escaladas ficam registradas em `frame.attrs["scales"]` ({coluna: n}).
+        """
+        params = params or []
+        arraysize = arraysize or self.DEFAULT_ARRAYSIZE
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.arraysize = arraysize
+                with timed("execute"):
+                    cursor.execute(query, params)
+                columns = [column[0] for column in cursor.description]
+                type_codes = [column[1] for column in cursor.description]
+                converters = [_column_converter(column, decimals) for column in cursor.description]
+                scales = _column_scales(cursor.description, decimals)
+                chunks: List[List[np.ndarray]] = [[] for _ in columns]
+                while True:
+                    with timed("fetch"):
+                        rows = cursor.fetchmany(arraysize)
+                        if not rows:
+                            break
+                        for index, values in enumerate(zip(*rows)):
+                            chunks[index].append(converters[index](values))
+            finally:
+                cursor.close()
+
+        data = {}
+        for name, type_code, column_chunks in zip(columns, type_codes, chunks):
+            if not column_chunks:
+                data[name] = np.array([], dtype=object)
+                continue
+            array = column_chunks[0] if len(column_chunks) == 1 else np.concatenate(column_chunks)
+            if categorical and type_code is str:
+                data[name] = pd.Categorical(array)
+            else:
+                data[name] = array
+        frame = pd.DataFrame(data, columns=columns)
+        if scales:
+            frame.attrs["scales"] = scales
+        add_result(len(frame), int(frame.memory_usage(index=False).sum()))
+        return frame
+    
+    def run_parallel(self, *calls: Callable[[], T], max_workers: int | None = None) -> List[T]:
+        """
+        Executa chamadas independentes (ex.: métodos de repositório) ao mesmo tempo,
+        cada uma na sua própria conexão do pool, e retorna os resultados na ordem
+        em que foram passadas.
+
+        Se alguma chamada falhar, as que ainda não começaram são canceladas e a
+        primeira exceção (na ordem das chamadas) é relançada sem alteração, de forma
+        que o `handle_db_errors` do chamador continua traduzindo os erros.
+
+        :param calls: Funções sem argumentos (use `functools.partial` para parâmetros).
+        :param max_workers: Limite de consultas simultâneas (padrão: tamanho máximo do pool).
+        """
+        if not calls:
+            return []
+        if len(calls) == 1:
+            return [calls[0]()]
+
+        limit = max_workers or (self.pool.max_size if self.pool is not None else len(calls))
+        executor = ThreadPoolExecutor(max_workers=min(limit, len(calls)), thread_name_prefix="sqlserver-parallel")
+        try:
+            futures = [executor.submit(call) for call in calls]
+            return [future.result() for future in futures]
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
     
     def fetch_one(self, query: str, params: Iterable[Any] | None = None) -> Dict[str, Any] | None:
         params = params or []
         with self.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(query, params)
-            row = cursor.fetchone()
-            if not row:
-                return None
-            
-            columns = [col[0] for col in cursor.description]
+            try:
+                with timed("execute"):
+                    cursor.execute(query, params)
+                with timed("fetch"):
+                    row = cursor.fetchone()
+                if not row:
+                    return None
+                add_result(1, estimate_rows_size([row]))
+                
+                columns = [col[0] for col in cursor.description]
+            finally:
+                cursor.close()
         return dict(zip(columns, row))
     
-default_sql_server_client = SQLServerCliente(SQLServerConfig())
\ No newline at end of file
+default_sql_server_client = SQLServerCliente(SQLServerConfig(), use_pool=True)
\ No newline at end of file
@@ -8,6 +8,13 @@ class SQLServerConfig:
         self.port = settings.SQLSERVER_PORT
         self.user = settings.SQLSERVER_USER
         self.password = settings.SQLSERVER_PASSWORD
+        self.pool_min_size = settings.SQLSERVER_POOL_MIN_SIZE
+        self.pool_max_size = settings.SQLSERVER_POOL_MAX_SIZE
+        self.pool_timeout = settings.SQLSERVER_POOL_TIMEOUT
+        self.pool_max_lifetime = settings.SQLSERVER_POOL_MAX_LIFETIME
+        self.pool_idle_timeout = settings.SQLSERVER_POOL_IDLE_TIMEOUT
+        self.pool_health_check_interval = settings.SQLSERVER_POOL_HEALTH_CHECK_INTERVAL
+        self.async_max_workers = settings.SQLSERVER_ASYNC_MAX_WORKERS
         
     def get_connection_string(self):
         return 'DRIVER='+self.driver+';SERVER='+self.host+','+str(self.port)+';DATABASE='+self.database+';UID='+self.user+';PWD='+self.password+';PORT='+str(self.port)+';'
\ No newline at end of file
@@ -0,0 +1,258 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict
+
+import pyodbc
+
+
+class PoolTimeoutError(Exception):
+    """Nenhuma conexão ficou disponível no pool dentro do tempo limite."""
+    pass
+
+
+@dataclass
+class PooledConnection:
+    """Conexão física mantida pelo pool, com os instantes de criação e último uso."""
+    connection: pyodbc.Connection
+    created_at: float = field(default_factory=time.monotonic)
+    last_used_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class PoolStats:
+    """Contadores acumulados do pool desde a sua criação."""
+    checkouts: int = 0
+    connections_created: int = 0
+    connections_closed: int = 0
+    health_check_failures: int = 0
+    timeouts: int = 0
+    total_wait_time: float = 0.0
+    max_wait_time: float = 0.0
+
+
+class SQLServerConnectionPool:
+    """
+    Pool de conexões thread-safe para o SQL Server.
+
+    Mantém entre `min_size` e `max_size` conexões físicas, reutilizando-as entre
+    as consultas em vez de abrir uma conexão nova (TCP + TLS + login) a cada chamada.
+    Conexões ociosas há mais de `health_check_interval` segundos são testadas com
+    um `SELECT 1` antes de serem reutilizadas, conexões mais antigas que
+    `max_lifetime` são recicladas e conexões ociosas além de `idle_timeout` são
+    fechadas enquanto o pool estiver acima de `min_size`.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], pyodbc.Connection],
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 30.0,
+        max_lifetime: float = 1800.0,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+    ):
+        if min_size < 0:
+            raise ValueError("min_size não pode ser negativo")
+        if max_size < 1 or max_size < min_size:
+            raise ValueError("max_size deve ser maior que zero e maior ou igual a min_size")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle: deque[PooledConnection] = deque()
+        self._in_use: Dict[int, PooledConnection] = {}
+        self._size = 0
+        self._closed = False
+        self._stats = PoolStats()
+
+    @contextmanager
+    def connection(self, timeout: float | None = None):
+        """Empresta uma conexão do pool e a devolve ao sair do contexto."""
+        connection = self.acquire(timeout)
+        discard = False
+        try:
+            yield connection
+        except (pyodbc.OperationalError, pyodbc.InterfaceError):
+            # Erros de comunicação deixam a conexão em estado desconhecido
+            discard = True
+            raise
+        finally:
+            if not discard:
+                try:
+                    connection.rollback()
+                except pyodbc.Error:
+                    discard = True
+            self.release(connection, discard=discard)
+
+    def acquire(self, timeout: float | None = None) -> pyodbc.Connection:
+        """
+        Retira uma conexão do pool, criando uma nova se houver espaço.
+
+        :param timeout: Tempo máximo de espera em segundos (padrão: `self.timeout`).
+        :return: Conexão pyodbc pronta para uso.
+        :raises PoolTimeoutError: Se nenhuma conexão ficar disponível a tempo.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started_at = time.monotonic()
+
+        while True:
+            pooled = self._reserve(started_at, timeout)
+            if pooled is None:
+                try:
+                    pooled = PooledConnection(self._connect())
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats.connections_created += 1
+                break
+
+            if self._is_usable(pooled):
+                break
+            self._discard(pooled)
+
+        waited = time.monotonic() - started_at
+        with self._cond:
+            self._in_use[id(pooled.connection)] = pooled
+            self._stats.checkouts += 1
+            self._stats.total_wait_time += waited
+            self._stats.max_wait_time = max(self._stats.max_wait_time, waited)
+        return pooled.connection
+
+    def release(self, connection: pyodbc.Connection, discard: bool = False) -> None:
+        """
+        Devolve uma conexão ao pool.
+
+        :param connection: Conexão obtida por `acquire`.
+        :param discard: Se True, fecha a conexão em vez de reaproveitá-la.
+        """
+        with self._cond:
+            pooled = self._in_use.pop(id(connection), None)
+        if pooled is None:
+            return
+
+        if discard or self._closed or self._expired(pooled, time.monotonic()):
+            self._discard(pooled)
+        else:
+            pooled.last_used_at = time.monotonic()
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+        self._evict_idle()
+
+    def close(self) -> None:
+        """Fecha todas as conexões ociosas e impede novos empréstimos."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna um retrato dos contadores e da ocupação atual do pool."""
+        with self._cond:
+            checkouts = self._stats.checkouts
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "checkouts": checkouts,
+                "connections_created": self._stats.connections_created,
+                "connections_closed": self._stats.connections_closed,
+                "health_check_failures": self._stats.health_check_failures,
+                "timeouts": self._stats.timeouts,
+                "total_wait_time": self._stats.total_wait_time,
+                "avg_wait_time": self._stats.total_wait_time / checkouts if checkouts else 0.0,
+                "max_wait_time": self._stats.max_wait_time,
+            }
+
+    def _reserve(self, started_at: float, timeout: float) -> PooledConnection | None:
+        """
+        Obtém uma conexão ociosa ou reserva espaço para criar uma nova.
+
+        Retorna None quando o chamador deve abrir a conexão física (o espaço
+        já foi contabilizado em `_size`).
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("O pool de conexões foi fechado.")
+                if self._idle:
+                    # LIFO: reaproveita a conexão usada mais recentemente
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+
+                remaining = timeout - (time.monotonic() - started_at)
+                if remaining <= 0:
+                    self._stats.timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Nenhuma conexão disponível no pool após {timeout:.1f}s "
+                        f"({self._size} conexões em uso)."
+                    )
+                self._cond.wait(remaining)
+
+    def _expired(self, pooled: PooledConnection, now: float) -> bool:
+        return self.max_lifetime is not None and now - pooled.created_at >= self.max_lifetime
+
+    def _is_usable(self, pooled: PooledConnection) -> bool:
+        now = time.monotonic()
+        if self._expired(pooled, now):
+            return False
+        if now - pooled.last_used_at < self.health_check_interval:
+            return True
+        try:
+            cursor = pooled.connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except pyodbc.Error:
+            with self._cond:
+                self._stats.health_check_failures += 1
+            return False
+
+    def _discard(self, pooled: PooledConnection) -> None:
+        try:
+            pooled.connection.close()
+        except pyodbc.Error:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats.connections_closed += 1
+            self._cond.notify()
+
+    def _evict_idle(self) -> None:
+        """Fecha conexões ociosas além de `idle_timeout`, preservando `min_size`."""
+        if self.idle_timeout is None:
+            return
+        now = time.monotonic()
+        evicted = []
+        with self._cond:
+            # As conexões mais antigas ficam no início da fila
+            while (
+                self._idle
+                and self._size - len(evicted) > self.min_size
+                and now - self._idle[0].last_used_at >= self.idle_timeout
+            ):
+                evicted.append(self._idle.popleft())
+        for pooled in evicted:
+            self._discard(pooled)
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from ninja.testing import TestAsyncClient
+
+from core.api.financeiro_api import router as financeiro_router
+from core.services.exceptions import ValidationError
+
+
+class SyncTestClient:
+    """Runs the async Ninja test client to completion so tests stay synchronous."""
+
+    def __init__(self, router):
+        self.client = TestAsyncClient(router)
+
+    def get(self, path, **kwargs):
+        return asyncio.run(self.client.get(path, **kwargs))
+
+
+@pytest.fixture
+def api_client():
+    return SyncTestClient(financeiro_router)
+
+
+@pytest.fixture
+def pagina_rentabilidade():
+    return {
+        "itens": [{"ItemCode": "I00001", "TipoDoNegocio": "B2B", "FaturamentoPorItem": 8961.78, "Rentabilidade": 12.5}],
+        "total": 1,
+        "offset": 0,
+        "fetch_next": 50,
+    }
+
+
+class TestFinanceiroAPI:
+
+    def test_listar_rentabilidade_itens_defaults(self, api_client, pagina_rentabilidade):
+        """Test the endpoint forwards the default filters and pagination."""
+        with patch('core.api.financeiro_api.FinanceiroService') as MockService:
+            mock_instance = MockService.return_value
+            mock_instance.listar_rentabilidade_itens_async = AsyncMock(return_value=(pagina_rentabilidade, "SELECT ..."))
+
+            response = api_client.get("rentabilidade-itens/")
+
+            assert response.status_code == 200
+            assert response.json() == pagina_rentabilidade
+            mock_instance.listar_rentabilidade_itens_async.assert_awaited_once_with(
+                data_inicio=None,
+                data_fim=None,
+                item_code=None,
+                tipo_negocio=None,
+                rentabilidade_min=None,
+                rentabilidade_max=None,
+                ordenar_por=None,
+                top=None,
+                offset=0,
+                fetch_next=50,
+                formato="records",
+            )
+
+    def test_listar_rentabilidade_itens_filters(self, api_client, pagina_rentabilidade):
+        """Test the endpoint parses the filter query parameters."""
+        with patch('core.api.financeiro_api.FinanceiroService') as MockService:
+            mock_instance = MockService.return_value
+            mock_instance.listar_rentabilidade_itens_async = AsyncMock(return_value=(pagina_rentabilidade, "SELECT ..."))
+
+            response = api_client.get(
+                "rentabilidade-itens/?item_code=I00001&tipo_negocio=B2B&rentabilidade_min=5.5"
+                "&ordenar_por=rentabilidade&top=20&offset=10&fetch_next=10"
+            )
+
+            assert response.status_code == 200
+            kwargs = mock_instance.listar_rentabilidade_itens_async.await_args.kwargs
+            assert kwargs["item_code"] == "I00001"
+            assert kwargs["tipo_negocio"] == "B2B"
+            assert kwargs["rentabilidade_min"] == 5.5
+            assert kwargs["ordenar_por"] == "rentabilidade"
+            assert (kwargs["top"], kwargs["offset"], kwargs["fetch_next"]) == (20, 10, 10)
+
+    def test_listar_rentabilidade_itens_validation_error(self, api_client):
+        """Test that service validation errors become 422 responses."""
+        with patch('core.api.financeiro_api.FinanceiroService') as MockService:
+            mock_instance = MockService.return_value
+            mock_instance.listar_rentabilidade_itens_async = AsyncMock(side_effect=ValidationError("top deve ser maior que zero"))
+
+            response = api_client.get("rentabilidade-itens/?top=0")
+
+            assert response.status_code == 422
+            assert response.json()["details"] == "top deve ser maior que zero"
@@ -1,6 +1,8 @@
+import asyncio
+
 import pytest
-from unittest.mock import patch
-from ninja.testing import TestClient
+from unittest.mock import AsyncMock, patch
+from ninja.testing import TestAsyncClient
 
 from core.api.logistica_api import router as logistica_router
 
@@ -13,9 +15,19 @@ from core.services.exceptions import (
 )
 
 
+class SyncTestClient:
+    """Runs the async Ninja test client to completion so tests stay synchronous."""
+
+    def __init__(self, router):
+        self.client = TestAsyncClient(router)
+
+    def get(self, path, **kwargs):
+        return asyncio.run(self.client.get(path, **kwargs))
+
+
 @pytest.fixture
 def api_client():
-    return TestClient(logistica_router)
+    return SyncTestClient(logistica_router)
 
 
 @pytest.fixture
@@ -40,10 +52,10 @@ class TestLogisticaAPI:
         # Mock the service method using patch
         with patch('core.api.logistica_api.LogisticaService') as MockService:
             mock_instance = MockService.return_value
-            mock_instance.listar_transportadoras_mais_usadas.return_value = (
+            mock_instance.listar_transportadoras_mais_usadas_async = AsyncMock(return_value=(
                 listar_transportadoras_mais_usadas_mock,
                 "SELECT ..."
-            )
+            ))
 
             # Make the API call (without leading slash for TestClient)
             response = api_client.get("listar-transportadoras-mais-usadas/")
@@ -63,10 +75,10 @@ class TestLogisticaAPI:
 
         with patch('core.api.logistica_api.LogisticaService') as MockService:
             mock_instance = MockService.return_value
-            mock_instance.listar_transportadoras_mais_usadas.return_value = (
+            mock_instance.listar_transportadoras_mais_usadas_async = AsyncMock(return_value=(
                 listar_transportadoras_mais_usadas_mock,
                 "SELECT ..."
-            )
+            ))
 
             # Make the API call with query parameters in URL
             response = api_client.get(
@@ -78,9 +90,10 @@ class TestLogisticaAPI:
             assert response.json() == listar_transportadoras_mais_usadas_mock
 
             # Ensure the service method was called with correct parameters
-            mock_instance.listar_transportadoras_mais_usadas.assert_called_once_with(
+            mock_instance.listar_transportadoras_mais_usadas_async.assert_awaited_once_with(
                 offset=offset,
-                fetch_next=fetch_next
+                fetch_next=fetch_next,
+                formato="records"
             )
         
     def test_listar_transportadoras_mais_usadas_invalid_params(self, api_client):
@@ -105,7 +118,7 @@ class TestLogisticaAPI:
         """Test error handling in the API endpoint."""
         with patch('core.api.logistica_api.LogisticaService') as MockService:
             mock_instance = MockService.return_value
-            mock_instance.listar_transportadoras_mais_usadas.side_effect = service_exception
+            mock_instance.listar_transportadoras_mais_usadas_async = AsyncMock(side_effect=service_exception)
 
             # Make the API call
             response = api_client.get("listar-transportadoras-mais-usadas/")
@@ -120,7 +133,7 @@ class TestLogisticaAPI:
         """Test the API endpoint when no data is found."""
         with patch('core.api.logistica_api.LogisticaService') as MockService:
             mock_instance = MockService.return_value
-            mock_instance.listar_transportadoras_mais_usadas.return_value = ([], "SELECT ...")
+            mock_instance.listar_transportadoras_mais_usadas_async = AsyncMock(return_value=([], "SELECT ..."))
 
             # Make the API call
             response = api_client.get("listar-transportadoras-mais-usadas/")
@@ -131,4 +144,50 @@ class TestLogisticaAPI:
     
     
         
-    
\ No newline at end of file
+    
+    def test_listar_transportadoras_por_cursor(self, api_client, listar_transportadoras_mais_usadas_mock):
+        """Test the cursor-paginated endpoint passes the cursor and returns the page envelope."""
+        pagina = {"transportadoras": listar_transportadoras_mais_usadas_mock, "proximo_cursor": "abc", "total": 8}
+
+        with patch('core.api.logistica_api.LogisticaService') as MockService:
+            mock_instance = MockService.return_value
+            mock_instance.listar_transportadoras_por_cursor_async = AsyncMock(return_value=(pagina, "SELECT ..."))
+
+            response = api_client.get("transportadoras-mais-usadas/?cursor=xyz&limite=4")
+
+            assert response.status_code == 200
+            assert response.json() == pagina
+            mock_instance.listar_transportadoras_por_cursor_async.assert_awaited_once_with(cursor="xyz", limite=4, formato="records")
+
+    def test_listar_transportadoras_mais_usadas_columns_format(self, api_client):
+        """Test that `format=columns` is passed to the service and the payload returned as is."""
+        colunas = {
+            "schema": [{"name": "CardCode", "type": "string"}, {"name": "JAN-2024", "type": "integer"}],
+            "length": 1,
+            "columns": [["F00001"], [150]],
+        }
+        with patch('core.api.logistica_api.LogisticaService') as MockService:
+            mock_instance = MockService.return_value
+            mock_instance.listar_transportadoras_mais_usadas_async = AsyncMock(return_value=(colunas, "SELECT ..."))
+
+            response = api_client.get("listar-transportadoras-mais-usadas/?format=columns")
+
+            assert response.status_code == 200
+            assert response.json() == colunas
+            mock_instance.listar_transportadoras_mais_usadas_async.assert_awaited_once_with(
+                offset=10,
+                fetch_next=None,
+                formato="columns"
+            )
+
+    def test_listar_transportadoras_mais_usadas_invalid_format(self, api_client):
+        """Test that an unknown format is rejected as a validation error."""
+        response = api_client.get("listar-transportadoras-mais-usadas/?format=xml")
+
+        assert response.status_code == 422
+
+    def test_listar_transportadoras_por_cursor_invalid_cursor(self, api_client):
+        """Test that a tampered cursor is rejected as a validation error."""
+        response = api_client.get("transportadoras-mais-usadas/?cursor=adulterado")
+
+        assert response.status_code == 422
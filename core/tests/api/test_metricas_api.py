@@ -0,0 +1,72 @@
+import pytest
+from unittest.mock import Mock
+from ninja.testing import TestClient
+
+from core.api.metricas_api import router as metricas_router
+from core.services.query_cache import query_cache
+from core.services.query_metrics import query_metrics
+
+
+@pytest.fixture
+def api_client():
+    return TestClient(metricas_router)
+
+
+@pytest.fixture
+def staff_user():
+    return Mock(is_authenticated=True, is_staff=True, is_superuser=False)
+
+
+class TestMetricasAPI:
+
+    def test_listar_metricas_consultas_requires_staff(self, api_client):
+        """Anonymous and non-staff users must not see the metrics."""
+        response = api_client.get("consultas/")
+        assert response.status_code == 401
+
+        user = Mock(is_authenticated=True, is_staff=False, is_superuser=False)
+        response = api_client.get("consultas/", user=user)
+        assert response.status_code == 401
+
+    def test_listar_metricas_consultas(self, api_client, staff_user):
+        """Staff users get per-method metrics and pool stats."""
+        query_metrics.reset()
+        with query_metrics.track("EstoqueRepository.listar_hits"):
+            pass
+
+        response = api_client.get("consultas/", user=staff_user)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["metodos"]["EstoqueRepository.listar_hits"]["calls"] == 1
+        assert "pool" in data
+
+    def test_limpar_metricas_consultas(self, api_client, staff_user):
+        """DELETE should reset the registry."""
+        with query_metrics.track("EstoqueRepository.listar_hits"):
+            pass
+
+        response = api_client.delete("consultas/", user=staff_user)
+
+        assert response.status_code == 204
+        assert query_metrics.snapshot() == {}
+
+    def test_listar_metricas_cache(self, api_client, staff_user):
+        """Cache counters are exposed per method."""
+        query_cache.reset_stats()
+        query_cache.get("EstoqueRepository.listar_hits", {})
+
+        response = api_client.get("cache/", user=staff_user)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["metodos"]["EstoqueRepository.listar_hits"]["misses"] == 1
+
+    def test_invalidar_cache(self, api_client, staff_user):
+        """DELETE should invalidate the given method (or everything)."""
+        query_cache.set("EstoqueRepository.listar_hits", {}, ([{"ItemCode": "A"}], "SELECT 1"))
+
+        response = api_client.delete("cache/?metodo=EstoqueRepository.listar_hits", user=staff_user)
+
+        assert response.status_code == 204
+        assert query_cache.get("EstoqueRepository.listar_hits", {}) == (False, None)
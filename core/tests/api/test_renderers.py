@@ -0,0 +1,74 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+from ninja import Schema
+from ninja.renderers import JSONRenderer
+
+from core.api import renderers
+from core.api.renderers import ORJSONRenderer
+
+
+class Item(Schema):
+    codigo: str
+    preco: Decimal
+
+
+@pytest.fixture
+def payload():
+    """Values as they come out of SQLServerCliente and pandas."""
+    return {
+        "itens": [
+            {
+                "ItemCode": "I00001",
+                "Preco": Decimal("19.90"),
+                "DocDate": date(2025, 1, 31),
+                "UpdateDate": datetime(2025, 1, 31, 8, 30),
+                "Quantidade": np.int64(3),
+                "Media": np.float64(1.25),
+                "Ativo": np.bool_(True),
+            },
+        ],
+        "meses": np.array([1, 2, 3]),
+        "emitido": pd.Timestamp("2025-02-01 10:00:00"),
+        "modelo": Item(codigo="I00002", preco=Decimal("5.00")),
+        1: "chave numérica",
+    }
+
+
+def render(renderer, data):
+    return json.loads(renderer.render(None, data, response_status=200))
+
+
+def test_renders_same_json_as_default_renderer(payload):
+    """Same document as Ninja's renderer (numpy converted first, which it cannot serialize)."""
+    esperado = {
+        **payload,
+        "itens": [{**payload["itens"][0], "Quantidade": 3, "Media": 1.25, "Ativo": True}],
+        "meses": [1, 2, 3],
+    }
+
+    assert render(ORJSONRenderer(), payload) == render(JSONRenderer(), esperado)
+
+
+def test_decimal_is_rendered_as_string(payload):
+    resultado = render(ORJSONRenderer(), payload)
+
+    assert resultado["itens"][0]["Preco"] == "19.90"
+    assert resultado["modelo"] == {"codigo": "I00002", "preco": "5.00"}
+
+
+def test_nan_is_rendered_as_null():
+    assert render(ORJSONRenderer(), {"Media": float("nan")}) == {"Media": None}
+
+
+def test_falls_back_to_default_renderer_without_orjson(monkeypatch, payload):
+    monkeypatch.setattr(renderers, "orjson", None)
+    dados = {"Preco": Decimal("19.90"), "DocDate": date(2025, 1, 31)}
+
+    assert ORJSONRenderer().render(None, dados, response_status=200) == JSONRenderer().render(
+        None, dados, response_status=200
+    )
@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def desabilitar_cache_de_consultas(settings):
+    """
+    Os testes trocam os métodos do cliente compartilhado a cada caso; com o cache
+    ligado, um resultado guardado em um teste vazaria para o seguinte. Os testes
+    do cache o habilitam explicitamente.
+    """
+    settings.SQLSERVER_QUERY_CACHE_ENABLED = False
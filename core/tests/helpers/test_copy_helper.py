@@ -0,0 +1,34 @@
+from decimal import Decimal
+
+import pytest
+
+from core.helpers.copy_helper import CopyHelper
+from core.models import SaidaItemMes
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    (None, ""),
+    ("", '""'),
+    ('Transportadora "A", Ltda', '"Transportadora ""A"", Ltda"'),
+    (Decimal("1.50"), "1.50"),
+    (7, "7"),
+])
+def test_csv_value(valor, esperado):
+    assert CopyHelper.csv_value(valor) == esperado
+
+
+@pytest.mark.django_db
+def test_copy_records_falls_back_to_bulk_create():
+    CopyHelper.copy_records(SaidaItemMes, [
+        {"ano_mes": "2025-01", "item_code": "A0001", "total": Decimal("1")},
+        {"ano_mes": "2025-01", "item_code": "B0002", "total": Decimal("2")},
+    ])
+
+    assert sorted(SaidaItemMes.objects.values_list("item_code", flat=True)) == ["A0001", "B0002"]
+
+
+@pytest.mark.django_db
+def test_copy_records_without_records_does_nothing():
+    CopyHelper.copy_records(SaidaItemMes, [])
+
+    assert not SaidaItemMes.objects.exists()
@@ -228,3 +228,69 @@ def test_prepare_date_params_invalid_date():
     with pytest.raises(ValueError) as exc_info:
         DateHelper.prepare_date_params(data_inicio, data_fim)
         
+
+def test_resolve_date_range_with_values():
+    from datetime import date
+    
+    inicio, fim = DateHelper.resolve_date_range("2024-01-01", "2024-06-30")
+    
+    assert inicio == date(2024, 1, 1)
+    assert fim == date(2024, 6, 30)
+
+def test_resolve_date_range_defaults():
+    from datetime import datetime
+    from dateutil.relativedelta import relativedelta
+    
+    inicio, fim = DateHelper.resolve_date_range(None, None, default_inicio_months_offset=6, default_inicio_day=1)
+    
+    expected_inicio = (datetime.now() - relativedelta(months=6)).replace(day=1).date()
+    assert inicio == expected_inicio
+    assert fim == datetime.now().date()
+
+def test_resolve_date_range_invalid():
+    with pytest.raises(ValueError):
+        DateHelper.resolve_date_range("2024-06-30", "2024-01-01")
+
+def test_first_day_of_month():
+    from datetime import date
+    
+    reference = date(2025, 3, 15)
+    
+    assert DateHelper.first_day_of_month(reference=reference) == date(2025, 3, 1)
+    assert DateHelper.first_day_of_month(-6, reference=reference) == date(2024, 9, 1)
+    assert DateHelper.first_day_of_month(12, reference=reference) == date(2026, 3, 1)
+
+def test_window_end(settings):
+    from datetime import date
+    
+    reference = date(2024, 2, 10)
+    
+    settings.SQLSERVER_JANELA_PADRAO_FIM = "dia"
+    assert DateHelper.window_end(reference) == reference
+    
+    settings.SQLSERVER_JANELA_PADRAO_FIM = "mes"
+    assert DateHelper.window_end(reference) == date(2024, 2, 29)
+
+def test_resolve_window():
+    from datetime import date
+    
+    inicio, fim = DateHelper.resolve_window(None, None, 6)
+    assert inicio == DateHelper.first_day_of_month(-6)
+    assert fim == DateHelper.today()
+    
+    assert DateHelper.resolve_window("2024-01-15", "2024-06-30", 6) == (date(2024, 1, 15), date(2024, 6, 30))
+    
+    with pytest.raises(ValueError):
+        DateHelper.resolve_window("2024-06-30", "2024-01-01", 6)
+
+def test_month_partitions():
+    from datetime import date
+    
+    assert DateHelper.month_partitions(date(2024, 1, 15), date(2024, 3, 10)) == [
+        (date(2024, 1, 15), date(2024, 1, 31)),
+        (date(2024, 2, 1), date(2024, 2, 29)),
+        (date(2024, 3, 1), date(2024, 3, 10)),
+    ]
+    assert DateHelper.month_partitions(date(2024, 12, 1), date(2024, 12, 31)) == [(date(2024, 12, 1), date(2024, 12, 31))]
+    assert DateHelper.month_partitions(date(2024, 5, 5), date(2024, 5, 5)) == [(date(2024, 5, 5), date(2024, 5, 5))]
+    assert DateHelper.month_partitions(date(2024, 2, 1), date(2024, 1, 31)) == []
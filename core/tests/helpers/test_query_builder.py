@@ -0,0 +1,123 @@
+from datetime import date
+
+import pytest
+
+from core.helpers.query_builder import QueryBuilder
+
+
+def _builder():
+    return QueryBuilder("OINV OINV").select("OINV.DocEntry")
+
+
+def test_build_without_filters():
+    sql, params = _builder().order_by("OINV.DocEntry").build()
+    assert sql == "SELECT\n    OINV.DocEntry\nFROM OINV OINV\nORDER BY\n    OINV.DocEntry"
+    assert params == []
+
+
+def test_build_requires_columns():
+    with pytest.raises(ValueError):
+        QueryBuilder("OINV OINV").build()
+
+
+def test_filters_go_into_where_before_group_by():
+    sql, params = (
+        _builder()
+        .where("OINV.CANCELED = 'N'")
+        .year("OINV.DocDate", 2024)
+        .equals("OINV.CardCode", "C1")
+        .group_by("OINV.DocEntry")
+        .build()
+    )
+    assert sql.index("WHERE") < sql.index("OINV.DocDate >= ?") < sql.index("GROUP BY")
+    assert "    OINV.CANCELED = 'N'\n    AND OINV.DocDate >= ?\n    AND OINV.DocDate < ?\n    AND OINV.CardCode = ?" in sql
+    assert params == [date(2024, 1, 1), date(2025, 1, 1), "C1"]
+
+
+def test_none_filters_are_ignored():
+    sql, params = (
+        _builder()
+        .year("OINV.DocDate", None)
+        .month_range("OINV.DocDate", None, None)
+        .week("OINV.DocDate", None, None)
+        .equals("OINV.CardCode", None)
+        .in_("OITM.ItmsGrpCod", None)
+        .build()
+    )
+    assert "WHERE" not in sql
+    assert params == []
+
+
+def test_in_with_values_and_empty_list():
+    sql, params = _builder().in_("OITM.ItmsGrpCod", [1, 2, 3]).build()
+    assert "OITM.ItmsGrpCod IN (?, ?, ?)" in sql
+    assert params == [1, 2, 3]
+
+    sql, params = _builder().in_("OITM.ItmsGrpCod", []).build()
+    assert "1 = 0" in sql
+    assert params == []
+
+
+def test_join_is_not_repeated():
+    join = "INNER JOIN INV1 INV1 ON OINV.DocEntry = INV1.DocEntry"
+    sql, _ = _builder().join(join).join(join).build()
+    assert sql.count("INNER JOIN") == 1
+
+
+@pytest.mark.parametrize("inicio, fim, esperado", [
+    ("2024-02", "2024-03", [date(2024, 2, 1), date(2024, 4, 1)]),
+    ("2024-12", "2024-12", [date(2024, 12, 1), date(2025, 1, 1)]),
+    ("2024-02", None, [date(2024, 2, 1)]),
+    (None, "2024-02", [date(2024, 3, 1)]),
+])
+def test_month_range(inicio, fim, esperado):
+    _, params = _builder().month_range("OINV.DocDate", inicio, fim).build()
+    assert params == esperado
+
+
+@pytest.mark.parametrize("inicio, fim", [("2024-05", "2024-04"), ("2024/05", None), ("2024-13", None)])
+def test_month_range_invalid(inicio, fim):
+    with pytest.raises(ValueError):
+        _builder().month_range("OINV.DocDate", inicio, fim)
+
+
+@pytest.mark.parametrize("ano, semana, esperado", [
+    # 2025-01-01 is a Wednesday: week 1 is Jan 1-4, week 2 starts on Sunday Jan 5
+    (2025, 1, (date(2025, 1, 1), date(2025, 1, 5))),
+    (2025, 2, (date(2025, 1, 5), date(2025, 1, 12))),
+    # Last week is cut at the end of the year
+    (2025, 53, (date(2025, 12, 28), date(2026, 1, 1))),
+    # 2023-01-01 is a Sunday: week 1 is a full week
+    (2023, 1, (date(2023, 1, 1), date(2023, 1, 8))),
+])
+def test_week_bounds(ano, semana, esperado):
+    assert QueryBuilder.week_bounds(ano, semana) == esperado
+
+
+@pytest.mark.parametrize("ano, semana", [(2025, 0), (2025, 54), (2023, 54)])
+def test_week_bounds_invalid(ano, semana):
+    with pytest.raises(ValueError):
+        QueryBuilder.week_bounds(ano, semana)
+
+
+def test_week_requires_year():
+    with pytest.raises(ValueError):
+        _builder().week("OINV.DocDate", None, 3)
+
+
+def test_paginate():
+    sql, params = _builder().order_by("OINV.DocEntry").paginate(20, 10).build()
+    assert sql.endswith("ORDER BY\n    OINV.DocEntry\nOFFSET ? ROWS FETCH NEXT ? ROWS ONLY")
+    assert params == [20, 10]
+
+    sql, params = _builder().order_by("OINV.DocEntry").paginate(fetch_next=5).build()
+    assert sql.endswith("OFFSET ? ROWS FETCH NEXT ? ROWS ONLY")
+    assert params == [0, 5]
+
+    sql, params = _builder().order_by("OINV.DocEntry").paginate().build()
+    assert "OFFSET" not in sql
+
+
+def test_paginate_requires_order_by():
+    with pytest.raises(ValueError):
+        _builder().paginate(0, 10).build()
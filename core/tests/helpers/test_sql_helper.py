@@ -0,0 +1,35 @@
+import pytest
+from core.helpers.sql_helper import SQLHelper
+
+def test_add_recompile_hint():
+    sql = """
+    SELECT *
+    FROM OINV
+    ORDER BY DocDate;
+    """
+    result = SQLHelper.add_recompile_hint(sql)
+    
+    assert result.rstrip().endswith("ORDER BY DocDate\n        OPTION (RECOMPILE);")
+    assert result.count(";") == 1
+
+@pytest.mark.django_db
+def test_apply_query_hints_only_for_configured_queries(settings):
+    sql = "SELECT 1"
+    settings.SQLSERVER_RECOMPILE_QUERIES = ["EstoqueRepository.listar_hits"]
+    
+    assert "OPTION (RECOMPILE)" in SQLHelper.apply_query_hints(sql, "EstoqueRepository.listar_hits")
+    assert SQLHelper.apply_query_hints(sql, "EstoqueRepository.listar_pedidos_em_transito") == sql
+
+def test_combine_statements_scopes_variables_and_concatenates_params():
+    sql, params = SQLHelper.combine_statements([
+        ("DECLARE @DataInicio DATE = ?;\n SELECT @DataInicio AS D, @@ROWCOUNT AS R;", ["2025-01-01"]),
+        ("DECLARE @DataInicio DATE = ?; SELECT @DataInicio", ["2025-02-01"]),
+        ("SELECT COUNT(*) FROM OINV WHERE DocDate >= ?", None),
+    ])
+
+    assert sql.startswith("SET NOCOUNT ON;")
+    assert "DECLARE @DataInicio_0 DATE = ?;" in sql
+    assert "DECLARE @DataInicio_1 DATE = ?;" in sql
+    assert "@@ROWCOUNT" in sql
+    assert sql.rstrip().endswith("WHERE DocDate >= ?;")
+    assert params == ["2025-01-01", "2025-02-01"]
@@ -0,0 +1,111 @@
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from core.helpers.date_helper import DateHelper
+from core.models import MesMaterializado, VendaItemMes
+from core.repositories.agregados_repository import (
+    CONJUNTO_TRANSPORTADORAS,
+    CONJUNTO_VENDAS,
+    AgregadosRepository,
+)
+from core.repositories.exceptions import QueryError
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def agregados():
+    return AgregadosRepository()
+
+
+@pytest.fixture(autouse=True)
+def hoje():
+    with patch.object(DateHelper, "today", return_value=date(2025, 7, 15)):
+        yield
+
+
+def _materializar(*meses, conjunto=CONJUNTO_VENDAS):
+    for ano_mes in meses:
+        MesMaterializado.objects.create(conjunto=conjunto, ano_mes=ano_mes)
+
+
+def test_planejar_without_materialized_months_queries_whole_range(agregados):
+    meses, trechos = agregados.planejar(CONJUNTO_VENDAS, date(2025, 1, 1), date(2025, 7, 15))
+
+    assert meses == []
+    assert trechos == [(date(2025, 1, 1), date(2025, 7, 15))]
+
+
+def test_planejar_splits_materialized_months_from_erp_ranges(agregados):
+    _materializar("2025-01", "2025-02", "2025-04", "2025-06")
+
+    meses, trechos = agregados.planejar(CONJUNTO_VENDAS, date(2025, 1, 1), date(2025, 7, 15))
+
+    assert meses == ["2025-01", "2025-02", "2025-04", "2025-06"]
+    assert trechos == [
+        (date(2025, 3, 1), date(2025, 3, 31)),
+        (date(2025, 5, 1), date(2025, 5, 31)),
+        (date(2025, 7, 1), date(2025, 7, 15)),
+    ]
+
+
+def test_planejar_ignores_partial_and_open_months(agregados):
+    _materializar("2025-01", "2025-02", "2025-06", "2025-07")
+
+    # Janeiro começa antes do intervalo e junho termina depois: vão inteiros ao ERP
+    meses, trechos = agregados.planejar(CONJUNTO_VENDAS, date(2025, 1, 10), date(2025, 6, 20))
+
+    assert meses == ["2025-02"]
+    assert trechos == [(date(2025, 1, 10), date(2025, 1, 31)), (date(2025, 3, 1), date(2025, 6, 20))]
+
+
+def test_planejar_open_end_keeps_last_range_open(agregados):
+    _materializar("2025-01", "2025-06", conjunto=CONJUNTO_TRANSPORTADORAS)
+
+    meses, trechos = agregados.planejar(CONJUNTO_TRANSPORTADORAS, date(2025, 1, 1), None)
+
+    assert meses == ["2025-01", "2025-06"]
+    assert trechos == [(date(2025, 2, 1), date(2025, 5, 31)), (date(2025, 7, 1), None)]
+
+
+def test_planejar_is_scoped_by_conjunto(agregados):
+    _materializar("2025-01", conjunto=CONJUNTO_TRANSPORTADORAS)
+
+    meses, _ = agregados.planejar(CONJUNTO_VENDAS, date(2025, 1, 1), date(2025, 1, 31))
+
+    assert meses == []
+
+
+def test_substituir_mes_roundtrip_uses_erp_column_names(agregados):
+    linhas = [
+        {"ItemCode": "A0001", "ItemName": "Produto A", "CardCode": "F1", "AnoMes": "2025-01", "QuantidadeVendida": Decimal("10.5")},
+        {"ItemCode": "B0002", "ItemName": None, "CardCode": "", "AnoMes": "2025-01", "QuantidadeVendida": Decimal("3.0")},
+    ]
+
+    assert agregados.substituir_mes(CONJUNTO_VENDAS, "2025-01", linhas) == 2
+
+    assert sorted(agregados.listar(CONJUNTO_VENDAS, ["2025-01"]), key=lambda linha: linha["ItemCode"]) == linhas
+    assert MesMaterializado.objects.get(conjunto=CONJUNTO_VENDAS, ano_mes="2025-01").linhas == 2
+    assert agregados.meses_materializados(CONJUNTO_VENDAS) == ["2025-01"]
+
+
+def test_substituir_mes_replaces_previous_load(agregados):
+    linha = {"ItemCode": "A0001", "ItemName": "Produto A", "CardCode": "", "AnoMes": "2025-01", "QuantidadeVendida": Decimal("1.0")}
+    agregados.substituir_mes(CONJUNTO_VENDAS, "2025-01", [linha, {**linha, "ItemCode": "B0002"}])
+    agregados.substituir_mes(CONJUNTO_VENDAS, "2025-01", [linha])
+
+    assert VendaItemMes.objects.count() == 1
+    assert MesMaterializado.objects.get(conjunto=CONJUNTO_VENDAS, ano_mes="2025-01").linhas == 1
+
+
+def test_listar_without_months_returns_empty(agregados):
+    assert agregados.listar(CONJUNTO_VENDAS, []) == []
+
+
+def test_unknown_conjunto_raises_query_error(agregados):
+    with pytest.raises(QueryError):
+        agregados.listar("inexistente", ["2025-01"])
+
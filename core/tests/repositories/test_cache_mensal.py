@@ -0,0 +1,133 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from core.repositories.estoque_repository import EstoqueRepository
+from core.services.query_cache import query_cache
+
+
+@pytest.fixture
+def cache_mensal(settings):
+    settings.SQLSERVER_QUERY_CACHE_ENABLED = True
+    settings.SQLSERVER_CACHE_MENSAL_ENABLED = True
+    settings.SQLSERVER_PARTICIONAMENTO_MIN_MESES = 0
+    query_cache.invalidate()
+    yield
+    query_cache.invalidate()
+
+
+@pytest.fixture
+def estoque_repository():
+    return EstoqueRepository()
+
+
+@pytest.fixture
+def erp_pedidos(estoque_repository):
+    """Fake ERP returning one row per item and month of the requested range."""
+    chamadas = []
+
+    def fake_fetch_all(sql, params=None):
+        data_fim, data_inicio = params
+        chamadas.append((data_inicio, data_fim))
+        meses = sorted({
+            date(ano, mes, 1).strftime("%Y-%m")
+            for ano in range(data_inicio.year, data_fim.year + 1)
+            for mes in range(1, 13)
+            if data_inicio.replace(day=1) <= date(ano, mes, 1) <= data_fim
+        })
+        return [
+            {"ItemCode": item, "ItemName": "Produto", "CardCode": "", "AnoMes": mes, "QuantidadeVendida": Decimal("1.0")}
+            for item in ("A0001", "B0002")
+            for mes in meses
+        ]
+
+    estoque_repository.cliente.fetch_all = fake_fetch_all
+    return chamadas
+
+
+@pytest.mark.django_db
+def test_overlapping_window_fetches_only_missing_months(estoque_repository, erp_pedidos, cache_mensal):
+    primeiro, _ = estoque_repository.listar_pedidos_de_venda("2025-01-01", "2025-06-30")
+    segundo, _ = estoque_repository.listar_pedidos_de_venda("2025-02-01", "2025-07-31")
+
+    # The first window is one query; the second only asks for July
+    assert erp_pedidos == [(date(2025, 1, 1), date(2025, 6, 30)), (date(2025, 7, 1), date(2025, 7, 31))]
+    assert [linha["AnoMes"] for linha in primeiro if linha["ItemCode"] == "A0001"] == [
+        "2025-01", "2025-02", "2025-03", "2025-04", "2025-05", "2025-06",
+    ]
+    assert [(linha["ItemCode"], linha["AnoMes"]) for linha in segundo][:7] == [
+        ("A0001", "2025-02"), ("A0001", "2025-03"), ("A0001", "2025-04"), ("A0001", "2025-05"),
+        ("A0001", "2025-06"), ("A0001", "2025-07"), ("B0002", "2025-02"),
+    ]
+
+
+@pytest.mark.django_db
+def test_gaps_are_fetched_as_contiguous_ranges(estoque_repository, erp_pedidos, cache_mensal):
+    estoque_repository.listar_pedidos_de_venda("2025-02-01", "2025-02-28")
+    estoque_repository.listar_pedidos_de_venda("2025-04-01", "2025-04-30")
+    erp_pedidos.clear()
+
+    resultado, _ = estoque_repository.listar_pedidos_de_venda("2025-01-01", "2025-06-30")
+
+    assert erp_pedidos == [
+        (date(2025, 1, 1), date(2025, 1, 31)),
+        (date(2025, 3, 1), date(2025, 3, 31)),
+        (date(2025, 5, 1), date(2025, 6, 30)),
+    ]
+    assert len(resultado) == 12
+
+
+@pytest.mark.django_db
+def test_partial_months_are_separate_segments(estoque_repository, erp_pedidos, cache_mensal):
+    estoque_repository.listar_pedidos_de_venda("2025-01-15", "2025-02-28")
+    erp_pedidos.clear()
+
+    estoque_repository.listar_pedidos_de_venda("2025-01-01", "2025-02-28")
+
+    # February is reused; January 1-31 is not the cached January 15-31 segment
+    assert erp_pedidos == [(date(2025, 1, 1), date(2025, 1, 31))]
+
+
+@pytest.mark.django_db
+def test_disabled_monthly_cache_runs_single_query(estoque_repository, erp_pedidos, cache_mensal, settings):
+    settings.SQLSERVER_CACHE_MENSAL_ENABLED = False
+
+    estoque_repository.listar_pedidos_de_venda("2025-01-01", "2025-03-31")
+    estoque_repository.listar_pedidos_de_venda("2025-02-01", "2025-03-31")
+
+    assert erp_pedidos == [(date(2025, 1, 1), date(2025, 3, 31)), (date(2025, 2, 1), date(2025, 3, 31))]
+
+
+@pytest.mark.django_db
+def test_saida_de_produtos_segments_keep_products_without_movement(estoque_repository, cache_mensal):
+    chamadas = []
+    produto = {"ItemName": "Produto", "CardCode": "F1", "CardName": "Fornecedor"}
+
+    def fake_fetch_all(sql, params=None):
+        chamadas.append(tuple(params))
+        if tuple(params) == (date(2025, 1, 1), date(2025, 2, 28)):
+            return [
+                {"ItemCode": "A0001", **produto, "AnoMes": "2025-01", "Total": Decimal("2")},
+                {"ItemCode": "B0002", **produto, "AnoMes": "2025-02", "Total": Decimal("1")},
+                {"ItemCode": "C0003", **produto, "AnoMes": None, "Total": Decimal("0")},
+            ]
+        return [
+            {"ItemCode": codigo, **produto, "AnoMes": None, "Total": Decimal("0")}
+            for codigo in ("A0001", "B0002", "C0003")
+        ]
+
+    estoque_repository.cliente.fetch_all = fake_fetch_all
+    estoque_repository.listar_saida_de_produtos("2025-01-01", "2025-02-28")
+    chamadas.clear()
+
+    # January is rebuilt from its segment: B0002 and C0003 had no movement in it
+    resultado, _ = estoque_repository.listar_saida_de_produtos("2025-01-01", "2025-01-31")
+
+    assert chamadas == []
+    assert [(linha["ItemCode"], linha["AnoMes"], linha["Total"]) for linha in resultado] == [
+        ("A0001", "2025-01", Decimal("2")),
+        ("B0002", None, Decimal("0")),
+        ("C0003", None, Decimal("0")),
+    ]
+    assert resultado[1]["CardName"] == "Fornecedor"
@@ -1,3 +1,5 @@
+from datetime import date
+
 import pytest
 import pyodbc
 
@@ -72,7 +74,9 @@ def test_listar_notas_fiscais_handling_errors(dashboard_repository):
 @pytest.mark.django_db
 def test_listar_notas_fiscais_with_year_filter(dashboard_repository, listar_notas_fiscais_mock):
     # Mock the cliente's fetch_all method, filter results by year
+    chamadas = []
     def mock_fetch_all(sql, params=None):
+        chamadas.append(params)
         return [item for item in listar_notas_fiscais_mock if item["ano_emissao"] == 2023]
     
     dashboard_repository.cliente.fetch_all = mock_fetch_all
@@ -82,33 +86,80 @@ def test_listar_notas_fiscais_with_year_filter(dashboard_repository, listar_nota
     assert result[0]["quantidade_notas"] == 100
     assert sql is not None
     assert isinstance(sql, str)
-    assert 'AND YEAR(OINV.DocDate) = ?' in sql or 'AND OINV.DocDate' in sql
-    
+    # Sargable range inside the WHERE clause, before GROUP BY
+    assert 'AND OINV.DocDate >= ?' in sql
+    assert 'YEAR(OINV.DocDate)' not in sql
+    assert sql.index('OINV.DocDate >= ?') < sql.index('GROUP BY')
+    assert chamadas == [[date(2023, 1, 1), date(2024, 1, 1)]]
+
+
+@pytest.mark.django_db
+def test_listar_notas_fiscais_without_filters_has_no_params(dashboard_repository):
+    chamadas = []
+    dashboard_repository.cliente.fetch_all = lambda sql, params=None: chamadas.append(params) or []
+    _, sql = dashboard_repository.listar_notas_fiscais()
+    assert chamadas == [[]]
+    assert 'OITM' not in sql
+    assert '?' not in sql
+
+
+@pytest.mark.django_db
+def test_listar_notas_fiscais_combined_filters(dashboard_repository):
+    chamadas = []
+    dashboard_repository.cliente.fetch_all = lambda sql, params=None: chamadas.append(params) or []
+    _, sql = dashboard_repository.listar_notas_fiscais(
+        mes_inicio="2024-02",
+        mes_fim="2024-03",
+        grupos_itens=[101, 102],
+        card_code="C00001",
+    )
+    assert 'INNER JOIN OITM OITM ON INV1.ItemCode = OITM.ItemCode' in sql
+    assert 'OITM.ItmsGrpCod IN (?, ?)' in sql
+    assert 'OINV.CardCode = ?' in sql
+    assert chamadas == [[date(2024, 2, 1), date(2024, 4, 1), "C00001", 101, 102]]
+    assert sql.count('?') == len(chamadas[0])
+
+
+@pytest.mark.django_db
+def test_listar_notas_fiscais_week_filter(dashboard_repository):
+    chamadas = []
+    dashboard_repository.cliente.fetch_all = lambda sql, params=None: chamadas.append(params) or []
+    dashboard_repository.listar_notas_fiscais(ano=2025, semana=2)
+    # Year range followed by the week range (2025-01-05 is the first Sunday)
+    assert chamadas == [[date(2025, 1, 1), date(2026, 1, 1), date(2025, 1, 5), date(2025, 1, 12)]]
+
+
+@pytest.mark.django_db
+def test_listar_notas_fiscais_week_requires_year(dashboard_repository):
+    dashboard_repository.cliente.fetch_all = lambda sql, params=None: []
+    with pytest.raises(QueryError):
+        dashboard_repository.listar_notas_fiscais(semana=2)
+
 
 @pytest.mark.django_db
 def test_listar_notas_fiscais_sql_integrity(dashboard_repository):
     # Mock the cliente's fetch_all method to return an empty list
     dashboard_repository.cliente.fetch_all = lambda sql, params=None: []
     result, sql = dashboard_repository.listar_notas_fiscais()
-    expected_sql_start = """
-            SELECT
-                COUNT(distinct(OINV.Serial)) AS quantidade_notas,
-                ,CAST(SUM(INV1.Quantity) AS int) as quantidade_itens,
-                ,OINV.DocDate as data_emissao
-                ,DATEPART(MONTH, OINV.DocDate) as mes_emissao
-                ,DATEPART(WEEK, OINV.DocDate) as semana_emissao
-                ,DATEPART(YEAR, OINV.DocDate) as ano_emissao
-            FROM OINV OINV
-            JOIN INV1 INV1 ON OINV.DocEntry = INV1.DocEntry
-            WHERE 
-                OINV.CANCELED = 'N'
-                AND OINV.InvntSttus = 'O'
-            GROUP BY
-                OINV.DocDate
-            ORDER BY
-                OINV.DocDate
-        """
-    assert sql.strip().startswith(expected_sql_start.strip())
+    expected_sql = """
+SELECT
+    COUNT(DISTINCT OINV.Serial) AS quantidade_notas,
+    CAST(SUM(INV1.Quantity) AS int) AS quantidade_itens,
+    OINV.DocDate AS data_emissao,
+    DATEPART(MONTH, OINV.DocDate) AS mes_emissao,
+    DATEPART(WEEK, OINV.DocDate) AS semana_emissao,
+    DATEPART(YEAR, OINV.DocDate) AS ano_emissao
+FROM OINV OINV
+INNER JOIN INV1 INV1 ON OINV.DocEntry = INV1.DocEntry
+WHERE
+    OINV.CANCELED = 'N'
+    AND OINV.InvntSttus = 'O'
+GROUP BY
+    OINV.DocDate
+ORDER BY
+    OINV.DocDate
+"""
+    assert sql.strip() == expected_sql.strip()
 
 @pytest.mark.django_db
 @pytest.mark.parametrize("exception, expected_exception", [
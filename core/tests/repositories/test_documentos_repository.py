@@ -0,0 +1,64 @@
+from datetime import date
+
+import pyodbc
+import pytest
+
+from core.repositories.documentos_repository import DocumentosRepository
+from core.repositories.exceptions import ConnectionError, QueryError
+
+
+@pytest.fixture
+def documentos_repository():
+    return DocumentosRepository()
+
+
+@pytest.mark.django_db
+def test_iterar_linhas_alteradas(documentos_repository):
+    chamadas = []
+
+    def fake_fetch_iter(sql, params=None, arraysize=None):
+        chamadas.append((params, arraysize))
+        yield [{"DocEntry": 11, "LineNum": 0}]
+
+    documentos_repository.cliente.fetch_iter = fake_fetch_iter
+    lotes, sql = documentos_repository.iterar_linhas_alteradas("OINV", 10, date(2025, 7, 1), tamanho_lote=500)
+
+    assert list(lotes) == [[{"DocEntry": 11, "LineNum": 0}]]
+    assert chamadas == [([10, date(2025, 7, 1)], 500)]
+    assert "FROM OINV H" in sql
+    assert "INNER JOIN INV1 L" in sql
+    assert "H.DocEntry > @UltimoDocEntry" in sql
+
+
+@pytest.mark.django_db
+def test_iterar_linhas_alteradas_first_run_ignores_update_date(documentos_repository):
+    chamadas = []
+
+    def fake_fetch_iter(sql, params=None, arraysize=None):
+        chamadas.append(params)
+        yield from ()
+
+    documentos_repository.cliente.fetch_iter = fake_fetch_iter
+    lotes, _ = documentos_repository.iterar_linhas_alteradas("ORDR")
+    list(lotes)
+
+    assert chamadas == [[0, date(9999, 12, 31)]]
+
+
+@pytest.mark.django_db
+def test_iterar_linhas_alteradas_invalid_tipo(documentos_repository):
+    with pytest.raises(QueryError):
+        documentos_repository.iterar_linhas_alteradas("OITM")
+
+
+@pytest.mark.django_db
+def test_iterar_linhas_alteradas_error_during_iteration(documentos_repository):
+    def fake_fetch_iter(sql, params=None, arraysize=None):
+        raise pyodbc.OperationalError("Test exception")
+        yield
+
+    documentos_repository.cliente.fetch_iter = fake_fetch_iter
+    lotes, _ = documentos_repository.iterar_linhas_alteradas("OINV")
+
+    with pytest.raises(ConnectionError):
+        list(lotes)
@@ -1,6 +1,10 @@
+from datetime import date
+from decimal import Decimal
+
 import pyodbc
 import pytest
 
+from core.helpers.date_helper import DateHelper
 from core.repositories.estoque_repository import EstoqueRepository
 from core.repositories.exceptions import ConnectionError, QueryError, RepositoryError
 
@@ -66,6 +70,25 @@ def test_listar_hits(estoque_repository, listar_hits_mock):
     assert all(isinstance(item, dict) for item in result)
     assert sql is not None
     assert isinstance(sql, str)
+
+@pytest.mark.django_db
+def test_listar_hits_sem_subquery_correlacionada(estoque_repository, listar_hits_mock):
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["params"] = params
+        return listar_hits_mock
+    estoque_repository.cliente.fetch_all = fake_fetch_all
+    result, sql = estoque_repository.listar_hits()
+    # Vendas06Meses vem de uma agregação única por item, unida com LEFT JOIN
+    assert "T_INV1.ItemCode = A.ItemCode" not in sql
+    assert "LEFT JOIN\n            VendasPorItem V ON V.ItemCode = H.ItemCode" in sql
+    assert "ISNULL(V.MesesComVenda, 0) AS 'Vendas06Meses'" in sql
+    assert captured["params"] == [
+        DateHelper.today(),
+        DateHelper.first_day_of_month(-12),
+        DateHelper.first_day_of_month(-5),
+        DateHelper.days_ago(30),
+    ]
     
 @pytest.mark.django_db
 @pytest.mark.parametrize("exception, expected_exception", [
@@ -194,10 +217,16 @@ def test_listar_pedidos_de_venda_check_sql(estoque_repository, listar_pedidos_de
     # Mock the cliente's fetch_all method
     data_inicio = "2025-01-01"
     data_fim = "2025-02-28"
-    estoque_repository.cliente.fetch_all = lambda sql, params=None: listar_pedidos_de_venda_mock
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["params"] = params
+        return listar_pedidos_de_venda_mock
+    estoque_repository.cliente.fetch_all = fake_fetch_all
     result, sql = estoque_repository.listar_pedidos_de_venda(data_inicio, data_fim)
-    assert f"DECLARE @DataFim DATE = '{data_fim}';" in sql
-    assert f"DECLARE @DataInicio DATE = '{data_inicio}';" in sql  # Since we use GETDATE() in the query
+    assert "DECLARE @DataFim DATE = ?;" in sql
+    assert "DECLARE @DataInicio DATE = ?;" in sql
+    assert data_inicio not in sql and data_fim not in sql
+    assert captured["params"] == [date(2025, 2, 28), date(2025, 1, 1)]
     assert f"OINV.DocDate BETWEEN @DataInicio AND @DataFim" in sql
 
 @pytest.mark.django_db
@@ -220,26 +249,36 @@ def test_listar_pedidos_de_venda_query_error(estoque_repository, exception, expe
         
 @pytest.mark.django_db
 def test_listar_pedidos_de_venda_date_none(estoque_repository):
-    estoque_repository.cliente.fetch_all = lambda sql, params=None: listar_pedidos_de_venda_mock
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["params"] = params
+        return listar_pedidos_de_venda_mock
+    estoque_repository.cliente.fetch_all = fake_fetch_all
     result, sql = estoque_repository.listar_pedidos_de_venda()
-    assert f"DECLARE @DataFim DATE = GETDATE();" in sql
-    assert f"DECLARE @DataInicio DATE = DATEADD(MONTH, -6, DATEADD(MONTH, DATEDIFF(MONTH, 0, GETDATE()), 0))" in sql  
+    assert "GETDATE" not in sql
+    assert captured["params"] == [DateHelper.today(), DateHelper.first_day_of_month(-6)]
     assert f"OINV.DocDate BETWEEN @DataInicio AND @DataFim" in sql in sql
 
 @pytest.mark.django_db
 def test_listar_pedidos_de_venda_date_partial(estoque_repository):
-    estoque_repository.cliente.fetch_all = lambda sql, params=None: listar_pedidos_de_venda_mock
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["params"] = params
+        return listar_pedidos_de_venda_mock
+    estoque_repository.cliente.fetch_all = fake_fetch_all
     result, sql = estoque_repository.listar_pedidos_de_venda(data_inicio="2025-01-01")
-    assert f"DECLARE @DataFim DATE = GETDATE();" in sql
-    assert f"DECLARE @DataInicio DATE = '2025-01-01';" in sql  
+    assert captured["params"] == [DateHelper.today(), date(2025, 1, 1)]
     assert f"OINV.DocDate BETWEEN @DataInicio AND @DataFim" in sql in sql
     
 @pytest.mark.django_db
 def test_listar_pedidos_de_venda_date_partial_end(estoque_repository):
-    estoque_repository.cliente.fetch_all = lambda sql, params=None: listar_pedidos_de_venda_mock
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["params"] = params
+        return listar_pedidos_de_venda_mock
+    estoque_repository.cliente.fetch_all = fake_fetch_all
     result, sql = estoque_repository.listar_pedidos_de_venda(data_fim="2025-06-30")
-    assert f"DECLARE @DataFim DATE = '2025-06-30';" in sql
-    assert f"DECLARE @DataInicio DATE = DATEADD(MONTH, -6, DATEADD(MONTH, DATEDIFF(MONTH, 0, GETDATE()), 0))" in sql  
+    assert captured["params"] == [date(2025, 6, 30), DateHelper.first_day_of_month(-6)]
     assert f"OINV.DocDate BETWEEN @DataInicio AND @DataFim" in sql in sql
 
 @pytest.mark.django_db
@@ -324,24 +363,35 @@ def test_listar_saida_de_produtos_query_error(estoque_repository, exception, exp
         
 @pytest.mark.django_db
 def test_listar_saida_de_produtos_date_none(estoque_repository):
-    estoque_repository.cliente.fetch_all = lambda sql, params=None: listar_saida_de_produtos_mock
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["params"] = params
+        return listar_saida_de_produtos_mock
+    estoque_repository.cliente.fetch_all = fake_fetch_all
     result, sql = estoque_repository.listar_saida_de_produtos()
-    assert f"@DataInicio DATE = DATEADD(MONTH, -6, GETDATE());" in sql
-    assert f"@DataFim DATE = GETDATE();" in sql
+    assert "@DataInicio DATE = ?;" in sql
+    assert "@DataFim DATE = ?;" in sql
+    assert captured["params"] == [DateHelper.first_day_of_month(-6), DateHelper.today()]
     
 @pytest.mark.django_db
 def test_listar_saida_de_produtos_date_partial(estoque_repository):
-    estoque_repository.cliente.fetch_all = lambda sql, params=None: listar_saida_de_produtos_mock
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["params"] = params
+        return listar_saida_de_produtos_mock
+    estoque_repository.cliente.fetch_all = fake_fetch_all
     result, sql = estoque_repository.listar_saida_de_produtos(data_inicio="2025-01-01")
-    assert f"@DataInicio DATE = '2025-01-01';" in sql
-    assert f"@DataFim DATE = GETDATE();" in sql
+    assert captured["params"] == [date(2025, 1, 1), DateHelper.today()]
 
 @pytest.mark.django_db
 def test_listar_saida_de_produtos_date_partial_end(estoque_repository):
-    estoque_repository.cliente.fetch_all = lambda sql, params=None: listar_saida_de_produtos_mock
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["params"] = params
+        return listar_saida_de_produtos_mock
+    estoque_repository.cliente.fetch_all = fake_fetch_all
     result, sql = estoque_repository.listar_saida_de_produtos(data_fim="2025-06-30")
-    assert f"@DataInicio DATE = DATEADD(MONTH, -6, GETDATE());" in sql
-    assert f"@DataFim DATE = '2025-06-30';" in sql
+    assert captured["params"] == [DateHelper.first_day_of_month(-6), date(2025, 6, 30)]
     
 @pytest.mark.django_db
 def test_listar_saida_de_produtos_invalid_date(estoque_repository):
@@ -357,3 +407,329 @@ def test_listar_saida_de_produtos_invalid_range(estoque_repository, data_inicio,
     with pytest.raises(QueryError):
         estoque_repository.listar_saida_de_produtos(data_inicio=data_inicio, data_fim=data_fim)
 
+
+
+@pytest.mark.django_db
+def test_iterar_saida_de_produtos(estoque_repository, listar_saida_de_produtos_mock):
+    def fake_fetch_iter(sql, params=None, arraysize=None):
+        assert params == [date(2025, 1, 1), date(2025, 6, 30)]
+        for i in range(0, len(listar_saida_de_produtos_mock), arraysize):
+            yield listar_saida_de_produtos_mock[i:i + arraysize]
+
+    estoque_repository.cliente.fetch_iter = fake_fetch_iter
+    batches, sql = estoque_repository.iterar_saida_de_produtos('2025-01-01', '2025-06-30', tamanho_lote=3)
+    result = list(batches)
+    assert [len(batch) for batch in result] == [3, 1]
+    assert [row for batch in result for row in batch] == listar_saida_de_produtos_mock
+    assert "@DataInicio DATE = ?;" in sql
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("exception, expected_exception", [
+    (pyodbc.OperationalError, ConnectionError),
+    (pyodbc.ProgrammingError, QueryError),
+    (Exception, RepositoryError),
+])
+def test_iterar_saida_de_produtos_query_error_during_iteration(estoque_repository, exception, expected_exception):
+    def fake_fetch_iter(sql, params=None, arraysize=None):
+        raise exception("Test exception")
+        yield
+
+    estoque_repository.cliente.fetch_iter = fake_fetch_iter
+    batches, _ = estoque_repository.iterar_saida_de_produtos('2025-01-01', '2025-06-30')
+
+    with pytest.raises(expected_exception):
+        list(batches)
+
+
+@pytest.mark.django_db
+def test_listar_paineis_estoque(estoque_repository, listar_hits_mock, listar_pedidos_em_transito_mock, listar_pedidos_de_venda_mock):
+    chamadas = []
+
+    def fake_fetch_multi(queries):
+        chamadas.append(queries)
+        return [listar_hits_mock, listar_pedidos_em_transito_mock, listar_pedidos_de_venda_mock]
+
+    estoque_repository.cliente.fetch_multi = fake_fetch_multi
+    hits, transito, vendas = estoque_repository.listar_paineis_estoque("2025-01-01", "2025-02-28")
+
+    # Uma única ida ao servidor com as três queries
+    assert len(chamadas) == 1
+    assert [params for _, params in chamadas[0]][2] == [date(2025, 2, 28), date(2025, 1, 1)]
+    assert hits[0] == listar_hits_mock
+    assert transito[0] == listar_pedidos_em_transito_mock
+    assert vendas[0] == listar_pedidos_de_venda_mock
+    assert "Hits12Meses" in hits[1]
+    assert "INVQTY_Mensal" in transito[1]
+    assert "@DataInicio DATE = ?;" in vendas[1]
+
+
+@pytest.mark.django_db
+def test_listar_paineis_estoque_reuses_method_cache_entries(
+    estoque_repository, listar_hits_mock, listar_pedidos_em_transito_mock, listar_pedidos_de_venda_mock, settings
+):
+    from core.services.query_cache import query_cache
+
+    settings.SQLSERVER_QUERY_CACHE_ENABLED = True
+    settings.SQLSERVER_CACHE_MENSAL_ENABLED = False
+    query_cache.invalidate()
+    chamadas = []
+
+    def fake_fetch_multi(queries):
+        chamadas.append(queries)
+        resultados = {"Hits12Meses": listar_hits_mock, "INVQTY_Mensal": listar_pedidos_em_transito_mock}
+        return [
+            next((dados for marca, dados in resultados.items() if marca in sql), listar_pedidos_de_venda_mock)
+            for sql, _ in queries
+        ]
+
+    estoque_repository.cliente.fetch_multi = fake_fetch_multi
+    estoque_repository.cliente.fetch_all = lambda sql, params=None: pytest.fail("consulta fora do lote")
+    try:
+        estoque_repository.listar_hits.store((listar_hits_mock, "SELECT hits"))
+        hits, transito, vendas = estoque_repository.listar_paineis_estoque("2025-01-01", "2025-02-28")
+
+        # Hits já estavam no cache: o lote leva só trânsito e vendas
+        assert len(chamadas[0]) == 2
+        assert hits == (listar_hits_mock, "SELECT hits")
+        assert transito[0] == listar_pedidos_em_transito_mock
+        assert vendas[0] == listar_pedidos_de_venda_mock
+
+        # Outras datas: o painel falta no cache, mas os conjuntos sem data vêm das entradas dos métodos
+        estoque_repository.listar_paineis_estoque("2025-03-01", "2025-04-30")
+        assert [params for _, params in chamadas[1]] == [[date(2025, 4, 30), date(2025, 3, 1)]]
+        assert estoque_repository.listar_pedidos_de_venda("2025-03-01", "2025-04-30")[0] == listar_pedidos_de_venda_mock
+        assert len(chamadas) == 2
+    finally:
+        query_cache.invalidate()
+
+
+@pytest.mark.django_db
+def test_listar_paineis_estoque_sales_through_method_with_monthly_cache(
+    estoque_repository, listar_hits_mock, listar_pedidos_em_transito_mock, listar_pedidos_de_venda_mock, settings
+):
+    from core.services.query_cache import query_cache
+
+    settings.SQLSERVER_QUERY_CACHE_ENABLED = True
+    settings.SQLSERVER_CACHE_MENSAL_ENABLED = True
+    query_cache.invalidate()
+    chamadas = []
+
+    def fake_fetch_multi(queries):
+        chamadas.append(queries)
+        return [listar_hits_mock, listar_pedidos_em_transito_mock]
+
+    estoque_repository.cliente.fetch_multi = fake_fetch_multi
+    estoque_repository.cliente.fetch_all = lambda sql, params=None: listar_pedidos_de_venda_mock
+    try:
+        _, _, vendas = estoque_repository.listar_paineis_estoque("2025-01-01", "2025-03-31")
+    finally:
+        query_cache.invalidate()
+
+    assert len(chamadas[0]) == 2
+    assert vendas[0] == sorted(listar_pedidos_de_venda_mock, key=lambda linha: (linha["ItemCode"], linha["AnoMes"]))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("exception, expected_exception", [
+    (pyodbc.OperationalError, ConnectionError),
+    (pyodbc.ProgrammingError, QueryError),
+    (Exception, RepositoryError),
+])
+def test_listar_paineis_estoque_query_error(estoque_repository, exception, expected_exception):
+    def fake_fetch_multi(queries):
+        raise exception("Test exception")
+
+    estoque_repository.cliente.fetch_multi = fake_fetch_multi
+
+    with pytest.raises(expected_exception):
+        estoque_repository.listar_paineis_estoque("2025-01-01", "2025-02-28")
+
+@pytest.fixture
+def agregados_materializados(settings):
+    from unittest.mock import patch
+
+    from core.repositories.agregados_repository import CONJUNTO_SAIDAS, CONJUNTO_VENDAS, AgregadosRepository
+
+    settings.MATERIALIZACAO_AGREGADOS_ENABLED = True
+    agregados = AgregadosRepository()
+    agregados.substituir_mes(CONJUNTO_VENDAS, "2025-01", [
+        {"ItemCode": "B0002", "ItemName": "Produto B", "CardCode": "", "QuantidadeVendida": Decimal("4.0")},
+        {"ItemCode": "A0001", "ItemName": "Produto A", "CardCode": "F1", "QuantidadeVendida": Decimal("10.0")},
+    ])
+    agregados.substituir_mes(CONJUNTO_SAIDAS, "2025-01", [
+        {"ItemCode": "A0001", "Total": Decimal("5")},
+        {"ItemCode": "Z9999", "Total": Decimal("1")},  # produto que saiu da lista do ERP
+    ])
+    with patch.object(DateHelper, "today", return_value=date(2025, 2, 10)):
+        yield
+
+
+@pytest.mark.django_db
+def test_listar_pedidos_de_venda_combines_materialized_months(estoque_repository, agregados_materializados):
+    chamadas = []
+
+    def fake_fetch_all(sql, params=None):
+        chamadas.append(params)
+        return [{"ItemCode": "A0001", "ItemName": "Produto A", "CardCode": "F1", "AnoMes": "2025-02", "QuantidadeVendida": Decimal("2.0")}]
+
+    estoque_repository.cliente.fetch_all = fake_fetch_all
+    result, sql = estoque_repository.listar_pedidos_de_venda("2025-01-01", "2025-02-10")
+
+    # Só o mês corrente vai ao ERP
+    assert chamadas == [[date(2025, 2, 10), date(2025, 2, 1)]]
+    assert [(linha["ItemCode"], linha["AnoMes"], linha["QuantidadeVendida"]) for linha in result] == [
+        ("A0001", "2025-01", Decimal("10.0")),
+        ("A0001", "2025-02", Decimal("2.0")),
+        ("B0002", "2025-01", Decimal("4.0")),
+    ]
+    assert "@DataInicio DATE = ?;" in sql
+
+
+@pytest.mark.django_db
+def test_listar_saida_de_produtos_combines_materialized_months(estoque_repository, agregados_materializados):
+    chamadas = []
+    produto = {"ItemName": "Produto", "CardCode": "F1", "CardName": "Fornecedor"}
+
+    def fake_fetch_all(sql, params=None):
+        chamadas.append(params)
+        return [
+            {"ItemCode": "A0001", **produto, "AnoMes": None, "Total": Decimal("0")},
+            {"ItemCode": "B0002", **produto, "AnoMes": "2025-02", "Total": Decimal("3")},
+            {"ItemCode": "C0003", **produto, "AnoMes": None, "Total": Decimal("0")},
+        ]
+
+    estoque_repository.cliente.fetch_all = fake_fetch_all
+    result, _ = estoque_repository.listar_saida_de_produtos("2025-01-01", "2025-02-10")
+
+    assert chamadas == [[date(2025, 2, 1), date(2025, 2, 10)]]
+    assert [(linha["ItemCode"], linha["AnoMes"], linha["Total"]) for linha in result] == [
+        ("A0001", "2025-01", Decimal("5")),
+        ("B0002", "2025-02", Decimal("3")),
+        ("C0003", None, Decimal("0")),
+    ]
+    assert result[0]["CardName"] == "Fornecedor"
+
+
+@pytest.mark.django_db
+def test_listar_saida_de_produtos_only_materialized_months_still_lists_products(estoque_repository, agregados_materializados):
+    chamadas = []
+
+    def fake_fetch_all(sql, params=None):
+        chamadas.append(params)
+        return [
+            {"ItemCode": codigo, "ItemName": "Produto", "CardCode": None, "CardName": None, "AnoMes": None, "Total": Decimal("0")}
+            for codigo in ("A0001", "C0003")
+        ]
+
+    estoque_repository.cliente.fetch_all = fake_fetch_all
+    result, _ = estoque_repository.listar_saida_de_produtos("2025-01-01", "2025-01-31")
+
+    # Sem trecho no ERP: consulta um intervalo vazio só para obter a lista de produtos
+    assert chamadas == [[date(2025, 2, 1), date(2025, 1, 31)]]
+    assert [(linha["ItemCode"], linha["AnoMes"], linha["Total"]) for linha in result] == [
+        ("A0001", "2025-01", Decimal("5")),
+        ("C0003", None, Decimal("0")),
+    ]
+
+
+@pytest.mark.django_db
+def test_listar_pedidos_de_venda_without_materialized_months_uses_single_query(estoque_repository, settings):
+    settings.MATERIALIZACAO_AGREGADOS_ENABLED = True
+    chamadas = []
+    estoque_repository.cliente.fetch_all = lambda sql, params=None: chamadas.append(params) or []
+
+    estoque_repository.listar_pedidos_de_venda("2025-01-01", "2025-02-10")
+
+    assert chamadas == [[date(2025, 2, 10), date(2025, 1, 1)]]
+
+
+@pytest.fixture
+def particionamento(settings):
+    settings.SQLSERVER_PARTICIONAMENTO_MIN_MESES = 2
+    settings.SQLSERVER_PARTICIONAMENTO_MAX_WORKERS = 2
+
+
+@pytest.mark.django_db
+def test_listar_pedidos_de_venda_partitioned_by_month(estoque_repository, particionamento):
+    chamadas = []
+
+    def fake_fetch_all(sql, params=None):
+        chamadas.append(params)
+        data_fim, data_inicio = params
+        return [
+            {"ItemCode": item, "ItemName": "Produto", "CardCode": "", "AnoMes": data_inicio.strftime("%Y-%m"), "QuantidadeVendida": Decimal("1.0")}
+            for item in ("B0002", "A0001")
+        ]
+
+    estoque_repository.cliente.fetch_all = fake_fetch_all
+    result, sql = estoque_repository.listar_pedidos_de_venda("2025-01-15", "2025-03-10")
+
+    assert sorted(chamadas) == [
+        [date(2025, 1, 31), date(2025, 1, 15)],
+        [date(2025, 2, 28), date(2025, 2, 1)],
+        [date(2025, 3, 10), date(2025, 3, 1)],
+    ]
+    assert [(linha["ItemCode"], linha["AnoMes"]) for linha in result] == [
+        ("A0001", "2025-01"), ("A0001", "2025-02"), ("A0001", "2025-03"),
+        ("B0002", "2025-01"), ("B0002", "2025-02"), ("B0002", "2025-03"),
+    ]
+    assert "@DataInicio DATE = ?;" in sql
+
+
+@pytest.mark.django_db
+def test_listar_pedidos_de_venda_partitions_are_cached(estoque_repository, particionamento, settings):
+    from core.services.query_cache import query_cache
+
+    settings.SQLSERVER_QUERY_CACHE_ENABLED = True
+    query_cache.invalidate()
+    chamadas = []
+    estoque_repository.cliente.fetch_all = lambda sql, params=None: chamadas.append(params) or []
+
+    try:
+        estoque_repository.listar_pedidos_de_venda("2025-01-01", "2025-03-31")
+        chamadas.clear()
+        estoque_repository.listar_pedidos_de_venda("2025-02-01", "2025-04-30")
+    finally:
+        query_cache.invalidate()
+
+    # February and March come from the cache; only April goes to the ERP
+    assert chamadas == [[date(2025, 4, 30), date(2025, 4, 1)]]
+
+
+@pytest.mark.django_db
+def test_listar_pedidos_de_venda_short_range_not_partitioned(estoque_repository, particionamento):
+    chamadas = []
+    estoque_repository.cliente.fetch_all = lambda sql, params=None: chamadas.append(params) or []
+
+    estoque_repository.listar_pedidos_de_venda("2025-01-02", "2025-01-30")
+
+    assert chamadas == [[date(2025, 1, 30), date(2025, 1, 2)]]
+
+
+@pytest.mark.django_db
+def test_listar_saida_de_produtos_partitioned_by_month(estoque_repository, particionamento):
+    chamadas = []
+    produto = {"ItemName": "Produto", "CardCode": "F1", "CardName": "Fornecedor"}
+
+    def fake_fetch_all(sql, params=None):
+        chamadas.append(params)
+        data_inicio, _ = params
+        # Each partition lists every product; B0002 only moves in February
+        movimento = data_inicio.month == 2
+        return [
+            {"ItemCode": "A0001", **produto, "AnoMes": data_inicio.strftime("%Y-%m"), "Total": Decimal("2")},
+            {"ItemCode": "B0002", **produto, "AnoMes": "2025-02" if movimento else None, "Total": Decimal("1" if movimento else "0")},
+            {"ItemCode": "C0003", **produto, "AnoMes": None, "Total": Decimal("0")},
+        ]
+
+    estoque_repository.cliente.fetch_all = fake_fetch_all
+    result, _ = estoque_repository.listar_saida_de_produtos("2025-01-01", "2025-02-28")
+
+    assert sorted(chamadas) == [[date(2025, 1, 1), date(2025, 1, 31)], [date(2025, 2, 1), date(2025, 2, 28)]]
+    assert [(linha["ItemCode"], linha["AnoMes"], linha["Total"]) for linha in result] == [
+        ("A0001", "2025-01", Decimal("2")),
+        ("A0001", "2025-02", Decimal("2")),
+        ("B0002", "2025-02", Decimal("1")),
+        ("C0003", None, Decimal("0")),
+    ]
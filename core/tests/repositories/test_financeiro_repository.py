@@ -1,7 +1,12 @@
+from datetime import date
+
+import pandas as pd
 import pytest
 import pyodbc
 
-from core.repositories.financeiro_repository import FinanceiroRepository
+from core.helpers.date_helper import DateHelper
+from core.repositories.financeiro_repository import DECIMAIS_RENTABILIDADE, FinanceiroRepository
+from core.services.decimal_policy import CENTS
 from core.repositories.exceptions import ConnectionError, QueryError, RepositoryError
 
 @pytest.fixture
@@ -52,24 +57,33 @@ def listar_rentabilidade_itens_response():
 @pytest.mark.django_db
 def test_listar_rentabilidade_itens(financeiro_repository, listar_rentabilidade_itens_response):
     
-    financeiro_repository.cliente.fetch_all = lambda sql, params = None: listar_rentabilidade_itens_response
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["params"] = params
+        return listar_rentabilidade_itens_response
+    financeiro_repository.cliente.fetch_all = fake_fetch_all
     result, sql = financeiro_repository.listar_rentabilidade_itens()
     assert result == listar_rentabilidade_itens_response
     assert isinstance(result, list)
     assert all(isinstance(item, dict) for item in result)
     assert sql is not None
-    assert "DECLARE @DataFim DATE = GETDATE()" in sql
-    assert "DECLARE @DataInicio DATE = DATEADD(MONTH, -12, GETDATE())" in sql
+    assert "DECLARE @DataFim DATE = ?;" in sql
+    assert "DECLARE @DataInicio DATE = ?;" in sql
+    assert captured["params"] == [DateHelper.today(), DateHelper.first_day_of_month(-12)]
 
 @pytest.mark.django_db
 def test_listar_rentabilidade_date_range(financeiro_repository):
     data_inicio = "2023-01-01"
     data_fim = "2023-12-31"
     
-    financeiro_repository.cliente.fetch_all = lambda sql, params = None: []
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["params"] = params
+        return []
+    financeiro_repository.cliente.fetch_all = fake_fetch_all
     result, sql = financeiro_repository.listar_rentabilidade_itens(data_inicio, data_fim)
-    assert f"@DataInicio DATE = '{data_inicio}'" in sql
-    assert f"@DataFim DATE = '{data_fim}'" in sql
+    assert data_inicio not in sql and data_fim not in sql
+    assert captured["params"] == [date(2023, 12, 31), date(2023, 1, 1)]
     
 @pytest.mark.django_db
 @pytest.mark.parametrize("exception, expected_exception", [
@@ -94,19 +108,25 @@ def test_listar_rentabilidade_itens_default_dates(financeiro_repository):
     
     data_inicio = '2025-06-01'
     
-    financeiro_repository.cliente.fetch_all = lambda sql, params = None: []
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["params"] = params
+        return []
+    financeiro_repository.cliente.fetch_all = fake_fetch_all
     result, sql = financeiro_repository.listar_rentabilidade_itens(data_inicio=data_inicio)
-    assert f"@DataInicio DATE = '{data_inicio}'" in sql
-    assert f"@DataFim DATE = GETDATE()" in sql
+    assert captured["params"] == [DateHelper.today(), date(2025, 6, 1)]
     
 @pytest.mark.django_db
 def test_listar_rentabilidade_itens_only_data_fim(financeiro_repository):
     data_fim = '2025-12-31'
     
-    financeiro_repository.cliente.fetch_all = lambda sql, params = None: []
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["params"] = params
+        return []
+    financeiro_repository.cliente.fetch_all = fake_fetch_all
     result, sql = financeiro_repository.listar_rentabilidade_itens(data_fim=data_fim)
-    assert f"@DataInicio DATE = DATEADD(MONTH, -12, GETDATE())" in sql
-    assert f"@DataFim DATE = '{data_fim}'" in sql
+    assert captured["params"] == [date(2025, 12, 31), DateHelper.first_day_of_month(-12)]
     
 @pytest.mark.django_db
 def test_listar_rentabilidade_itens_invalid_date_format(financeiro_repository):
@@ -125,4 +145,207 @@ def test_listar_rentabilidade_itens_invalid_range(financeiro_repository):
     financeiro_repository.cliente.fetch_all = lambda sql, params = None: []
     
     with pytest.raises(RepositoryError):
-        financeiro_repository.listar_rentabilidade_itens(data_inicio=data_inicio, data_fim=data_fim)
\ No newline at end of file
+        financeiro_repository.listar_rentabilidade_itens(data_inicio=data_inicio, data_fim=data_fim)
+
+
+@pytest.mark.django_db
+def test_listar_rentabilidade_itens_recompile_hint(financeiro_repository, settings):
+    financeiro_repository.cliente.fetch_all = lambda sql, params = None: []
+
+    _, sql = financeiro_repository.listar_rentabilidade_itens()
+    assert "OPTION (RECOMPILE)" not in sql
+
+    settings.SQLSERVER_RECOMPILE_QUERIES = ["FinanceiroRepository.listar_rentabilidade_itens"]
+    _, sql = financeiro_repository.listar_rentabilidade_itens()
+    assert sql.rstrip().endswith("OPTION (RECOMPILE);")
+
+
+@pytest.mark.django_db
+def test_listar_rentabilidade_itens_filters_pushed_into_sql(financeiro_repository):
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["params"] = params
+        return []
+    financeiro_repository.cliente.fetch_all = fake_fetch_all
+    _, sql = financeiro_repository.listar_rentabilidade_itens(
+        data_inicio="2024-01-01",
+        data_fim="2024-12-31",
+        item_code="I00001",
+        tipo_negocio="B2B",
+        rentabilidade_min=10,
+        rentabilidade_max=50,
+    )
+    # Item and business type filter both UNION branches, before the aggregation
+    assert "AND INV1.ItemCode = @ItemCode" in sql
+    assert "AND RIN1.ItemCode = @ItemCode" in sql
+    assert sql.count("AND OCRD.U_Tipo_Negocios = @TipoNegocio") == 2
+    # Thresholds apply to the aggregated profitability
+    assert "R.Rentabilidade >= ?" in sql and "R.Rentabilidade <= ?" in sql
+    assert captured["params"] == [date(2024, 12, 31), date(2024, 1, 1), "I00001", "B2B", 10, 50]
+    assert sql.count("?") == len(captured["params"])
+
+
+@pytest.mark.django_db
+def test_listar_rentabilidade_itens_without_filters_keeps_full_result(financeiro_repository):
+    financeiro_repository.cliente.fetch_all = lambda sql, params=None: []
+    _, sql = financeiro_repository.listar_rentabilidade_itens()
+    assert "@ItemCode" not in sql
+    assert "OFFSET" not in sql
+    assert "TotalLinhas" not in sql
+    assert "ORDER BY\n    R.ItemCode,\n    R.TipoDoNegocio" in sql
+
+
+@pytest.mark.django_db
+def test_listar_rentabilidade_itens_invalid_order(financeiro_repository):
+    financeiro_repository.cliente.fetch_all = lambda sql, params=None: []
+    with pytest.raises(QueryError):
+        financeiro_repository.listar_rentabilidade_itens(ordenar_por="ItemName")
+
+
+@pytest.mark.django_db
+def test_listar_rentabilidade_itens_com_total(financeiro_repository, listar_rentabilidade_itens_response):
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["sql"], captured["params"] = sql, params
+        return [{**linha, "TotalLinhas": 42} for linha in listar_rentabilidade_itens_response[:2]]
+    financeiro_repository.cliente.fetch_all = fake_fetch_all
+    linhas, total, sql = financeiro_repository.listar_rentabilidade_itens_com_total(
+        data_inicio="2024-01-01",
+        data_fim="2024-12-31",
+        offset=10,
+        fetch_next=2,
+        ordenar_por="faturamento",
+    )
+    assert total == 42
+    assert linhas == listar_rentabilidade_itens_response[:2]
+    assert "COUNT(*) OVER () AS TotalLinhas" in sql
+    assert "ORDER BY\n    R.FaturamentoPorItem DESC" in sql
+    assert sql.rstrip().endswith("OFFSET ? ROWS FETCH NEXT ? ROWS ONLY")
+    assert captured["params"] == [date(2024, 12, 31), date(2024, 1, 1), 10, 2]
+
+
+@pytest.mark.django_db
+def test_listar_rentabilidade_itens_com_total_page_past_end(financeiro_repository):
+    chamadas = []
+    def fake_fetch_all(sql, params=None):
+        chamadas.append(params)
+        # Only the first-row query (offset 0) finds data
+        return [{"ItemCode": "I00001", "TotalLinhas": 3}] if params[-2] == 0 else []
+    financeiro_repository.cliente.fetch_all = fake_fetch_all
+    linhas, total, _ = financeiro_repository.listar_rentabilidade_itens_com_total(offset=30, fetch_next=10)
+    assert linhas == []
+    assert total == 3
+    assert [params[-2:] for params in chamadas] == [[30, 10], [0, 1]]
+
+
+@pytest.mark.django_db
+def test_listar_rentabilidade_itens_com_total_dataframe(financeiro_repository):
+    captured = {}
+    def fake_fetch_frame(sql, params=None, decimals=None):
+        captured["decimals"] = decimals
+        frame = pd.DataFrame({
+            "ItemCode": ["I00001", "I00002"],
+            "FaturamentoPorItem": [12345, 678],
+            "TotalLinhas": [42, 42],
+        })
+        frame.attrs["scales"] = {"FaturamentoPorItem": 2}
+        return frame
+    financeiro_repository.cliente.fetch_frame = fake_fetch_frame
+    frame, total, sql = financeiro_repository.listar_rentabilidade_itens_com_total_dataframe(
+        offset=10, fetch_next=2
+    )
+    assert total == 42
+    assert list(frame.columns) == ["ItemCode", "FaturamentoPorItem"]
+    assert frame.attrs["scales"] == {"FaturamentoPorItem": 2}
+    assert captured["decimals"] == DECIMAIS_RENTABILIDADE
+    assert captured["decimals"]["FaturamentoPorItem"] == CENTS
+    assert "COUNT(*) OVER () AS TotalLinhas" in sql
+
+
+@pytest.mark.django_db
+def test_listar_rentabilidade_itens_com_total_dataframe_page_past_end(financeiro_repository):
+    def fake_fetch_frame(sql, params=None, decimals=None):
+        # Only the first-row query (offset 0) finds data
+        if params[-2] == 0:
+            return pd.DataFrame({"ItemCode": ["I00001"], "TotalLinhas": [3]})
+        return pd.DataFrame({"ItemCode": [], "TotalLinhas": []})
+    financeiro_repository.cliente.fetch_frame = fake_fetch_frame
+    frame, total, _ = financeiro_repository.listar_rentabilidade_itens_com_total_dataframe(offset=30, fetch_next=10)
+    assert frame.empty and list(frame.columns) == ["ItemCode"]
+    assert total == 3
+
+
+@pytest.mark.django_db
+def test_listar_rentabilidade_itens_partitioned_merges_components(financeiro_repository, settings):
+    from decimal import Decimal
+
+    settings.SQLSERVER_PARTICIONAMENTO_MIN_MESES = 2
+    chamadas = []
+
+    def fake_fetch_all(sql, params=None):
+        chamadas.append(params)
+        assert "A.Origem" in sql
+        base = {"ItemCode": "I00001", "ItemName": "Item A", "TipoDoNegocio": "B2B", "Price": Decimal("50.000000")}
+        if params[1].month == 1:
+            return [
+                {**base, "Origem": "NF", "Quantidade": 3, "PrecoMinimo": Decimal("100"), "FaturamentoPorItem": Decimal("120")},
+                {**base, "Origem": "DEV", "Quantidade": -1, "PrecoMinimo": Decimal("-50"), "FaturamentoPorItem": Decimal("-40")},
+            ]
+        return [{**base, "Origem": "NF", "Quantidade": 2, "PrecoMinimo": Decimal("100"), "FaturamentoPorItem": Decimal("100")}]
+
+    financeiro_repository.cliente.fetch_all = fake_fetch_all
+    result, _ = financeiro_repository.listar_rentabilidade_itens("2024-01-01", "2024-02-29", item_code="I00001")
+
+    assert sorted(params[:3] for params in chamadas) == [
+        [date(2024, 1, 31), date(2024, 1, 1), "I00001"],
+        [date(2024, 2, 29), date(2024, 2, 1), "I00001"],
+    ]
+    # NF: (220 - 200) / 200 = 10%; DEV: -(40 - 50) / 50 = 20%; summed like the full query
+    assert result == [{
+        "ItemCode": "I00001",
+        "ItemName": "Item A",
+        "TipoDoNegocio": "B2B",
+        "Quantidade": Decimal("4"),
+        "PrecoMinimoUnitario": Decimal("50.00"),
+        "FaturamentoPorItem": Decimal("180.00"),
+        "Rentabilidade": Decimal("30.00"),
+    }]
+
+
+@pytest.mark.django_db
+def test_listar_rentabilidade_itens_partitioned_truncates_quantity_once(financeiro_repository, settings):
+    from decimal import Decimal
+
+    settings.SQLSERVER_PARTICIONAMENTO_MIN_MESES = 2
+
+    def fake_fetch_all(sql, params=None):
+        # Partitions return the exact sums; the int cast is left to the merge
+        assert "SUM(INV1.Quantity) as 'Quantidade'" in sql
+        assert "CAST(SUM(INV1.Quantity) AS int)" not in sql
+        base = {
+            "ItemCode": "I00001", "ItemName": "Item A", "TipoDoNegocio": "B2B", "Price": Decimal("50.000000"),
+            "PrecoMinimo": Decimal("80"), "FaturamentoPorItem": Decimal("100"),
+        }
+        linhas = [{**base, "Origem": "NF", "Quantidade": Decimal("1.600000")}]
+        if params[1].month == 1:
+            linhas.append({**base, "Origem": "DEV", "Quantidade": Decimal("-0.600000"),
+                           "PrecoMinimo": Decimal("-10"), "FaturamentoPorItem": Decimal("-10")})
+        return linhas
+
+    financeiro_repository.cliente.fetch_all = fake_fetch_all
+    result, _ = financeiro_repository.listar_rentabilidade_itens("2024-01-01", "2024-02-29", item_code="I00001")
+
+    # Full query: CAST(3.2 AS int) - CAST(0.6 AS int) = 3 (truncating each month would give 1 + 1 - 0)
+    assert result[0]["Quantidade"] == Decimal("3")
+
+
+@pytest.mark.django_db
+def test_listar_rentabilidade_itens_post_aggregation_filters_not_partitioned(financeiro_repository, settings):
+    settings.SQLSERVER_PARTICIONAMENTO_MIN_MESES = 2
+    chamadas = []
+    financeiro_repository.cliente.fetch_all = lambda sql, params=None: chamadas.append(sql) or []
+
+    financeiro_repository.listar_rentabilidade_itens("2024-01-01", "2024-06-30", ordenar_por="faturamento")
+
+    assert len(chamadas) == 1
+    assert "A.Origem" not in chamadas[0]
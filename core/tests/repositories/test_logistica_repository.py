@@ -1,6 +1,7 @@
 import pytest
 import pyodbc
 
+from core.helpers.date_helper import DateHelper
 from core.repositories.logistica_repository import LogisticaRepository
 from core.repositories.exceptions import ConnectionError, QueryError, RepositoryError
 
@@ -81,29 +82,44 @@ def test_listar_transportadoras_mais_usadas_exceptions(logistica_repository, exc
 @pytest.mark.django_db
 def test_listar_transportadoras_mais_usadas_primeiros_registros(logistica_repository, listar_transportadoras_mais_usadas_mock):
     # Mock the cliente's fetch_all method
-    logistica_repository.cliente.fetch_all = lambda sql, params=None: listar_transportadoras_mais_usadas_mock
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["params"] = params
+        return listar_transportadoras_mais_usadas_mock
+    logistica_repository.cliente.fetch_all = fake_fetch_all
     result, sql = logistica_repository.listar_transportadoras_mais_usadas(offset=0, fetch_next=2)
-    assert 'OFFSET 0 ROWS' in sql
-    assert 'FETCH NEXT 2 ROWS ONLY' in sql
+    assert 'OFFSET ? ROWS' in sql
+    assert 'FETCH NEXT ? ROWS ONLY' in sql
+    data_inicio = DateHelper.first_day_of_month(-6)
+    assert captured["params"] == [data_inicio, 0, 2, data_inicio]
     
 @pytest.mark.django_db
 def test_listar_transportadoras_mais_usadas_offset_e_fetch(logistica_repository, listar_transportadoras_mais_usadas_mock):
     # Mock the cliente's fetch_all method
-    logistica_repository.cliente.fetch_all = lambda sql, params=None: listar_transportadoras_mais_usadas_mock
-    offset = 2
-    fetch_next = 2
-    result, sql = logistica_repository.listar_transportadoras_mais_usadas(offset=offset, fetch_next=fetch_next)
-    assert f'OFFSET {offset} ROWS' in sql
-    assert f'FETCH NEXT {fetch_next} ROWS ONLY' in sql
+    captured = []
+    def fake_fetch_all(sql, params=None):
+        captured.append((sql, params))
+        return listar_transportadoras_mais_usadas_mock
+    logistica_repository.cliente.fetch_all = fake_fetch_all
+    logistica_repository.listar_transportadoras_mais_usadas(offset=0, fetch_next=2)
+    result, sql = logistica_repository.listar_transportadoras_mais_usadas(offset=2, fetch_next=2)
+    # Páginas diferentes usam o mesmo texto de query (mesmo plano no SQL Server)
+    assert captured[0][0] == captured[1][0]
+    assert captured[1][1][1:3] == [2, 2]
     
 @pytest.mark.django_db
 def test_listar_transportadoras_mais_usadas_sem_fetch_next(logistica_repository, listar_transportadoras_mais_usadas_mock):
     # Mock the cliente's fetch_all method
-    logistica_repository.cliente.fetch_all = lambda sql, params=None: listar_transportadoras_mais_usadas_mock
-    offset = 5
-    result, sql = logistica_repository.listar_transportadoras_mais_usadas(offset=offset, fetch_next=None)
-    assert f'OFFSET {offset} ROWS' in sql
+    captured = {}
+    def fake_fetch_all(sql, params=None):
+        captured["params"] = params
+        return listar_transportadoras_mais_usadas_mock
+    logistica_repository.cliente.fetch_all = fake_fetch_all
+    result, sql = logistica_repository.listar_transportadoras_mais_usadas(offset=5, fetch_next=None)
+    assert 'OFFSET ? ROWS' in sql
     assert 'FETCH NEXT' not in sql
+    assert captured["params"][1] == 5
+    assert len(captured["params"]) == 3
 
 
 # ===================== Testes contar_transportadoras =====================
@@ -145,4 +161,219 @@ def test_contar_transportadoras_exceptions(logistica_repository, exception, expe
     logistica_repository.cliente.fetch_one = raise_exception
     
     with pytest.raises(expected_exception):
-        logistica_repository.contar_transportadoras()
\ No newline at end of file
+        logistica_repository.contar_transportadoras()
+
+@pytest.mark.django_db
+def test_listar_transportadoras_mais_usadas_dataframe(logistica_repository, listar_transportadoras_mais_usadas_mock):
+    import pandas as pd
+
+    logistica_repository.cliente.fetch_frame = lambda sql, params=None: pd.DataFrame(listar_transportadoras_mais_usadas_mock)
+    result, sql = logistica_repository.listar_transportadoras_mais_usadas_dataframe(offset=2, fetch_next=2)
+    assert isinstance(result, pd.DataFrame)
+    assert result.to_dict(orient="records") == listar_transportadoras_mais_usadas_mock
+    assert 'OFFSET ? ROWS' in sql
+    assert 'FETCH NEXT ? ROWS ONLY' in sql
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_mais_usadas_async(logistica_repository, listar_transportadoras_mais_usadas_mock):
+    import asyncio
+
+    logistica_repository.cliente.fetch_all = lambda sql, params=None: listar_transportadoras_mais_usadas_mock
+    result, sql = asyncio.run(logistica_repository.listar_transportadoras_mais_usadas_async(offset=0, fetch_next=2))
+    assert result == listar_transportadoras_mais_usadas_mock
+    assert 'FETCH NEXT ? ROWS ONLY' in sql
+
+
+@pytest.mark.django_db
+def test_contar_transportadoras_async_exceptions(logistica_repository):
+    import asyncio
+
+    def raise_exception(sql, params=None):
+        raise pyodbc.OperationalError("Simulated database error")
+
+    logistica_repository.cliente.fetch_one = raise_exception
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(logistica_repository.contar_transportadoras_async())
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_mais_usadas_com_total(logistica_repository, listar_transportadoras_mais_usadas_mock):
+    chamadas = []
+
+    def fake_fetch_multi(queries):
+        chamadas.append(queries)
+        return [listar_transportadoras_mais_usadas_mock, [{"Total": 42}]]
+
+    logistica_repository.cliente.fetch_multi = fake_fetch_multi
+    result, total, sql = logistica_repository.listar_transportadoras_mais_usadas_com_total(offset=0, fetch_next=2)
+
+    assert result == listar_transportadoras_mais_usadas_mock
+    assert total == 42
+    assert 'FETCH NEXT ? ROWS ONLY' in sql
+    # Página e total no mesmo lote
+    assert len(chamadas) == 1
+    assert "COUNT(DISTINCT T2.CardCode)" in chamadas[0][1][0]
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_mais_usadas_com_total_query_error(logistica_repository):
+    def fake_fetch_multi(queries):
+        raise pyodbc.ProgrammingError("Test exception")
+
+    logistica_repository.cliente.fetch_multi = fake_fetch_multi
+
+    with pytest.raises(QueryError):
+        logistica_repository.listar_transportadoras_mais_usadas_com_total(offset=0, fetch_next=2)
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_mais_usadas_combines_materialized_months(logistica_repository, settings):
+    from datetime import date
+    from unittest.mock import patch
+
+    from core.repositories.agregados_repository import CONJUNTO_TRANSPORTADORAS, AgregadosRepository
+
+    settings.MATERIALIZACAO_AGREGADOS_ENABLED = True
+    agregados = AgregadosRepository()
+    for ano_mes, mes in (("2025-01", 1), ("2025-02", 2), ("2025-03", 3), ("2025-04", 4), ("2025-05", 5), ("2025-06", 6)):
+        agregados.substituir_mes(CONJUNTO_TRANSPORTADORAS, ano_mes, [
+            {"CardCode": "T2", "CardName": "Beta", "Total": 5, "Mes": mes, "Ano": 2025},
+            {"CardCode": "T3", "CardName": "Gama", "Total": 1, "Mes": mes, "Ano": 2025},
+        ])
+
+    chamadas = []
+
+    def fake_fetch_all(sql, params=None):
+        if "INV12" not in sql:  # nomes atuais no OCRD
+            return [{"CardCode": code, "CardName": nome} for code, nome in (("T1", "Alfa"), ("T2", "Beta"), ("T3", "Gama"))]
+        chamadas.append(params)
+        return [{"CardCode": "T1", "CardName": "Alfa", "Total": 2, "Mes": 7, "Ano": 2025}]
+
+    logistica_repository.cliente.fetch_all = fake_fetch_all
+    with patch.object(DateHelper, "today", return_value=date(2025, 7, 15)):
+        result, sql = logistica_repository.listar_transportadoras_mais_usadas(offset=0, fetch_next=2)
+        frame, _ = logistica_repository.listar_transportadoras_mais_usadas_dataframe(offset=2, fetch_next=2)
+
+    # Só o mês corrente (fim aberto) vai ao ERP
+    assert chamadas[0] == [date(2025, 7, 1), date(9999, 12, 31)]
+    assert {linha["CardCode"] for linha in result} == {"T1", "T2"}
+    assert len(result) == 7
+    assert result[0] == {"CardCode": "T1", "CardName": "Alfa", "Total": 2, "Mes": 7, "Ano": 2025}
+    assert list(frame["CardCode"].unique()) == ["T3"]
+    assert 'FETCH NEXT ? ROWS ONLY' in sql
+
+
+@pytest.mark.django_db
+def test_combined_carriers_use_current_erp_name(logistica_repository, settings):
+    from datetime import date
+    from unittest.mock import patch
+
+    from core.repositories.agregados_repository import CONJUNTO_TRANSPORTADORAS, AgregadosRepository
+
+    settings.MATERIALIZACAO_AGREGADOS_ENABLED = True
+    agregados = AgregadosRepository()
+    for ano_mes, mes in (("2025-01", 1), ("2025-02", 2), ("2025-03", 3), ("2025-04", 4), ("2025-05", 5), ("2025-06", 6)):
+        agregados.substituir_mes(CONJUNTO_TRANSPORTADORAS, ano_mes, [
+            {"CardCode": "T1", "CardName": "Zeta Antiga", "Total": 1, "Mes": mes, "Ano": 2025},
+            {"CardCode": "T2", "CardName": "beta", "Total": 1, "Mes": mes, "Ano": 2025},
+            {"CardCode": "T3", "CardName": "Ágil", "Total": 1, "Mes": mes, "Ano": 2025},
+            {"CardCode": "T4", "CardName": "Excluída", "Total": 1, "Mes": mes, "Ano": 2025},
+        ])
+
+    nomes_consultados = []
+
+    def fake_fetch_all(sql, params=None):
+        if "INV12" in sql:
+            return [{"CardCode": "T1", "CardName": "Alfa", "Total": 2, "Mes": 7, "Ano": 2025}]
+        nomes_consultados.append(params)
+        return [{"CardCode": code, "CardName": nome} for code, nome in (("T1", "Alfa"), ("T2", "beta"), ("T3", "Ágil"))]
+
+    logistica_repository.cliente.fetch_all = fake_fetch_all
+    with patch.object(DateHelper, "today", return_value=date(2025, 7, 15)):
+        result, _ = logistica_repository.listar_transportadoras_mais_usadas(offset=0, fetch_next=3)
+
+    assert sorted(nomes_consultados[0]) == ["T1", "T2", "T3", "T4"]
+    # Renomeada: uma transportadora só, com o nome atual; ordem sem diferenciar acento e maiúsculas
+    assert list(dict.fromkeys((linha["CardCode"], linha["CardName"]) for linha in result)) == [
+        ("T3", "Ágil"), ("T1", "Alfa"), ("T2", "beta"),
+    ]
+    assert len(result) == 6 + 1 + 6 + 6
+
+
+def test_chave_nome_orders_like_the_database_collation():
+    from core.repositories.logistica_repository import chave_nome
+
+    nomes = ["beta", None, "Ahl", "Ágil", "Agil", "alfa"]
+    assert sorted(nomes, key=chave_nome) == [None, "Agil", "Ágil", "Ahl", "alfa", "beta"]
+    assert chave_nome(None) < chave_nome("")
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_por_chave_drops_lookahead_carrier(logistica_repository):
+    from datetime import date
+
+    chamadas = []
+
+    def fake_fetch_all(sql, params=None):
+        chamadas.append(params)
+        return [
+            {"CardCode": "T1", "CardName": "Alfa", "Total": 1, "Mes": 1, "Ano": 2025},
+            {"CardCode": "T1", "CardName": "Alfa", "Total": 2, "Mes": 2, "Ano": 2025},
+            {"CardCode": "T2", "CardName": "Beta", "Total": 3, "Mes": 1, "Ano": 2025},
+        ]
+
+    logistica_repository.cliente.fetch_all = fake_fetch_all
+    linhas, proxima, sql = logistica_repository.listar_transportadoras_por_chave(
+        apos=("Aaa", "T0"), limite=1, data_inicio=date(2025, 1, 1)
+    )
+
+    assert chamadas == [[2, date(2025, 1, 1), "Aaa", "Aaa", "T0", date(2025, 1, 1)]]
+    assert [linha["CardCode"] for linha in linhas] == ["T1", "T1"]
+    assert proxima == ("Alfa", "T1")
+    assert "AND (C.CardName > ? OR (C.CardName = ? AND C.CardCode > ?))" in sql
+    assert "ISNULL" not in sql
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_por_chave_null_name_key(logistica_repository):
+    from datetime import date
+
+    logistica_repository.cliente.fetch_all = lambda sql, params=None: [
+        {"CardCode": "T1", "CardName": None, "Total": 1, "Mes": 1, "Ano": 2025},
+        {"CardCode": "T2", "CardName": "Beta", "Total": 3, "Mes": 1, "Ano": 2025},
+    ]
+    linhas, proxima, sql = logistica_repository.listar_transportadoras_por_chave(limite=1, data_inicio=date(2025, 1, 1))
+
+    assert [linha["CardCode"] for linha in linhas] == ["T1"]
+    assert proxima == (None, "T1")
+    assert "ORDER BY C.CardName, C.CardCode" in sql
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_por_chave_after_null_name(logistica_repository):
+    from datetime import date
+
+    chamadas = []
+
+    def fake_fetch_all(sql, params=None):
+        chamadas.append((sql, params))
+        return []
+
+    logistica_repository.cliente.fetch_all = fake_fetch_all
+    logistica_repository.listar_transportadoras_por_chave(apos=(None, "T1"), limite=1, data_inicio=date(2025, 1, 1))
+
+    sql, params = chamadas[0]
+    assert "AND ((C.CardName IS NULL AND C.CardCode > ?) OR C.CardName IS NOT NULL)" in sql
+    assert params == [2, date(2025, 1, 1), "T1", date(2025, 1, 1)]
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_por_chave_last_page(logistica_repository, listar_transportadoras_mais_usadas_mock):
+    logistica_repository.cliente.fetch_all = lambda sql, params=None: listar_transportadoras_mais_usadas_mock
+    linhas, proxima, sql = logistica_repository.listar_transportadoras_por_chave(limite=10)
+
+    assert linhas == listar_transportadoras_mais_usadas_mock
+    assert proxima is None
+    assert "C.CardName > ?" not in sql
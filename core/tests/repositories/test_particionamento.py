@@ -0,0 +1,66 @@
+import threading
+from datetime import date
+
+import pytest
+
+from core.repositories.particionamento import ParticionamentoMensal
+from core.services.sqlserver_cliente import default_sql_server_client
+
+
+@pytest.fixture
+def particoes():
+    return ParticionamentoMensal(default_sql_server_client)
+
+
+def test_disabled_by_default(particoes, settings):
+    settings.SQLSERVER_PARTICIONAMENTO_MIN_MESES = 0
+    assert not particoes.aplicavel([(date(2020, 1, 1), date(2024, 12, 31))])
+
+
+def test_applies_from_min_months(particoes, settings):
+    settings.SQLSERVER_PARTICIONAMENTO_MIN_MESES = 3
+    assert not particoes.aplicavel([(date(2025, 1, 15), date(2025, 2, 10))])
+    assert particoes.aplicavel([(date(2025, 1, 15), date(2025, 3, 1))])
+    # Months of all ranges count together
+    assert particoes.aplicavel([(date(2025, 1, 1), date(2025, 1, 31)), (date(2025, 3, 1), date(2025, 4, 30))])
+
+
+def test_executar_runs_partitions_concurrently_in_order(particoes, settings):
+    settings.SQLSERVER_PARTICIONAMENTO_MAX_WORKERS = 3
+    threads = set()
+
+    def consulta(inicio, fim):
+        threads.add(threading.get_ident())
+        return [{"inicio": inicio, "fim": fim}], "SELECT ..."
+
+    partes = particoes.executar(consulta, [(date(2025, 1, 10), date(2025, 3, 5))])
+
+    assert partes == [
+        [{"inicio": date(2025, 1, 10), "fim": date(2025, 1, 31)}],
+        [{"inicio": date(2025, 2, 1), "fim": date(2025, 2, 28)}],
+        [{"inicio": date(2025, 3, 1), "fim": date(2025, 3, 5)}],
+    ]
+    assert threading.get_ident() not in threads
+
+
+def test_executar_propagates_first_error(particoes):
+    def consulta(inicio, fim):
+        if inicio.month == 2:
+            raise ValueError("falha na partição")
+        return [], "SELECT ..."
+
+    with pytest.raises(ValueError, match="falha na partição"):
+        particoes.executar(consulta, [(date(2025, 1, 1), date(2025, 3, 31))])
+
+
+def test_consultar_without_partitioning_runs_one_query_per_range(particoes, settings):
+    settings.SQLSERVER_PARTICIONAMENTO_MIN_MESES = 0
+    trechos = [(date(2025, 1, 1), date(2025, 3, 31)), (date(2025, 5, 1), date(2025, 5, 31))]
+
+    partes = particoes.consultar(
+        trechos,
+        lambda inicio, fim: ([(inicio, fim)], "SELECT ..."),
+        lambda inicio, fim: pytest.fail("partição não deveria ser usada"),
+    )
+
+    assert partes == [[trecho] for trecho in trechos]
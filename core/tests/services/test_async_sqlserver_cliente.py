@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from unittest.mock import MagicMock
+
+from core.services.async_sqlserver_cliente import AsyncSQLServerCliente
+
+
+@pytest.fixture
+def cliente_mock():
+    cliente = MagicMock()
+    cliente.config.async_max_workers = 2
+    return cliente
+
+
+def test_async_cliente_uses_bounded_executor(cliente_mock):
+    async_cliente = AsyncSQLServerCliente(cliente_mock)
+    assert async_cliente.max_workers == 2
+    assert async_cliente.executor._max_workers == 2
+    async_cliente.shutdown()
+
+
+def test_async_cliente_fetch_all_runs_off_event_loop(cliente_mock):
+    threads = []
+
+    def fake_fetch_all(query, params=None):
+        threads.append(threading.current_thread().name)
+        return [{"column1": 1}]
+
+    cliente_mock.fetch_all.side_effect = fake_fetch_all
+    async_cliente = AsyncSQLServerCliente(cliente_mock)
+
+    result = asyncio.run(async_cliente.fetch_all("SELECT 1 AS column1", [5]))
+
+    assert result == [{"column1": 1}]
+    cliente_mock.fetch_all.assert_called_once_with("SELECT 1 AS column1", [5])
+    assert threads[0].startswith("sqlserver")
+    async_cliente.shutdown()
+
+
+def test_async_cliente_runs_concurrently_up_to_max_workers(cliente_mock):
+    def slow_query(*args, **kwargs):
+        time.sleep(0.2)
+        return []
+
+    cliente_mock.fetch_all.side_effect = slow_query
+    async_cliente = AsyncSQLServerCliente(cliente_mock)
+
+    async def run_queries():
+        return await asyncio.gather(*(async_cliente.fetch_all("SELECT") for _ in range(4)))
+
+    started_at = time.perf_counter()
+    asyncio.run(run_queries())
+    elapsed = time.perf_counter() - started_at
+
+    # 4 consultas de 0.2s com 2 workers: ~0.4s (nem 0.2s ilimitado, nem 0.8s sequencial)
+    assert 0.35 < elapsed < 0.75
+    async_cliente.shutdown()
+
+
+def test_async_cliente_propagates_exceptions(cliente_mock):
+    cliente_mock.fetch_one.side_effect = Exception("Database error")
+    async_cliente = AsyncSQLServerCliente(cliente_mock)
+
+    with pytest.raises(Exception) as excinfo:
+        asyncio.run(async_cliente.fetch_one("SELECT"))
+
+    assert "Database error" in str(excinfo.value)
+    async_cliente.shutdown()
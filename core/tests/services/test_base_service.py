@@ -4,7 +4,7 @@ import numpy as np
 
 from core.services.base_service import BaseService
 
-from core.services.exceptions import DataNotFoundError
+from core.services.exceptions import DataNotFoundError, ValidationError
 
 
 @pytest.fixture
@@ -262,3 +262,260 @@ class TestBaseServicePivotTable:
         )
         assert len(result) == 1
         assert result.iloc[0]["Jan"] == 10
+
+
+
+def _generic_pivot(data, index, columns, values, fill_value=0):
+    """Reference result: pd.pivot_table with the flattening done by BaseService."""
+    pivot = pd.pivot_table(
+        data, index=index, columns=columns, values=values, aggfunc="sum", fill_value=fill_value, observed=True
+    ).reset_index()
+    if isinstance(pivot.columns, pd.MultiIndex):
+        pivot.columns = ['-'.join(str(c) for c in col).strip('-') for col in pivot.columns.values]
+    pivot.columns.name = None
+    return pivot
+
+
+@pytest.fixture
+def monthly_totals():
+    """Carrier totals by month and year, with gaps, repeated cells and unsorted keys."""
+    rng = np.random.default_rng(42)
+    size = 500
+    return pd.DataFrame({
+        "CardCode": rng.choice([f"F{i:03d}" for i in range(30)], size),
+        "CardName": rng.choice(["Transp B", "Transp A", "Transp C"], size),
+        "Mes": rng.integers(1, 13, size),
+        "Ano": rng.choice([2025, 2024], size),
+        "Total": rng.integers(0, 100, size),
+    })
+
+
+class TestBaseServicePivotSum:
+    """Test cases for the sum fast path of BaseService.pivot_table."""
+
+    @pytest.mark.parametrize("fill_value", [0, 7, 0.5])
+    def test_matches_generic_pivot_for_month_year(self, base_service, monthly_totals, fill_value):
+        """Should produce the same frame as pd.pivot_table, including dtypes and order."""
+        monthly_totals = monthly_totals.sample(frac=0.1, random_state=1)
+        result = base_service.pivot_table(
+            data=monthly_totals,
+            index=["CardCode", "CardName"],
+            columns=["Mes", "Ano"],
+            values="Total",
+            fill_value=fill_value
+        )
+        expected = _generic_pivot(monthly_totals, ["CardCode", "CardName"], ["Mes", "Ano"], "Total", fill_value)
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_matches_generic_pivot_for_float_values_with_nan(self, base_service, monthly_totals):
+        """NaN values are skipped by the sum, as in pd.pivot_table."""
+        monthly_totals["Total"] = monthly_totals["Total"].astype(float)
+        monthly_totals.loc[monthly_totals.index[::3], "Total"] = np.nan
+        result = base_service.pivot_table(
+            data=monthly_totals, index=["CardName"], columns="Mes", values="Total"
+        )
+        expected = _generic_pivot(monthly_totals, ["CardName"], "Mes", "Total")
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_month_year_headers(self, base_service, monthly_totals):
+        """Should name the columns like replace_column_names_with_month_year, in one step."""
+        result = base_service.pivot_table(
+            data=monthly_totals,
+            index=["CardCode", "CardName"],
+            columns=["Mes", "Ano"],
+            values="Total",
+            month_year_headers=True
+        )
+        expected = base_service.replace_column_names_with_month_year(
+            _generic_pivot(monthly_totals, ["CardCode", "CardName"], ["Mes", "Ano"], "Total")
+        )
+        pd.testing.assert_frame_equal(result, expected)
+        assert list(result.columns[2:5]) == ["JAN-2024", "JAN-2025", "FEV-2024"]
+
+    def test_categorical_keys_use_fast_path(self, base_service, monthly_totals, monkeypatch):
+        """Categorical keys, as `fetch_frame` returns them, go through `_pivot_sum`."""
+        monthly_totals["CardCode"] = pd.Categorical(
+            monthly_totals["CardCode"], categories=[f"F{i:03d}" for i in range(35)][::-1]
+        )
+        monthly_totals["CardName"] = monthly_totals["CardName"].astype("category")
+        calls = []
+        pivot_sum = base_service._pivot_sum
+        monkeypatch.setattr(base_service, "_pivot_sum", lambda *args: calls.append(args) or pivot_sum(*args))
+        result = base_service.pivot_table(
+            data=monthly_totals, index=["CardCode", "CardName"], columns=["Mes", "Ano"], values="Total"
+        )
+        expected = _generic_pivot(monthly_totals, ["CardCode", "CardName"], ["Mes", "Ano"], "Total")
+        assert len(calls) == 1
+        pd.testing.assert_frame_equal(result, expected)
+        assert result["CardCode"].iloc[0] == "F029"  # category order, not lexical
+
+    def test_null_keys_use_generic_pivot(self, base_service, monthly_totals):
+        """Rows with null keys are dropped, as in pd.pivot_table."""
+        monthly_totals["CardName"] = monthly_totals["CardName"].astype(object)
+        monthly_totals.loc[monthly_totals.index[:10], "CardName"] = None
+        result = base_service.pivot_table(
+            data=monthly_totals, index=["CardName"], columns=["Mes", "Ano"], values="Total"
+        )
+        expected = _generic_pivot(monthly_totals, ["CardName"], ["Mes", "Ano"], "Total")
+        pd.testing.assert_frame_equal(result, expected)
+
+
+class TestBaseServiceDataFrameToColumns:
+    """Test cases for BaseService.dataframe_to_columns and format_dataframe."""
+
+    def test_schema_and_columns(self, base_service):
+        """Should describe each column and carry one array per column."""
+        data = pd.DataFrame({
+            "CardCode": ["F1", "F2", "F3"],
+            "Total": [10, 20, 30],
+            "Media": [1.5, np.nan, 2.5],
+        })
+        result = base_service.dataframe_to_columns(data)
+        assert result == {
+            "schema": [
+                {"name": "CardCode", "type": "string"},
+                {"name": "Total", "type": "integer"},
+                {"name": "Media", "type": "number"},
+            ],
+            "length": 3,
+            "columns": [["F1", "F2", "F3"], [10, 20, 30], [1.5, None, 2.5]],
+        }
+        assert all(type(value) is int for value in result["columns"][1])
+
+    def test_dictionary_encodes_repeated_strings(self, base_service):
+        """Strings with few distinct values are sent once, with one index per row."""
+        data = pd.DataFrame({"CardName": ["A", "B", "A", None, "A"], "Total": [1, 2, 3, 4, 5]})
+        result = base_service.dataframe_to_columns(data)
+        assert result["schema"][0] == {"name": "CardName", "type": "string", "dictionary": True}
+        assert result["columns"][0] == {"values": ["A", "B"], "indices": [0, 1, 0, None, 0]}
+
+    def test_rebuilds_the_same_records(self, base_service, sample_data):
+        """Decoding the columns gives back dataframe_to_list_dicts."""
+        result = base_service.dataframe_to_columns(sample_data)
+        decoded = []
+        for field, column in zip(result["schema"], result["columns"]):
+            if field.get("dictionary"):
+                column = [column["values"][i] for i in column["indices"]]
+            decoded.append(column)
+        names = [field["name"] for field in result["schema"]]
+        assert [dict(zip(names, row)) for row in zip(*decoded)] == base_service.dataframe_to_list_dicts(sample_data)
+
+    def test_format_dataframe(self, base_service, sample_data):
+        """Should dispatch on the format and reject unknown ones."""
+        assert base_service.format_dataframe(sample_data) == base_service.dataframe_to_list_dicts(sample_data)
+        assert base_service.format_dataframe(sample_data, "columns") == base_service.dataframe_to_columns(sample_data)
+        with pytest.raises(ValidationError):
+            base_service.format_dataframe(sample_data, "xml")
+
+    def test_categorical_columns(self, base_service):
+        """Categorical columns are typed by their categories."""
+        data = base_service.compact_dataframe(pd.DataFrame({"CardName": ["A", "B", "A", "A"]}), {"CardName": "category"})
+        result = base_service.dataframe_to_columns(data)
+        assert result["schema"] == [{"name": "CardName", "type": "string", "dictionary": True}]
+        assert result["columns"] == [{"values": ["A", "B"], "indices": [0, 1, 0, 0]}]
+
+class TestBaseServiceBatchesToDataFrame:
+    """Test cases for BaseService.batches_to_dataframe method."""
+    
+    def test_batches_to_dataframe_concatenates_batches(self, base_service):
+        """Should produce the same frame as the list of all rows."""
+        batches = iter([
+            [{"Col1": 1, "Col2": "A"}, {"Col1": 2, "Col2": "B"}],
+            [{"Col1": 3, "Col2": "C"}],
+        ])
+        result = base_service.batches_to_dataframe(batches)
+        expected = pd.DataFrame([
+            {"Col1": 1, "Col2": "A"},
+            {"Col1": 2, "Col2": "B"},
+            {"Col1": 3, "Col2": "C"},
+        ])
+        pd.testing.assert_frame_equal(result, expected)
+    
+    def test_batches_to_dataframe_with_no_batches(self, base_service):
+        """Should return empty DataFrame when there are no rows."""
+        result = base_service.batches_to_dataframe(iter([]))
+        assert isinstance(result, pd.DataFrame)
+        assert result.empty
+    
+    def test_batches_to_dataframe_with_schema(self, base_service):
+        """Should compact the concatenated frame."""
+        batches = iter([[{"Col1": 1, "Col2": "A"}], [{"Col1": 2, "Col2": "A"}]])
+        result = base_service.batches_to_dataframe(batches, schema={"Col1": "integer", "Col2": "category"})
+        assert result["Col1"].dtype == np.int8
+        assert result["Col2"].tolist() == ["A", "A"]
+        assert isinstance(result["Col2"].dtype, pd.CategoricalDtype)
+
+
+@pytest.fixture
+def saida_de_produtos():
+    from decimal import Decimal
+    itens = [(f"PA{i:04d}", f"Produto {i}", f"C{i % 7:03d}", f"Cliente {i % 7}") for i in range(20)]
+    return [
+        {
+            "ItemCode": item_code, "ItemName": item_name, "CardCode": card_code, "CardName": card_name,
+            "AnoMes": f"2025-{mes:02d}", "Total": mes * 10, "Valor": Decimal(f"{mes}.50"),
+        }
+        for item_code, item_name, card_code, card_name in itens
+        for mes in range(1, 13)
+    ]
+
+
+class TestBaseServiceCompactDataFrame:
+    """Test cases for BaseService.compact_dataframe."""
+
+    SCHEMA = {
+        "ItemName": "category", "CardName": "category", "AnoMes": "datetime",
+        "Total": "integer", "Valor": "float", "ItemCode": "string",
+    }
+
+    def test_converts_columns_by_schema(self, base_service, saida_de_produtos):
+        """Should apply each kind and keep the values."""
+        original = base_service.list_dicts_to_dataframe(saida_de_produtos)
+        result = base_service.list_dicts_to_dataframe(saida_de_produtos, schema=self.SCHEMA)
+
+        assert isinstance(result["ItemName"].dtype, pd.CategoricalDtype)
+        assert isinstance(result["CardName"].dtype, pd.CategoricalDtype)
+        assert result["AnoMes"].dtype == "datetime64[ns]"
+        assert result["AnoMes"].iloc[0] == pd.Timestamp(2025, 1, 1)
+        assert result["Total"].dtype == np.int8
+        assert result["Valor"].dtype == np.float64
+        assert result["ItemCode"].dtype == object
+        assert result["CardCode"].dtype == object  # not in the schema
+        assert result["ItemName"].tolist() == original["ItemName"].tolist()
+        assert result["Total"].tolist() == original["Total"].tolist()
+        assert original["Total"].dtype == np.int64  # the input frame is not changed
+
+    def test_reduces_and_logs_memory(self, base_service, saida_de_produtos, caplog):
+        """Should use less memory and log the usage before and after."""
+        original = base_service.list_dicts_to_dataframe(saida_de_produtos)
+        with caplog.at_level("DEBUG", logger="core.services.base_service"):
+            result = base_service.compact_dataframe(original, self.SCHEMA)
+
+        before = original.memory_usage(deep=True).sum()
+        after = result.memory_usage(deep=True).sum()
+        assert after < before / 2
+        assert f"{before} -> {after} bytes" in caplog.text
+
+    def test_infers_schema(self, base_service):
+        """Without a schema, integers are downcast and repeated strings become categoricals."""
+        data = pd.DataFrame({
+            "CardCode": ["F1", "F2", "F3", "F4"],
+            "CardName": ["A", "A", "B", "A"],
+            "Total": [1, 2, 300, 4],
+            "Media": [1.5, 2.5, 3.5, np.nan],
+        })
+        result = base_service.compact_dataframe(data)
+        assert result["CardCode"].dtype == object
+        assert isinstance(result["CardName"].dtype, pd.CategoricalDtype)
+        assert result["Total"].dtype == np.int16
+        assert result["Media"].dtype == np.float64
+
+    def test_integer_with_nulls_stays_float(self, base_service):
+        """Nulls keep an integer column in float64."""
+        result = base_service.compact_dataframe(pd.DataFrame({"Total": [1, None, 3]}), {"Total": "integer"})
+        assert result["Total"].dtype == np.float64
+
+    def test_invalid_kind_raises_error(self, base_service):
+        """Should reject kinds outside COLUMN_KINDS."""
+        with pytest.raises(ValidationError):
+            base_service.compact_dataframe(pd.DataFrame({"Total": [1]}), {"Total": "int8"})
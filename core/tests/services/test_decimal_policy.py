@@ -0,0 +1,64 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from core.services.decimal_policy import CENTS, DECIMAL, FLOAT, policy_for, scaled
+
+
+def test_float_policy():
+    result = FLOAT.to_array((Decimal("1.50"), None, Decimal("-2.25")), column_scale=2)
+
+    assert result.dtype == np.float64
+    assert result[0] == 1.5 and np.isnan(result[1]) and result[2] == -2.25
+
+
+def test_decimal_policy_keeps_objects():
+    values = (Decimal("1.50"), None)
+
+    assert DECIMAL.to_array(values).tolist() == [Decimal("1.50"), None]
+
+
+def test_cents_policy_is_exact():
+    values = tuple(Decimal(f"{reais}.{centavos:02d}") for reais in range(0, 2000, 7) for centavos in range(100))
+
+    result = CENTS.to_array(values, column_scale=2)
+
+    assert result.dtype == np.int64
+    assert result.tolist() == [int(value * 100) for value in values]
+    assert result.sum() == int(sum(values) * 100)
+
+
+def test_scaled_policy_with_nulls_is_float():
+    result = CENTS.to_array((Decimal("10.01"), None), column_scale=2)
+
+    assert result.dtype == np.float64
+    assert result[0] == 1001 and np.isnan(result[1])
+
+
+@pytest.mark.parametrize("column_scale", [6, None])
+def test_scaled_policy_rounds_half_even(column_scale):
+    values = (Decimal("0.125000"), Decimal("0.135000"), Decimal("-0.005001"))
+
+    assert CENTS.to_array(values, column_scale=column_scale).tolist() == [12, 14, -1]
+
+
+def test_scaled_policy_large_values_stay_exact():
+    values = (Decimal("123456789012345.67"), Decimal("1.00"))
+
+    result = CENTS.to_array(values, column_scale=2)
+
+    assert result.dtype == np.int64
+    assert result.tolist() == [12345678901234567, 100]
+
+
+def test_scaled_policy_beyond_int64_keeps_python_ints():
+    values = (Decimal("99999999999999999.99"), Decimal("1.00"))
+
+    assert CENTS.to_array(values, column_scale=2).tolist() == [9999999999999999999, 100]
+
+
+def test_policy_for():
+    assert policy_for(CENTS, "Qualquer") is CENTS
+    assert policy_for({"Valor": scaled(4)}, "Valor") == scaled(4)
+    assert policy_for({"Valor": CENTS}, "Outra") is FLOAT
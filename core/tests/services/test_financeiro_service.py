@@ -0,0 +1,110 @@
+import pandas as pd
+import pytest
+
+from core.services.financeiro_service import FinanceiroService
+from core.repositories.financeiro_repository import FinanceiroRepository
+from core.services.exceptions import ValidationError
+
+
+@pytest.fixture
+def financeiro_service():
+    return FinanceiroService()
+
+
+@pytest.fixture
+def repo_com_total(financeiro_service):
+    """Replaces the repository call and records the arguments it received."""
+    chamadas = []
+    def fake_com_total(**kwargs):
+        chamadas.append(kwargs)
+        itens = [{"ItemCode": "I00001", "FaturamentoPorItem": 100}]
+        return itens, 25, "SELECT ..."
+    def fake_com_total_dataframe(**kwargs):
+        itens, total, sql = fake_com_total(**kwargs)
+        frame = pd.DataFrame(itens)
+        frame.attrs["scales"] = {"FaturamentoPorItem": 2}
+        return frame, total, sql
+    financeiro_service.repo.listar_rentabilidade_itens_com_total = fake_com_total
+    financeiro_service.repo.listar_rentabilidade_itens_com_total_dataframe = fake_com_total_dataframe
+    return chamadas
+
+
+@pytest.mark.django_db
+def test_financeiro_service_instantiation(financeiro_service):
+    assert isinstance(financeiro_service.repo, FinanceiroRepository)
+
+
+@pytest.mark.django_db
+def test_listar_rentabilidade_itens_page(financeiro_service, repo_com_total):
+    pagina, sql = financeiro_service.listar_rentabilidade_itens(
+        item_code="I00001",
+        tipo_negocio="B2B",
+        rentabilidade_min=5,
+        offset=10,
+        fetch_next=5,
+    )
+    assert sql == "SELECT ..."
+    assert pagina == {
+        "itens": [{"ItemCode": "I00001", "FaturamentoPorItem": 100}],
+        "total": 25,
+        "offset": 10,
+        "fetch_next": 5,
+    }
+    assert repo_com_total == [{
+        "data_inicio": None,
+        "data_fim": None,
+        "offset": 10,
+        "fetch_next": 5,
+        "item_code": "I00001",
+        "tipo_negocio": "B2B",
+        "rentabilidade_min": 5,
+        "rentabilidade_max": None,
+        "ordenar_por": None,
+    }]
+
+
+@pytest.mark.django_db
+def test_listar_rentabilidade_itens_top(financeiro_service, repo_com_total):
+    pagina, _ = financeiro_service.listar_rentabilidade_itens(top=12, offset=10, fetch_next=5)
+    # Only the 2 rows left in the top 12, ranked by revenue by default
+    assert repo_com_total[0]["fetch_next"] == 2
+    assert repo_com_total[0]["ordenar_por"] == "faturamento"
+    assert pagina["total"] == 12
+    assert pagina["fetch_next"] == 2
+
+
+@pytest.mark.django_db
+def test_listar_rentabilidade_itens_top_by_margin(financeiro_service, repo_com_total):
+    financeiro_service.listar_rentabilidade_itens(top=10, ordenar_por="rentabilidade")
+    assert repo_com_total[0]["fetch_next"] == 10
+    assert repo_com_total[0]["ordenar_por"] == "rentabilidade"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("kwargs", [
+    {"ordenar_por": "ItemName"},
+    {"rentabilidade_min": 10, "rentabilidade_max": 5},
+    {"top": 0},
+    {"top": 10, "offset": 10},
+    {"offset": -1},
+    {"fetch_next": 0},
+])
+def test_listar_rentabilidade_itens_invalid_params(financeiro_service, repo_com_total, kwargs):
+    with pytest.raises(ValidationError):
+        financeiro_service.listar_rentabilidade_itens(**kwargs)
+    assert repo_com_total == []
+
+
+@pytest.mark.django_db
+def test_listar_rentabilidade_itens_columns_format(financeiro_service, repo_com_total):
+    pagina, _ = financeiro_service.listar_rentabilidade_itens(formato="columns")
+
+    assert pagina["itens"] == {
+        "schema": [
+            {"name": "ItemCode", "type": "string"},
+            {"name": "FaturamentoPorItem", "type": "integer", "scale": 2},
+        ],
+        "length": 1,
+        "columns": [["I00001"], [100]],
+    }
+    assert pagina["total"] == 25
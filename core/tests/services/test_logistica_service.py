@@ -1,4 +1,5 @@
 import pytest
+import pandas as pd
 
 from core.services.logistica_service import LogisticaService
 from core.repositories.logistica_repository import LogisticaRepository
@@ -79,8 +80,8 @@ def listar_transportadoras_mais_usadas_expected():
 
 @pytest.mark.django_db
 def test_logistica_service_listar_transportadoras_mais_usadas(logistica_service, listar_transportadoras_mais_usadas_mock, listar_transportadoras_mais_usadas_expected):
-    # Mock repository's cliente.fetch_all (raw data before pivot)
-    logistica_service.repo.cliente.fetch_all = lambda sql, params=None: listar_transportadoras_mais_usadas_mock
+    # Mock repository's cliente.fetch_frame (raw data before pivot)
+    logistica_service.repo.cliente.fetch_frame = lambda sql, params=None: pd.DataFrame(listar_transportadoras_mais_usadas_mock)
     result, sql = logistica_service.listar_transportadoras_mais_usadas()
     
     # Result should be pivoted data
@@ -89,12 +90,12 @@ def test_logistica_service_listar_transportadoras_mais_usadas(logistica_service,
     assert all(isinstance(item, dict) for item in result)
     assert sql is not None
     assert isinstance(sql, str)
-    assert f"OFFSET 0 ROWS" in sql
+    assert "OFFSET ? ROWS" in sql
     
 @pytest.mark.django_db
 def test_logistica_service_listar_transportadoras_mais_usadas_com_paginacao(logistica_service, listar_transportadoras_mais_usadas_mock, listar_transportadoras_mais_usadas_expected):
-    # Mock repository's cliente.fetch_all (raw data before pivot)
-    logistica_service.repo.cliente.fetch_all = lambda sql, params=None: listar_transportadoras_mais_usadas_mock
+    # Mock repository's cliente.fetch_frame (raw data before pivot)
+    logistica_service.repo.cliente.fetch_frame = lambda sql, params=None: pd.DataFrame(listar_transportadoras_mais_usadas_mock)
     offset = 2
     fetch_next = 2
     result, sql = logistica_service.listar_transportadoras_mais_usadas(offset=offset, fetch_next=fetch_next)
@@ -105,8 +106,8 @@ def test_logistica_service_listar_transportadoras_mais_usadas_com_paginacao(logi
     assert all(isinstance(item, dict) for item in result)
     assert sql is not None
     assert isinstance(sql, str)
-    assert f"OFFSET {offset} ROWS" in sql
-    assert f"FETCH NEXT {fetch_next} ROWS ONLY" in sql
+    assert "OFFSET ? ROWS" in sql
+    assert "FETCH NEXT ? ROWS ONLY" in sql
     
 @pytest.mark.django_db
 def test_logistica_service_listar_transportadoras_mais_usadas_invalid_pagination(logistica_service):
@@ -138,9 +139,9 @@ def test_listar_transportadoras_mais_usadas_handling_repository_exceptions(
     def raise_exception(*args, **kwargs):
         raise repository_exception("Simulated repository error")
     
-    # Mock the repository method directly (not cliente.fetch_all)
+    # Mock the repository method directly (not cliente.fetch_frame)
     # This way the service decorator receives the exception directly
-    logistica_service.repo.listar_transportadoras_mais_usadas = raise_exception
+    logistica_service.repo.listar_transportadoras_mais_usadas_dataframe = raise_exception
     
     with pytest.raises(expected_exception) as exc_info:
         logistica_service.listar_transportadoras_mais_usadas()
@@ -150,7 +151,7 @@ def test_listar_transportadoras_mais_usadas_handling_repository_exceptions(
 @pytest.mark.django_db
 def test_listar_transportadoras_mais_usadas_result(logistica_service, listar_transportadoras_mais_usadas_mock):
     # Mock service method and but don't mock sql generation
-    logistica_service.repo.cliente.fetch_all = lambda sql, params=None: listar_transportadoras_mais_usadas_mock
+    logistica_service.repo.cliente.fetch_frame = lambda sql, params=None: pd.DataFrame(listar_transportadoras_mais_usadas_mock)
     result, sql = logistica_service.listar_transportadoras_mais_usadas()
     
     # result should be a pivot table (dict) with Mes_Ano as column (underscore separator)
@@ -162,8 +163,8 @@ def test_listar_transportadoras_mais_usadas_result(logistica_service, listar_tra
     
 @pytest.mark.django_db
 def test_logistica_service_listar_transportadoras_mais_usadas_empty_result(logistica_service):
-    # Mock repository's cliente.fetch_all to return empty list
-    logistica_service.repo.cliente.fetch_all = lambda sql, params=None: []
+    # Mock repository's cliente.fetch_frame to return an empty DataFrame
+    logistica_service.repo.cliente.fetch_frame = lambda sql, params=None: pd.DataFrame()
     
     with pytest.raises(DataNotFoundError):
         result, sql = logistica_service.listar_transportadoras_mais_usadas()
@@ -181,8 +182,8 @@ def test_logistica_service_listar_transportadoras_mais_usadas_data_transformatio
     expected_exception,
     error_message
 ):
-    # Mock repository's cliente.fetch_all to return valid data
-    logistica_service.repo.cliente.fetch_all = lambda sql, params=None: listar_transportadoras_mais_usadas_mock
+    # Mock repository's cliente.fetch_frame to return valid data
+    logistica_service.repo.cliente.fetch_frame = lambda sql, params=None: pd.DataFrame(listar_transportadoras_mais_usadas_mock)
     
     # Patch the pivot_table method to raise the desired exception
     original_pivot_table = logistica_service.pivot_table
@@ -204,4 +205,212 @@ def test_logistica_service_listar_transportadoras_mais_usadas_data_transformatio
 
     
     
-    
\ No newline at end of file
+    
+
+@pytest.mark.django_db
+def test_logistica_service_listar_transportadoras_mais_usadas_async(logistica_service, listar_transportadoras_mais_usadas_mock):
+    import asyncio
+
+    logistica_service.repo.cliente.fetch_frame = lambda sql, params=None: pd.DataFrame(listar_transportadoras_mais_usadas_mock)
+    result, sql = asyncio.run(logistica_service.listar_transportadoras_mais_usadas_async(offset=0, fetch_next=4))
+
+    expected, _ = logistica_service.listar_transportadoras_mais_usadas(offset=0, fetch_next=4)
+    assert result == expected
+    assert "FETCH NEXT ? ROWS ONLY" in sql
+
+
+@pytest.mark.django_db
+def test_logistica_service_listar_transportadoras_mais_usadas_async_invalid_pagination(logistica_service):
+    import asyncio
+
+    with pytest.raises(ValidationError):
+        asyncio.run(logistica_service.listar_transportadoras_mais_usadas_async(offset=-1))
+
+
+@pytest.mark.django_db
+def test_logistica_service_listar_transportadoras_mais_usadas_async_repository_error(logistica_service):
+    import asyncio
+
+    async def raise_exception(*args, **kwargs):
+        raise RepoConnectionError("Simulated repository error")
+
+    logistica_service.repo.listar_transportadoras_mais_usadas_dataframe_async = raise_exception
+
+    with pytest.raises(ServiceError) as exc_info:
+        asyncio.run(logistica_service.listar_transportadoras_mais_usadas_async())
+
+    assert "Erro de conexão com o banco de dados" in str(exc_info.value)
+
+
+@pytest.fixture
+def erp_transportadoras(logistica_service):
+    """Fake ERP applying the keyset query (TOP + key filter) over in-memory carriers."""
+    transportadoras = [(f"Transportadora {letra}", f"F{indice:05d}") for indice, letra in enumerate("EDCBA", start=1)]
+    chamadas = {"fetch_all": [], "fetch_one": 0}
+
+    def fake_fetch_all(sql, params=None):
+        chamadas["fetch_all"].append(params)
+        top, apos = params[0], None
+        if len(params) == 6:
+            apos = (params[2], params[4])
+        ordenadas = sorted(chave for chave in transportadoras if apos is None or chave > apos)[:top]
+        return [
+            {"CardCode": codigo, "CardName": nome, "Total": 10, "Mes": 1, "Ano": 2025}
+            for nome, codigo in ordenadas
+        ]
+
+    def fake_fetch_one(sql, params=None):
+        chamadas["fetch_one"] += 1
+        return {"Total": len(transportadoras)}
+
+    logistica_service.repo.cliente.fetch_all = fake_fetch_all
+    logistica_service.repo.cliente.fetch_one = fake_fetch_one
+    return chamadas
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_por_cursor_walks_all_pages(logistica_service, erp_transportadoras):
+    paginas, cursor = [], None
+    while True:
+        pagina, sql = logistica_service.listar_transportadoras_por_cursor(cursor=cursor, limite=2)
+        paginas.append([linha["CardName"] for linha in pagina["transportadoras"]])
+        assert pagina["total"] == 5
+        cursor = pagina["proximo_cursor"]
+        if cursor is None:
+            break
+
+    assert paginas == [
+        ["Transportadora A", "Transportadora B"],
+        ["Transportadora C", "Transportadora D"],
+        ["Transportadora E"],
+    ]
+    # O total é contado só na primeira página; as seguintes partem da chave da anterior
+    assert erp_transportadoras["fetch_one"] == 1
+    assert [params[2:5] for params in erp_transportadoras["fetch_all"][1:]] == [
+        ["Transportadora B", "Transportadora B", "F00004"],
+        ["Transportadora D", "Transportadora D", "F00002"],
+    ]
+    assert "OFFSET" not in sql
+    assert "TOP (?)" in sql
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_por_cursor_walks_past_null_name(logistica_service):
+    """NULL names sort first and stay None in the cursor key, distinct from ''."""
+    transportadoras = [
+        (None, "F00009"), (None, "F00003"), ("", "F00001"), ("transportadora b", "F00002"), ("Transportadora A", "F00004"),
+    ]
+
+    def chave(nome, codigo):
+        # Emula o ORDER BY do SQL Server: NULL primeiro e collation sem diferenciar maiúsculas
+        return nome is not None, (nome or "").casefold(), codigo
+
+    def fake_fetch_all(sql, params=None):
+        top, apos = params[0], None
+        if len(params) == 4:
+            assert "C.CardName IS NULL AND C.CardCode > ?" in sql
+            apos = chave(None, params[2])
+        elif len(params) == 6:
+            assert "C.CardName > ?" in sql
+            apos = chave(params[2], params[4])
+        ordenadas = sorted(
+            (item for item in transportadoras if apos is None or chave(*item) > apos), key=lambda item: chave(*item)
+        )[:top]
+        return [
+            {"CardCode": codigo, "CardName": nome, "Total": 10, "Mes": 1, "Ano": 2025}
+            for nome, codigo in ordenadas
+        ]
+
+    logistica_service.repo.cliente.fetch_all = fake_fetch_all
+    logistica_service.repo.cliente.fetch_one = lambda sql, params=None: {"Total": len(transportadoras)}
+
+    paginas, cursor = [], None
+    while True:
+        pagina, _ = logistica_service.listar_transportadoras_por_cursor(cursor=cursor, limite=1)
+        paginas.append([(linha["CardCode"], linha["CardName"]) for linha in pagina["transportadoras"]])
+        cursor = pagina["proximo_cursor"]
+        if cursor is None:
+            break
+
+    assert paginas == [
+        [("F00003", None)],
+        [("F00009", None)],
+        [("F00001", "")],
+        [("F00004", "Transportadora A")],
+        [("F00002", "transportadora b")],
+    ]
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_por_cursor_keeps_window_of_first_page(logistica_service, erp_transportadoras):
+    from datetime import date
+    from unittest.mock import patch
+
+    from core.helpers.date_helper import DateHelper
+
+    with patch.object(DateHelper, "today", return_value=date(2025, 7, 31)):
+        pagina, _ = logistica_service.listar_transportadoras_por_cursor(limite=2)
+    with patch.object(DateHelper, "today", return_value=date(2025, 8, 1)):
+        logistica_service.listar_transportadoras_por_cursor(cursor=pagina["proximo_cursor"], limite=2)
+
+    assert [params[1] for params in erp_transportadoras["fetch_all"]] == [date(2025, 1, 1), date(2025, 1, 1)]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("cursor", ["adulterado", "eyJhcG9zIjpbXX0:1abc:xyz"])
+def test_listar_transportadoras_por_cursor_invalid_cursor(logistica_service, cursor):
+    with pytest.raises(ValidationError):
+        logistica_service.listar_transportadoras_por_cursor(cursor=cursor)
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_por_cursor_invalid_limite(logistica_service):
+    with pytest.raises(ValidationError):
+        logistica_service.listar_transportadoras_por_cursor(limite=0)
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_por_cursor_empty(logistica_service):
+    logistica_service.repo.cliente.fetch_all = lambda sql, params=None: []
+    logistica_service.repo.cliente.fetch_one = lambda sql, params=None: {"Total": 0}
+
+    pagina, _ = logistica_service.listar_transportadoras_por_cursor()
+
+    assert pagina == {"transportadoras": [], "proximo_cursor": None, "total": 0}
+
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_mais_usadas_columns_format(logistica_service, listar_transportadoras_mais_usadas_mock):
+    logistica_service.repo.cliente.fetch_frame = lambda sql, params=None: pd.DataFrame(listar_transportadoras_mais_usadas_mock)
+
+    colunas, _ = logistica_service.listar_transportadoras_mais_usadas(formato="columns")
+    registros, _ = logistica_service.listar_transportadoras_mais_usadas()
+
+    assert [campo["name"] for campo in colunas["schema"]] == list(registros[0])
+    assert colunas["length"] == len(registros)
+    assert colunas["columns"][2] == [linha["JAN-2024"] for linha in registros]
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_por_cursor_columns_format(logistica_service, erp_transportadoras):
+    pagina, _ = logistica_service.listar_transportadoras_por_cursor(limite=2, formato="columns")
+
+    assert pagina["transportadoras"]["length"] == 2
+    assert pagina["transportadoras"]["columns"][1] == ["Transportadora A", "Transportadora B"]
+    assert pagina["proximo_cursor"] is not None
+
+
+@pytest.mark.django_db
+def test_listar_transportadoras_mais_usadas_invalid_format(logistica_service):
+    with pytest.raises(ValidationError):
+        logistica_service.listar_transportadoras_mais_usadas(formato="xml")
+
+@pytest.mark.django_db
+def test_listar_transportadoras_por_cursor_async(logistica_service, erp_transportadoras):
+    import asyncio
+
+    pagina, _ = asyncio.run(logistica_service.listar_transportadoras_por_cursor_async(limite=3))
+
+    assert [linha["CardName"] for linha in pagina["transportadoras"]] == ["Transportadora A", "Transportadora B", "Transportadora C"]
+    assert pagina["proximo_cursor"] is not None
@@ -0,0 +1,99 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from core.helpers.date_helper import DateHelper
+from core.models import MesMaterializado, SaidaItemMes, TransportadoraMes, VendaItemMes
+from core.repositories.agregados_repository import CONJUNTO_SAIDAS, CONJUNTO_TRANSPORTADORAS, CONJUNTO_VENDAS
+from core.services.exceptions import ValidationError
+from core.services.materializacao_service import MaterializacaoService
+
+pytestmark = pytest.mark.django_db
+
+
+def fake_fetch_all(sql, params=None):
+    if "QuantidadeVendida" in sql:
+        return [{"ItemCode": "A0001", "ItemName": "Produto A", "CardCode": "", "AnoMes": "2025-05", "QuantidadeVendida": Decimal("1.0")}]
+    if "MOVIMENTOS" in sql:
+        return [
+            {"ItemCode": "A0001", "ItemName": "Produto A", "CardCode": None, "CardName": None, "AnoMes": "2025-05", "Total": Decimal("2")},
+            {"ItemCode": "B0002", "ItemName": "Produto B", "CardCode": None, "CardName": None, "AnoMes": None, "Total": Decimal("0")},
+        ]
+    return [{"CardCode": "T1", "CardName": "Alfa", "Total": 3, "Mes": 5, "Ano": 2025}]
+
+
+@pytest.fixture
+def service():
+    service = MaterializacaoService()
+    service.estoque.cliente.fetch_all = fake_fetch_all
+    with patch.object(DateHelper, "today", return_value=date(2025, 7, 15)):
+        yield service
+
+
+def test_materializar_mes_loads_each_conjunto(service):
+    assert service.materializar_mes(CONJUNTO_VENDAS, "2025-05") == 1
+    assert service.materializar_mes(CONJUNTO_SAIDAS, "2025-05") == 1  # sem a linha sem movimento
+    assert service.materializar_mes(CONJUNTO_TRANSPORTADORAS, "2025-05") == 1
+
+    assert VendaItemMes.objects.get().quantidade_vendida == Decimal("1.0")
+    assert SaidaItemMes.objects.get().item_code == "A0001"
+    assert TransportadoraMes.objects.get().ano_mes == "2025-05"
+
+
+def test_materializar_mes_queries_the_whole_month(service):
+    chamadas = []
+    service.estoque.cliente.fetch_all = lambda sql, params=None: chamadas.append(params) or []
+
+    service.materializar_mes(CONJUNTO_VENDAS, "2025-02")
+
+    assert chamadas == [[date(2025, 2, 28), date(2025, 2, 1)]]
+    assert MesMaterializado.objects.get(conjunto=CONJUNTO_VENDAS).linhas == 0
+
+
+@pytest.mark.parametrize("conjunto, ano_mes", [
+    (CONJUNTO_VENDAS, "2025-07"),  # mês corrente
+    (CONJUNTO_VENDAS, "2025-13"),
+    ("inexistente", "2025-05"),
+])
+def test_materializar_mes_invalid(service, conjunto, ano_mes):
+    with pytest.raises(ValidationError):
+        service.materializar_mes(conjunto, ano_mes)
+
+
+def test_backfill_loads_every_closed_month(service):
+    resultado = service.backfill("2025-04", conjuntos=[CONJUNTO_VENDAS])
+
+    assert resultado == {CONJUNTO_VENDAS: {"2025-04": 1, "2025-05": 1, "2025-06": 1}}
+
+
+def test_backfill_rejects_open_month(service):
+    with pytest.raises(ValidationError):
+        service.backfill("2025-04", "2025-07")
+
+
+def test_command_refreshes_last_closed_month_by_default(service):
+    saida = StringIO()
+    call_command("materializar_agregados", stdout=saida)
+
+    assert set(MesMaterializado.objects.values_list("conjunto", "ano_mes")) == {
+        (CONJUNTO_VENDAS, "2025-06"),
+        (CONJUNTO_SAIDAS, "2025-06"),
+        (CONJUNTO_TRANSPORTADORAS, "2025-06"),
+    }
+    assert "Materialização concluída." in saida.getvalue()
+
+
+def test_command_with_months_and_conjunto(service):
+    call_command("materializar_agregados", "--mes", "2025-01", "--mes", "2025-03", "--conjunto", CONJUNTO_VENDAS, stdout=StringIO())
+
+    assert sorted(MesMaterializado.objects.values_list("ano_mes", flat=True)) == ["2025-01", "2025-03"]
+
+
+def test_command_invalid_month(service):
+    with pytest.raises(CommandError):
+        call_command("materializar_agregados", "--mes", "2025-07", stdout=StringIO())
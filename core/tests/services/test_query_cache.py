@@ -0,0 +1,264 @@
+import threading
+import time
+from datetime import date
+
+import pytest
+from unittest.mock import MagicMock, PropertyMock, patch
+
+from core.helpers.date_helper import DateHelper
+from core.repositories.decorators import cached_query, janela_padrao
+from core.repositories.estoque_repository import EstoqueRepository
+from core.services.query_cache import BackgroundRefresher, QueryCache, query_cache, query_cache_refresher
+
+
+@pytest.fixture
+def cache(settings):
+    settings.SQLSERVER_QUERY_CACHE_ENABLED = True
+    query_cache.invalidate()
+    query_cache.reset_stats()
+    return query_cache
+
+
+def test_query_cache_miss_then_hit(cache):
+    assert cache.get("Repo.metodo", {"ano": 2025}) == (False, None)
+
+    cache.set("Repo.metodo", {"ano": 2025}, ([{"Total": 1}], "SELECT 1"))
+
+    assert cache.get("Repo.metodo", {"ano": 2025}) == (True, ([{"Total": 1}], "SELECT 1"))
+    assert cache.get("Repo.metodo", {"ano": 2024}) == (False, None)
+    stats = cache.stats()["Repo.metodo"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["sets"] == 1
+    assert stats["hit_ratio"] == pytest.approx(1 / 3, abs=1e-4)
+
+
+def test_query_cache_normalizes_params(cache):
+    key = cache.make_key("Repo.metodo", {"data_inicio": " 2025-01-01 ", "data_fim": date(2025, 2, 28)})
+    same_key = cache.make_key("Repo.metodo", {"data_fim": "2025-02-28", "data_inicio": "2025-01-01"})
+
+    assert key == same_key
+
+
+def test_query_cache_invalidate_method(cache):
+    cache.set("Repo.a", {}, "a")
+    cache.set("Repo.b", {}, "b")
+
+    cache.invalidate("Repo.a")
+
+    assert cache.get("Repo.a", {}) == (False, None)
+    assert cache.get("Repo.b", {}) == (True, "b")
+
+
+def test_query_cache_invalidate_all(cache):
+    cache.set("Repo.a", {}, "a")
+    cache.set("Repo.b", {}, "b")
+
+    cache.invalidate()
+
+    assert cache.get("Repo.a", {}) == (False, None)
+    assert cache.get("Repo.b", {}) == (False, None)
+
+
+def test_query_cache_skips_results_above_max_rows(cache, settings):
+    settings.SQLSERVER_QUERY_CACHE_MAX_ROWS = 2
+
+    assert cache.set("Repo.metodo", {}, ([{}, {}, {}], "SELECT 1")) is False
+    assert cache.get("Repo.metodo", {}) == (False, None)
+    assert cache.stats()["Repo.metodo"]["skipped"] == 1
+
+
+def test_query_cache_backend_failure_falls_through(cache):
+    backend = MagicMock()
+    backend.get_many.side_effect = ConnectionRefusedError("redis fora do ar")
+
+    with patch.object(QueryCache, "backend", new_callable=PropertyMock, return_value=backend):
+        assert cache.get("Repo.metodo", {}) == (False, None)
+        assert cache.set("Repo.metodo", {}, "valor") is False
+
+    assert cache.stats()["Repo.metodo"]["errors"] == 2
+
+
+def test_cached_query_decorator(cache):
+    calls = []
+
+    class Repo:
+        @cached_query(ttl=60)
+        def listar(self, ano: int = 2025):
+            calls.append(ano)
+            return [{"ano": ano}], "SELECT 1"
+
+    repo = Repo()
+    assert repo.listar() == repo.listar(2025) == repo.listar(ano=2025)
+    repo.listar(2024)
+    assert calls == [2025, 2024]
+
+    Repo.listar.invalidate()
+    repo.listar()
+    assert calls == [2025, 2024, 2025]
+
+
+def test_cached_query_disabled_calls_through(settings):
+    settings.SQLSERVER_QUERY_CACHE_ENABLED = False
+    calls = []
+
+    class Repo:
+        @cached_query()
+        def listar(self):
+            calls.append(1)
+            return [], "SELECT 1"
+
+    Repo().listar()
+    Repo().listar()
+    assert len(calls) == 2
+
+
+def test_cached_query_does_not_cache_errors(cache):
+    calls = []
+
+    class Repo:
+        @cached_query()
+        def listar(self):
+            calls.append(1)
+            raise ValueError("falhou")
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            Repo().listar()
+    assert len(calls) == 2
+
+
+@pytest.mark.django_db
+def test_repository_method_is_cached(cache):
+    repo = EstoqueRepository()
+    calls = []
+
+    def fake_fetch_all(sql, params=None):
+        calls.append(params)
+        return [{"ItemCode": "A0001", "AnoMes": "2025-01"}]
+
+    repo.cliente.fetch_all = fake_fetch_all
+
+    first = repo.listar_pedidos_de_venda("2025-01-01", "2025-02-28")
+    second = repo.listar_pedidos_de_venda(data_inicio="2025-01-01", data_fim="2025-02-28")
+
+    assert first == second
+    assert len(calls) == 1
+    assert cache.stats()["EstoqueRepository.listar_pedidos_de_venda"]["hits"] == 1
+
+
+
+@pytest.mark.django_db
+def test_default_window_shares_entry_with_explicit_dates(cache):
+    repo = EstoqueRepository()
+    calls = []
+
+    def fake_fetch_all(sql, params=None):
+        calls.append(params)
+        return []
+
+    repo.cliente.fetch_all = fake_fetch_all
+
+    repo.listar_pedidos_de_venda()
+    repo.listar_pedidos_de_venda(
+        data_inicio=DateHelper.first_day_of_month(-6).isoformat(),
+        data_fim=DateHelper.today().isoformat(),
+    )
+
+    assert len(calls) == 1
+    assert cache.stats()["EstoqueRepository.listar_pedidos_de_venda"]["hits"] == 1
+
+
+def test_janela_padrao_fills_missing_dates(settings):
+    settings.SQLSERVER_JANELA_PADRAO_FIM = "mes"
+    normalizar = janela_padrao(12)
+
+    with patch.object(DateHelper, "today", return_value=date(2025, 3, 15)):
+        assert normalizar({"data_inicio": None, "data_fim": None, "ano": 1}) == {
+            "data_inicio": "2024-03-01",
+            "data_fim": "2025-03-31",
+            "ano": 1,
+        }
+        assert normalizar({"data_inicio": "2025-01-01", "data_fim": None})["data_inicio"] == "2025-01-01"
+
+def _wait_for_refreshes(timeout=2):
+    deadline = time.monotonic() + timeout
+    while query_cache_refresher.pending():
+        assert time.monotonic() < deadline, "atualização em segundo plano não terminou"
+        time.sleep(0.005)
+
+
+def test_stale_while_revalidate_serves_stale_and_refreshes(cache, settings):
+    settings.SQLSERVER_QUERY_CACHE_STALE_TTL = 60
+    versions = iter(["v1", "v2", "v3"])
+    calls = []
+
+    class Repo:
+        @cached_query(ttl=0, stale_while_revalidate=True)
+        def listar(self):
+            calls.append(1)
+            return next(versions)
+
+    repo = Repo()
+    assert repo.listar() == "v1"  # falta: bloqueia
+    assert repo.listar() == "v1"  # vencido: servido na hora, atualização agendada
+    _wait_for_refreshes()
+    assert repo.listar() == "v2"  # valor atualizado em segundo plano
+    assert cache.stats()[Repo.listar.__wrapped__.__qualname__]["stale_hits"] >= 1
+    assert len(calls) >= 2
+
+
+def test_without_stale_while_revalidate_expired_entry_blocks(cache):
+    calls = []
+
+    class Repo:
+        @cached_query(ttl=0)
+        def listar(self):
+            calls.append(1)
+            return len(calls)
+
+    repo = Repo()
+    assert repo.listar() == 1
+    assert repo.listar() == 2
+
+
+def test_stale_refresh_failure_keeps_serving_stale_value(cache, settings):
+    settings.SQLSERVER_QUERY_CACHE_STALE_TTL = 60
+    fail = []
+
+    class Repo:
+        @cached_query(ttl=0, stale_while_revalidate=True)
+        def listar(self):
+            if fail:
+                raise ValueError("ERP indisponível")
+            return "v1"
+
+    repo = Repo()
+    repo.listar()
+    fail.append(True)
+    assert repo.listar() == "v1"
+    _wait_for_refreshes()
+    assert repo.listar() == "v1"
+    assert query_cache_refresher.stats()["failed"] >= 1
+
+
+def test_background_refresher_deduplicates_and_bounds_pending(settings):
+    settings.SQLSERVER_QUERY_CACHE_REFRESH_MAX_PENDING = 2
+    refresher = BackgroundRefresher()
+    release = threading.Event()
+
+    assert refresher.submit("a", lambda: release.wait(2)) is True
+    assert refresher.submit("a", lambda: None) is False
+    assert refresher.submit("b", lambda: release.wait(2)) is True
+    assert refresher.submit("c", lambda: None) is False
+
+    release.set()
+    deadline = time.monotonic() + 2
+    while refresher.pending():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+    stats = refresher.stats()
+    assert stats["deduplicated"] == 1
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
@@ -0,0 +1,149 @@
+import pyodbc
+import pytest
+from unittest.mock import MagicMock, patch
+
+from core.repositories.decorators import handle_db_errors, stream_db_errors
+from core.repositories.exceptions import ConnectionError
+from core.services.query_metrics import Histogram, QueryMetricsRegistry, query_metrics
+from core.services.sqlserver_cliente import SQLServerCliente
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    query_metrics.reset()
+    yield
+    query_metrics.reset()
+
+
+def test_histogram_counts_and_percentiles():
+    histogram = Histogram((10, 100, 1000))
+    for value in (1, 5, 50, 500, 5000):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 5
+    assert snapshot["min"] == 1
+    assert snapshot["max"] == 5000
+    assert snapshot["p50"] == 100
+    assert snapshot["p99"] == 5000
+    assert snapshot["buckets"] == {"<=10": 2, "<=100": 1, "<=1000": 1, ">1000": 1}
+
+
+def test_registry_records_calls_and_original_error_class():
+    registry = QueryMetricsRegistry()
+
+    with registry.track("Repo.metodo"):
+        pass
+    with pytest.raises(pyodbc.OperationalError):
+        with registry.track("Repo.metodo"):
+            raise pyodbc.OperationalError("timeout")
+
+    metrics = registry.snapshot()["Repo.metodo"]
+    assert metrics["calls"] == 2
+    assert metrics["errors"] == {"OperationalError": 1}
+    assert metrics["total_ms"]["count"] == 2
+
+
+@pytest.mark.django_db
+def test_handle_db_errors_records_client_stages():
+    config = MagicMock()
+    cliente = SQLServerCliente(config)
+
+    fake_connection = MagicMock()
+    fake_cursor = MagicMock()
+    fake_cursor.description = [('column1',), ('column2',)]
+    fake_cursor.fetchall.return_value = [(1, 'a'), (2, 'b'), (3, 'c')]
+    fake_connection.cursor.return_value = fake_cursor
+
+    class FakeRepository:
+        @handle_db_errors
+        def listar(self):
+            return cliente.fetch_all("SELECT * FROM DummyTable")
+
+    with patch("core.services.sqlserver_cliente.pyodbc.connect", return_value=fake_connection):
+        FakeRepository().listar()
+
+    metrics = query_metrics.snapshot()["test_handle_db_errors_records_client_stages.<locals>.FakeRepository.listar"]
+    assert metrics["calls"] == 1
+    assert metrics["errors"] == {}
+    assert metrics["rows"]["sum"] == 3
+    assert metrics["bytes"]["sum"] > 0
+    for stage in ("connect_ms", "execute_ms", "fetch_ms"):
+        assert metrics[stage]["count"] == 1
+
+
+@pytest.mark.django_db
+def test_handle_db_errors_records_error_before_translation():
+    class FakeRepository:
+        @handle_db_errors
+        def listar(self):
+            raise pyodbc.OperationalError("Simulated database error")
+
+    with pytest.raises(ConnectionError):
+        FakeRepository().listar()
+
+    (metrics,) = query_metrics.snapshot().values()
+    assert metrics["errors"] == {"OperationalError": 1}
+    # Nenhuma consulta chegou a ser executada
+    assert metrics["execute_ms"]["count"] == 0
+
+
+def _streaming_repository(fake_connection):
+    cliente = SQLServerCliente(MagicMock())
+    cliente.connect = lambda: fake_connection
+
+    class FakeRepository:
+        @handle_db_errors
+        def iterar(self):
+            return stream_db_errors(cliente.fetch_iter("SELECT * FROM DummyTable", arraysize=2)), "SELECT"
+
+    return FakeRepository()
+
+
+@pytest.mark.django_db
+def test_stream_db_errors_records_stages_during_iteration():
+    fake_connection = MagicMock()
+    fake_cursor = MagicMock()
+    fake_cursor.description = [('column1',), ('column2',)]
+    fake_cursor.fetchmany.side_effect = [[(1, 'a'), (2, 'b')], [(3, 'c')], []]
+    fake_connection.cursor.return_value = fake_cursor
+
+    lotes, _ = _streaming_repository(fake_connection).iterar()
+    # O método já retornou, mas a consulta ainda não rodou: nada registrado
+    assert query_metrics.snapshot() == {}
+
+    assert sum(len(lote) for lote in lotes) == 3
+
+    (metrics,) = query_metrics.snapshot().values()
+    assert metrics["calls"] == 1
+    assert metrics["errors"] == {}
+    assert metrics["rows"]["sum"] == 3
+    assert metrics["bytes"]["sum"] > 0
+    for stage in ("connect_ms", "execute_ms", "fetch_ms"):
+        assert metrics[stage]["count"] == 1
+    fake_cursor.close.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_stream_db_errors_records_error_and_early_close():
+    fake_connection = MagicMock()
+    fake_cursor = MagicMock()
+    fake_cursor.description = [('column1',)]
+    fake_cursor.fetchmany.side_effect = [[(1,)], pyodbc.OperationalError("timeout")]
+    fake_connection.cursor.return_value = fake_cursor
+    repository = _streaming_repository(fake_connection)
+
+    lotes, _ = repository.iterar()
+    with pytest.raises(ConnectionError):
+        list(lotes)
+
+    fake_cursor.fetchmany.side_effect = [[(1,)], [(2,)], []]
+    lotes, _ = repository.iterar()
+    next(lotes)
+    lotes.close()
+
+    (metrics,) = query_metrics.snapshot().values()
+    assert metrics["calls"] == 2
+    assert metrics["errors"] == {"OperationalError": 1}
+    assert metrics["rows"]["sum"] == 2  # uma linha em cada chamada
+    assert fake_cursor.close.call_count == 2
@@ -0,0 +1,178 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+
+from core.helpers.date_helper import DateHelper
+from core.models import LinhaDocumento, MarcaReplicacao
+from core.repositories.replica_repository import ReplicaRepository
+from core.services.exceptions import ServiceError, ValidationError
+from core.services.replicacao_service import ReplicacaoService
+
+pytestmark = pytest.mark.django_db
+
+
+def linha(doc_entry, line_num, canceled="N", doc_date=date(2025, 7, 1), item_code="A0001"):
+    return {
+        "DocEntry": doc_entry,
+        "LineNum": line_num,
+        "DocDate": doc_date,
+        "UpdateDate": doc_date,
+        "Canceled": canceled,
+        "DocStatus": "O",
+        "CardCode": "C0001",
+        "ItemCode": item_code,
+        "Quantity": Decimal("2"),
+        "InvQty": Decimal("2"),
+        "LineTotal": Decimal("100.50"),
+        "Usage": "12",
+        "LineStatus": "O",
+        "ActDelDate": doc_date,
+        "ShipDate": None,
+    }
+
+
+@pytest.fixture
+def service():
+    service = ReplicacaoService()
+    service.chamadas = []
+
+    def usar_erp(linhas):
+        def fake_fetch_iter(sql, params=None, arraysize=None):
+            service.chamadas.append(params)
+            tamanho = arraysize or len(linhas) or 1
+            for i in range(0, len(linhas), tamanho):
+                yield linhas[i:i + tamanho]
+
+        service.documentos.cliente.fetch_iter = fake_fetch_iter
+
+    service.usar_erp = usar_erp
+    with patch.object(DateHelper, "today", return_value=date(2025, 7, 15)):
+        yield service
+
+
+def test_replicar_first_run_loads_everything_and_sets_high_water_mark(service):
+    service.usar_erp([linha(1, 0), linha(1, 1), linha(2, 0)])
+
+    resultado = service.replicar("OINV")
+
+    assert resultado == {"tipo": "OINV", "documentos": 2, "linhas": 3, "ultimo_doc_entry": 2}
+    assert service.chamadas == [[0, date(9999, 12, 31)]]
+    marca = MarcaReplicacao.objects.get(tipo="OINV")
+    # Último dia replicado por completo: a véspera do início
+    assert (marca.ultimo_doc_entry, marca.ultima_atualizacao) == (2, date(2025, 7, 14))
+    assert LinhaDocumento.objects.filter(tipo="OINV").count() == 3
+
+
+def test_replicar_incremental_replaces_updated_documents(service):
+    service.usar_erp([linha(1, 0), linha(1, 1), linha(2, 0)])
+    service.replicar("OINV")
+
+    # Documento 1 foi cancelado (UpdateDate recente) e o 3 é novo
+    service.usar_erp([linha(1, 0, canceled="Y"), linha(3, 0)])
+    service.replicar("OINV")
+
+    assert service.chamadas[-1] == [2, date(2025, 7, 14)]
+    assert sorted(LinhaDocumento.objects.values_list("doc_entry", "line_num", "canceled")) == [
+        (1, 0, "Y"),
+        (2, 0, "N"),
+        (3, 0, "N"),
+    ]
+    assert MarcaReplicacao.objects.get(tipo="OINV").ultimo_doc_entry == 3
+
+
+def test_replicar_document_split_across_batches_keeps_all_lines(service):
+    service.usar_erp([linha(1, 0), linha(1, 1), linha(1, 2)])
+
+    service.replicar("ORDR", tamanho_lote=2)
+
+    assert LinhaDocumento.objects.filter(tipo="ORDR", doc_entry=1).count() == 3
+
+
+def test_replicar_completo_resets_replica(service):
+    service.usar_erp([linha(5, 0)])
+    service.replicar("OINV")
+
+    service.usar_erp([linha(1, 0)])
+    service.replicar("OINV", completo=True)
+
+    assert service.chamadas[-1] == [0, date(9999, 12, 31)]
+    assert list(LinhaDocumento.objects.values_list("doc_entry", flat=True)) == [1]
+
+
+def test_replicar_failure_keeps_committed_batches_and_resumes(service):
+    def fake_fetch_iter(sql, params=None, arraysize=None):
+        service.chamadas.append(params)
+        yield [linha(1, 0), linha(1, 1), linha(2, 0)]
+        yield [linha(2, 1), linha(3, 0)]
+        raise ValueError("conexão perdida")
+
+    service.documentos.cliente.fetch_iter = fake_fetch_iter
+
+    with pytest.raises(ServiceError):
+        service.replicar("OINV")
+
+    # Lotes gravados continuam; a marca fica antes do último documento, que pode estar incompleto
+    marca = MarcaReplicacao.objects.get(tipo="OINV")
+    assert (marca.ultimo_doc_entry, marca.ultima_atualizacao) == (2, date(2025, 7, 14))
+    assert LinhaDocumento.objects.count() == 5
+
+    service.usar_erp([linha(3, 0), linha(3, 1)])
+    resultado = service.replicar("OINV")
+
+    assert service.chamadas[-1] == [2, date(2025, 7, 14)]
+    assert resultado["ultimo_doc_entry"] == 3
+    assert sorted(LinhaDocumento.objects.values_list("doc_entry", "line_num")) == [
+        (1, 0), (1, 1), (2, 0), (2, 1), (3, 0), (3, 1),
+    ]
+
+
+def test_replicar_commits_each_batch(service):
+    service.usar_erp([linha(1, 0), linha(2, 0), linha(3, 0)])
+    marcas = []
+    atualizar_marca = service.replica.atualizar_marca
+
+    def registrar(tipo, ultimo_doc_entry, ultima_atualizacao, linhas):
+        marcas.append((ultimo_doc_entry, ultima_atualizacao, linhas))
+        return atualizar_marca(tipo, ultimo_doc_entry, ultima_atualizacao, linhas)
+
+    service.replica.atualizar_marca = registrar
+    service.replicar("OINV", tamanho_lote=2)
+
+    assert marcas == [
+        (1, date(2025, 7, 14), 2),
+        (2, date(2025, 7, 14), 3),
+        (3, date(2025, 7, 14), 3),
+    ]
+
+
+def test_replicar_invalid_tipo(service):
+    with pytest.raises(ValidationError):
+        service.replicar("OITM")
+
+
+def test_listar_linhas_filters_period_and_cancelled(service):
+    service.usar_erp([
+        linha(1, 0),
+        linha(2, 0, canceled="Y"),
+        linha(3, 0, doc_date=date(2025, 5, 1)),
+    ])
+    service.replicar("OINV")
+
+    linhas = ReplicaRepository().listar_linhas(["OINV"], date(2025, 6, 1), date(2025, 7, 31))
+
+    assert [(linha["Tipo"], linha["DocEntry"]) for linha in linhas] == [("OINV", 1)]
+    assert linhas[0]["LineTotal"] == Decimal("100.50")
+
+
+def test_command_replicates_selected_tipos(service):
+    service.usar_erp([linha(1, 0)])
+    saida = StringIO()
+
+    call_command("replicar_documentos", "--tipo", "OINV", "--tipo", "ORIN", stdout=saida)
+
+    assert set(MarcaReplicacao.objects.values_list("tipo", flat=True)) == {"OINV", "ORIN"}
+    assert "OINV: 1 documentos, 1 linhas" in saida.getvalue()
@@ -0,0 +1,157 @@
+import threading
+import time
+
+import pytest
+
+from core.repositories.decorators import cached_query
+from core.repositories.exceptions import QueryError
+from core.services.single_flight import SingleFlight, SingleFlightTimeoutError
+
+
+def _run_concurrently(target, count):
+    results = [None] * count
+    errors = [None] * count
+
+    def worker(index):
+        try:
+            results[index] = target()
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def _wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condição não atingida a tempo"
+        time.sleep(0.001)
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow_query():
+        calls.append(1)
+        release.wait(2)
+        return [{"Total": 1}]
+
+    threads, results, errors = _run_concurrently(lambda: flight.do("Repo.metodo:abc", slow_query, timeout=2), 6)
+    _wait_until(lambda: flight.stats().get("coalesced", 0) == 5)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert errors == [None] * 6
+    assert results == [[{"Total": 1}]] * 6
+    assert flight.in_flight() == 0
+
+
+def test_single_flight_propagates_error_to_waiters():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing_query():
+        release.wait(2)
+        raise ValueError("falhou")
+
+    threads, results, errors = _run_concurrently(lambda: flight.do("k", failing_query, timeout=2), 4)
+    _wait_until(lambda: flight.stats().get("coalesced", 0) == 3)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert flight.stats()["executions"] == 1
+    assert flight.stats()["shared_errors"] == 3
+
+
+def test_single_flight_waiter_timeout():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_query():
+        started.set()
+        release.wait(2)
+        return "ok"
+
+    leader = threading.Thread(target=lambda: flight.do("k", slow_query))
+    leader.start()
+    started.wait(2)
+
+    with pytest.raises(SingleFlightTimeoutError):
+        flight.do("k", slow_query, timeout=0.01)
+
+    release.set()
+    leader.join(timeout=5)
+    assert flight.stats()["timeouts"] == 1
+    # Após a conclusão, a chave volta a executar normalmente
+    assert flight.do("k", lambda: "nova") == "nova"
+
+
+def test_single_flight_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == 1
+    assert flight.do("k", lambda: 2) == 2
+    assert flight.stats()["executions"] == 2
+
+
+def test_cached_query_coalesces_without_cache(settings):
+    settings.SQLSERVER_QUERY_CACHE_ENABLED = False
+    settings.SQLSERVER_SINGLE_FLIGHT_ENABLED = True
+    calls = []
+    barrier = threading.Barrier(4, timeout=2)
+
+    class Repo:
+        @cached_query()
+        def listar(self, ano: int = 2025):
+            calls.append(ano)
+            time.sleep(0.2)
+            return [{"ano": ano}], "SELECT 1"
+
+    repo = Repo()
+
+    def call():
+        barrier.wait()
+        return repo.listar(2025)
+
+    threads, results, errors = _run_concurrently(call, 4)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert errors == [None] * 4
+    assert results == [([{"ano": 2025}], "SELECT 1")] * 4
+    assert len(calls) == 1
+
+
+def test_cached_query_translates_single_flight_timeout(settings):
+    settings.SQLSERVER_QUERY_CACHE_ENABLED = False
+    settings.SQLSERVER_SINGLE_FLIGHT_ENABLED = True
+    settings.SQLSERVER_SINGLE_FLIGHT_TIMEOUT = 0.01
+    started = threading.Event()
+    release = threading.Event()
+
+    class Repo:
+        @cached_query()
+        def listar(self):
+            started.set()
+            release.wait(2)
+            return [], "SELECT 1"
+
+    repo = Repo()
+    leader = threading.Thread(target=repo.listar)
+    leader.start()
+    started.wait(2)
+
+    with pytest.raises(QueryError):
+        repo.listar()
+
+    release.set()
+    leader.join(timeout=5)
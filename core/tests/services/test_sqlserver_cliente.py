@@ -1,3 +1,4 @@
+import pyodbc
 import pytest
 from unittest.mock import patch, MagicMock
 from core.services.sqlserver_cliente import SQLServerCliente
@@ -185,6 +186,7 @@ def test_sqlserver_cliente_fetch_one_method(sqlserver_config_mock):
         result = cliente.fetch_one("SELECT * FROM DummyTable")
     
     assert result == {"column1": 'a', "column2": 1}
+    fake_cursor.close.assert_called_once()
 
 @pytest.mark.django_db
 def test_sqlserver_cliente_fetch_one_method_empty(sqlserver_config_mock):
@@ -215,4 +217,241 @@ def test_sqlserver_cliente_fetch_one_method_error(sqlserver_config_mock):
             cliente.fetch_one("SELECT * FROM DummyTable")
     
     assert "Database error" in str(excinfo.value)
-    
\ No newline at end of file
+    fake_cursor.close.assert_called_once()
+    
+
+@pytest.mark.django_db
+def test_sqlserver_cliente_fetch_iter_yields_batches(sqlserver_config_mock):
+    cliente = SQLServerCliente(sqlserver_config_mock)
+
+    fake_connection = MagicMock()
+    fake_cursor = MagicMock()
+    fake_cursor.description = [('column1',), ('column2',)]
+    fake_cursor.fetchmany.side_effect = [[(1, 'a'), (2, 'b')], [(3, 'c')], []]
+    fake_connection.cursor.return_value = fake_cursor
+
+    with patch("core.services.sqlserver_cliente.pyodbc.connect", return_value=fake_connection):
+        batches = cliente.fetch_iter("SELECT * FROM DummyTable", arraysize=2)
+        # Nada é executado até o gerador ser consumido
+        fake_cursor.execute.assert_not_called()
+        results = list(batches)
+
+    assert results == [
+        [{'column1': 1, 'column2': 'a'}, {'column1': 2, 'column2': 'b'}],
+        [{'column1': 3, 'column2': 'c'}],
+    ]
+    fake_cursor.fetchmany.assert_called_with(2)
+    fake_connection.close.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_sqlserver_cliente_fetch_iter_releases_connection_on_close(sqlserver_config_mock):
+    cliente = SQLServerCliente(sqlserver_config_mock)
+
+    fake_connection = MagicMock()
+    fake_cursor = MagicMock()
+    fake_cursor.description = [('column1',)]
+    fake_cursor.fetchmany.return_value = [(1,)]
+    fake_connection.cursor.return_value = fake_cursor
+
+    with patch("core.services.sqlserver_cliente.pyodbc.connect", return_value=fake_connection):
+        batches = cliente.fetch_iter("SELECT * FROM DummyTable", arraysize=1)
+        assert next(batches) == [{'column1': 1}]
+        fake_connection.close.assert_not_called()
+        batches.close()
+
+    fake_cursor.close.assert_called_once()
+    fake_connection.close.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_sqlserver_cliente_fetch_frame_builds_typed_columns(sqlserver_config_mock):
+    import datetime
+    from decimal import Decimal
+    import numpy as np
+    import pandas as pd
+
+    cliente = SQLServerCliente(sqlserver_config_mock)
+
+    fake_connection = MagicMock()
+    fake_cursor = MagicMock()
+    fake_cursor.description = [
+        ('CardCode', str), ('Total', int), ('Valor', Decimal), ('Data', datetime.date),
+    ]
+    fake_cursor.fetchmany.side_effect = [
+        [('F1', 1, Decimal('1.50'), datetime.date(2025, 1, 1)), ('F2', 2, Decimal('2.25'), datetime.date(2025, 2, 1))],
+        [('F1', None, None, None)],
+        [],
+    ]
+    fake_connection.cursor.return_value = fake_cursor
+
+    with patch("core.services.sqlserver_cliente.pyodbc.connect", return_value=fake_connection):
+        result = cliente.fetch_frame("SELECT * FROM DummyTable", arraysize=2)
+
+    assert list(result.columns) == ['CardCode', 'Total', 'Valor', 'Data']
+    assert isinstance(result['CardCode'].dtype, pd.CategoricalDtype)
+    assert list(result['CardCode']) == ['F1', 'F2', 'F1']
+    assert result['Total'].dtype == np.float64  # nulo presente
+    assert result['Valor'].tolist()[:2] == [1.5, 2.25]
+    assert result['Data'].dtype == 'datetime64[ns]'
+    assert pd.isna(result['Data'].iloc[2])
+    fake_connection.close.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_sqlserver_cliente_fetch_frame_decimal_policies(sqlserver_config_mock):
+    from decimal import Decimal
+    import numpy as np
+    from core.services.decimal_policy import CENTS, DECIMAL
+
+    cliente = SQLServerCliente(sqlserver_config_mock)
+
+    fake_connection = MagicMock()
+    fake_cursor = MagicMock()
+    fake_cursor.description = [
+        ('Valor', Decimal, None, 19, 19, 2, True),
+        ('Custo', Decimal, None, 19, 19, 6, True),
+        ('Taxa', Decimal, None, 19, 19, 6, True),
+        ('Margem', Decimal, None, 19, 19, 2, True),
+    ]
+    fake_cursor.fetchmany.side_effect = [
+        [(Decimal('0.10'), Decimal('1.005000'), Decimal('0.125000'), Decimal('0.30'))],
+        [(Decimal('0.20'), Decimal('2.000000'), Decimal('0.500000'), None)],
+        [],
+    ]
+    fake_connection.cursor.return_value = fake_cursor
+
+    with patch("core.services.sqlserver_cliente.pyodbc.connect", return_value=fake_connection):
+        result = cliente.fetch_frame(
+            "SELECT * FROM DummyTable", arraysize=1,
+            decimals={'Valor': CENTS, 'Custo': CENTS, 'Taxa': DECIMAL},
+        )
+
+    assert result['Valor'].dtype == np.int64
+    assert result['Valor'].tolist() == [10, 20]
+    assert result['Valor'].sum() == 30
+    assert result['Custo'].tolist() == [100, 200]  # 6 casas arredondadas (half-even)
+    assert result['Taxa'].tolist() == [Decimal('0.125000'), Decimal('0.500000')]
+    assert result['Margem'].dtype == np.float64  # coluna sem política: FLOAT
+    assert result['Margem'].iloc[0] == 0.3 and np.isnan(result['Margem'].iloc[1])
+    assert result.attrs['scales'] == {'Valor': 2, 'Custo': 2}
+
+
+@pytest.mark.django_db
+def test_sqlserver_cliente_fetch_frame_empty_result(sqlserver_config_mock):
+    cliente = SQLServerCliente(sqlserver_config_mock)
+
+    fake_connection = MagicMock()
+    fake_cursor = MagicMock()
+    fake_cursor.description = [('column1', int), ('column2', str)]
+    fake_cursor.fetchmany.return_value = []
+    fake_connection.cursor.return_value = fake_cursor
+
+    with patch("core.services.sqlserver_cliente.pyodbc.connect", return_value=fake_connection):
+        result = cliente.fetch_frame("SELECT * FROM DummyTable")
+
+    assert result.empty
+    assert list(result.columns) == ['column1', 'column2']
+
+
+@pytest.mark.django_db
+def test_sqlserver_cliente_run_parallel_keeps_order_and_runs_concurrently(sqlserver_config_mock):
+    import time
+
+    cliente = SQLServerCliente(sqlserver_config_mock)
+
+    def slow(value, delay):
+        def call():
+            time.sleep(delay)
+            return value
+        return call
+
+    started_at = time.perf_counter()
+    results = cliente.run_parallel(slow('a', 0.2), slow('b', 0.1), slow('c', 0.15))
+    elapsed = time.perf_counter() - started_at
+
+    assert results == ['a', 'b', 'c']
+    assert elapsed < 0.4  # tempo da mais lenta, não a soma (0.45s)
+
+
+@pytest.mark.django_db
+def test_sqlserver_cliente_run_parallel_reraises_first_error(sqlserver_config_mock):
+    cliente = SQLServerCliente(sqlserver_config_mock)
+
+    def fail():
+        raise ValueError("Database error")
+
+    with pytest.raises(ValueError) as excinfo:
+        cliente.run_parallel(lambda: 1, fail, lambda: 3)
+
+    assert "Database error" in str(excinfo.value)
+    assert cliente.run_parallel() == []
+
+
+class FakeMultiCursor:
+    """Cursor whose result sets are advanced with nextset(); None marks a set without columns."""
+
+    def __init__(self, result_sets):
+        self.result_sets = list(result_sets)
+        self.position = 0
+        self.closed = False
+
+    def execute(self, sql, params):
+        self.sql, self.params = sql, params
+
+    @property
+    def description(self):
+        current = self.result_sets[self.position]
+        return None if current is None else [(column,) for column in current[0]]
+
+    def fetchall(self):
+        return self.result_sets[self.position][1]
+
+    def nextset(self):
+        if self.position + 1 >= len(self.result_sets):
+            return False
+        self.position += 1
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.django_db
+def test_sqlserver_cliente_fetch_multi_reads_each_result_set(sqlserver_config_mock):
+    cliente = SQLServerCliente(sqlserver_config_mock)
+    cursor = FakeMultiCursor([
+        (["ItemCode"], [("A",), ("B",)]),
+        None,  # contagem de linhas de um comando sem SELECT
+        (["Total"], [(2,)]),
+    ])
+    fake_connection = MagicMock()
+    fake_connection.cursor.return_value = cursor
+
+    with patch("core.services.sqlserver_cliente.pyodbc.connect", return_value=fake_connection) as connect:
+        results = cliente.fetch_multi([
+            ("DECLARE @Inicio DATE = ?; SELECT ItemCode FROM OITM WHERE UpdateDate >= @Inicio", ["2025-01-01"]),
+            ("SELECT COUNT(*) AS Total FROM OITM", None),
+        ])
+
+    assert results == [[{"ItemCode": "A"}, {"ItemCode": "B"}], [{"Total": 2}]]
+    assert connect.call_count == 1
+    assert "@Inicio_0" in cursor.sql
+    assert cursor.params == ["2025-01-01"]
+    assert cursor.closed
+
+
+@pytest.mark.django_db
+def test_sqlserver_cliente_fetch_multi_missing_result_set(sqlserver_config_mock):
+    cliente = SQLServerCliente(sqlserver_config_mock)
+    fake_connection = MagicMock()
+    fake_connection.cursor.return_value = FakeMultiCursor([(["Total"], [(1,)])])
+
+    with patch("core.services.sqlserver_cliente.pyodbc.connect", return_value=fake_connection):
+        with pytest.raises(pyodbc.ProgrammingError):
+            cliente.fetch_multi([("SELECT 1 AS Total", None), ("SELECT 2 AS Total", None)])
+
+
+@pytest.mark.django_db
+def test_sqlserver_cliente_fetch_multi_without_queries(sqlserver_config_mock):
+    assert SQLServerCliente(sqlserver_config_mock).fetch_multi([]) == []
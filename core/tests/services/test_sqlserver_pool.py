@@ -0,0 +1,152 @@
+import threading
+import time
+
+import pyodbc
+import pytest
+from unittest.mock import MagicMock, patch
+
+from core.services.sqlserver_cliente import SQLServerCliente
+from core.services.sqlserver_pool import SQLServerConnectionPool, PoolTimeoutError
+
+
+@pytest.fixture
+def connect_mock():
+    return MagicMock(side_effect=lambda: MagicMock())
+
+
+def test_pool_reuses_released_connection(connect_mock):
+    pool = SQLServerConnectionPool(connect_mock, min_size=0, max_size=2)
+
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert connect_mock.call_count == 1
+    stats = pool.stats()
+    assert stats["checkouts"] == 2
+    assert stats["connections_created"] == 1
+    assert stats["idle"] == 1
+    assert stats["in_use"] == 0
+
+
+def test_pool_respects_max_size_and_times_out(connect_mock):
+    pool = SQLServerConnectionPool(connect_mock, min_size=0, max_size=1, timeout=0.05)
+
+    connection = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+
+    pool.release(connection)
+    assert pool.stats()["timeouts"] == 1
+    assert pool.acquire() is connection
+
+
+def test_pool_waiting_thread_receives_released_connection(connect_mock):
+    pool = SQLServerConnectionPool(connect_mock, min_size=0, max_size=1, timeout=2)
+    connection = pool.acquire()
+    received = []
+
+    worker = threading.Thread(target=lambda: received.append(pool.acquire()))
+    worker.start()
+    time.sleep(0.05)
+    pool.release(connection)
+    worker.join(timeout=2)
+
+    assert received == [connection]
+    assert connect_mock.call_count == 1
+    assert pool.stats()["max_wait_time"] > 0
+
+
+def test_pool_discards_connection_failing_health_check(connect_mock):
+    pool = SQLServerConnectionPool(connect_mock, min_size=0, max_size=2, health_check_interval=0)
+
+    with pool.connection() as first:
+        pass
+    first.cursor.return_value.execute.side_effect = pyodbc.OperationalError("conexão perdida")
+
+    with pool.connection() as second:
+        pass
+
+    assert second is not first
+    first.close.assert_called_once()
+    assert pool.stats()["health_check_failures"] == 1
+
+
+def test_pool_recycles_connection_after_max_lifetime(connect_mock):
+    pool = SQLServerConnectionPool(connect_mock, min_size=0, max_size=2, max_lifetime=0)
+
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert second is not first
+    first.close.assert_called_once()
+    assert pool.stats()["size"] == 0
+
+
+def test_pool_evicts_idle_connections_above_min_size(connect_mock):
+    pool = SQLServerConnectionPool(connect_mock, min_size=1, max_size=3, idle_timeout=0)
+
+    first = pool.acquire()
+    second = pool.acquire()
+    pool.release(first)
+    pool.release(second)
+
+    stats = pool.stats()
+    assert stats["size"] == 1
+    assert stats["idle"] == 1
+    assert stats["connections_closed"] == 1
+
+
+def test_pool_discards_connection_on_operational_error(connect_mock):
+    pool = SQLServerConnectionPool(connect_mock, min_size=0, max_size=2)
+
+    with pytest.raises(pyodbc.OperationalError):
+        with pool.connection() as connection:
+            raise pyodbc.OperationalError("link caiu")
+
+    connection.close.assert_called_once()
+    assert pool.stats()["size"] == 0
+
+
+def test_pool_releases_slot_when_connect_fails():
+    pool = SQLServerConnectionPool(MagicMock(side_effect=pyodbc.InterfaceError("driver")), max_size=1)
+
+    with pytest.raises(pyodbc.InterfaceError):
+        pool.acquire()
+
+    assert pool.stats()["size"] == 0
+
+
+def test_pool_invalid_sizes():
+    with pytest.raises(ValueError):
+        SQLServerConnectionPool(MagicMock(), min_size=5, max_size=2)
+
+
+@pytest.mark.django_db
+def test_sqlserver_cliente_with_pool_reuses_connection():
+    config = MagicMock()
+    config.pool_min_size = 0
+    config.pool_max_size = 2
+    config.pool_timeout = 1
+    config.pool_max_lifetime = 1800
+    config.pool_idle_timeout = 300
+    config.pool_health_check_interval = 30
+    cliente = SQLServerCliente(config, use_pool=True)
+
+    fake_connection = MagicMock()
+    fake_cursor = MagicMock()
+    fake_cursor.description = [('column1',)]
+    fake_cursor.fetchall.return_value = [(1,)]
+    fake_connection.cursor.return_value = fake_cursor
+
+    with patch("core.services.sqlserver_cliente.pyodbc.connect", return_value=fake_connection) as mock_connect:
+        cliente.fetch_all("SELECT 1 AS column1")
+        cliente.fetch_all("SELECT 1 AS column1")
+
+    mock_connect.assert_called_once()
+    fake_connection.close.assert_not_called()
+    assert cliente.pool.stats()["checkouts"] == 2
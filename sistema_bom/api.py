@@ -3,8 +3,11 @@ from ninja import NinjaAPI
 
 from core.api.logistica_api import router as logistica_router
 from core.api.financeiro_api import router as financeiro_router
+from core.api.metricas_api import router as metricas_router
+from core.api.renderers import ORJSONRenderer
 
-api = NinjaAPI(docs_decorator=staff_member_required)
+api = NinjaAPI(docs_decorator=staff_member_required, renderer=ORJSONRenderer())
 
 api.add_router("logistica/", logistica_router)
-api.add_router("financeiro/", financeiro_router)
\ No newline at end of file
+api.add_router("financeiro/", financeiro_router)
+api.add_router("metricas/", metricas_router)
\ No newline at end of file
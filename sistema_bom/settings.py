@@ -1,5 +1,5 @@
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -153,4 +153,72 @@ SQLSERVER_HOST = config('SQLSERVER_HOST')
 SQLSERVER_DB = config('SQLSERVER_DB')
 SQLSERVER_PORT = config('SQLSERVER_PORT')
 SQLSERVER_USER = config('SQLSERVER_USER')
-SQLSERVER_PASSWORD = config('SQLSERVER_PASSWORD')
\ No newline at end of file
+SQLSERVER_PASSWORD = config('SQLSERVER_PASSWORD')
+
+# Pool de conexões do SQL Server (tempos em segundos)
+SQLSERVER_POOL_MIN_SIZE = config('SQLSERVER_POOL_MIN_SIZE', default=1, cast=int)
+SQLSERVER_POOL_MAX_SIZE = config('SQLSERVER_POOL_MAX_SIZE', default=10, cast=int)
+SQLSERVER_POOL_TIMEOUT = config('SQLSERVER_POOL_TIMEOUT', default=30, cast=float)
+SQLSERVER_POOL_MAX_LIFETIME = config('SQLSERVER_POOL_MAX_LIFETIME', default=1800, cast=float)
+SQLSERVER_POOL_IDLE_TIMEOUT = config('SQLSERVER_POOL_IDLE_TIMEOUT', default=300, cast=float)
+SQLSERVER_POOL_HEALTH_CHECK_INTERVAL = config('SQLSERVER_POOL_HEALTH_CHECK_INTERVAL', default=30, cast=float)
+
+# Threads dedicadas às consultas do cliente assíncrono (padrão: uma por conexão do pool)
+SQLSERVER_ASYNC_MAX_WORKERS = config('SQLSERVER_ASYNC_MAX_WORKERS', default=SQLSERVER_POOL_MAX_SIZE, cast=int)
+
+# Métricas por método de repositório (expostas em /api/v1/metricas/)
+SQLSERVER_QUERY_METRICS_ENABLED = config('SQLSERVER_QUERY_METRICS_ENABLED', default=True, cast=bool)
+
+# Queries ("Classe.metodo") executadas com OPTION (RECOMPILE), separadas por vírgula
+SQLSERVER_RECOMPILE_QUERIES = config('SQLSERVER_RECOMPILE_QUERIES', default='', cast=Csv())
+
+# Cache de resultados dos repositórios (@cached_query). O alias 'consultas' pode apontar
+# para Redis/Memcached em produção; o LocMemCache é por processo e limitado por MAX_ENTRIES (LRU).
+SQLSERVER_QUERY_CACHE_ENABLED = config('SQLSERVER_QUERY_CACHE_ENABLED', default=True, cast=bool)
+SQLSERVER_QUERY_CACHE_ALIAS = 'consultas'
+SQLSERVER_QUERY_CACHE_TTL = config('SQLSERVER_QUERY_CACHE_TTL', default=300, cast=int)
+SQLSERVER_QUERY_CACHE_MAX_ROWS = config('SQLSERVER_QUERY_CACHE_MAX_ROWS', default=200000, cast=int)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    SQLSERVER_QUERY_CACHE_ALIAS: {
+        'BACKEND': config('SQLSERVER_QUERY_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('SQLSERVER_QUERY_CACHE_LOCATION', default='consultas-sqlserver'),
+        'TIMEOUT': SQLSERVER_QUERY_CACHE_TTL,
+        'OPTIONS': {
+            'MAX_ENTRIES': config('SQLSERVER_QUERY_CACHE_MAX_ENTRIES', default=256, cast=int),
+        },
+    },
+}
+
+# Coalescência (single-flight) de chamadas idênticas e simultâneas aos repositórios com @cached_query:
+# só a primeira vai ao banco; as demais aguardam até SQLSERVER_SINGLE_FLIGHT_TIMEOUT segundos.
+SQLSERVER_SINGLE_FLIGHT_ENABLED = config('SQLSERVER_SINGLE_FLIGHT_ENABLED', default=True, cast=bool)
+SQLSERVER_SINGLE_FLIGHT_TIMEOUT = config('SQLSERVER_SINGLE_FLIGHT_TIMEOUT', default=120, cast=float)
+
+# Stale-while-revalidate (@cached_query(stale_while_revalidate=True)): depois do TTL a entrada
+# ainda é servida por SQLSERVER_QUERY_CACHE_STALE_TTL segundos enquanto é atualizada em segundo plano.
+SQLSERVER_QUERY_CACHE_STALE_TTL = config('SQLSERVER_QUERY_CACHE_STALE_TTL', default=3600, cast=int)
+SQLSERVER_QUERY_CACHE_REFRESH_WORKERS = config('SQLSERVER_QUERY_CACHE_REFRESH_WORKERS', default=2, cast=int)
+SQLSERVER_QUERY_CACHE_REFRESH_MAX_PENDING = config('SQLSERVER_QUERY_CACHE_REFRESH_MAX_PENDING', default=100, cast=int)
+
+# Agregados mensais de meses fechados materializados no banco do Django
+# (comando `materializar_agregados`). Com a flag ativa, os meses já carregados são lidos
+# daqui e só os demais (incluindo o mês corrente) são consultados no SQL Server.
+MATERIALIZACAO_AGREGADOS_ENABLED = config('MATERIALIZACAO_AGREGADOS_ENABLED', default=False, cast=bool)
+
+# Consultas com intervalo de datas longo (pedidos de venda, saída de produtos, rentabilidade) divididas
+# em partições mensais executadas em paralelo, cada uma em uma conexão do pool e guardada no cache
+# separadamente. Vale para intervalos com pelo menos SQLSERVER_PARTICIONAMENTO_MIN_MESES meses (0 desativa).
+SQLSERVER_PARTICIONAMENTO_MIN_MESES = config('SQLSERVER_PARTICIONAMENTO_MIN_MESES', default=0, cast=int)
+SQLSERVER_PARTICIONAMENTO_MAX_WORKERS = config('SQLSERVER_PARTICIONAMENTO_MAX_WORKERS', default=4, cast=int)
+
+# Cache por mês de pedidos de venda e saída de produtos (requer o cache de consultas): cada mês do
+# resultado é guardado separadamente e uma nova janela só consulta no ERP os meses que faltam.
+SQLSERVER_CACHE_MENSAL_ENABLED = config('SQLSERVER_CACHE_MENSAL_ENABLED', default=True, cast=bool)
+
+# Fim da janela padrão quando a data final não é informada: "dia" (hoje) ou "mes" (último dia do
+# mês corrente). Com "mes", a visão padrão fica na mesma entrada do cache durante o mês inteiro.
+SQLSERVER_JANELA_PADRAO_FIM = config('SQLSERVER_JANELA_PADRAO_FIM', default='dia')